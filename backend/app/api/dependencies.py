@@ -3,19 +3,104 @@ FastAPI 依存性注入（Dependency Injection）
 """
 
 from typing import Optional
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from app.utils.jwt import verify_token
-from app.services.auth import AuthService
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.container import ServiceContainer
 from app.schemas.user import UserInDB
+from app.services.account_deletion import AccountDeletionService
+from app.services.auth import AuthService
+from app.services.auto_notification import AutoNotificationService
+from app.services.cleanup import CleanupService
+from app.services.favorites import FavoriteService
+from app.services.fcm_tokens import FcmTokenService
+from app.services.friends import FriendService
+from app.services.geofencing import GeofencingService
+from app.services.location import LocationService
+from app.services.notifications import NotificationService
+from app.services.pops import PopService
+from app.services.reactions import ReactionService
+from app.services.schedules import ScheduleService
+from app.services.users import UserService
+from app.utils.jwt import verify_token
 
 # HTTPベアラー認証
 security = HTTPBearer()
 
 
+def get_services(request: Request) -> ServiceContainer:
+    """アプリケーション全体で共有するサービスコンテナを取得（app/main.py で生成）"""
+    return request.app.state.services
+
+
+def get_auth_service(services: ServiceContainer = Depends(get_services)) -> AuthService:
+    return services.auth_service
+
+
+def get_user_service(services: ServiceContainer = Depends(get_services)) -> UserService:
+    return services.user_service
+
+
+def get_friend_service(services: ServiceContainer = Depends(get_services)) -> FriendService:
+    return services.friend_service
+
+
+def get_favorite_service(services: ServiceContainer = Depends(get_services)) -> FavoriteService:
+    return services.favorite_service
+
+
+def get_schedule_service(services: ServiceContainer = Depends(get_services)) -> ScheduleService:
+    return services.schedule_service
+
+
+def get_location_service(services: ServiceContainer = Depends(get_services)) -> LocationService:
+    return services.location_service
+
+
+def get_geofencing_service(
+    services: ServiceContainer = Depends(get_services),
+) -> GeofencingService:
+    return services.geofencing_service
+
+
+def get_notification_service(
+    services: ServiceContainer = Depends(get_services),
+) -> NotificationService:
+    return services.notification_service
+
+
+def get_auto_notification_service(
+    services: ServiceContainer = Depends(get_services),
+) -> AutoNotificationService:
+    return services.auto_notification_service
+
+
+def get_cleanup_service(services: ServiceContainer = Depends(get_services)) -> CleanupService:
+    return services.cleanup_service
+
+
+def get_pop_service(services: ServiceContainer = Depends(get_services)) -> PopService:
+    return services.pop_service
+
+
+def get_reaction_service(services: ServiceContainer = Depends(get_services)) -> ReactionService:
+    return services.reaction_service
+
+
+def get_fcm_token_service(services: ServiceContainer = Depends(get_services)) -> FcmTokenService:
+    return services.fcm_token_service
+
+
+def get_account_deletion_service(
+    services: ServiceContainer = Depends(get_services),
+) -> AccountDeletionService:
+    return services.account_deletion_service
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    auth_service: AuthService = Depends(lambda: AuthService())
+    auth_service: AuthService = Depends(get_auth_service)
 ) -> UserInDB:
     """
     認証トークンから現在のユーザーを取得
@@ -64,7 +149,7 @@ async def get_current_user(
 
 async def get_optional_user(
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
-    auth_service: AuthService = Depends(lambda: AuthService())
+    auth_service: AuthService = Depends(get_auth_service)
 ) -> Optional[UserInDB]:
     """
     認証トークンから現在のユーザーを取得（オプショナル）
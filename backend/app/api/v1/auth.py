@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_auth_service, get_current_user
 from app.schemas.auth import FirebaseTokenRequest, SignupRequest, TokenResponse
 from app.schemas.user import UserDetailResponse, UserInDB
 from app.services.auth import AuthService
@@ -15,7 +15,7 @@ router = APIRouter()
 @router.post("/signup", response_model=TokenResponse, status_code=status.HTTP_201_CREATED)
 async def signup(
     request: SignupRequest,
-    auth_service: AuthService = Depends(lambda: AuthService())
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     新規ユーザー登録
@@ -46,7 +46,7 @@ async def signup(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     request: FirebaseTokenRequest,
-    auth_service: AuthService = Depends(lambda: AuthService())
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     ログイン（Firebase IDトークンで認証）
@@ -107,7 +107,7 @@ async def get_current_user_info(
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_account(
     current_user: UserInDB = Depends(get_current_user),
-    auth_service: AuthService = Depends(lambda: AuthService())
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     アカウントを削除
@@ -134,7 +134,7 @@ async def delete_account(
 async def register_fcm_token(
     fcm_token: str,
     current_user: UserInDB = Depends(get_current_user),
-    auth_service: AuthService = Depends(lambda: AuthService())
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     FCMトークンを登録
@@ -166,7 +166,7 @@ async def register_fcm_token(
 async def unregister_fcm_token(
     fcm_token: str,
     current_user: UserInDB = Depends(get_current_user),
-    auth_service: AuthService = Depends(lambda: AuthService())
+    auth_service: AuthService = Depends(get_auth_service)
 ):
     """
     FCMトークンを削除
@@ -5,12 +5,20 @@
 セキュリティ: 本番環境では認証トークンやIP制限が必要
 """
 
-from fastapi import APIRouter, Header, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, status
 from pydantic import BaseModel
 
+from app.api.dependencies import (
+    get_account_deletion_service,
+    get_auto_notification_service,
+    get_cleanup_service,
+    get_fcm_token_service,
+)
 from app.config import settings
+from app.services.account_deletion import AccountDeletionService
 from app.services.auto_notification import AutoNotificationService
 from app.services.cleanup import CleanupService
+from app.services.fcm_tokens import FcmTokenService
 
 router = APIRouter()
 
@@ -53,19 +61,28 @@ def verify_batch_token(x_batch_token: str = Header(None)):
 
 
 @router.post("/stay-notifications", response_model=BatchResponse)
-async def send_stay_notifications_batch():
+async def send_stay_notifications_batch(
+    full_scan: bool = False,
+    auto_notification_service: AutoNotificationService = Depends(get_auto_notification_service),
+):
     """
     滞在通知のバッチ送信
 
-    到着済みのスケジュールをチェックし、滞在時間に達したものに通知を送信します。
+    期限を迎えた滞在通知タスク（到着時刻 + 指定滞在時間）を処理して通知を送信します。
+    STAY_NOTIFICATION_TIMER_ENABLED 時はプロセス内タイマーが期限ちょうどに送信するため、
+    このエンドポイントは取りこぼしの回収用になります。
     推奨実行頻度: 5分毎
 
+    Args:
+        full_scan: Trueの場合、到着済みの全スケジュールを走査する旧来の処理も実行
+                   （タスク導入前に到着したスケジュールの回収用）
+
     Returns:
         処理結果
     """
-    auto_notification_service = AutoNotificationService()
-
-    sent_count = await auto_notification_service.check_and_send_stay_notifications()
+    sent_count = await auto_notification_service.process_due_stay_tasks()
+    if full_scan:
+        sent_count += await auto_notification_service.check_and_send_stay_notifications()
 
     return BatchResponse(
         success=True,
@@ -74,8 +91,58 @@ async def send_stay_notifications_batch():
     )
 
 
+@router.post("/stay-notifications/backfill", response_model=BatchResponse)
+async def backfill_stay_notification_tasks_batch(
+    auto_notification_service: AutoNotificationService = Depends(get_auto_notification_service),
+):
+    """
+    滞在通知タスクの登録（移行用）
+
+    滞在通知タスクの導入前に到着済みになったスケジュールのタスクを登録します。
+    デプロイ後に1度実行してください。
+
+    Returns:
+        処理結果
+    """
+    created_count = await auto_notification_service.backfill_stay_notification_tasks()
+
+    return BatchResponse(
+        success=True,
+        message=f"滞在通知タスクを{created_count}件登録しました",
+        details={"created_count": created_count},
+    )
+
+
+@router.post("/notification-history/migrate", response_model=BatchResponse)
+async def migrate_notification_history_batch(
+    auto_notification_service: AutoNotificationService = Depends(get_auto_notification_service),
+):
+    """
+    通知履歴の統合（移行用）
+
+    到着・滞在・退出の通知に送信元・スケジュールID・自動削除日時を設定し、
+    旧 notification_history コレクションのドキュメントを削除します。
+    デプロイ後に1度実行してください。
+
+    Returns:
+        処理結果
+    """
+    results = await auto_notification_service.migrate_notification_history()
+
+    return BatchResponse(
+        success=True,
+        message=(
+            f"通知を{results['updated_notifications']}件更新し、"
+            f"通知履歴を{results['deleted_history']}件削除しました"
+        ),
+        details=results,
+    )
+
+
 @router.post("/cleanup", response_model=BatchResponse)
-async def cleanup_expired_data_batch():
+async def cleanup_expired_data_batch(
+    cleanup_service: CleanupService = Depends(get_cleanup_service),
+):
     """
     期限切れデータの削除
 
@@ -85,8 +152,6 @@ async def cleanup_expired_data_batch():
     Returns:
         処理結果
     """
-    cleanup_service = CleanupService()
-
     results = await cleanup_service.cleanup_expired_data()
 
     total = sum(results.values())
@@ -98,8 +163,54 @@ async def cleanup_expired_data_batch():
     )
 
 
+@router.post("/account-deletions", response_model=BatchResponse)
+async def resume_account_deletions_batch(
+    deletion_service: AccountDeletionService = Depends(get_account_deletion_service),
+):
+    """
+    未完了のアカウント削除ジョブの再開
+
+    失敗したジョブや、実行中のインスタンスが停止して残ったジョブを続きから実行します。
+    推奨実行頻度: 1時間毎
+
+    Returns:
+        処理結果
+    """
+    completed_count = await deletion_service.resume_incomplete_jobs()
+
+    return BatchResponse(
+        success=True,
+        message=f"アカウント削除ジョブを{completed_count}件完了しました",
+        details={"completed_count": completed_count},
+    )
+
+
+@router.post("/prune-fcm-tokens", response_model=BatchResponse)
+async def prune_fcm_tokens_batch(
+    fcm_token_service: FcmTokenService = Depends(get_fcm_token_service),
+):
+    """
+    古いFCMトークンの削除
+
+    FCM_TOKEN_STALE_DAYS 日以上アプリから登録されていないトークンを、ユーザーごとに一括で削除します。
+    推奨実行頻度: 1日1回
+
+    Returns:
+        処理結果
+    """
+    pruned_count = await fcm_token_service.prune_stale_tokens()
+
+    return BatchResponse(
+        success=True,
+        message=f"古いFCMトークンを{pruned_count}件削除しました",
+        details={"pruned_count": pruned_count},
+    )
+
+
 @router.post("/update-expired-schedules", response_model=BatchResponse)
-async def update_expired_schedules_batch():
+async def update_expired_schedules_batch(
+    cleanup_service: CleanupService = Depends(get_cleanup_service),
+):
     """
     期限切れスケジュールのステータス更新
 
@@ -109,8 +220,6 @@ async def update_expired_schedules_batch():
     Returns:
         処理結果
     """
-    cleanup_service = CleanupService()
-
     updated_count = await cleanup_service.update_expired_schedules_status()
 
     return BatchResponse(
@@ -121,7 +230,9 @@ async def update_expired_schedules_batch():
 
 
 @router.get("/cleanup-stats", response_model=BatchResponse)
-async def get_cleanup_stats():
+async def get_cleanup_stats(
+    cleanup_service: CleanupService = Depends(get_cleanup_service),
+):
     """
     クリーンアップ対象データの統計情報を取得
 
@@ -130,8 +241,6 @@ async def get_cleanup_stats():
     Returns:
         統計情報
     """
-    cleanup_service = CleanupService()
-
     stats = await cleanup_service.get_cleanup_stats()
 
     return BatchResponse(
@@ -140,7 +249,10 @@ async def get_cleanup_stats():
 
 
 @router.post("/run-all", response_model=BatchResponse)
-async def run_all_batch_jobs():
+async def run_all_batch_jobs(
+    auto_notification_service: AutoNotificationService = Depends(get_auto_notification_service),
+    cleanup_service: CleanupService = Depends(get_cleanup_service),
+):
     """
     全てのバッチ処理を一括実行
 
@@ -150,14 +262,12 @@ async def run_all_batch_jobs():
     Returns:
         処理結果
     """
-    auto_notification_service = AutoNotificationService()
-    cleanup_service = CleanupService()
-
     # 1. 期限切れスケジュールのステータス更新
     updated_count = await cleanup_service.update_expired_schedules_status()
 
-    # 2. 滞在通知の送信
-    sent_count = await auto_notification_service.check_and_send_stay_notifications()
+    # 2. 滞在通知の送信（タスク未登録の到着済みスケジュールも全件走査で回収）
+    sent_count = await auto_notification_service.process_due_stay_tasks()
+    sent_count += await auto_notification_service.check_and_send_stay_notifications()
 
     # 3. 期限切れデータの削除
     cleanup_results = await cleanup_service.cleanup_expired_data()
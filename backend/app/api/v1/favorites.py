@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_favorite_service
 from app.schemas.favorite import (
     FavoriteLocationCreate,
     FavoriteLocationListResponse,
@@ -20,7 +20,7 @@ router = APIRouter()
 async def create_favorite(
     favorite_data: FavoriteLocationCreate,
     current_user: UserInDB = Depends(get_current_user),
-    favorite_service: FavoriteService = Depends(lambda: FavoriteService()),
+    favorite_service: FavoriteService = Depends(get_favorite_service),
 ):
     """
     お気に入り場所を作成
@@ -43,7 +43,7 @@ async def create_favorite(
 @router.get("", response_model=FavoriteLocationListResponse)
 async def get_favorites(
     current_user: UserInDB = Depends(get_current_user),
-    favorite_service: FavoriteService = Depends(lambda: FavoriteService()),
+    favorite_service: FavoriteService = Depends(get_favorite_service),
 ):
     """
     お気に入り場所一覧を取得
@@ -69,7 +69,7 @@ async def get_favorites(
 async def get_favorite(
     favorite_id: str = Path(..., description="お気に入りID"),
     current_user: UserInDB = Depends(get_current_user),
-    favorite_service: FavoriteService = Depends(lambda: FavoriteService()),
+    favorite_service: FavoriteService = Depends(get_favorite_service),
 ):
     """
     お気に入り場所詳細を取得
@@ -104,7 +104,7 @@ async def get_favorite(
 async def delete_favorite(
     favorite_id: str = Path(..., description="お気に入りID"),
     current_user: UserInDB = Depends(get_current_user),
-    favorite_service: FavoriteService = Depends(lambda: FavoriteService()),
+    favorite_service: FavoriteService = Depends(get_favorite_service),
 ):
     """
     お気に入り場所を削除
@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_friend_service
 from app.schemas.friend import (
     FriendListResponse,
     FriendRequestCreate,
@@ -24,7 +24,7 @@ router = APIRouter()
 async def send_friend_request(
     request_data: FriendRequestCreate,
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     フレンドリクエストを送信
@@ -56,7 +56,7 @@ async def send_friend_request(
 @router.get("/requests/received", response_model=FriendRequestListResponse)
 async def get_received_requests(
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     受信したフレンドリクエスト一覧を取得
@@ -77,7 +77,7 @@ async def get_received_requests(
 @router.get("/requests/sent", response_model=FriendRequestListResponse)
 async def get_sent_requests(
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     送信したフレンドリクエスト一覧を取得
@@ -99,7 +99,7 @@ async def get_sent_requests(
 async def accept_friend_request(
     request_id: str = Path(..., description="リクエストID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     フレンドリクエストを承認
@@ -132,7 +132,7 @@ async def accept_friend_request(
 async def reject_friend_request(
     request_id: str = Path(..., description="リクエストID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     フレンドリクエストを拒否
@@ -160,7 +160,7 @@ async def reject_friend_request(
 @router.get("", response_model=FriendListResponse)
 async def get_friends(
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     フレンド一覧を取得
@@ -182,7 +182,7 @@ async def get_friends(
 async def get_friend(
     friend_id: str = Path(..., description="フレンドのUID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     特定のフレンド情報を取得
@@ -221,7 +221,7 @@ async def update_friendship(
     friend_id: str = Path(..., description="フレンドのUID"),
     update_data: FriendshipUpdate = ...,
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     フレンド関係を更新
@@ -261,7 +261,7 @@ async def update_friendship(
 async def remove_friend(
     friend_id: str = Path(..., description="フレンドのUID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     フレンド関係を削除
@@ -286,7 +286,7 @@ async def remove_friend(
 async def block_user(
     friend_id: str = Path(..., description="ブロックするユーザーのUID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     ユーザーをブロック
@@ -313,7 +313,7 @@ async def block_user(
 async def send_location_share_request(
     request_data: LocationShareRequestCreate,
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     位置情報共有リクエストを送信
@@ -346,7 +346,7 @@ async def send_location_share_request(
 @router.get("/location-share/requests/received", response_model=LocationShareRequestListResponse)
 async def get_received_location_share_requests(
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     受信した位置情報共有リクエスト一覧を取得
@@ -367,7 +367,7 @@ async def get_received_location_share_requests(
 @router.get("/location-share/requests/sent", response_model=LocationShareRequestListResponse)
 async def get_sent_location_share_requests(
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     送信した位置情報共有リクエスト一覧を取得
@@ -389,7 +389,7 @@ async def get_sent_location_share_requests(
 async def accept_location_share_request(
     request_id: str = Path(..., description="リクエストID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     位置情報共有リクエストを承認
@@ -424,7 +424,7 @@ async def accept_location_share_request(
 async def reject_location_share_request(
     request_id: str = Path(..., description="リクエストID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     位置情報共有リクエストを拒否
@@ -453,7 +453,7 @@ async def reject_location_share_request(
 async def revoke_location_share(
     friend_id: str = Path(..., description="共有を停止する相手のUID"),
     current_user: UserInDB = Depends(get_current_user),
-    friend_service: FriendService = Depends(lambda: FriendService()),
+    friend_service: FriendService = Depends(get_friend_service),
 ):
     """
     位置情報共有を停止
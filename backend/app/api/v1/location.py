@@ -2,97 +2,129 @@
 位置情報トラッキングAPIエンドポイント
 """
 
+import logging
+
 from fastapi import APIRouter, Depends
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import (
+    get_auto_notification_service,
+    get_current_user,
+    get_geofencing_service,
+    get_location_service,
+    get_schedule_service,
+)
+from app.core.logging_config import log_diagnostic
 from app.schemas.location import (
     LocationStatusResponse,
     LocationUpdateRequest,
     LocationUpdateResponse,
 )
 from app.schemas.user import UserInDB
+from app.services.auto_notification import AutoNotificationService
+from app.services.geofencing import GeofencingService
 from app.services.location import LocationService
+from app.services.schedules import ScheduleService
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
 
 @router.post("/update", response_model=LocationUpdateResponse)
 async def update_location(
     location_data: LocationUpdateRequest,
     current_user: UserInDB = Depends(get_current_user),
-    location_service: LocationService = Depends(lambda: LocationService()),
+    location_service: LocationService = Depends(get_location_service),
+    geofencing_service: GeofencingService = Depends(get_geofencing_service),
+    auto_notification_service: AutoNotificationService = Depends(get_auto_notification_service),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
 ):
     """
     位置情報を更新
 
-    アプリがバックグラウンドで定期的に（10分間隔）呼び出すエンドポイント。
+    アプリがバックグラウンドで定期的に呼び出すエンドポイント。
     位置情報を記録し、アクティブなスケジュールのジオフェンスチェックを行います。
+    レスポンスの next_update_after_seconds で次回送信までの推奨間隔を返します
+    （目的地の近くでは短く、スケジュールがない・目的地から遠い場合は長くなります）。
 
     Args:
         location_data: 位置情報データ
         current_user: 現在のユーザー
         location_service: 位置情報サービス
+        geofencing_service: ジオフェンシングサービス
+        auto_notification_service: 自動通知サービス
+        schedule_service: スケジュールサービス
 
     Returns:
         更新結果と通知・スケジュール更新の情報
     """
-    import logging
-
-    from app.services.auto_notification import AutoNotificationService
-    from app.services.geofencing import GeofencingService
-
-    logger = logging.getLogger(__name__)
-
-    logger.info(
-        f"[位置情報更新] ユーザー: {current_user.uid}, "
-        f"座標: ({location_data.coords.lat}, {location_data.coords.lng}), "
-        f"精度: {location_data.accuracy}m"
+    log_diagnostic(
+        logger,
+        "[位置情報更新] ユーザー: %s, 座標: (%s, %s), 精度: %sm",
+        current_user.uid,
+        location_data.coords.lat,
+        location_data.coords.lng,
+        location_data.accuracy,
     )
 
     # 位置情報を記録
-    await location_service.record_location(current_user.uid, location_data)
+    current_history = await location_service.record_location(current_user.uid, location_data)
 
     # 前回の位置情報を取得（インデックスエラーが出る場合はスキップ）
     previous_coords = None
+    previous_recorded_at = None
+    previous_accuracy = None
     try:
         location_histories = await location_service.get_location_history(current_user.uid, limit=2)
         if len(location_histories) >= 2:
             previous_coords = location_histories[1].coords
-            logger.info(
-                f"[位置情報更新] 前回の位置: ({previous_coords.lat}, {previous_coords.lng})"
+            previous_recorded_at = location_histories[1].recorded_at
+            previous_accuracy = location_histories[1].accuracy
+            log_diagnostic(
+                logger,
+                "[位置情報更新] 前回の位置: (%s, %s)",
+                previous_coords.lat,
+                previous_coords.lng,
             )
         else:
-            logger.info(f"[位置情報更新] 初回の位置情報記録（履歴件数: {len(location_histories)}）")
+            log_diagnostic(
+                logger, "[位置情報更新] 初回の位置情報記録（履歴件数: %d）", len(location_histories)
+            )
     except Exception as e:
         logger.warning(
-            f"[位置情報更新] 位置情報履歴の取得に失敗（インデックス未作成の可能性）: {e}. "
-            f"前回位置情報なしで処理を継続します"
+            "[位置情報更新] 位置情報履歴の取得に失敗（インデックス未作成の可能性）: %s. "
+            "前回位置情報なしで処理を継続します",
+            e,
         )
 
     # ジオフェンスチェック
-    geofencing_service = GeofencingService()
+    tracked_schedules = await geofencing_service.get_tracked_schedules(current_user.uid)
     geofence_events = await geofencing_service.process_location_update(
         user_id=current_user.uid,
         current_coords=location_data.coords,
         previous_coords=previous_coords,
+        schedules=tracked_schedules,
+        previous_recorded_at=previous_recorded_at,
+        current_recorded_at=current_history.recorded_at,
+        accuracy=max(
+            (a for a in (location_data.accuracy, previous_accuracy) if a is not None),
+            default=None,
+        ),
     )
 
-    logger.info(
-        f"[位置情報更新] ジオフェンスイベント: {len(geofence_events)}件検出"
-    )
+    log_diagnostic(logger, "[位置情報更新] ジオフェンスイベント: %d件検出", len(geofence_events))
 
     # 自動通知の送信
-    auto_notification_service = AutoNotificationService()
     triggered_notifications = []
     schedule_updates = []
 
     for event in geofence_events:
         logger.info(
-            f"[ジオフェンスイベント] タイプ: {event.event_type}, "
-            f"スケジュール: {event.schedule.id}, "
-            f"目的地: {event.schedule.destination_name}, "
-            f"距離: {event.distance_to_destination:.1f}m, "
-            f"通知先: {len(event.schedule.notify_to_user_ids)}人"
+            "[ジオフェンスイベント] タイプ: %s, スケジュール: %s, 目的地: %s, 距離: %.1fm, 通知先: %d人",
+            event.event_type,
+            event.schedule.id,
+            event.schedule.destination_name,
+            event.distance_to_destination,
+            len(event.schedule.notify_to_user_ids),
         )
 
         schedule_update = {
@@ -104,11 +136,11 @@ async def update_location(
 
         if event.event_type == "entry":
             # 到着通知を送信
-            logger.info(f"[到着通知] スケジュール {event.schedule.id} の到着通知を送信開始")
+            log_diagnostic(logger, "[到着通知] スケジュール %s の到着通知を送信開始", event.schedule.id)
             notification_ids = await auto_notification_service.send_arrival_notification(
                 schedule=event.schedule, current_coords=location_data.coords
             )
-            logger.info(f"[到着通知] {len(notification_ids)}件の通知を送信しました")
+            logger.info("[到着通知] %d件の通知を送信しました", len(notification_ids))
             schedule_update["status"] = "arrived"
             schedule_update["notification_ids"] = notification_ids
             triggered_notifications.extend(
@@ -117,11 +149,11 @@ async def update_location(
 
         elif event.event_type == "exit":
             # 退出通知を送信
-            logger.info(f"[退出通知] スケジュール {event.schedule.id} の退出通知を送信開始")
+            log_diagnostic(logger, "[退出通知] スケジュール %s の退出通知を送信開始", event.schedule.id)
             notification_ids = await auto_notification_service.send_departure_notification(
                 schedule=event.schedule, current_coords=location_data.coords
             )
-            logger.info(f"[退出通知] {len(notification_ids)}件の通知を送信しました")
+            logger.info("[退出通知] %d件の通知を送信しました", len(notification_ids))
             schedule_update["status"] = "completed"
             schedule_update["notification_ids"] = notification_ids
             triggered_notifications.extend(
@@ -133,9 +165,6 @@ async def update_location(
     # 到着済みスケジュールの滞在通知をチェック
     # 自分が作成したスケジュール + 通知先に自分が含まれているスケジュール
     from app.schemas.schedule import ScheduleStatus
-    from app.services.schedules import ScheduleService
-
-    schedule_service = ScheduleService()
 
     # 1. 自分が作成した到着済みスケジュール
     my_arrived_schedules = await schedule_service.get_schedules_by_user(
@@ -158,14 +187,17 @@ async def update_location(
                 schedule = LocationScheduleInDB(**schedule_data, id=doc.id)
                 all_arrived_schedules.append(schedule)
     except Exception as e:
-        logger.warning(f"[滞在通知チェック] フレンドスケジュールの取得失敗: {e}")
+        logger.warning("[滞在通知チェック] フレンドスケジュールの取得失敗: %s", e)
 
     # 自分のスケジュールとフレンドのスケジュールをマージ（重複排除）
     arrived_schedules = list({s.id: s for s in (my_arrived_schedules + all_arrived_schedules)}.values())
 
-    logger.info(
-        f"[滞在通知チェック] 到着済みスケジュール: {len(arrived_schedules)}件 "
-        f"(自分: {len(my_arrived_schedules)}件, フレンド: {len(all_arrived_schedules)}件)"
+    log_diagnostic(
+        logger,
+        "[滞在通知チェック] 到着済みスケジュール: %d件 (自分: %d件, フレンド: %d件)",
+        len(arrived_schedules),
+        len(my_arrived_schedules),
+        len(all_arrived_schedules),
     )
 
     for schedule in arrived_schedules:
@@ -177,7 +209,9 @@ async def update_location(
 
             if notification_ids:
                 logger.info(
-                    f"[滞在通知] スケジュール {schedule.id}: {len(notification_ids)}件の通知を送信しました"
+                    "[滞在通知] スケジュール %s: %d件の通知を送信しました",
+                    schedule.id,
+                    len(notification_ids),
                 )
                 schedule_updates.append(
                     {
@@ -191,23 +225,42 @@ async def update_location(
                     [{"type": "stay", "schedule_id": schedule.id}] * len(notification_ids)
                 )
         except Exception as e:
-            logger.error(f"[滞在通知エラー] スケジュール {schedule.id}: {e}", exc_info=True)
+            logger.error("[滞在通知エラー] スケジュール %s: %s", schedule.id, e, exc_info=True)
+
+    # 次回の送信間隔を計算（退出済みになったスケジュールは対象外）
+    departed_schedule_ids = {
+        event.schedule.id for event in geofence_events if event.event_type == "exit"
+    }
+    speed_mps = geofencing_service.estimate_speed(
+        previous_coords,
+        previous_recorded_at,
+        location_data.coords,
+        current_history.recorded_at,
+    )
+    next_update_after_seconds = geofencing_service.calculate_next_update_interval(
+        schedules=[s for s in tracked_schedules if s.id not in departed_schedule_ids],
+        current_coords=location_data.coords,
+        speed_mps=speed_mps,
+    )
 
     message = f"位置情報を記録しました。{len(geofence_events)}件のジオフェンスイベントを処理しました。"
-    logger.info(f"[位置情報更新完了] {message}")
+    log_diagnostic(
+        logger, "[位置情報更新完了] %s 次回送信まで: %d秒", message, next_update_after_seconds
+    )
 
     return LocationUpdateResponse(
         message=message,
         location_recorded=True,
         triggered_notifications=triggered_notifications,
         schedule_updates=schedule_updates,
+        next_update_after_seconds=next_update_after_seconds,
     )
 
 
 @router.get("/status", response_model=LocationStatusResponse)
 async def get_location_status(
     current_user: UserInDB = Depends(get_current_user),
-    location_service: LocationService = Depends(lambda: LocationService()),
+    location_service: LocationService = Depends(get_location_service),
 ):
     """
     現在の位置情報ステータスを取得
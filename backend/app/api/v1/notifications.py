@@ -2,10 +2,12 @@
 通知APIエンドポイント
 """
 
+from datetime import timedelta
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_notification_service
+from app.config import settings
 from app.schemas.notification import (
     FCMTokenRegisterRequest,
     FCMTokenRemoveRequest,
@@ -18,6 +20,7 @@ from app.schemas.notification import (
 )
 from app.schemas.user import UserInDB
 from app.services.notifications import NotificationService
+from app.utils.timezone import now_jst
 
 router = APIRouter()
 
@@ -26,7 +29,7 @@ router = APIRouter()
 async def register_fcm_token(
     token_data: FCMTokenRegisterRequest,
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     FCMトークンを登録
@@ -53,7 +56,7 @@ async def register_fcm_token(
 async def remove_fcm_token(
     token_data: FCMTokenRemoveRequest,
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     FCMトークンを削除
@@ -80,7 +83,7 @@ async def get_notifications(
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     unread_only: bool = Query(False, description="未読のみ取得するか"),
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     通知一覧を取得
@@ -112,12 +115,13 @@ async def get_notifications(
 async def get_notification_history(
     limit: int = Query(50, ge=1, le=100, description="取得件数"),
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     通知履歴を取得（24時間以内）
 
-    自分宛の通知履歴を取得します。
+    自分宛の通知のうち、DATA_RETENTION_HOURS 時間以内に受け取ったものを取得します。
+    通知一覧と同じ notifications コレクションから返します。
     新しい順に並びます。
 
     Args:
@@ -128,8 +132,9 @@ async def get_notification_history(
     Returns:
         通知履歴一覧
     """
+    since = now_jst() - timedelta(hours=settings.DATA_RETENTION_HOURS)
     notifications = await notification_service.get_user_notifications(
-        current_user.uid, limit=limit, unread_only=False
+        current_user.uid, limit=limit, since=since
     )
 
     unread_count = await notification_service.get_unread_count(current_user.uid)
@@ -142,7 +147,7 @@ async def get_notification_history(
 @router.get("/unread-count", response_model=dict)
 async def get_unread_count(
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     未読通知数を取得
@@ -162,7 +167,7 @@ async def get_unread_count(
 async def mark_notifications_as_read(
     read_data: NotificationMarkReadRequest,
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     通知を既読にする
@@ -193,7 +198,7 @@ async def mark_notifications_as_read(
 async def delete_notification(
     notification_id: str = Path(..., description="削除する通知ID"),
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     通知を削除
@@ -218,7 +223,7 @@ async def delete_notification(
 async def send_test_notification(
     notification_data: PushNotificationRequest,
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     テスト通知を送信（開発・デバッグ用）
@@ -257,7 +262,7 @@ async def send_test_notification(
 @router.get("/settings", response_model=NotificationSettings)
 async def get_notification_settings(
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     通知設定を取得
@@ -285,7 +290,7 @@ async def get_notification_settings(
 async def update_notification_settings(
     settings_update: NotificationSettingsUpdate,
     current_user: UserInDB = Depends(get_current_user),
-    notification_service: NotificationService = Depends(lambda: NotificationService()),
+    notification_service: NotificationService = Depends(get_notification_service),
 ):
     """
     通知設定を更新
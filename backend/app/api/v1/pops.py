@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_pop_service
 from app.schemas.pop import (
     CATEGORIES,
     CategoryListResponse,
@@ -24,7 +24,7 @@ router = APIRouter()
 async def create_pop(
     pop_data: PopCreate,
     current_user: UserInDB = Depends(get_current_user),
-    pop_service: PopService = Depends(lambda: PopService()),
+    pop_service: PopService = Depends(get_pop_service),
 ):
     """
     ポップを投稿
@@ -54,7 +54,7 @@ async def create_pop(
 async def search_nearby_pops(
     search_request: PopSearchRequest,
     current_user: UserInDB = Depends(get_current_user),
-    pop_service: PopService = Depends(lambda: PopService()),
+    pop_service: PopService = Depends(get_pop_service),
 ):
     """
     周辺のポップを検索
@@ -80,7 +80,7 @@ async def search_nearby_pops(
 async def get_my_pops(
     include_expired: bool = Query(False, description="期限切れポップも含めるか"),
     current_user: UserInDB = Depends(get_current_user),
-    pop_service: PopService = Depends(lambda: PopService()),
+    pop_service: PopService = Depends(get_pop_service),
 ):
     """
     自分が投稿したポップ一覧を取得
@@ -118,7 +118,7 @@ async def get_categories():
 async def get_pop(
     pop_id: str = Path(..., description="ポップID"),
     current_user: UserInDB = Depends(get_current_user),
-    pop_service: PopService = Depends(lambda: PopService()),
+    pop_service: PopService = Depends(get_pop_service),
 ):
     """
     ポップの詳細情報を取得
@@ -149,7 +149,7 @@ async def update_pop(
     pop_id: str = Path(..., description="ポップID"),
     update_data: PopUpdate = ...,
     current_user: UserInDB = Depends(get_current_user),
-    pop_service: PopService = Depends(lambda: PopService()),
+    pop_service: PopService = Depends(get_pop_service),
 ):
     """
     ポップを更新
@@ -181,7 +181,7 @@ async def update_pop(
 async def delete_pop(
     pop_id: str = Path(..., description="ポップID"),
     current_user: UserInDB = Depends(get_current_user),
-    pop_service: PopService = Depends(lambda: PopService()),
+    pop_service: PopService = Depends(get_pop_service),
 ):
     """
     ポップを削除
@@ -4,7 +4,7 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_reaction_service
 from app.schemas.reaction import (
     ReactionCreate,
     ReactionListResponse,
@@ -21,7 +21,7 @@ router = APIRouter()
 async def send_reaction(
     reaction_data: ReactionCreate,
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     リアクションを送信
@@ -51,7 +51,7 @@ async def send_reaction(
 async def get_received_reactions(
     status_filter: ReactionStatus = Query(None, description="ステータスフィルター"),
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     受信したリアクション一覧を取得
@@ -78,7 +78,7 @@ async def get_received_reactions(
 async def get_sent_reactions(
     status_filter: ReactionStatus = Query(None, description="ステータスフィルター"),
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     送信したリアクション一覧を取得
@@ -102,7 +102,7 @@ async def get_sent_reactions(
 async def get_pop_reactions(
     pop_id: str = Path(..., description="ポップID"),
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     特定のポップへのリアクション一覧を取得
@@ -137,7 +137,7 @@ async def get_pop_reactions(
 @router.get("/unread-count", response_model=dict)
 async def get_unread_count(
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     未読リアクション数を取得
@@ -159,7 +159,7 @@ async def get_unread_count(
 async def get_reaction(
     reaction_id: str = Path(..., description="リアクションID"),
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     リアクションの詳細情報を取得
@@ -197,7 +197,7 @@ async def get_reaction(
 async def accept_reaction(
     reaction_id: str = Path(..., description="リアクションID"),
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     リアクションを承認（マッチング成立）
@@ -227,7 +227,7 @@ async def accept_reaction(
 async def reject_reaction(
     reaction_id: str = Path(..., description="リアクションID"),
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     リアクションを拒否
@@ -256,7 +256,7 @@ async def reject_reaction(
 async def cancel_reaction(
     reaction_id: str = Path(..., description="リアクションID"),
     current_user: UserInDB = Depends(get_current_user),
-    reaction_service: ReactionService = Depends(lambda: ReactionService()),
+    reaction_service: ReactionService = Depends(get_reaction_service),
 ):
     """
     リアクションをキャンセル
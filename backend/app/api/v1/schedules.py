@@ -2,14 +2,16 @@
 位置情報スケジュール管理APIエンドポイント
 """
 
-from typing import Optional
+import logging
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Path, Query, status
 
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_user, get_schedule_service, get_user_service
 from app.schemas.schedule import (
     CreatorUser,
     LocationScheduleCreate,
+    LocationScheduleInDB,
     LocationScheduleListResponse,
     LocationScheduleResponse,
     LocationScheduleUpdate,
@@ -20,58 +22,67 @@ from app.schemas.user import UserInDB
 from app.services.schedules import ScheduleService
 from app.services.users import UserService
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
-async def _enrich_schedule_with_user_info(
-    schedule: LocationScheduleResponse,
+async def _enrich_schedules_with_user_info(
+    schedules: List[LocationScheduleInDB],
     user_service: UserService,
     include_creator: bool = False,
-) -> LocationScheduleResponse:
+) -> List[LocationScheduleResponse]:
     """
-    スケジュールに通知先ユーザー情報を追加
+    スケジュールをレスポンスに変換し、通知先ユーザー情報を追加
+
+    全スケジュールで参照されているユーザーをまとめて1回で取得し、共有して使う。
 
     Args:
-        schedule: スケジュールレスポンス
+        schedules: スケジュールのリスト
         user_service: ユーザーサービス
         include_creator: 作成者情報も追加するか
 
     Returns:
-        ユーザー情報を追加したスケジュールレスポンス
+        ユーザー情報を追加したスケジュールレスポンスのリスト
     """
-    notify_to_users = []
-    for user_id in schedule.notify_to_user_ids:
-        user = await user_service.get_user_by_uid(user_id)
-        if user:
-            notify_to_users.append(
-                NotifyToUser(
-                    user_id=user.uid,
-                    display_name=user.display_name,
-                    profile_image_url=user.profile_image_url,
-                )
-            )
+    uids = [user_id for schedule in schedules for user_id in schedule.notify_to_user_ids]
+    if include_creator:
+        uids.extend(schedule.user_id for schedule in schedules)
+    users = await user_service.get_users_by_uids(uids)
 
-    schedule.notify_to_users = notify_to_users
+    schedule_responses = []
+    for schedule in schedules:
+        schedule_response = LocationScheduleResponse(**schedule.model_dump())
+        schedule_response.notify_to_users = [
+            NotifyToUser(
+                user_id=user.uid,
+                display_name=user.display_name,
+                profile_image_url=user.thumbnail_url(),
+            )
+            for user in (users.get(user_id) for user_id in schedule.notify_to_user_ids)
+            if user
+        ]
 
-    # 作成者情報も追加する場合
-    if include_creator:
-        creator = await user_service.get_user_by_uid(schedule.user_id)
+        # 作成者情報も追加する場合
+        creator = users.get(schedule.user_id) if include_creator else None
         if creator:
-            schedule.creator = CreatorUser(
+            schedule_response.creator = CreatorUser(
                 user_id=creator.uid,
                 display_name=creator.display_name,
-                profile_image_url=creator.profile_image_url,
+                profile_image_url=creator.thumbnail_url(),
             )
 
-    return schedule
+        schedule_responses.append(schedule_response)
+
+    return schedule_responses
 
 
 @router.post("", response_model=LocationScheduleResponse, status_code=status.HTTP_201_CREATED)
 async def create_schedule(
     schedule_data: LocationScheduleCreate,
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
-    user_service: UserService = Depends(lambda: UserService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     位置情報スケジュールを作成
@@ -91,16 +102,12 @@ async def create_schedule(
         HTTPException: バリデーションエラー
     """
     try:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"[DEBUG API] クライアントから受信した start_time: {schedule_data.start_time}")
+        logger.debug("クライアントから受信した start_time: %s", schedule_data.start_time)
 
         schedule = await schedule_service.create_schedule(current_user.uid, schedule_data)
-        schedule_response = LocationScheduleResponse(**schedule.model_dump())
 
-        logger.info(f"[DEBUG API] レスポンス前の start_time: {schedule_response.start_time}")
-        result = await _enrich_schedule_with_user_info(schedule_response, user_service)
-        logger.info(f"[DEBUG API] レスポンス直前の start_time: {result.start_time}")
+        [result] = await _enrich_schedules_with_user_info([schedule], user_service)
+        logger.debug("レスポンスの start_time: %s", result.start_time)
         return result
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
@@ -112,8 +119,8 @@ async def get_schedules(
         None, description="ステータスでフィルタリング"
     ),
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
-    user_service: UserService = Depends(lambda: UserService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     スケジュール一覧を取得
@@ -133,11 +140,7 @@ async def get_schedules(
     schedules = await schedule_service.get_schedules_by_user(current_user.uid, status_filter)
 
     # LocationScheduleInDB -> LocationScheduleResponse に変換し、ユーザー情報を追加
-    schedule_responses = []
-    for s in schedules:
-        schedule_response = LocationScheduleResponse(**s.model_dump())
-        enriched_schedule = await _enrich_schedule_with_user_info(schedule_response, user_service)
-        schedule_responses.append(enriched_schedule)
+    schedule_responses = await _enrich_schedules_with_user_info(schedules, user_service)
 
     return LocationScheduleListResponse(schedules=schedule_responses, total=len(schedule_responses))
 
@@ -145,8 +148,8 @@ async def get_schedules(
 @router.get("/active", response_model=LocationScheduleListResponse)
 async def get_active_schedules(
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
-    user_service: UserService = Depends(lambda: UserService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     アクティブなスケジュール一覧を取得
@@ -164,11 +167,7 @@ async def get_active_schedules(
     schedules = await schedule_service.get_active_schedules(current_user.uid)
 
     # LocationScheduleInDB -> LocationScheduleResponse に変換し、ユーザー情報を追加
-    schedule_responses = []
-    for s in schedules:
-        schedule_response = LocationScheduleResponse(**s.model_dump())
-        enriched_schedule = await _enrich_schedule_with_user_info(schedule_response, user_service)
-        schedule_responses.append(enriched_schedule)
+    schedule_responses = await _enrich_schedules_with_user_info(schedules, user_service)
 
     return LocationScheduleListResponse(schedules=schedule_responses, total=len(schedule_responses))
 
@@ -179,8 +178,8 @@ async def get_friend_schedules(
         None, description="ステータスでフィルタリング"
     ),
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
-    user_service: UserService = Depends(lambda: UserService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     フレンドが作成したスケジュール一覧を取得
@@ -200,13 +199,9 @@ async def get_friend_schedules(
     schedules = await schedule_service.get_schedules_by_recipient(current_user.uid, status_filter)
 
     # LocationScheduleInDB -> LocationScheduleResponse に変換し、ユーザー情報と作成者情報を追加
-    schedule_responses = []
-    for s in schedules:
-        schedule_response = LocationScheduleResponse(**s.model_dump())
-        enriched_schedule = await _enrich_schedule_with_user_info(
-            schedule_response, user_service, include_creator=True
-        )
-        schedule_responses.append(enriched_schedule)
+    schedule_responses = await _enrich_schedules_with_user_info(
+        schedules, user_service, include_creator=True
+    )
 
     return LocationScheduleListResponse(schedules=schedule_responses, total=len(schedule_responses))
 
@@ -215,8 +210,8 @@ async def get_friend_schedules(
 async def get_schedule(
     schedule_id: str = Path(..., description="スケジュールID"),
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
-    user_service: UserService = Depends(lambda: UserService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     スケジュール詳細を取得
@@ -243,8 +238,8 @@ async def get_schedule(
                 status_code=status.HTTP_404_NOT_FOUND, detail="スケジュールが見つかりません"
             )
 
-        schedule_response = LocationScheduleResponse(**schedule.model_dump())
-        return await _enrich_schedule_with_user_info(schedule_response, user_service)
+        [schedule_response] = await _enrich_schedules_with_user_info([schedule], user_service)
+        return schedule_response
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(e))
 
@@ -254,8 +249,8 @@ async def update_schedule(
     schedule_id: str = Path(..., description="スケジュールID"),
     update_data: LocationScheduleUpdate = ...,
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
-    user_service: UserService = Depends(lambda: UserService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     スケジュール情報を更新
@@ -280,8 +275,8 @@ async def update_schedule(
             schedule_id, current_user.uid, update_data
         )
 
-        schedule_response = LocationScheduleResponse(**schedule.model_dump())
-        return await _enrich_schedule_with_user_info(schedule_response, user_service)
+        [schedule_response] = await _enrich_schedules_with_user_info([schedule], user_service)
+        return schedule_response
     except ValueError as e:
         # スケジュールが見つからない場合は404、権限がない場合は403
         if "見つかりません" in str(e):
@@ -294,7 +289,7 @@ async def update_schedule(
 async def delete_schedule(
     schedule_id: str = Path(..., description="スケジュールID"),
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
 ):
     """
     スケジュールを削除
@@ -323,7 +318,7 @@ async def delete_schedule(
 async def test_arrival_notification(
     schedule_id: str = Path(..., description="スケジュールID"),
     current_user: UserInDB = Depends(get_current_user),
-    schedule_service: ScheduleService = Depends(lambda: ScheduleService()),
+    schedule_service: ScheduleService = Depends(get_schedule_service),
 ):
     """
     到着通知をテスト送信（開発・デバッグ用）
@@ -4,10 +4,25 @@
 
 from typing import List
 
-from fastapi import APIRouter, Depends, File, HTTPException, Path, Query, UploadFile, status
-
-from app.api.dependencies import get_current_user
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Path,
+    Query,
+    UploadFile,
+    status,
+)
+
+from app.api.dependencies import (
+    get_account_deletion_service,
+    get_current_user,
+    get_user_service,
+)
 from app.schemas.user import UserDetailResponse, UserInDB, UserResponse, UserUpdate
+from app.services.account_deletion import AccountDeletionService
 from app.services.users import UserService
 
 router = APIRouter()
@@ -17,7 +32,7 @@ router = APIRouter()
 async def update_my_profile(
     update_data: UserUpdate,
     current_user: UserInDB = Depends(get_current_user),
-    user_service: UserService = Depends(lambda: UserService()),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     自分のプロフィールを更新
@@ -42,7 +57,7 @@ async def update_my_profile(
 @router.get("/check-username")
 async def check_username_availability(
     username: str = Query(..., min_length=3, max_length=20, description="チェックするユーザID"),
-    user_service: UserService = Depends(lambda: UserService()),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     ユーザIDの利用可否をチェック（認証不要）
@@ -63,7 +78,7 @@ async def check_username_availability(
 @router.get("/check-email")
 async def check_email_availability(
     email: str = Query(..., description="チェックするメールアドレス"),
-    user_service: UserService = Depends(lambda: UserService()),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     メールアドレスの利用可否をチェック（認証不要）
@@ -86,7 +101,7 @@ async def search_users(
     q: str = Query(..., min_length=1, description="検索クエリ（ユーザID）"),
     limit: int = Query(20, ge=1, le=50, description="取得件数の上限"),
     current_user: UserInDB = Depends(get_current_user),
-    user_service: UserService = Depends(lambda: UserService()),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     ユーザーをIDで検索
@@ -122,7 +137,7 @@ async def search_users(
 async def get_user(
     uid: str = Path(..., description="ユーザID"),
     current_user: UserInDB = Depends(get_current_user),
-    user_service: UserService = Depends(lambda: UserService()),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     ユーザー情報を取得（公開情報のみ）
@@ -153,45 +168,48 @@ async def get_user(
     )
 
 
-@router.delete("/me")
+@router.delete("/me", status_code=status.HTTP_202_ACCEPTED)
 async def delete_my_account(
+    background_tasks: BackgroundTasks,
     current_user: UserInDB = Depends(get_current_user),
-    user_service: UserService = Depends(lambda: UserService()),
+    deletion_service: AccountDeletionService = Depends(get_account_deletion_service),
 ):
     """
     自分のアカウントを完全に削除
 
-    ユーザーアカウントとすべての関連データ（フレンド、スケジュール、位置情報履歴など）を削除します。
+    ユーザーアカウントとすべての関連データ（フレンド、スケジュール、位置情報履歴、ポップなど）を削除します。
+    削除はバックグラウンドのジョブで行い、ジョブIDをすぐに返します。
     この操作は取り消せません。
 
     Args:
+        background_tasks: バックグラウンドタスク
         current_user: 現在のユーザー
-        user_service: ユーザーサービス
+        deletion_service: アカウント削除ジョブサービス
 
     Returns:
-        削除完了メッセージ
+        削除ジョブの情報
     """
     try:
-        await user_service.delete_user(current_user.uid)
-        return {
-            "message": "アカウントを削除しました",
-            "deleted_user_id": current_user.uid,
-        }
+        job = await deletion_service.start_deletion(current_user.uid)
     except ValueError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
-    except Exception as e:
-        print(f"[delete_my_account] Exception: {e}")
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"アカウントの削除に失敗しました: {str(e)}",
-        )
+
+    # 実行中のジョブがある場合、run_job は実行権を取得できずに何もしない
+    background_tasks.add_task(deletion_service.run_job, job["id"])
+
+    return {
+        "message": "アカウントの削除を開始しました",
+        "deleted_user_id": current_user.uid,
+        "job_id": job["id"],
+        "status": job["status"],
+    }
 
 
 @router.post("/me/profile-image")
 async def upload_profile_image(
     file: UploadFile = File(...),
     current_user: UserInDB = Depends(get_current_user),
-    user_service: UserService = Depends(lambda: UserService()),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     プロフィール画像をアップロード
@@ -199,7 +217,7 @@ async def upload_profile_image(
     画像ファイルをFirebase Storageにアップロードし、プロフィール画像URLを更新します。
 
     Args:
-        file: アップロードする画像ファイル（JPEG, PNG, GIF）
+        file: アップロードする画像ファイル（JPEG, PNG, GIF, WebP。128px・512pxのWebPに変換して保存）
         current_user: 現在のユーザー
         user_service: ユーザーサービス
 
@@ -256,7 +274,7 @@ async def upload_profile_image(
 @router.delete("/me/profile-image")
 async def delete_profile_image(
     current_user: UserInDB = Depends(get_current_user),
-    user_service: UserService = Depends(lambda: UserService()),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     プロフィール画像を削除
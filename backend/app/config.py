@@ -1,4 +1,6 @@
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
+from datetime import datetime
 from typing import Optional
 import os
 
@@ -22,14 +24,69 @@ class Settings(BaseSettings):
 
     # 暗号化設定
     ENCRYPTION_KEY: str
+    # キーローテーション用の旧キー（カンマ区切り、復号化のみに使用）
+    ENCRYPTION_OLD_KEYS: str = ""
 
     # 位置情報設定
     GEOFENCE_RADIUS_METERS: int = 50
     LOCATION_UPDATE_INTERVAL_MINUTES: int = 5
+    # 次回の位置情報送信までの推奨間隔（/location/update のレスポンスで返す）
+    LOCATION_UPDATE_MIN_INTERVAL_SECONDS: int = 60
+    LOCATION_UPDATE_MAX_INTERVAL_SECONDS: int = 1800
+    # ジオフェンス判定の対象を時間枠（開始前・終了後の猶予を含む）に入っているスケジュールに絞り込む
+    GEOFENCE_TIME_WINDOW_FILTER_ENABLED: bool = True
+    GEOFENCE_TIME_WINDOW_GRACE_MINUTES: int = 60
     DATA_RETENTION_HOURS: int = 24
+    # 位置情報履歴の保存形式（"document": 1点1ドキュメント, "bucket": ユーザー×時間枠のバケットにまとめて保存）
+    LOCATION_HISTORY_STORAGE: str = "document"
+    LOCATION_BUCKET_MINUTES: int = 60  # バケット1つあたりの時間枠（分）
+    # "bucket" 形式へ切り替えた日時（例: 2025-01-20T09:00:00+09:00）。この日時から DATA_RETENTION_HOURS の間だけ、
+    # 切り替え前の1点1ドキュメント形式の履歴を読み取りで補完する（未設定の場合は補完しない）
+    LOCATION_BUCKET_CUTOVER_AT: Optional[datetime] = None
+    # 位置情報履歴の座標を暗号化して保存する（"document" 形式のみ対象）
+    LOCATION_HISTORY_ENCRYPTION_ENABLED: bool = False
 
     # 通知設定
     NOTIFICATION_STAY_DURATION_MINUTES: int = 60
+    # 滞在通知をプロセス内タイマーで期限ちょうどに送信する（Cloud RunではCPU常時割り当て時のみ有効化）
+    STAY_NOTIFICATION_TIMER_ENABLED: bool = False
+    # 同じ受信者への自動通知をこの秒数の間まとめて1回のプッシュ通知で送信する（0で無効。
+    # 時間枠の経過後にバックグラウンドで送信するため、Cloud RunではCPU常時割り当て時のみ有効化）
+    NOTIFICATION_COALESCE_WINDOW_SECONDS: float = 0
+
+    # ログ設定
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: str = ""  # モジュールごとのログレベル（例: "app.services.geofencing=WARNING,app.api.v1.location=DEBUG"）
+    LOG_FORMAT: str = "text"  # "text" または "json"（Cloud Logging向け）
+    LOG_ASYNC: bool = True  # ログの書式化・書き込みを別スレッドで行う
+    LOG_DIAGNOSTIC_SAMPLE_RATE: float = 0.01  # 詳細な診断ログを記録するリクエストの割合（0〜1）
+
+    # Firestore操作数の計測（リクエストごとの読み取り・書き込み数。DEBUG時はレスポンスヘッダーにも付与）
+    FIRESTORE_OP_METRICS_ENABLED: bool = True
+
+    # 分散カウンター（ポップのリアクション数など、頻繁に更新されるカウンター）
+    # 1カウンターあたりのシャード数（読み取り時はシャード数分の読み取りが発生）
+    # 読み取り・削除は 0..COUNTER_SHARDS-1 のシャードのみを対象とするため、増やすことはできるが
+    # 減らしてはいけない（減らすと番号の大きいシャードの値が合計から漏れ、親の削除時にも残る）
+    COUNTER_SHARDS: int = 5
+    COUNTER_CACHE_TTL_SECONDS: float = 5  # 合計値をプロセス内にキャッシュする秒数
+
+    # FCMトークン（この日数以上アプリから登録されていないトークンはバッチ処理で削除）
+    FCM_TOKEN_STALE_DAYS: int = 60
+
+    # 周辺のポップ検索のタイルキャッシュ（Geohashタイルごとのクエリ結果をプロセス内にキャッシュ）
+    POP_TILE_CACHE_TTL_SECONDS: float = 10  # 0で無効
+
+    # プロファイリング（一部のリクエストと遅いリクエストのスタックをcollapsed形式で書き出す）
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.001  # 計測するリクエストの割合（0〜1）
+    PROFILING_SLOW_THRESHOLD_MS: float = 0  # この処理時間を超えたリクエストを書き出す（0: 無効）
+    PROFILING_INTERVAL_MS: float = 5  # スタックを取得する間隔
+    PROFILING_OUTPUT_DIR: str = "/tmp/profiles"
+
+    # 起動設定
+    # 起動直後にバックグラウンドでFirestoreへ接続し、最初のリクエストの待ち時間を減らす
+    FIRESTORE_PREWARM_ENABLED: bool = True
 
     # バッチ処理設定
     BATCH_TOKEN: Optional[str] = None  # 本番環境では必須
@@ -41,6 +98,15 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
 
+    @model_validator(mode="after")
+    def check_location_history_encryption(self) -> "Settings":
+        """座標の暗号化は1点1ドキュメント形式のみ対応（バケット形式では平文で保存されてしまうため起動時に拒否）"""
+        if self.LOCATION_HISTORY_ENCRYPTION_ENABLED and self.LOCATION_HISTORY_STORAGE == "bucket":
+            raise ValueError(
+                "LOCATION_HISTORY_ENCRYPTION_ENABLED は LOCATION_HISTORY_STORAGE=document の場合のみ有効にできます"
+            )
+        return self
+
     @property
     def is_production(self) -> bool:
         """本番環境かどうかを返す"""
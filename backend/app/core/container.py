@@ -0,0 +1,99 @@
+"""
+サービスコンテナ
+
+アプリケーション全体で共有するサービスを保持します。各サービスは初回利用時に1度だけ生成され、
+依存するサービス（UserService、ScheduleServiceなど）もコンテナ内の同じインスタンスを共有します。
+リクエストごとのサービス生成が不要になり、サービスが持つキャッシュもリクエストをまたいで保持されます。
+
+テストでは app.dependency_overrides で app/api/dependencies.py の get_xxx_service を
+差し替えてください。
+"""
+
+from functools import cached_property
+
+from app.services.account_deletion import AccountDeletionService
+from app.services.auth import AuthService
+from app.services.auto_notification import AutoNotificationService
+from app.services.cleanup import CleanupService
+from app.services.counters import ShardedCounterService
+from app.services.favorites import FavoriteService
+from app.services.fcm_tokens import FcmTokenService
+from app.services.friends import FriendService
+from app.services.geofencing import GeofencingService
+from app.services.location import LocationService
+from app.services.notifications import NotificationService
+from app.services.pops import PopService
+from app.services.reactions import ReactionService
+from app.services.scheduled_tasks import ScheduledTaskService
+from app.services.schedules import ScheduleService
+from app.services.users import UserService
+
+
+class ServiceContainer:
+    """アプリケーション全体で共有するサービスのコンテナ"""
+
+    @cached_property
+    def fcm_token_service(self) -> FcmTokenService:
+        return FcmTokenService()
+
+    @cached_property
+    def auth_service(self) -> AuthService:
+        return AuthService(self.fcm_token_service)
+
+    @cached_property
+    def user_service(self) -> UserService:
+        return UserService()
+
+    @cached_property
+    def friend_service(self) -> FriendService:
+        return FriendService(self.user_service)
+
+    @cached_property
+    def favorite_service(self) -> FavoriteService:
+        return FavoriteService()
+
+    @cached_property
+    def task_service(self) -> ScheduledTaskService:
+        return ScheduledTaskService()
+
+    @cached_property
+    def schedule_service(self) -> ScheduleService:
+        return ScheduleService(self.task_service)
+
+    @cached_property
+    def location_service(self) -> LocationService:
+        return LocationService(self.schedule_service)
+
+    @cached_property
+    def geofencing_service(self) -> GeofencingService:
+        return GeofencingService(self.schedule_service)
+
+    @cached_property
+    def notification_service(self) -> NotificationService:
+        return NotificationService(self.user_service, self.fcm_token_service)
+
+    @cached_property
+    def auto_notification_service(self) -> AutoNotificationService:
+        return AutoNotificationService(
+            self.notification_service, self.user_service, self.task_service
+        )
+
+    @cached_property
+    def cleanup_service(self) -> CleanupService:
+        return CleanupService(self.location_service, self.auto_notification_service)
+
+    @cached_property
+    def counter_service(self) -> ShardedCounterService:
+        return ShardedCounterService()
+
+    @cached_property
+    def pop_service(self) -> PopService:
+        return PopService(self.counter_service)
+
+    @cached_property
+    def reaction_service(self) -> ReactionService:
+        return ReactionService(self.counter_service)
+
+    @cached_property
+    def account_deletion_service(self) -> AccountDeletionService:
+        return AccountDeletionService(self.counter_service)
@@ -1,9 +1,15 @@
 import firebase_admin
-from firebase_admin import credentials, firestore, auth, storage
+from firebase_admin import auth, credentials, firestore
+
 from app.config import settings
+from app.core.firestore_metrics import instrument_client
+
+# 計測用ラッパーで包んだFirestoreクライアント（get_firestore_client で生成）
+_instrumented_client = None
+
 
 def initialize_firebase():
-    """Firebase初期化"""
+    """Firebase初期化（初期化済みの場合は何もしない）"""
     if not firebase_admin._apps:
         if settings.FIREBASE_CREDENTIALS_PATH:
             cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
@@ -20,21 +26,43 @@ def initialize_firebase():
         })
 
 def get_firestore_client():
-    """Firestoreクライアント取得"""
-    return firestore.client()
+    """
+    Firestoreクライアント取得（初回呼び出し時にFirebaseを初期化）
+
+    FIRESTORE_OP_METRICS_ENABLED の場合は、リクエストごとの操作数を計測するラッパーで包んで返す。
+    """
+    global _instrumented_client
+    initialize_firebase()
+    client = firestore.client()
+    if not settings.FIRESTORE_OP_METRICS_ENABLED:
+        return client
+
+    # firestore.client() と同様に、全サービスで同じインスタンスを共有する
+    if _instrumented_client is None or _instrumented_client._target is not client:
+        _instrumented_client = instrument_client(client)
+    return _instrumented_client
 
 def get_auth_client():
     """Firebase Auth クライアント取得"""
+    initialize_firebase()
     return auth
 
 def get_storage_client():
-    """Firebase Storage クライアント取得"""
+    """Firebase Storage クライアント取得（読み込みが重いため初回利用時にimport）"""
+    from firebase_admin import storage
+
+    initialize_firebase()
     return storage
 
 def get_storage_bucket():
     """Firebase Storage バケット取得"""
-    return storage.bucket()
+    return get_storage_client().bucket()
+
+def prewarm_firestore():
+    """
+    Firestoreへの接続（gRPCチャネルと認証トークン）を事前に確立
 
-# グローバルインスタンス（アプリ起動時に初期化）
-initialize_firebase()
-db = get_firestore_client()
+    起動直後にバックグラウンドで呼び出し、最初のリクエストが接続確立を待たないようにする。
+    存在しないドキュメントを1件読むだけなので、課金は1読み取り分のみ。
+    """
+    get_firestore_client().collection("_warmup").document("ping").get()
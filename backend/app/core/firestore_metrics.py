@@ -0,0 +1,413 @@
+"""
+Firestore操作の計測
+
+get_firestore_client が返すクライアントを薄いラッパーで包み、リクエストごとに
+読み取り・書き込み・クエリの回数、取得ドキュメント数、Firestoreの待ち時間を数えます。
+
+- reads: 課金対象の読み取り数（ドキュメント取得は1件、クエリは結果件数（0件でも1））
+- writes: 書き込み数（set / update / delete / create / add、バッチはコミット時に件数分）
+- queries: 実行したクエリ数
+- documents: 取得したドキュメント数
+- elapsed_ms: Firestoreの呼び出しにかかった時間の合計
+
+計測結果はルートごとに集計され（/health/firestore-ops）、DEBUG時はレスポンスヘッダーにも付与されます。
+テストでは track_firestore_ops で任意の処理の操作数を取得できます（tests/conftest.py の firestore_budget）。
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class FirestoreOpStats:
+    """Firestore操作の計測結果"""
+
+    reads: int = 0
+    writes: int = 0
+    queries: int = 0
+    documents: int = 0
+    elapsed_ms: float = 0.0
+
+    def add(self, other: "FirestoreOpStats") -> None:
+        """別の計測結果を加算"""
+        self.reads += other.reads
+        self.writes += other.writes
+        self.queries += other.queries
+        self.documents += other.documents
+        self.elapsed_ms += other.elapsed_ms
+
+    def as_headers(self) -> Dict[str, str]:
+        """レスポンスヘッダー形式で取得"""
+        return {
+            "X-Firestore-Reads": str(self.reads),
+            "X-Firestore-Writes": str(self.writes),
+            "X-Firestore-Queries": str(self.queries),
+            "X-Firestore-Documents": str(self.documents),
+            "X-Firestore-Time-Ms": f"{self.elapsed_ms:.1f}",
+        }
+
+
+# 現在処理中のリクエストの計測結果（ミドルウェアで設定）
+_current_stats: ContextVar[Optional[FirestoreOpStats]] = ContextVar(
+    "firestore_op_stats", default=None
+)
+
+# track_firestore_ops で計測中の結果（スレッドをまたいで記録するためContextVarではなくリストで保持）
+_trackers: List[FirestoreOpStats] = []
+_trackers_lock = threading.Lock()
+
+
+def _record(
+    reads: int = 0,
+    writes: int = 0,
+    queries: int = 0,
+    documents: int = 0,
+    elapsed: float = 0.0,
+) -> None:
+    """操作を現在のリクエストと計測中の結果に記録"""
+    op = FirestoreOpStats(reads, writes, queries, documents, elapsed * 1000)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add(op)
+    if _trackers:
+        with _trackers_lock:
+            for tracker in _trackers:
+                tracker.add(op)
+
+
+@contextmanager
+def firestore_request_scope() -> Iterator[FirestoreOpStats]:
+    """
+    リクエスト1件分の計測範囲（ミドルウェアで使用）
+
+    Yields:
+        このリクエストの計測結果（リクエスト処理中に加算される）
+    """
+    stats = FirestoreOpStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def track_firestore_ops() -> Iterator[FirestoreOpStats]:
+    """
+    ブロック内のFirestore操作を計測（リクエスト外の処理や別スレッドの処理も含む）
+
+    Yields:
+        計測結果（ブロック終了まで加算される）
+    """
+    stats = FirestoreOpStats()
+    with _trackers_lock:
+        _trackers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _trackers_lock:
+            _trackers.remove(stats)
+
+
+class FirestoreOpMetrics:
+    """ルートごとのFirestore操作数の集計"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: Dict[str, Dict[str, float]] = {}
+
+    def observe(self, route: str, stats: FirestoreOpStats) -> None:
+        """
+        リクエスト1件分の計測結果を集計に加える
+
+        Args:
+            route: ルートのパス（例: "/api/v1/location/update"）
+            stats: リクエストの計測結果
+        """
+        with self._lock:
+            entry = self._routes.setdefault(
+                route,
+                {"requests": 0, "reads": 0, "writes": 0, "queries": 0, "documents": 0,
+                 "elapsed_ms": 0.0, "max_reads": 0, "max_writes": 0},
+            )
+            entry["requests"] += 1
+            for key, value in asdict(stats).items():
+                entry[key] += value
+            entry["max_reads"] = max(entry["max_reads"], stats.reads)
+            entry["max_writes"] = max(entry["max_writes"], stats.writes)
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        """集計結果を辞書で取得（1リクエストあたりの平均を含む）"""
+        with self._lock:
+            result = {}
+            for route, entry in self._routes.items():
+                requests = entry["requests"]
+                result[route] = {
+                    **entry,
+                    "elapsed_ms": round(entry["elapsed_ms"], 1),
+                    "avg_reads": round(entry["reads"] / requests, 2),
+                    "avg_writes": round(entry["writes"] / requests, 2),
+                }
+            return result
+
+    def reset(self) -> None:
+        """集計結果を破棄"""
+        with self._lock:
+            self._routes.clear()
+
+
+# アプリケーション全体で共有する集計結果
+firestore_op_metrics = FirestoreOpMetrics()
+
+
+def _unwrap(value: Any) -> Any:
+    """ラッパーを元のオブジェクトに戻す（Firestore SDKへ渡す引数用）"""
+    return value._target if isinstance(value, _Instrumented) else value
+
+
+def _unwrap_args(args: tuple, kwargs: dict) -> tuple:
+    return (
+        tuple(_unwrap(arg) for arg in args),
+        {key: _unwrap(value) for key, value in kwargs.items()},
+    )
+
+
+class _Instrumented:
+    """計測用ラッパーの基底クラス（未定義の属性は元のオブジェクトに委譲）"""
+
+    def __init__(self, target: Any):
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        if name == "_target":
+            raise AttributeError(name)
+        return getattr(self._target, name)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self._target!r})"
+
+    def _call(self, name: str, *args, **kwargs) -> tuple:
+        """元のオブジェクトのメソッドを呼び出し、結果と所要時間を返す"""
+        args, kwargs = _unwrap_args(args, kwargs)
+        started_at = time.perf_counter()
+        result = getattr(self._target, name)(*args, **kwargs)
+        return result, time.perf_counter() - started_at
+
+    def _write(self, name: str, *args, **kwargs) -> Any:
+        result, elapsed = self._call(name, *args, **kwargs)
+        _record(writes=1, elapsed=elapsed)
+        return result
+
+
+class InstrumentedQuery(_Instrumented):
+    """クエリ（コレクション参照を含む）のラッパー"""
+
+    def _chain(self, name: str, *args, **kwargs) -> "InstrumentedQuery":
+        args, kwargs = _unwrap_args(args, kwargs)
+        return InstrumentedQuery(getattr(self._target, name)(*args, **kwargs))
+
+    def where(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("where", *args, **kwargs)
+
+    def order_by(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("order_by", *args, **kwargs)
+
+    def limit(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("limit", *args, **kwargs)
+
+    def limit_to_last(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("limit_to_last", *args, **kwargs)
+
+    def offset(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("offset", *args, **kwargs)
+
+    def select(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("select", *args, **kwargs)
+
+    def start_at(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("start_at", *args, **kwargs)
+
+    def start_after(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("start_after", *args, **kwargs)
+
+    def end_at(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("end_at", *args, **kwargs)
+
+    def end_before(self, *args, **kwargs) -> "InstrumentedQuery":
+        return self._chain("end_before", *args, **kwargs)
+
+    def get(self, *args, **kwargs) -> Any:
+        result, elapsed = self._call("get", *args, **kwargs)
+        try:
+            count = len(result)
+        except TypeError:
+            count = 0
+        _record(reads=max(count, 1), queries=1, documents=count, elapsed=elapsed)
+        return result
+
+    def stream(self, *args, **kwargs) -> Iterator[Any]:
+        args, kwargs = _unwrap_args(args, kwargs)
+        count = 0
+        elapsed = 0.0
+        try:
+            started_at = time.perf_counter()
+            iterator = iter(self._target.stream(*args, **kwargs))
+            elapsed += time.perf_counter() - started_at
+            while True:
+                started_at = time.perf_counter()
+                try:
+                    doc = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    elapsed += time.perf_counter() - started_at
+                count += 1
+                yield doc
+        finally:
+            # 途中で打ち切られた場合も、そこまでの件数で記録する
+            _record(reads=max(count, 1), queries=1, documents=count, elapsed=elapsed)
+
+
+class InstrumentedCollection(InstrumentedQuery):
+    """コレクション参照のラッパー"""
+
+    def document(self, *args, **kwargs) -> "InstrumentedDocument":
+        args, kwargs = _unwrap_args(args, kwargs)
+        return InstrumentedDocument(self._target.document(*args, **kwargs))
+
+    def add(self, *args, **kwargs) -> Any:
+        return self._write("add", *args, **kwargs)
+
+
+class InstrumentedDocument(_Instrumented):
+    """ドキュメント参照のラッパー"""
+
+    def collection(self, *args, **kwargs) -> InstrumentedCollection:
+        args, kwargs = _unwrap_args(args, kwargs)
+        return InstrumentedCollection(self._target.collection(*args, **kwargs))
+
+    def get(self, *args, **kwargs) -> Any:
+        snapshot, elapsed = self._call("get", *args, **kwargs)
+        _record(reads=1, documents=1 if snapshot.exists else 0, elapsed=elapsed)
+        return snapshot
+
+    def set(self, *args, **kwargs) -> Any:
+        return self._write("set", *args, **kwargs)
+
+    def create(self, *args, **kwargs) -> Any:
+        return self._write("create", *args, **kwargs)
+
+    def update(self, *args, **kwargs) -> Any:
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs) -> Any:
+        return self._write("delete", *args, **kwargs)
+
+
+class InstrumentedWriteBatch(_Instrumented):
+    """バッチ書き込みのラッパー（コミット時に件数分の書き込みとして記録）"""
+
+    def __init__(self, target: Any):
+        super().__init__(target)
+        self._pending = 0
+
+    def _queue(self, name: str, *args, **kwargs) -> Any:
+        args, kwargs = _unwrap_args(args, kwargs)
+        self._pending += 1
+        return getattr(self._target, name)(*args, **kwargs)
+
+    def set(self, *args, **kwargs) -> Any:
+        return self._queue("set", *args, **kwargs)
+
+    def create(self, *args, **kwargs) -> Any:
+        return self._queue("create", *args, **kwargs)
+
+    def update(self, *args, **kwargs) -> Any:
+        return self._queue("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs) -> Any:
+        return self._queue("delete", *args, **kwargs)
+
+    def commit(self, *args, **kwargs) -> Any:
+        result, elapsed = self._call("commit", *args, **kwargs)
+        _record(writes=self._pending, elapsed=elapsed)
+        self._pending = 0
+        return result
+
+
+class InstrumentedTransaction(_Instrumented):
+    """
+    トランザクションのラッパー
+
+    firestore.transactional はトランザクションの内部属性を読むだけなので、委譲でそのまま動作する。
+    """
+
+    def get(self, *args, **kwargs) -> Any:
+        result, elapsed = self._call("get", *args, **kwargs)
+        _record(reads=1, elapsed=elapsed)
+        return result
+
+    def set(self, *args, **kwargs) -> Any:
+        return self._write("set", *args, **kwargs)
+
+    def create(self, *args, **kwargs) -> Any:
+        return self._write("create", *args, **kwargs)
+
+    def update(self, *args, **kwargs) -> Any:
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs) -> Any:
+        return self._write("delete", *args, **kwargs)
+
+
+class InstrumentedClient(_Instrumented):
+    """Firestoreクライアントのラッパー"""
+
+    def collection(self, *args, **kwargs) -> InstrumentedCollection:
+        args, kwargs = _unwrap_args(args, kwargs)
+        return InstrumentedCollection(self._target.collection(*args, **kwargs))
+
+    def collection_group(self, *args, **kwargs) -> InstrumentedQuery:
+        args, kwargs = _unwrap_args(args, kwargs)
+        return InstrumentedQuery(self._target.collection_group(*args, **kwargs))
+
+    def document(self, *args, **kwargs) -> InstrumentedDocument:
+        args, kwargs = _unwrap_args(args, kwargs)
+        return InstrumentedDocument(self._target.document(*args, **kwargs))
+
+    def batch(self) -> InstrumentedWriteBatch:
+        return InstrumentedWriteBatch(self._target.batch())
+
+    def transaction(self, *args, **kwargs) -> InstrumentedTransaction:
+        return InstrumentedTransaction(self._target.transaction(*args, **kwargs))
+
+    def get_all(self, references, *args, **kwargs) -> Iterator[Any]:
+        references = [_unwrap(reference) for reference in references]
+        args, kwargs = _unwrap_args(args, kwargs)
+        started_at = time.perf_counter()
+        snapshots = list(self._target.get_all(references, *args, **kwargs))
+        _record(
+            reads=len(references),
+            documents=sum(1 for snapshot in snapshots if snapshot.exists),
+            elapsed=time.perf_counter() - started_at,
+        )
+        return iter(snapshots)
+
+
+def instrument_client(client: Any) -> InstrumentedClient:
+    """
+    Firestoreクライアントを計測用ラッパーで包む（包み済みの場合はそのまま返す）
+
+    Args:
+        client: Firestoreクライアント（テストではモックも可）
+
+    Returns:
+        計測用ラッパー
+    """
+    if isinstance(client, InstrumentedClient):
+        return client
+    return InstrumentedClient(client)
@@ -0,0 +1,195 @@
+"""
+ロギング設定
+
+- ログの書式化と標準出力への書き込みは QueueListener の別スレッドで行い、リクエスト処理を待たせない
+- LOG_FORMAT=json でCloud Loggingが解釈できるJSON形式（1行1レコード）で出力
+- LOG_LEVELS でモジュールごとのログレベルを指定（例: "app.services.geofencing=WARNING"）
+- 詳細な診断ログは log_diagnostic で出力し、リクエストIDから決まる一部のリクエストだけ記録する
+  （同じリクエストの診断ログは全て記録されるか、全て記録されないかのどちらか）
+"""
+
+import atexit
+import json
+import logging
+import queue
+import sys
+import uuid
+import zlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.config import settings
+
+# 現在処理中のリクエストID（ミドルウェアで設定）
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# LogRecordの標準属性（JSON出力で extra として扱わない）
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+_configured = False
+_listener: Optional[QueueListener] = None
+
+
+def new_request_id(trace_header: Optional[str] = None) -> str:
+    """
+    リクエストIDを生成
+
+    Args:
+        trace_header: X-Cloud-Trace-Context ヘッダー（"TRACE_ID/SPAN_ID;o=1"）
+
+    Returns:
+        リクエストID（トレースIDがあればそれを使用）
+    """
+    if trace_header:
+        trace_id = trace_header.split("/", 1)[0]
+        if trace_id:
+            return trace_id
+    return uuid.uuid4().hex
+
+
+def is_sampled(request_id: Optional[str] = None) -> bool:
+    """
+    診断ログを記録するリクエストかどうか（リクエストIDから決定的に判定）
+
+    Args:
+        request_id: リクエストID（省略時は現在のリクエスト）
+
+    Returns:
+        記録対象の場合True
+    """
+    rate = settings.LOG_DIAGNOSTIC_SAMPLE_RATE
+    if rate <= 0:
+        return False
+    if rate >= 1:
+        return True
+
+    request_id = request_id or request_id_var.get()
+    if request_id is None:
+        return False
+    return zlib.crc32(request_id.encode()) % 10000 < rate * 10000
+
+
+def log_diagnostic(logger: logging.Logger, msg: str, *args) -> None:
+    """
+    詳細な診断ログを出力
+
+    DEBUGが有効なロガーでは常にDEBUGで、それ以外はサンプリング対象のリクエストのみINFOで出力します。
+    メッセージは出力する場合のみ書式化されるため、%形式の引数で渡してください。
+
+    Args:
+        logger: ロガー
+        msg: メッセージ（%形式）
+        *args: メッセージの引数
+    """
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args)
+    elif is_sampled() and logger.isEnabledFor(logging.INFO):
+        logger.info(msg, *args, extra={"sampled": True})
+
+
+class RequestContextFilter(logging.Filter):
+    """ログにリクエストIDを付与（呼び出し元のスレッドで実行される）"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Cloud Logging向けのJSON形式フォーマッター"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "severity": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+
+        # extra で渡されたフィールド
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and key not in entry:
+                entry[key] = value
+
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """
+    書式化を行わずにキューへ渡すQueueHandler
+
+    標準のQueueHandlerは呼び出し元のスレッドでフォーマッターを実行するため、
+    メッセージの展開と例外のトレースバックの文字列化（呼び出し元でしか行えない）のみを行い、
+    JSON化・書き込みはリスナーのスレッドに任せる。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _build_formatter() -> logging.Formatter:
+    """設定に応じたフォーマッターを生成"""
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return logging.Formatter("%(levelname)s:     %(name)s - %(message)s")
+
+
+def _apply_levels() -> None:
+    """ルートロガーとモジュールごとのログレベルを設定"""
+    logging.getLogger().setLevel(settings.LOG_LEVEL.upper())
+
+    for entry in settings.LOG_LEVELS.split(","):
+        if "=" not in entry:
+            continue
+        name, level = entry.split("=", 1)
+        logging.getLogger(name.strip()).setLevel(level.strip().upper())
+
+
+def setup_logging() -> None:
+    """ロギングを初期化（2回目以降の呼び出しは何もしない）"""
+    global _configured, _listener
+    if _configured:
+        return
+    _configured = True
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(_build_formatter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    if settings.LOG_ASYNC:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        queue_handler = _DeferredFormatQueueHandler(log_queue)
+        queue_handler.addFilter(RequestContextFilter())
+        root.addHandler(queue_handler)
+
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+    else:
+        stream_handler.addFilter(RequestContextFilter())
+        root.addHandler(stream_handler)
+
+    _apply_levels()
+
+
+def shutdown_logging() -> None:
+    """キューに残ったログを書き出してリスナーを停止"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
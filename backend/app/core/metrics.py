@@ -0,0 +1,275 @@
+"""
+Prometheus形式のメトリクス
+
+/metrics でPrometheusのテキスト形式（version 0.0.4）を返します。
+依存パッケージを増やさないよう、必要なカウンター・ゲージ・ヒストグラムのみを実装しています。
+値はプロセスごとに保持されるため、Cloud Runの複数インスタンスの合算は収集側で行ってください。
+"""
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+
+# リクエスト処理時間のバケット（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# バッチ処理時間のバケット（秒、滞在通知バッチの実行間隔5分を超えたかを判別できるように）
+BATCH_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    """メトリクスの基底クラス"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name}: ラベルが一致しません（期待: {self.labelnames}, 指定: {tuple(labels)}）"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[Tuple[str, Sequence[str], Sequence[str], float]]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """テキスト形式の行を生成"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, names, values, value in self._samples():
+            lines.append(
+                f"{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}"
+            )
+        return lines
+
+
+class Counter(_Metric):
+    """単調増加するカウンター"""
+
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        """
+        カウンターを増やす
+
+        Args:
+            amount: 増加量（0以上）
+            **labels: ラベルの値
+        """
+        if amount < 0:
+            raise ValueError(f"{self.name}: カウンターは減らせません")
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        """現在の値を取得（テスト・確認用）"""
+        return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            return [("", self.labelnames, key, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """増減する値"""
+
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        """現在の値を取得（テスト・確認用）"""
+        return self._values.get(self._label_values(labels), 0)
+
+    def _samples(self):
+        with self._lock:
+            return [("", self.labelnames, key, value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """値の分布（累積バケット・合計・件数）"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # ラベルごとに [各バケットの件数..., 合計]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        値を記録
+
+        Args:
+            value: 記録する値（秒など）
+            **labels: ラベルの値
+        """
+        key = self._label_values(labels)
+        with self._lock:
+            counts = self._values.setdefault(key, [0] * len(self.buckets) + [0.0])
+            for index, upper_bound in enumerate(self.buckets):
+                if value <= upper_bound:
+                    counts[index] += 1
+                    break
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """ブロックの所要時間を記録"""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, **labels)
+
+    def count(self, **labels: str) -> int:
+        """記録件数を取得（テスト・確認用）"""
+        counts = self._values.get(self._label_values(labels))
+        return int(sum(counts[:-1])) if counts else 0
+
+    def _samples(self):
+        samples = []
+        bucket_names = self.labelnames + ("le",)
+        with self._lock:
+            for key, counts in self._values.items():
+                cumulative = 0
+                for upper_bound, count in zip(self.buckets, counts):
+                    cumulative += count
+                    samples.append(
+                        ("_bucket", bucket_names, key + (_format_value(upper_bound),), cumulative)
+                    )
+                samples.append(("_sum", self.labelnames, key, counts[-1]))
+                samples.append(("_count", self.labelnames, key, cumulative))
+        return samples
+
+
+class MetricsRegistry:
+    """メトリクスの登録先"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"メトリクス {metric.name} は登録済みです")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        """全メトリクスをテキスト形式で出力"""
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# アプリケーション全体で共有するメトリクス
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "HTTPリクエストの処理時間",
+        ("method", "route", "status"),
+    )
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.register(
+    Gauge("http_requests_in_flight", "処理中のHTTPリクエスト数")
+)
+GEOFENCE_EVENTS = registry.register(
+    Counter("geofence_events_total", "検出したジオフェンスイベント数", ("event_type",))
+)
+NOTIFICATIONS_SENT = registry.register(
+    Counter("notifications_sent_total", "FCMで送信に成功した通知数", ("notification_type",))
+)
+NOTIFICATIONS_FAILED = registry.register(
+    Counter("notifications_failed_total", "FCMでの送信に失敗した通知数", ("notification_type",))
+)
+NOTIFICATIONS_COALESCED = registry.register(
+    Counter("notifications_coalesced_total", "他の通知とまとめて送信したため省略したプッシュ通知数")
+)
+FCM_TOKENS_PRUNED = registry.register(
+    Counter("fcm_tokens_pruned_total", "無効として削除したFCMトークン数")
+)
+BATCH_JOB_DURATION = registry.register(
+    Histogram("batch_job_duration_seconds", "バッチ処理の所要時間", ("job",), BATCH_BUCKETS)
+)
+BATCH_JOB_LAST_DURATION = registry.register(
+    Gauge("batch_job_last_duration_seconds", "直近のバッチ処理の所要時間", ("job",))
+)
+BATCH_JOB_ITEMS = registry.register(
+    Counter("batch_job_items_total", "バッチ処理で処理した件数", ("job",))
+)
+
+
+def record_batch_job(job: str, started_at: float, item_count: int) -> None:
+    """
+    バッチ処理の所要時間と処理件数を記録
+
+    Args:
+        job: バッチ処理名
+        started_at: 処理の開始時刻（time.perf_counter()）
+        item_count: 処理件数
+    """
+    elapsed = time.perf_counter() - started_at
+    BATCH_JOB_DURATION.observe(elapsed, job=job)
+    BATCH_JOB_LAST_DURATION.set(elapsed, job=job)
+    BATCH_JOB_ITEMS.inc(item_count, job=job)
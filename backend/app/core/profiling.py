@@ -0,0 +1,173 @@
+"""
+リクエストのサンプリングプロファイラー
+
+PROFILING_ENABLED の場合、一部のリクエスト（PROFILING_SAMPLE_RATE）と、処理時間が
+PROFILING_SLOW_THRESHOLD_MS を超えたリクエストのスタックを記録し、ルートごとのディレクトリに
+collapsed形式（flamegraph.pl / speedscope で読み込める "関数;関数;関数 回数"）で書き出します。
+
+- 別スレッドが PROFILING_INTERVAL_MS ごとにイベントループのスタックを取得するだけなので、
+  cProfile のように全関数呼び出しをフックせず、計測中のリクエストへの影響は小さい
+- 同時に処理中の他のリクエストのスタックと区別するため、ミドルウェアのフレームを含むスタックのみ数える
+- スレッドプールで実行される同期処理（同期の依存関数など）は計測対象外
+- 閾値を設定した場合は、遅かったかどうかを後から判定するため全リクエストでサンプリングする
+"""
+
+import asyncio
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from types import FrameType
+from typing import Dict, Optional
+
+from app.config import settings
+from app.core.logging_config import request_id_var
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_label(frame: FrameType) -> str:
+    """スタックに表示するフレーム名（関数名とファイル・行番号）"""
+    code = frame.f_code
+    filename = code.co_filename
+    if "site-packages/" in filename:
+        filename = filename.rsplit("site-packages/", 1)[1]
+    elif "/app/" in filename:
+        filename = "app/" + filename.rsplit("/app/", 1)[1]
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """
+    計測中のリクエストのスタックを一定間隔で取得するスレッド
+
+    begin() で渡したフレーム（ミドルウェアのコルーチンのフレーム）がスタック上にあるとき、
+    そのフレームより内側のスタックを1サンプルとして数える。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active: Dict[int, Counter] = {}
+        self._frames: Dict[int, FrameType] = {}
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def begin(self, frame: FrameType) -> int:
+        """計測を開始（戻り値は end() に渡すキー）"""
+        key = id(frame)
+        with self._lock:
+            self._active[key] = Counter()
+            self._frames[key] = frame
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+        return key
+
+    def end(self, key: int) -> Counter:
+        """計測を終了し、collapsed形式のスタック → サンプル数を返す"""
+        with self._lock:
+            self._frames.pop(key, None)
+            stacks = self._active.pop(key, Counter())
+            if not self._active:
+                self._wake.clear()
+        return stacks
+
+    def sample(self) -> None:
+        """全スレッドのスタックを1回取得し、計測中のリクエストに振り分ける"""
+        with self._lock:
+            if not self._frames:
+                return
+            targets = {id(frame): key for key, frame in self._frames.items()}
+
+            for thread_frame in sys._current_frames().values():
+                labels = []
+                frame = thread_frame
+                while frame is not None:
+                    key = targets.get(id(frame))
+                    if key is not None:
+                        self._active[key][";".join(reversed(labels))] += 1
+                        break
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            time.sleep(settings.PROFILING_INTERVAL_MS / 1000)
+            self.sample()
+
+
+stack_sampler = StackSampler()
+
+
+def _route_dir_name(method: str, path: str) -> str:
+    """ルートごとの出力ディレクトリ名（例: POST_api_v1_location_update）"""
+    return re.sub(r"[^0-9A-Za-z]+", "_", f"{method} {path}").strip("_")
+
+
+def write_profile(method: str, path: str, elapsed_ms: float, request_id: Optional[str], stacks: Counter) -> Path:
+    """
+    collapsed形式のプロファイルを書き出す
+
+    Returns:
+        書き出したファイルのパス
+    """
+    directory = Path(settings.PROFILING_OUTPUT_DIR) / _route_dir_name(method, path)
+    directory.mkdir(parents=True, exist_ok=True)
+    filename = f"{datetime.now():%Y%m%d-%H%M%S}_{elapsed_ms:.0f}ms_{request_id or 'unknown'}.collapsed"
+    profile_path = directory / filename
+    profile_path.write_text(
+        "".join(f"{stack} {count}\n" for stack, count in stacks.most_common()), encoding="utf-8"
+    )
+    return profile_path
+
+
+class ProfilingMiddleware:
+    """
+    リクエストをサンプリングプロファイラーで計測するASGIミドルウェア
+
+    他のミドルウェアより内側（エンドポイントと同じタスク）で動かす必要があるため、
+    app/main.py では最初に登録する。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        sampled = random.random() < settings.PROFILING_SAMPLE_RATE
+        threshold_ms = settings.PROFILING_SLOW_THRESHOLD_MS
+        if not sampled and threshold_ms <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        key = stack_sampler.begin(sys._getframe())
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed_ms = (time.perf_counter() - started_at) * 1000
+            stacks = stack_sampler.end(key)
+
+        if not stacks or not (sampled or 0 < threshold_ms <= elapsed_ms):
+            return
+
+        # レスポンスの送信後なので、書き込みの待ち時間はクライアントに影響しない
+        route = scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        try:
+            profile_path = await asyncio.get_running_loop().run_in_executor(
+                None, write_profile, scope["method"], path, elapsed_ms, request_id_var.get(), stacks
+            )
+            logger.info("[プロファイル] %s %s (%.0fms) → %s", scope["method"], path, elapsed_ms, profile_path)
+        except OSError as e:
+            logger.warning("[プロファイル] 書き出しに失敗: %s", e)
@@ -0,0 +1,63 @@
+"""
+起動時間の計測
+
+コールドスタート（Cloud Runのゼロからのスケール）時の所要時間を記録します。
+app/main.py の最初に import されるため、計測の起点はアプリケーションの読み込み開始時点です。
+
+- import_seconds: アプリケーション（ルーター・サービス）の読み込みにかかった時間
+- firestore_prewarm_seconds: Firestoreへの事前接続にかかった時間
+- first_request_seconds: 読み込み開始から最初のリクエストを受け付けるまでの時間
+"""
+
+import logging
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupMetrics:
+    """起動時間の計測クラス"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.import_seconds: Optional[float] = None
+        self.firestore_prewarm_seconds: Optional[float] = None
+        self.first_request_seconds: Optional[float] = None
+
+    def _elapsed(self) -> float:
+        return round(time.perf_counter() - self.started_at, 3)
+
+    def mark_imports_done(self) -> None:
+        """アプリケーションの読み込み完了を記録"""
+        self.import_seconds = self._elapsed()
+        logger.info(f"[起動] アプリケーションの読み込み: {self.import_seconds}秒")
+
+    def mark_firestore_prewarmed(self, started_at: float) -> None:
+        """
+        Firestoreへの事前接続の完了を記録
+
+        Args:
+            started_at: 事前接続の開始時刻（time.perf_counter()）
+        """
+        self.firestore_prewarm_seconds = round(time.perf_counter() - started_at, 3)
+        logger.info(f"[起動] Firestoreへの事前接続: {self.firestore_prewarm_seconds}秒")
+
+    def mark_first_request(self) -> None:
+        """最初のリクエストの受け付けを記録（2回目以降は何もしない）"""
+        if self.first_request_seconds is not None:
+            return
+        self.first_request_seconds = self._elapsed()
+        logger.info(f"[起動] 最初のリクエストまで: {self.first_request_seconds}秒")
+
+    def as_dict(self) -> dict:
+        """計測結果を辞書で取得"""
+        return {
+            "import_seconds": self.import_seconds,
+            "firestore_prewarm_seconds": self.firestore_prewarm_seconds,
+            "first_request_seconds": self.first_request_seconds,
+        }
+
+
+# アプリケーション全体で共有する計測結果
+startup_metrics = StartupMetrics()
@@ -1,7 +1,13 @@
+# 起動時間の計測の起点（他のモジュールより先に読み込む）
+from app.core.startup import startup_metrics  # isort: skip
+
+import asyncio
 import logging
+import time
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.v1 import (
     auth,
@@ -14,13 +20,16 @@ from app.api.v1 import (
     users,
 )
 from app.config import settings
-from app.core.firebase import initialize_firebase
+from app.core.container import ServiceContainer
+from app.core.firebase import prewarm_firestore
+from app.core.firestore_metrics import firestore_op_metrics, firestore_request_scope
+from app.core.logging_config import new_request_id, request_id_var, setup_logging, shutdown_logging
+from app.core.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, registry
+from app.core.profiling import ProfilingMiddleware
+from app.services.stay_notification_timer import stay_notification_timer
 
-# ロギング設定
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(levelname)s:     %(name)s - %(message)s",
-)
+# ロギング設定（書式化・出力は別スレッド、レベルは LOG_LEVEL / LOG_LEVELS）
+setup_logging()
 
 # アプリケーションロガーを取得
 logger = logging.getLogger(__name__)
@@ -32,6 +41,13 @@ app = FastAPI(
     redirect_slashes=False  # 307リダイレクトを無効化
 )
 
+# アプリケーション全体で共有するサービス（各サービスは初回利用時に生成）
+# テストでは app.dependency_overrides で get_xxx_service を差し替える
+app.state.services = ServiceContainer()
+
+# プロファイリング（エンドポイントと同じタスクで動かすため、最も内側になるよう最初に登録する）
+app.add_middleware(ProfilingMiddleware)
+
 # CORS設定
 allowed_origins = (
     settings.ALLOWED_ORIGINS.split(",")
@@ -46,16 +62,95 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_first_request(request: Request, call_next):
+    """最初のリクエストまでの時間を記録"""
+    startup_metrics.mark_first_request()
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def bind_request_id(request: Request, call_next):
+    """ログに付与するリクエストIDを設定（Cloud RunのトレースIDがあればそれを使用）"""
+    token = request_id_var.set(new_request_id(request.headers.get("X-Cloud-Trace-Context")))
+    try:
+        return await call_next(request)
+    finally:
+        request_id_var.reset(token)
+
+
+@app.middleware("http")
+async def account_firestore_ops(request: Request, call_next):
+    """リクエストごとのFirestore操作数を集計（DEBUG時はレスポンスヘッダーにも付与）"""
+    if not settings.FIRESTORE_OP_METRICS_ENABLED:
+        return await call_next(request)
+
+    with firestore_request_scope() as stats:
+        response = await call_next(request)
+
+    # パスパラメータごとに集計が分かれないよう、ルートのパステンプレートで集計する
+    route = request.scope.get("route")
+    firestore_op_metrics.observe(getattr(route, "path", "unmatched"), stats)
+    if settings.DEBUG:
+        response.headers.update(stats.as_headers())
+    return response
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """ルートごとの処理時間と処理中のリクエスト数を記録（/metrics で公開）"""
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    started_at = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started_at,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status_code),
+        )
+
+
+async def _prewarm_firestore() -> None:
+    """Firestoreへの接続をバックグラウンドで事前に確立（失敗しても起動は継続）"""
+    started_at = time.perf_counter()
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, prewarm_firestore)
+        startup_metrics.mark_firestore_prewarmed(started_at)
+    except Exception as e:
+        logger.warning(f"Firestoreへの事前接続に失敗: {e}")
+
+
 @app.on_event("startup")
 async def startup_event():
     """アプリケーション起動時の処理"""
     logger.info("=" * 50)
     logger.info("imane API サーバー起動中...")
     logger.info("=" * 50)
-    initialize_firebase()
-    logger.info("Firebase初期化完了")
+    # Firebaseは初回利用時に初期化される。起動をブロックしないよう、接続の確立はバックグラウンドで行う
+    if settings.FIRESTORE_PREWARM_ENABLED:
+        app.state.prewarm_task = asyncio.create_task(_prewarm_firestore())
+    if settings.STAY_NOTIFICATION_TIMER_ENABLED:
+        stay_notification_timer.start(app.state.services.auto_notification_service)
     logger.info("=" * 50)
 
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """アプリケーション終了時の処理"""
+    await stay_notification_timer.stop()
+    if settings.NOTIFICATION_COALESCE_WINDOW_SECONDS > 0:
+        # まとめ送信の時間枠内で送信待ちの通知を送信してから終了する
+        await app.state.services.auto_notification_service.coalescer.flush_all()
+    shutdown_logging()
+
 # ルーター登録
 app.include_router(auth.router, prefix="/api/v1/auth", tags=["認証"])
 app.include_router(users.router, prefix="/api/v1/users", tags=["ユーザー"])
@@ -73,3 +168,22 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/startup")
+async def startup_health_check():
+    """起動時間の計測結果（コールドスタートの監視用）"""
+    return startup_metrics.as_dict()
+
+@app.get("/health/firestore-ops")
+async def firestore_ops_health_check():
+    """ルートごとのFirestore操作数の集計（読み取り・書き込み数の監視用）"""
+    return firestore_op_metrics.as_dict()
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus形式のメトリクス（処理時間・ジオフェンスイベント・通知・バッチ処理）"""
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+startup_metrics.mark_imports_done()
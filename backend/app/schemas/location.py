@@ -13,6 +13,24 @@ Firestoreのlocation_history コレクション構造:
     "recorded_at": "2025-01-15T14:05:00Z",
     "auto_delete_at": "2025-01-16T14:05:00Z"  # 24時間後
 }
+
+LOCATION_HISTORY_ENCRYPTION_ENABLED=True の場合、"coords" の代わりに
+"encrypted_coords": "gAAAAA..."（{"lat": ..., "lng": ...} のFernetトークン）を保存します。
+
+Firestoreのlocation_buckets コレクション構造（LOCATION_HISTORY_STORAGE=bucket の場合）:
+{
+    "id": "{user_id}_202501151400",  # ユーザー×時間枠ごとに1ドキュメント
+    "user_id": "firebase_auth_uid",
+    "bucket_start": "2025-01-15T14:00:00+09:00",
+    "bucket_end": "2025-01-15T15:00:00+09:00",
+    "lats": [35.6580, 35.6581],  # 以下は同じインデックスで1点を表す並列配列
+    "lngs": [139.7016, 139.7018],
+    "accuracies": [10.0, null],
+    "recorded_ats": ["2025-01-15T14:05:00+09:00", "2025-01-15T14:10:00+09:00"],
+    "schedule_ids": [null, null],
+    "point_count": 2,
+    "auto_delete_at": "2025-01-16T15:00:00+09:00"  # バケット終了の24時間後
+}
 """
 
 from datetime import datetime, timedelta
@@ -49,6 +67,46 @@ class LocationHistoryInDB(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class LocationBucketInDB(BaseModel):
+    """データベース内の位置情報バケット（時間枠ごとに複数点をまとめたもの）"""
+
+    id: str = Field(..., description="バケットID（{user_id}_{開始時刻}）")
+    user_id: str = Field(..., description="ユーザID")
+    bucket_start: datetime = Field(..., description="時間枠の開始日時")
+    bucket_end: datetime = Field(..., description="時間枠の終了日時")
+    lats: List[float] = Field(default_factory=list, description="緯度の配列")
+    lngs: List[float] = Field(default_factory=list, description="経度の配列")
+    accuracies: List[Optional[float]] = Field(default_factory=list, description="精度の配列")
+    recorded_ats: List[datetime] = Field(default_factory=list, description="記録日時の配列")
+    schedule_ids: List[Optional[str]] = Field(default_factory=list, description="スケジュールIDの配列")
+    point_count: int = Field(default=0, description="格納されている点の数")
+    auto_delete_at: datetime = Field(..., description="自動削除日時（バケット終了の24時間後）")
+
+    def to_histories(self) -> List[LocationHistoryInDB]:
+        """
+        並列配列を展開して位置情報履歴のリストに変換（新しい順）
+
+        Returns:
+            位置情報履歴のリスト
+        """
+        histories = [
+            LocationHistoryInDB(
+                id=f"{self.id}_{index}",
+                user_id=self.user_id,
+                schedule_id=schedule_id,
+                coords=Coordinates(lat=lat, lng=lng),
+                accuracy=accuracy,
+                recorded_at=recorded_at,
+                auto_delete_at=self.auto_delete_at,
+            )
+            for index, (lat, lng, accuracy, recorded_at, schedule_id) in enumerate(
+                zip(self.lats, self.lngs, self.accuracies, self.recorded_ats, self.schedule_ids)
+            )
+        ]
+        histories.sort(key=lambda history: history.recorded_at, reverse=True)
+        return histories
+
+
 class LocationHistoryResponse(BaseModel):
     """位置情報履歴のレスポンス"""
 
@@ -120,3 +178,6 @@ class LocationUpdateResponse(BaseModel):
     schedule_updates: List[dict] = Field(
         default_factory=list, description="更新されたスケジュールの情報"
     )
+    next_update_after_seconds: Optional[int] = Field(
+        None, description="次回の位置情報送信までの推奨間隔（秒）"
+    )
@@ -17,9 +17,17 @@ notifications コレクション:
     },
     "is_read": false,
     "created_at": "2024-01-01T00:00:00Z",
-    "read_at": null
+    "read_at": null,
+    # 位置情報の通知（arrival/stay/departure）のみ設定
+    "from_user_id": "uid2",
+    "schedule_id": "schedule_id",
+    "auto_delete_at": "2024-01-02T00:00:00Z"  # 24時間TTL
 }
 
+通知は受信者ごとに1件だけ保存し、通知一覧（/notifications）と24時間以内の履歴
+（/notifications/history）の両方をこのコレクションから返します。
+位置情報を含む通知には auto_delete_at を設定し、期限を過ぎたらクリーンアップで削除します。
+
 通知タイプ:
 - message: 新しいメッセージ受信
 - location_change: フレンドの位置情報ステータス変更
@@ -65,6 +73,9 @@ class NotificationInDB(BaseModel):
     is_read: bool = Field(default=False, description="既読フラグ")
     created_at: datetime = Field(default_factory=now_jst)
     read_at: Optional[datetime] = Field(None, description="既読日時")
+    from_user_id: Optional[str] = Field(None, description="送信元ユーザID")
+    schedule_id: Optional[str] = Field(None, description="関連するスケジュールID")
+    auto_delete_at: Optional[datetime] = Field(None, description="自動削除日時（24時間TTL）")
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -81,10 +92,13 @@ class NotificationResponse(BaseModel):
     is_read: bool
     created_at: datetime
     read_at: Optional[datetime] = None
+    from_user_id: Optional[str] = None
+    schedule_id: Optional[str] = None
+    auto_delete_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
 
-    @field_serializer('created_at', 'read_at')
+    @field_serializer('created_at', 'read_at', 'auto_delete_at')
     def serialize_datetime(self, dt: Optional[datetime], _info) -> Optional[str]:
         """datetimeをJSTタイムゾーン付きのISO 8601形式でシリアライズ"""
         if dt is None:
@@ -128,22 +142,6 @@ class PushNotificationRequest(BaseModel):
     data: dict[str, Any] = Field(default_factory=dict, description="追加データ")
 
 
-class NotificationHistoryInDB(BaseModel):
-    """通知履歴（imane用 - 24時間TTL）"""
-
-    id: str = Field(..., description="通知履歴ID")
-    from_user_id: str = Field(..., description="送信元ユーザID")
-    to_user_id: str = Field(..., description="送信先ユーザID")
-    schedule_id: str = Field(..., description="関連するスケジュールID")
-    type: str = Field(..., description="通知タイプ (arrival/stay/departure)")
-    message: str = Field(..., description="通知メッセージ")
-    map_link: str = Field(..., description="地図リンク")
-    sent_at: datetime = Field(default_factory=now_jst, description="送信日時")
-    auto_delete_at: datetime = Field(..., description="自動削除日時（24時間後）")
-
-    model_config = ConfigDict(from_attributes=True)
-
-
 class NotificationSettings(BaseModel):
     """通知設定（ユーザーごと）"""
 
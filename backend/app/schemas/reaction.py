@@ -8,7 +8,9 @@ Firestoreのreactionsコレクション構造:
     "from_user_id": "user_xyz789",
     "to_user_id": "user_abc123",
     "created_at": "2024-01-01T00:00:00Z",
-    "status": "pending"
+    "status": "pending",
+    "from_user_display_name": "送信者",  # 送信時点の送信者情報（ポップごとの一覧で使用）
+    "from_user_profile_image_url": "https://..."
 }
 """
 
@@ -51,6 +53,10 @@ class ReactionInDB(ReactionBase):
     message: Optional[str] = Field(None, description="添付メッセージ")
     created_at: datetime = Field(default_factory=now_jst)
     status: ReactionStatus = Field(default=ReactionStatus.PENDING)
+    from_user_display_name: Optional[str] = Field(None, description="送信時点の送信者の表示名")
+    from_user_profile_image_url: Optional[str] = Field(
+        None, description="送信時点の送信者のプロフィール画像"
+    )
 
     model_config = ConfigDict(from_attributes=True)
 
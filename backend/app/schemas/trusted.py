@@ -0,0 +1,122 @@
+"""
+信頼できるデータからのモデル生成
+
+自サービスが書き込んだFirestoreのドキュメントは書き込み時にPydanticで検証済みのため、
+読み込みのたびに検証し直す必要はありません。construct_trusted は検証を行わずに
+モデルを生成し、ネストしたモデル（dictで保存）とEnum（値で保存）のみ変換します。
+変換処理はモデルごとに初回だけ型注釈から組み立ててキャッシュします。
+
+効果があるのは EmailStr や正規表現など、検証そのものが重いフィールドを持つモデルです（UserInDB で約7倍）。
+数値・文字列・日時だけのモデルは pydantic-core の検証がこの関数と同程度に速いため、通常どおり生成してください。
+リクエストボディなど、信頼できないデータには使わないでください。
+"""
+
+import types
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional, Tuple, Type, TypeVar, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+Converter = Callable[[Any], Any]
+
+
+def _build_converter(annotation: Any) -> Optional[Converter]:
+    """
+    型注釈から値の変換関数を組み立てる
+
+    Returns:
+        変換関数（変換不要な型の場合はNone）
+    """
+    origin = get_origin(annotation)
+    if origin is Union or origin is types.UnionType:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        # None は呼び出し元で除外するため、Optional[X] は X の変換関数をそのまま使う
+        return _build_converter(args[0]) if len(args) == 1 else None
+
+    if origin is list:
+        args = get_args(annotation)
+        inner = _build_converter(args[0]) if args else None
+        if inner is None:
+            return None
+        return lambda value: [None if item is None else inner(item) for item in value]
+
+    if not isinstance(annotation, type):
+        return None
+    if issubclass(annotation, BaseModel):
+        return lambda value: construct_trusted(annotation, value) if isinstance(value, dict) else value
+    if issubclass(annotation, Enum):
+        return lambda value: value if isinstance(value, annotation) else annotation(value)
+    return None
+
+
+# デフォルト値がないことを表す値
+_REQUIRED = object()
+
+# そのまま共有してよい（コピー不要な）デフォルト値の型
+_IMMUTABLE_DEFAULTS = (type(None), bool, int, float, str, Enum, tuple, frozenset)
+
+
+@lru_cache(maxsize=None)
+def _field_plan(model: Type[BaseModel]) -> Tuple[Tuple[str, Optional[Converter], Any], ...]:
+    """
+    モデルのフィールドごとの（フィールド名, 変換関数, デフォルト値を返す関数 または _REQUIRED）
+    """
+    plan = []
+    for name, field in model.model_fields.items():
+        if field.is_required():
+            default = _REQUIRED
+        elif field.default_factory is None and isinstance(field.default, _IMMUTABLE_DEFAULTS):
+            default = (lambda value: lambda: value)(field.default)
+        else:
+            default = (lambda info: lambda: info.get_default(call_default_factory=True))(field)
+        plan.append((name, _build_converter(field.annotation), default))
+    return tuple(plan)
+
+
+def construct_trusted(model: Type[ModelT], data: Dict[str, Any], **overrides: Any) -> ModelT:
+    """
+    検証を行わずにモデルを生成（自サービスが書き込んだFirestoreのドキュメント用）
+
+    model_construct と同じくインスタンスの属性を直接設定する（Pydantic v2 の model_construct は
+    フィールドごとの処理が遅いため、フィールドごとの処理を事前に組み立てて使う）。
+
+    Args:
+        model: 生成するモデルのクラス
+        data: ドキュメントのデータ（変更しない）
+        **overrides: data より優先するフィールド（ドキュメントIDなど）
+
+    Returns:
+        モデルのインスタンス（省略されたフィールドはデフォルト値、モデルにないキーは無視）
+    """
+    if model.__private_attributes__:
+        return model.model_construct(**_convert(model, {**data, **overrides}))
+
+    values = {**data, **overrides} if overrides else data
+    fields: Dict[str, Any] = {}
+    fields_set = set()
+    for name, converter, default in _field_plan(model):
+        if name in values:
+            value = values[name]
+            fields[name] = converter(value) if converter is not None and value is not None else value
+            fields_set.add(name)
+        elif default is not _REQUIRED:
+            fields[name] = default()
+
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", fields)
+    object.__setattr__(instance, "__pydantic_fields_set__", fields_set)
+    object.__setattr__(instance, "__pydantic_extra__", None)
+    object.__setattr__(instance, "__pydantic_private__", None)
+    return instance
+
+
+def _convert(model: Type[BaseModel], values: Dict[str, Any]) -> Dict[str, Any]:
+    """フィールドの値を変換（プライベート属性を持つモデルを model_construct で生成する場合）"""
+    for name, converter, _default in _field_plan(model):
+        value = values.get(name)
+        if converter is not None and value is not None:
+            values[name] = converter(value)
+    return values
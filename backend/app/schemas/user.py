@@ -7,7 +7,8 @@ Firestoreのusersコレクション構造:
     "username": "user123",  # ユーザーが設定する一意のID（フレンド検索用）
     "email": "user@example.com",
     "display_name": "ユーザー名",
-    "profile_image_url": "https://...",  # オプション
+    "profile_image_url": "https://...",  # オプション（512px）
+    "profile_image_urls": {"128": "https://...", "512": "https://..."},  # サイズ → URL
     "home_address": {
         "latitude": 35.6812,
         "longitude": 139.7671,
@@ -36,9 +37,10 @@ Firestoreのusersコレクション構造:
 """
 
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
+from app.schemas.trusted import construct_trusted
 from app.utils.timezone import now_jst
 
 
@@ -85,6 +87,7 @@ class UserInDB(UserBase):
     """データベース内のユーザー情報"""
     uid: str = Field(..., description="Firebase AuthのUID")
     profile_image_url: Optional[str] = None
+    profile_image_urls: Dict[str, str] = Field(default_factory=dict, description="サイズ（px）→ 画像URL")
     home_address: Optional[Address] = None
     work_address: Optional[Address] = None
     custom_locations: List[CustomLocation] = Field(default_factory=list)
@@ -94,6 +97,33 @@ class UserInDB(UserBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+    def thumbnail_url(self) -> Optional[str]:
+        """一覧表示用の最小サイズの画像URL（リサイズ前にアップロードされた画像は元のURL）"""
+        if not self.profile_image_urls:
+            return self.profile_image_url
+        return self.profile_image_urls[min(self.profile_image_urls, key=int)]
+
+
+def user_from_firestore(user_data: dict) -> UserInDB:
+    """
+    Firestoreのユーザードキュメントから UserInDB を生成（検証は行わない）
+
+    ドキュメントは登録・更新時に検証済みのため、EmailStr・username のパターン検証を省略する。
+    created_at / updated_at はFirestoreの日時をnaiveなdatetime（ローカル時刻）に変換する。
+
+    Args:
+        user_data: ユーザードキュメントのデータ（変更しない）
+
+    Returns:
+        ユーザー情報
+    """
+    timestamps = {
+        key: datetime.fromtimestamp(user_data[key].timestamp())
+        for key in ("created_at", "updated_at")
+        if hasattr(user_data.get(key), "timestamp")
+    }
+    return construct_trusted(UserInDB, user_data, **timestamps)
+
 
 class UserResponse(BaseModel):
     """ユーザー情報のレスポンス（公開情報のみ）"""
@@ -0,0 +1,314 @@
+"""
+アカウント削除ジョブサービス
+
+アカウント削除はリクエスト内では行わず、account_deletion_jobs コレクションにジョブを登録して
+バックグラウンドで実行します。関連コレクションの削除は並行して行い、各コレクションは
+BATCH_SIZE 件ずつバッチ書き込みで削除します。
+
+Firestoreのaccount_deletion_jobs コレクション構造:
+{
+    "id": "uid",  # ユーザーごとに1件（同じユーザーの再登録は既存のジョブを再開する）
+    "user_id": "uid",
+    "status": "pending",  # "pending", "running", "completed", "failed"
+    "completed_steps": {"friend_requests_from": 12, ...},  # 完了したステップ → 削除件数（チェックポイント）
+    "error": null,
+    "created_at": "2025-01-15T14:05:00+09:00",
+    "updated_at": "2025-01-15T14:05:00+09:00",
+    "started_at": null,
+    "completed_at": null
+}
+
+各ステップは残っているドキュメントを検索して削除するため、途中で停止しても再実行で続きから処理できます。
+実行中はステップが完了するたびに started_at を更新して実行権を延長し、"running" のまま
+LEASE_MINUTES を過ぎたジョブは、実行中のインスタンスが停止したものとみなして再開します。
+ユーザードキュメントと通知設定（notification_settings/{uid}）は全ステップの完了後に削除します。
+"""
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import List, Optional, Tuple
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1 import FieldFilter
+
+from app.core.firebase import get_firestore_client, get_storage_bucket
+from app.services.counters import ShardedCounterService
+from app.utils.timezone import now_jst
+
+logger = logging.getLogger(__name__)
+
+# 1回のバッチ書き込みで削除する件数（Firestoreの上限は500）
+BATCH_SIZE = 500
+
+# 実行権の有効期限（分）。これを過ぎた "running" のジョブは再開される
+LEASE_MINUTES = 10
+
+# 削除ステップ: (ステップ名, コレクション, ユーザーIDのフィールド)
+DELETION_STEPS: Tuple[Tuple[str, str, str], ...] = (
+    ("friend_requests_from", "friend_requests", "from_user_id"),
+    ("friend_requests_to", "friend_requests", "to_user_id"),
+    ("location_share_requests_requester", "location_share_requests", "requester_id"),
+    ("location_share_requests_target", "location_share_requests", "target_id"),
+    ("friendships_user", "friendships", "user_id"),
+    ("friendships_friend", "friendships", "friend_id"),
+    ("schedules", "schedules", "user_id"),
+    ("favorites", "favorites", "user_id"),
+    ("location_history", "location_history", "user_id"),
+    ("location_buckets", "location_buckets", "user_id"),
+    ("notifications_from", "notifications", "from_user_id"),
+    ("notifications", "notifications", "user_id"),
+    ("reactions_from", "reactions", "from_user_id"),
+    ("reactions_to", "reactions", "to_user_id"),
+    ("pops", "pops", "user_id"),
+    ("fcm_tokens", "fcm_tokens", "user_id"),
+)
+
+# 削除するドキュメントのサブコレクションにある分散カウンター（コレクション → カウンター名）
+_COUNTERS = {"pops": ("reaction_count",)}
+
+
+class AccountDeletionService:
+    """アカウント削除ジョブサービスクラス"""
+
+    def __init__(self, counter_service: Optional[ShardedCounterService] = None):
+        self.db = get_firestore_client()
+        self.collection_name = "account_deletion_jobs"
+        self.counter_service = counter_service or ShardedCounterService()
+
+    async def start_deletion(self, uid: str) -> dict:
+        """
+        アカウント削除ジョブを登録（実行は run_job で行う）
+
+        Args:
+            uid: ユーザID
+
+        Returns:
+            登録したジョブ（実行中・未完了のジョブがある場合はそのジョブ）
+
+        Raises:
+            ValueError: ユーザーが見つからない場合
+        """
+        if not self.db.collection("users").document(uid).get().exists:
+            raise ValueError("ユーザーが見つかりません")
+
+        job_ref = self.db.collection(self.collection_name).document(uid)
+
+        @firestore.transactional
+        def register(transaction) -> dict:
+            snapshot = job_ref.get(transaction=transaction)
+            if snapshot.exists and snapshot.to_dict().get("status") != "completed":
+                return snapshot.to_dict()
+
+            now = now_jst()
+            job_dict = {
+                "id": uid,
+                "user_id": uid,
+                "status": "pending",
+                "completed_steps": {},
+                "error": None,
+                "created_at": now,
+                "updated_at": now,
+                "started_at": None,
+                "completed_at": None,
+            }
+            transaction.set(job_ref, job_dict)
+            return job_dict
+
+        job_dict = register(self.db.transaction())
+        logger.info(f"アカウント削除ジョブを登録: {uid} (status={job_dict['status']})")
+        return job_dict
+
+    async def run_job(self, job_id: str) -> Optional[dict]:
+        """
+        アカウント削除ジョブを実行（完了済みのステップは飛ばす）
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            実行後のジョブ（失敗時は status が "failed"、他で実行中・完了済みの場合はNone）
+        """
+        job_dict = self._claim(job_id)
+        if job_dict is None:
+            return None
+
+        uid = job_dict["user_id"]
+        job_ref = self.db.collection(self.collection_name).document(job_id)
+        completed_steps = dict(job_dict.get("completed_steps") or {})
+
+        try:
+            loop = asyncio.get_running_loop()
+            pending_steps = [step for step in DELETION_STEPS if step[0] not in completed_steps]
+            counts = await asyncio.gather(
+                *(
+                    loop.run_in_executor(None, self._run_step, job_ref, uid, step)
+                    for step in pending_steps
+                )
+            )
+            completed_steps.update(
+                {step_name: count for (step_name, _, _), count in zip(pending_steps, counts)}
+            )
+
+            # 全ステップの完了後に通知設定とユーザー本体を削除
+            self.db.collection("notification_settings").document(uid).delete()
+            self.db.collection("users").document(uid).delete()
+            await loop.run_in_executor(None, self._delete_profile_images, uid)
+
+        except Exception as e:
+            logger.error(f"アカウント削除ジョブに失敗: {job_id}: {e}")
+            job_ref.update({"status": "failed", "error": str(e), "updated_at": now_jst()})
+            return {**job_dict, "status": "failed", "error": str(e)}
+
+        now = now_jst()
+        job_ref.update({"status": "completed", "completed_at": now, "updated_at": now})
+        logger.info(
+            f"アカウント削除ジョブが完了: {job_id} (合計 {sum(completed_steps.values())}件)"
+        )
+        return {**job_dict, "status": "completed", "completed_steps": completed_steps}
+
+    async def resume_incomplete_jobs(self) -> int:
+        """
+        未完了のアカウント削除ジョブを再開（バッチ処理から呼び出される）
+
+        Returns:
+            完了したジョブの件数
+        """
+        docs = (
+            self.db.collection(self.collection_name)
+            .where(filter=FieldFilter("status", "in", ["pending", "running", "failed"]))
+            .stream()
+        )
+
+        # 失敗したジョブは次回のバッチ処理で再実行する
+        completed = 0
+        for doc in docs:
+            job_dict = await self.run_job(doc.id)
+            if job_dict is not None and job_dict["status"] == "completed":
+                completed += 1
+
+        return completed
+
+    def _claim(self, job_id: str) -> Optional[dict]:
+        """
+        ジョブの実行権を取得（内部メソッド）
+
+        Args:
+            job_id: ジョブID
+
+        Returns:
+            実行権を取得できた場合はジョブ、他で実行中・完了済みの場合はNone
+        """
+        job_ref = self.db.collection(self.collection_name).document(job_id)
+
+        @firestore.transactional
+        def claim(transaction) -> Optional[dict]:
+            snapshot = job_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+
+            job_dict = snapshot.to_dict()
+            now = now_jst()
+            status = job_dict.get("status")
+            lease_expired = (
+                status == "running"
+                and job_dict.get("started_at") is not None
+                and job_dict["started_at"] <= now - timedelta(minutes=LEASE_MINUTES)
+            )
+            if status not in ("pending", "failed") and not lease_expired:
+                return None
+
+            transaction.update(
+                job_ref, {"status": "running", "started_at": now, "updated_at": now, "error": None}
+            )
+            return job_dict
+
+        return claim(self.db.transaction())
+
+    def _run_step(self, job_ref, uid: str, step: Tuple[str, str, str]) -> int:
+        """
+        削除ステップを実行し、完了をジョブに記録（内部メソッド、スレッドで実行）
+
+        Args:
+            job_ref: ジョブの参照
+            uid: ユーザID
+            step: (ステップ名, コレクション, ユーザーIDのフィールド)
+
+        Returns:
+            削除した件数
+        """
+        step_name, collection, field = step
+        query = (
+            self.db.collection(collection)
+            .where(filter=FieldFilter(field, "==", uid))
+            .limit(BATCH_SIZE)
+        )
+
+        deleted_count = 0
+        while True:
+            refs = [doc.reference for doc in query.stream()]
+            if not refs:
+                break
+
+            self._delete_in_batches(refs, self._subcollection_refs(collection, refs))
+            deleted_count += len(refs)
+            if len(refs) < BATCH_SIZE:
+                break
+
+        # 完了を記録し、実行権（started_at）を延長する
+        now = now_jst()
+        job_ref.update(
+            {f"completed_steps.{step_name}": deleted_count, "started_at": now, "updated_at": now}
+        )
+        logger.info(f"アカウント削除 {uid}: {step_name} を{deleted_count}件削除")
+        return deleted_count
+
+    def _subcollection_refs(self, collection: str, refs: list) -> list:
+        """
+        削除するドキュメントのサブコレクションにある分散カウンターのシャード（内部メソッド）
+
+        Args:
+            collection: コレクション名
+            refs: 削除するドキュメントの参照のリスト
+
+        Returns:
+            シャードの参照のリスト
+        """
+        return [
+            shard_ref
+            for name in _COUNTERS.get(collection, ())
+            for ref in refs
+            for shard_ref in self.counter_service.shard_refs(ref, name)
+        ]
+
+    def _delete_in_batches(self, refs: list, extra_refs: List) -> None:
+        """
+        ドキュメントをバッチ書き込みで削除（内部メソッド）
+
+        サブコレクションのドキュメントを先に削除し、親ドキュメントが途中で残っても再実行で削除されるようにする。
+
+        Args:
+            refs: 削除するドキュメントの参照のリスト
+            extra_refs: 先に削除するサブコレクションのドキュメントの参照のリスト
+        """
+        all_refs = list(extra_refs) + list(refs)
+        for start in range(0, len(all_refs), BATCH_SIZE):
+            batch = self.db.batch()
+            for ref in all_refs[start : start + BATCH_SIZE]:
+                batch.delete(ref)
+            batch.commit()
+
+    def _delete_profile_images(self, uid: str) -> None:
+        """
+        プロフィール画像を削除（内部メソッド）
+
+        Args:
+            uid: ユーザID
+        """
+        try:
+            bucket = get_storage_bucket()
+            for blob in bucket.list_blobs(prefix=f"profile_images/{uid}/"):
+                blob.delete()
+        except Exception as e:
+            # ストレージの削除エラーは無視（ファイルが存在しない場合など）
+            logger.warning(f"プロフィール画像の削除に失敗: {uid}: {e}")
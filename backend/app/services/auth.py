@@ -5,22 +5,24 @@
 from datetime import datetime
 from typing import Optional
 
-from firebase_admin import auth, firestore
+from firebase_admin import auth
 from firebase_admin.exceptions import FirebaseError
 
 from app.core.firebase import get_auth_client, get_firestore_client
 from app.utils.timezone import now_jst
 from app.schemas.auth import SignupRequest, TokenResponse
-from app.schemas.user import UserInDB
+from app.schemas.user import UserInDB, user_from_firestore
+from app.services.fcm_tokens import FcmTokenService
 from app.utils.jwt import create_access_token, get_token_expire_time
 
 
 class AuthService:
     """認証サービスクラス"""
 
-    def __init__(self):
+    def __init__(self, fcm_token_service: Optional[FcmTokenService] = None):
         self.db = get_firestore_client()
         self.auth_client = get_auth_client()
+        self.fcm_token_service = fcm_token_service or FcmTokenService()
 
     async def signup(self, request: SignupRequest) -> TokenResponse:
         """
@@ -144,15 +146,6 @@ class AuthService:
 
         user_data = user_doc.to_dict()
 
-        # FirestoreのTimestampをdatetimeに変換
-        if "created_at" in user_data and hasattr(user_data["created_at"], "timestamp"):
-            from datetime import datetime
-            user_data["created_at"] = datetime.fromtimestamp(user_data["created_at"].timestamp())
-
-        if "updated_at" in user_data and hasattr(user_data["updated_at"], "timestamp"):
-            from datetime import datetime
-            user_data["updated_at"] = datetime.fromtimestamp(user_data["updated_at"].timestamp())
-
         # usernameが存在しない場合はエラー
         if "username" not in user_data or not user_data["username"]:
             print(f"[AuthService] Error: User {uid} has no username")
@@ -162,7 +155,7 @@ class AuthService:
                 "Please delete this user from Firebase Console and re-register."
             )
 
-        return UserInDB(**user_data)
+        return user_from_firestore(user_data)
 
     async def delete_user(self, uid: str) -> bool:
         """
@@ -198,13 +191,7 @@ class AuthService:
             更新成功時True
         """
         try:
-            user_ref = self.db.collection('users').document(uid)
-
-            # fcm_tokensに追加（重複を避ける）
-            user_ref.update({
-                'fcm_tokens': firestore.ArrayUnion([fcm_token])
-            })
-
+            await self.fcm_token_service.register_token(uid, fcm_token)
             return True
 
         except Exception:
@@ -222,12 +209,7 @@ class AuthService:
             削除成功時True
         """
         try:
-            user_ref = self.db.collection('users').document(uid)
-
-            user_ref.update({
-                'fcm_tokens': firestore.ArrayRemove([fcm_token])
-            })
-
+            await self.fcm_token_service.remove_tokens(uid, [fcm_token])
             return True
 
         except Exception:
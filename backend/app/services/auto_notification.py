@@ -6,30 +6,45 @@
 """
 
 import logging
-import uuid
+import time
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 
 from app.config import settings
 from app.core.firebase import get_firestore_client
+from app.core.logging_config import log_diagnostic
+from app.core.metrics import record_batch_job
 from app.schemas.common import Coordinates
-from app.schemas.notification import NotificationHistoryInDB, NotificationType
-from app.schemas.schedule import LocationScheduleInDB
+from app.schemas.notification import NotificationType
+from app.schemas.schedule import LocationScheduleInDB, ScheduleStatus
+from app.services.notification_coalescer import NotificationCoalescer, PendingPush
 from app.services.notifications import NotificationService
+from app.services.scheduled_tasks import ScheduledTaskService
 from app.services.users import UserService
 from app.utils.timezone import JST, now_jst
 
 logger = logging.getLogger(__name__)
 
+# 1回のバッチ書き込みの上限（Firestoreの上限は500）
+_BATCH_LIMIT = 500
+
 
 class AutoNotificationService:
     """自動通知サービスクラス"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        notification_service: Optional[NotificationService] = None,
+        user_service: Optional[UserService] = None,
+        task_service: Optional[ScheduledTaskService] = None,
+        coalescer: Optional[NotificationCoalescer] = None,
+    ):
         self.db = get_firestore_client()
-        self.notification_service = NotificationService()
-        self.user_service = UserService()
-        self.notification_history_collection = "notification_history"
+        self.user_service = user_service or UserService()
+        self.notification_service = notification_service or NotificationService(self.user_service)
+        self.task_service = task_service or ScheduledTaskService()
+        self.coalescer = coalescer or NotificationCoalescer(self.notification_service)
+        self.notifications_collection = "notifications"
 
     def _generate_map_link(self, coords: Coordinates) -> str:
         """
@@ -107,57 +122,86 @@ class AutoNotificationService:
         """
         return f"今ね、{user_name}さんが出発したよ"
 
-    async def _save_notification_history(
-        self,
-        from_user_id: str,
-        to_user_id: str,
-        schedule_id: str,
-        notification_type: str,
-        message: str,
-        map_link: str,
-    ) -> NotificationHistoryInDB:
+    def _has_sent_stay_notification(self, schedule_id: str) -> bool:
         """
-        通知履歴を保存（24時間TTL）
+        スケジュールの滞在通知を送信済みかチェック（重複送信防止）
 
         Args:
-            from_user_id: 送信元ユーザID
-            to_user_id: 送信先ユーザID
             schedule_id: スケジュールID
-            notification_type: 通知タイプ（arrival/stay/departure）
-            message: メッセージ
-            map_link: 地図リンク
 
         Returns:
-            保存された通知履歴
+            いずれかの通知先に送信済みの場合True
         """
-        history_id = str(uuid.uuid4())
-        now = now_jst()
-        auto_delete_at = now + timedelta(hours=settings.DATA_RETENTION_HOURS)
-
-        history_dict = {
-            "id": history_id,
-            "from_user_id": from_user_id,
-            "to_user_id": to_user_id,
-            "schedule_id": schedule_id,
-            "type": notification_type,
-            "message": message,
-            "map_link": map_link,
-            "sent_at": now,
-            "auto_delete_at": auto_delete_at,
-        }
-
-        logger.info(
-            f"[通知履歴] notification_historyコレクションに保存中: "
-            f"history_id={history_id}, type={notification_type}, "
-            f"from={from_user_id} -> to={to_user_id}"
+        query = (
+            self.db.collection(self.notifications_collection)
+            .where("schedule_id", "==", schedule_id)
+            .where("type", "==", NotificationType.STAY.value)
+            .limit(1)
         )
+        return bool(list(query.stream()))
 
-        history_ref = self.db.collection(self.notification_history_collection).document(history_id)
-        history_ref.set(history_dict)
+    async def _notify(
+        self,
+        to_user_id: str,
+        schedule: LocationScheduleInDB,
+        title: str,
+        body: str,
+        notification_type: NotificationType,
+        data: dict,
+    ) -> str:
+        """
+        通知を受信者ごとに1件保存し、プッシュ通知を送信（内部メソッド）
+
+        まとめ送信が有効な場合、プッシュ通知は時間枠の経過後に同じ受信者への他の通知と
+        まとめて送信します。
 
-        logger.info(f"[通知履歴] 保存完了: history_id={history_id}")
+        Args:
+            to_user_id: 送信先ユーザID
+            schedule: スケジュール情報
+            title: 通知タイトル
+            body: 通知本文
+            notification_type: 通知タイプ
+            data: 追加データ
 
-        return NotificationHistoryInDB(**history_dict)
+        Returns:
+            保存した通知のID
+        """
+        ttl = timedelta(hours=settings.DATA_RETENTION_HOURS)
+        if not self.coalescer.enabled:
+            notification = await self.notification_service.send_push_notification(
+                user_id=to_user_id,
+                title=title,
+                body=body,
+                notification_type=notification_type,
+                data=data,
+                save_to_db=True,
+                from_user_id=schedule.user_id,
+                schedule_id=schedule.id,
+                ttl=ttl,
+            )
+            return notification.notification_id
+
+        notification = await self.notification_service.save_notification(
+            user_id=to_user_id,
+            title=title,
+            body=body,
+            notification_type=notification_type,
+            data=data,
+            from_user_id=schedule.user_id,
+            schedule_id=schedule.id,
+            ttl=ttl,
+        )
+        self.coalescer.add(
+            to_user_id,
+            PendingPush(
+                notification_id=notification.notification_id,
+                title=title,
+                body=body,
+                notification_type=notification_type,
+                data=data,
+            ),
+        )
+        return notification.notification_id
 
     async def send_arrival_notification(
         self, schedule: LocationScheduleInDB, current_coords: Coordinates
@@ -172,33 +216,35 @@ class AutoNotificationService:
         Returns:
             送信した通知のIDリスト
         """
-        logger.info(
-            f"[到着通知] スケジュール {schedule.id} の処理開始: "
-            f"通知先={len(schedule.notify_to_user_ids)}人, "
-            f"到着通知有効={schedule.notify_on_arrival}"
+        log_diagnostic(
+            logger,
+            "[到着通知] スケジュール %s の処理開始: 通知先=%d人, 到着通知有効=%s",
+            schedule.id,
+            len(schedule.notify_to_user_ids),
+            schedule.notify_on_arrival,
         )
 
         # 到着通知が無効の場合はスキップ
         if not schedule.notify_on_arrival:
-            logger.warning(f"[到着通知] スケジュール {schedule.id}: 到着通知は無効です")
+            log_diagnostic(logger, "[到着通知] スケジュール %s: 到着通知は無効です", schedule.id)
             return []
 
         # 通知先が空の場合は警告
         if not schedule.notify_to_user_ids:
             logger.warning(
-                f"[到着通知] スケジュール {schedule.id}: "
-                f"通知先ユーザーIDが空です。通知先を設定してください。"
+                "[到着通知] スケジュール %s: 通知先ユーザーIDが空です。通知先を設定してください。",
+                schedule.id,
             )
             return []
 
         # ユーザー情報を取得
         user = await self.user_service.get_user_by_uid(schedule.user_id)
         if not user:
-            logger.error(f"[到着通知] ユーザーが見つかりません: {schedule.user_id}")
+            logger.error("[到着通知] ユーザーが見つかりません: %s", schedule.user_id)
             return []
 
         user_name = user.display_name or user.username
-        logger.info(f"[到着通知] 送信者: {user_name} ({schedule.user_id})")
+        log_diagnostic(logger, "[到着通知] 送信者: %s (%s)", user_name, schedule.user_id)
 
         # メッセージと地図リンクを生成
         message = self._format_arrival_message(user_name)
@@ -215,16 +261,21 @@ class AutoNotificationService:
                     to_user_id, NotificationType.ARRIVAL
                 )
                 if not should_send:
-                    logger.info(
-                        f"[到着通知] ユーザー {to_user_id} は到着通知をOFFにしているためスキップ"
+                    log_diagnostic(
+                        logger,
+                        "[到着通知] ユーザー %s は到着通知をOFFにしているためスキップ",
+                        to_user_id,
                     )
                     continue
 
-                logger.info(f"[到着通知] 通知送信中: {schedule.user_id} -> {to_user_id}")
+                log_diagnostic(
+                    logger, "[到着通知] 通知送信中: %s -> %s", schedule.user_id, to_user_id
+                )
 
-                # プッシュ通知を送信（save_to_db=Trueで明示的に指定）
-                await self.notification_service.send_push_notification(
-                    user_id=to_user_id,
+                # 受信者の通知として保存し、プッシュ通知を送信（24時間TTL）
+                notification_id = await self._notify(
+                    to_user_id,
+                    schedule,
                     title=f"📍 {short_location}に到着",
                     body=message + f"\nここにいるよ → {map_link}",
                     notification_type=NotificationType.ARRIVAL,
@@ -235,33 +286,27 @@ class AutoNotificationService:
                         "map_link": map_link,
                         "coords": {"lat": current_coords.lat, "lng": current_coords.lng},
                     },
-                    save_to_db=True,  # 明示的にDB保存を指定
-                )
-
-                # 通知履歴を保存（24時間TTL）
-                history = await self._save_notification_history(
-                    from_user_id=schedule.user_id,
-                    to_user_id=to_user_id,
-                    schedule_id=schedule.id,
-                    notification_type="arrival",
-                    message=message,
-                    map_link=map_link,
                 )
-                notification_ids.append(history.id)
+                notification_ids.append(notification_id)
 
                 logger.info(
-                    f"[到着通知] 送信成功: {schedule.user_id} -> {to_user_id}, "
-                    f"履歴ID: {history.id}"
+                    "[到着通知] 送信成功: %s -> %s, 通知ID: %s",
+                    schedule.user_id,
+                    to_user_id,
+                    notification_id,
                 )
 
             except Exception as e:
                 logger.error(
-                    f"[到着通知] 送信失敗: {schedule.user_id} -> {to_user_id}, "
-                    f"エラー: {type(e).__name__}: {str(e)}",
+                    "[到着通知] 送信失敗: %s -> %s, エラー: %s: %s",
+                    schedule.user_id,
+                    to_user_id,
+                    type(e).__name__,
+                    e,
                     exc_info=True,
                 )
 
-        logger.info(f"[到着通知] 完了: {len(notification_ids)}件の通知を送信しました")
+        log_diagnostic(logger, "[到着通知] 完了: %d件の通知を送信しました", len(notification_ids))
         return notification_ids
 
     async def send_stay_notification(
@@ -277,14 +322,17 @@ class AutoNotificationService:
         Returns:
             送信した通知のIDリスト
         """
-        logger.info(
-            f"[滞在通知チェック] スケジュール {schedule.id}: "
-            f"到着時刻={schedule.arrived_at}, 通知閾値={schedule.notify_after_minutes}分"
+        log_diagnostic(
+            logger,
+            "[滞在通知チェック] スケジュール %s: 到着時刻=%s, 通知閾値=%d分",
+            schedule.id,
+            schedule.arrived_at,
+            schedule.notify_after_minutes,
         )
 
         # 到着していない場合はスキップ
         if not schedule.arrived_at:
-            logger.warning(f"[滞在通知] スケジュール {schedule.id}: 到着時刻が記録されていません")
+            logger.warning("[滞在通知] スケジュール %s: 到着時刻が記録されていません", schedule.id)
             return []
 
         # 滞在時間を計算
@@ -292,44 +340,38 @@ class AutoNotificationService:
         stay_duration = now - schedule.arrived_at
         stay_minutes = int(stay_duration.total_seconds() / 60)
 
-        logger.info(
-            f"[滞在通知] スケジュール {schedule.id}: 滞在時間={stay_minutes}分"
-        )
-
         # 指定された滞在時間に達していない場合はスキップ
         if stay_minutes < schedule.notify_after_minutes:
-            logger.info(
-                f"[滞在通知] スケジュール {schedule.id}: 滞在時間が不足 "
-                f"({stay_minutes}分 < {schedule.notify_after_minutes}分)"
+            log_diagnostic(
+                logger,
+                "[滞在通知] スケジュール %s: 滞在時間が不足 (%d分 < %d分)",
+                schedule.id,
+                stay_minutes,
+                schedule.notify_after_minutes,
             )
             return []
 
         # 既に滞在通知を送信済みかチェック（重複送信防止）
-        logger.info(f"[滞在通知] スケジュール {schedule.id}: 既存通知をチェック中...")
-        notification_history_query = (
-            self.db.collection(self.notification_history_collection)
-            .where("schedule_id", "==", schedule.id)
-            .where("type", "==", "stay")
-        )
-        existing_notifications = list(notification_history_query.stream())
-
-        if existing_notifications:
-            logger.info(
-                f"[滞在通知] スケジュール {schedule.id}: "
-                f"既に滞在通知が送信済みです（{len(existing_notifications)}件）。スキップします。"
+        if self._has_sent_stay_notification(schedule.id):
+            log_diagnostic(
+                logger, "[滞在通知] スケジュール %s: 既に滞在通知が送信済みです", schedule.id
             )
             return []
 
-        logger.info(f"[滞在通知] スケジュール {schedule.id}: 滞在通知を送信します")
+        logger.info(
+            "[滞在通知] スケジュール %s: 滞在時間=%d分のため滞在通知を送信します",
+            schedule.id,
+            stay_minutes,
+        )
 
         # ユーザー情報を取得
         user = await self.user_service.get_user_by_uid(schedule.user_id)
         if not user:
-            logger.error(f"[滞在通知] ユーザーが見つかりません: {schedule.user_id}")
+            logger.error("[滞在通知] ユーザーが見つかりません: %s", schedule.user_id)
             return []
 
         user_name = user.display_name or user.username
-        logger.info(f"[滞在通知] 送信者: {user_name} ({schedule.user_id})")
+        log_diagnostic(logger, "[滞在通知] 送信者: %s (%s)", user_name, schedule.user_id)
 
         # メッセージと地図リンクを生成
         message = self._format_stay_message(user_name, stay_minutes)
@@ -346,16 +388,21 @@ class AutoNotificationService:
                     to_user_id, NotificationType.STAY
                 )
                 if not should_send:
-                    logger.info(
-                        f"[滞在通知] ユーザー {to_user_id} は滞在通知をOFFにしているためスキップ"
+                    log_diagnostic(
+                        logger,
+                        "[滞在通知] ユーザー %s は滞在通知をOFFにしているためスキップ",
+                        to_user_id,
                     )
                     continue
 
-                logger.info(f"[滞在通知] 通知送信中: {schedule.user_id} -> {to_user_id}")
+                log_diagnostic(
+                    logger, "[滞在通知] 通知送信中: %s -> %s", schedule.user_id, to_user_id
+                )
 
-                # プッシュ通知を送信（save_to_db=Trueで明示的に指定）
-                await self.notification_service.send_push_notification(
-                    user_id=to_user_id,
+                # 受信者の通知として保存し、プッシュ通知を送信（24時間TTL）
+                notification_id = await self._notify(
+                    to_user_id,
+                    schedule,
                     title=f"📍 {short_location}で滞在中",
                     body=message + f"\nここにいるよ → {map_link}",
                     notification_type=NotificationType.STAY,
@@ -367,33 +414,27 @@ class AutoNotificationService:
                         "coords": {"lat": current_coords.lat, "lng": current_coords.lng},
                         "stay_duration_minutes": stay_minutes,
                     },
-                    save_to_db=True,  # 明示的にDB保存を指定
-                )
-
-                # 通知履歴を保存（24時間TTL）
-                history = await self._save_notification_history(
-                    from_user_id=schedule.user_id,
-                    to_user_id=to_user_id,
-                    schedule_id=schedule.id,
-                    notification_type="stay",
-                    message=message,
-                    map_link=map_link,
                 )
-                notification_ids.append(history.id)
+                notification_ids.append(notification_id)
 
                 logger.info(
-                    f"[滞在通知] 送信成功: {schedule.user_id} -> {to_user_id}, "
-                    f"履歴ID: {history.id}"
+                    "[滞在通知] 送信成功: %s -> %s, 通知ID: %s",
+                    schedule.user_id,
+                    to_user_id,
+                    notification_id,
                 )
 
             except Exception as e:
                 logger.error(
-                    f"[滞在通知] 送信失敗: {schedule.user_id} -> {to_user_id}, "
-                    f"エラー: {type(e).__name__}: {str(e)}",
+                    "[滞在通知] 送信失敗: %s -> %s, エラー: %s: %s",
+                    schedule.user_id,
+                    to_user_id,
+                    type(e).__name__,
+                    e,
                     exc_info=True,
                 )
 
-        logger.info(f"[滞在通知] 完了: {len(notification_ids)}件の通知を送信しました")
+        log_diagnostic(logger, "[滞在通知] 完了: %d件の通知を送信しました", len(notification_ids))
         return notification_ids
 
     async def send_departure_notification(
@@ -409,33 +450,35 @@ class AutoNotificationService:
         Returns:
             送信した通知のIDリスト
         """
-        logger.info(
-            f"[退出通知] スケジュール {schedule.id} の処理開始: "
-            f"通知先={len(schedule.notify_to_user_ids)}人, "
-            f"退出通知有効={schedule.notify_on_departure}"
+        log_diagnostic(
+            logger,
+            "[退出通知] スケジュール %s の処理開始: 通知先=%d人, 退出通知有効=%s",
+            schedule.id,
+            len(schedule.notify_to_user_ids),
+            schedule.notify_on_departure,
         )
 
         # 退出通知が無効の場合はスキップ
         if not schedule.notify_on_departure:
-            logger.warning(f"[退出通知] スケジュール {schedule.id}: 退出通知は無効です")
+            log_diagnostic(logger, "[退出通知] スケジュール %s: 退出通知は無効です", schedule.id)
             return []
 
         # 通知先が空の場合は警告
         if not schedule.notify_to_user_ids:
             logger.warning(
-                f"[退出通知] スケジュール {schedule.id}: "
-                f"通知先ユーザーIDが空です。通知先を設定してください。"
+                "[退出通知] スケジュール %s: 通知先ユーザーIDが空です。通知先を設定してください。",
+                schedule.id,
             )
             return []
 
         # ユーザー情報を取得
         user = await self.user_service.get_user_by_uid(schedule.user_id)
         if not user:
-            logger.error(f"[退出通知] ユーザーが見つかりません: {schedule.user_id}")
+            logger.error("[退出通知] ユーザーが見つかりません: %s", schedule.user_id)
             return []
 
         user_name = user.display_name or user.username
-        logger.info(f"[退出通知] 送信者: {user_name} ({schedule.user_id})")
+        log_diagnostic(logger, "[退出通知] 送信者: %s (%s)", user_name, schedule.user_id)
 
         # メッセージを生成（退出通知では現在地リンクは不要）
         message = self._format_departure_message(user_name)
@@ -452,16 +495,21 @@ class AutoNotificationService:
                     to_user_id, NotificationType.DEPARTURE
                 )
                 if not should_send:
-                    logger.info(
-                        f"[退出通知] ユーザー {to_user_id} は退出通知をOFFにしているためスキップ"
+                    log_diagnostic(
+                        logger,
+                        "[退出通知] ユーザー %s は退出通知をOFFにしているためスキップ",
+                        to_user_id,
                     )
                     continue
 
-                logger.info(f"[退出通知] 通知送信中: {schedule.user_id} -> {to_user_id}")
+                log_diagnostic(
+                    logger, "[退出通知] 通知送信中: %s -> %s", schedule.user_id, to_user_id
+                )
 
-                # プッシュ通知を送信（save_to_db=Trueで明示的に指定）
-                await self.notification_service.send_push_notification(
-                    user_id=to_user_id,
+                # 受信者の通知として保存し、プッシュ通知を送信（24時間TTL）
+                notification_id = await self._notify(
+                    to_user_id,
+                    schedule,
                     title=f"📍 {short_location}から出発",
                     body=message,
                     notification_type=NotificationType.DEPARTURE,
@@ -471,33 +519,27 @@ class AutoNotificationService:
                         "destination_name": schedule.destination_name,
                         "map_link": map_link,
                     },
-                    save_to_db=True,  # 明示的にDB保存を指定
-                )
-
-                # 通知履歴を保存（24時間TTL）
-                history = await self._save_notification_history(
-                    from_user_id=schedule.user_id,
-                    to_user_id=to_user_id,
-                    schedule_id=schedule.id,
-                    notification_type="departure",
-                    message=message,
-                    map_link=map_link,
                 )
-                notification_ids.append(history.id)
+                notification_ids.append(notification_id)
 
                 logger.info(
-                    f"[退出通知] 送信成功: {schedule.user_id} -> {to_user_id}, "
-                    f"履歴ID: {history.id}"
+                    "[退出通知] 送信成功: %s -> %s, 通知ID: %s",
+                    schedule.user_id,
+                    to_user_id,
+                    notification_id,
                 )
 
             except Exception as e:
                 logger.error(
-                    f"[退出通知] 送信失敗: {schedule.user_id} -> {to_user_id}, "
-                    f"エラー: {type(e).__name__}: {str(e)}",
+                    "[退出通知] 送信失敗: %s -> %s, エラー: %s: %s",
+                    schedule.user_id,
+                    to_user_id,
+                    type(e).__name__,
+                    e,
                     exc_info=True,
                 )
 
-        logger.info(f"[退出通知] 完了: {len(notification_ids)}件の通知を送信しました")
+        log_diagnostic(logger, "[退出通知] 完了: %d件の通知を送信しました", len(notification_ids))
         return notification_ids
 
     async def check_and_send_stay_notifications(self) -> int:
@@ -510,6 +552,7 @@ class AutoNotificationService:
         """
         from app.services.location import LocationService
 
+        started_at = time.perf_counter()
         location_service = LocationService()
 
         # arrived状態のスケジュールを全て取得
@@ -541,16 +584,8 @@ class AutoNotificationService:
                 # 時間枠はあくまで目安なので、end_timeを過ぎていても通知を送る
                 # （end_timeのチェックは行わない）
 
-                # 既に滞在通知を送信済みかチェック（通知履歴を確認）
-                notification_history_query = (
-                    self.db.collection(self.notification_history_collection)
-                    .where("schedule_id", "==", schedule.id)
-                    .where("type", "==", "stay")
-                )
-
-                existing_notifications = list(notification_history_query.stream())
-                if existing_notifications:
-                    # 既に送信済み
+                # 既に滞在通知を送信済みかチェック
+                if self._has_sent_stay_notification(schedule.id):
                     continue
 
                 # 最新の位置情報を取得
@@ -579,18 +614,127 @@ class AutoNotificationService:
         if total_sent > 0:
             logger.info(f"バッチ処理完了: {total_sent}件の滞在通知を送信しました")
 
+        record_batch_job("stay_notifications_full_scan", started_at, len(arrived_schedules))
         return total_sent
 
+    async def run_stay_notification_task(self, task_id: str) -> int:
+        """
+        期限を迎えた滞在通知タスクを実行
+
+        タスクの実行権を取得できた場合のみ通知を送信します。
+        送信に失敗した場合はタスクを未処理に戻し、次回のバッチで再実行します。
+
+        Args:
+            task_id: タスクID
+
+        Returns:
+            送信した通知数
+        """
+        from app.services.location import LocationService
+
+        task = await self.task_service.claim_task(task_id)
+        if not task:
+            return 0
+
+        try:
+            schedule_doc = self.db.collection("schedules").document(task["schedule_id"]).get()
+            if not schedule_doc.exists:
+                await self.task_service.complete_task(task_id)
+                return 0
+
+            schedule = LocationScheduleInDB(**schedule_doc.to_dict())
+            if schedule.status != ScheduleStatus.ARRIVED or not schedule.arrived_at:
+                await self.task_service.complete_task(task_id)
+                return 0
+
+            # 最新の位置情報を取得（見つからない場合は目的地の座標）
+            latest_location = await LocationService().get_latest_location(schedule.user_id)
+            current_coords = (
+                latest_location.coords if latest_location else schedule.destination_coords
+            )
+
+            notification_ids = await self.send_stay_notification(schedule, current_coords)
+            await self.task_service.complete_task(task_id)
+
+            logger.info(
+                f"[滞在通知タスク] スケジュール {schedule.id} の滞在通知を送信 "
+                f"({len(notification_ids)}件)"
+            )
+            return len(notification_ids)
+
+        except Exception as e:
+            logger.error(f"[滞在通知タスク] 実行エラー (task_id: {task_id}): {e}", exc_info=True)
+            await self.task_service.release_task(task_id)
+            return 0
+
+    async def process_due_stay_tasks(self, limit: int = 500) -> int:
+        """
+        期限を迎えた滞在通知タスクを処理
+        （定期的なバッチ処理で呼び出される想定。処理コストは期限を迎えたタスク数に比例）
+
+        Args:
+            limit: 1回で処理するタスク数の上限
+
+        Returns:
+            送信した通知数
+        """
+        started_at = time.perf_counter()
+        due_tasks = await self.task_service.get_due_tasks(limit=limit)
+
+        total_sent = 0
+        for task in due_tasks:
+            total_sent += await self.run_stay_notification_task(task["id"])
+
+        if due_tasks:
+            logger.info(
+                f"バッチ処理完了: {len(due_tasks)}件のタスクを処理し、"
+                f"{total_sent}件の滞在通知を送信しました"
+            )
+
+        record_batch_job("stay_notifications", started_at, len(due_tasks))
+        return total_sent
+
+    async def backfill_stay_notification_tasks(self) -> int:
+        """
+        タスク導入前に到着済みになったスケジュールの滞在通知タスクを登録
+        （デプロイ後に1度実行する想定。登録済み・送信済みのスケジュールはスキップ）
+
+        Returns:
+            登録したタスク数
+        """
+        query = self.db.collection("schedules").where("status", "==", "arrived")
+
+        created_count = 0
+        for doc in query.stream():
+            schedule = LocationScheduleInDB(**doc.to_dict())
+            if not schedule.arrived_at:
+                continue
+
+            task_id = self.task_service.get_stay_notification_task_id(schedule.id)
+            if await self.task_service.has_task(task_id):
+                continue
+
+            # 既に滞在通知を送信済みのスケジュールは対象外
+            if self._has_sent_stay_notification(schedule.id):
+                continue
+
+            due_at = schedule.arrived_at + timedelta(minutes=schedule.notify_after_minutes)
+            await self.task_service.schedule_stay_notification(schedule.id, due_at)
+            created_count += 1
+
+        logger.info(f"[滞在通知タスク] 到着済みスケジュールのタスクを{created_count}件登録しました")
+        return created_count
+
     async def cleanup_old_notification_history(self) -> int:
         """
-        24時間以上経過した通知履歴を削除
+        自動削除日時（24時間TTL）を過ぎた通知を削除
 
         Returns:
             削除した件数
         """
         now = now_jst()
 
-        query = self.db.collection(self.notification_history_collection).where(
+        query = self.db.collection(self.notifications_collection).where(
             "auto_delete_at", "<=", now
         )
 
@@ -603,3 +747,66 @@ class AutoNotificationService:
             logger.info(f"古い通知履歴を削除しました: {deleted_count}件")
 
         return deleted_count
+
+    async def migrate_notification_history(self) -> dict:
+        """
+        旧 notification_history コレクションを notifications に統合（移行用）
+
+        到着・滞在・退出の通知に送信元・スケジュールID・自動削除日時を設定し、
+        同じ内容を重複して保存していた notification_history のドキュメントを削除します。
+        デプロイ後に1度実行する想定で、何度実行しても結果は変わりません。
+
+        Returns:
+            {"updated_notifications": 更新した通知数, "deleted_history": 削除した履歴数}
+        """
+        retention = timedelta(hours=settings.DATA_RETENTION_HOURS)
+        location_types = [
+            NotificationType.ARRIVAL.value,
+            NotificationType.STAY.value,
+            NotificationType.DEPARTURE.value,
+        ]
+
+        batch = self.db.batch()
+        pending = 0
+        updated_count = 0
+        query = self.db.collection(self.notifications_collection).where(
+            "type", "in", location_types
+        )
+        for doc in query.stream():
+            notification_data = doc.to_dict()
+            if notification_data.get("auto_delete_at"):
+                continue
+
+            data = notification_data.get("data") or {}
+            batch.update(
+                doc.reference,
+                {
+                    "from_user_id": data.get("from_user_id"),
+                    "schedule_id": data.get("schedule_id"),
+                    "auto_delete_at": notification_data["created_at"] + retention,
+                },
+            )
+            updated_count += 1
+            pending += 1
+            if pending >= _BATCH_LIMIT:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+
+        deleted_count = 0
+        for doc in self.db.collection("notification_history").stream():
+            batch.delete(doc.reference)
+            deleted_count += 1
+            pending += 1
+            if pending >= _BATCH_LIMIT:
+                batch.commit()
+                batch = self.db.batch()
+                pending = 0
+
+        if pending:
+            batch.commit()
+
+        logger.info(
+            f"[通知移行] 通知を{updated_count}件更新し、通知履歴を{deleted_count}件削除しました"
+        )
+        return {"updated_notifications": updated_count, "deleted_history": deleted_count}
@@ -5,9 +5,14 @@
 """
 
 import logging
+import time
 from datetime import datetime
+from typing import Optional
+
+from firebase_admin import firestore
 
 from app.core.firebase import get_firestore_client
+from app.core.metrics import record_batch_job
 from app.utils.timezone import now_jst
 from app.services.auto_notification import AutoNotificationService
 from app.services.location import LocationService
@@ -18,10 +23,14 @@ logger = logging.getLogger(__name__)
 class CleanupService:
     """データクリーンアップサービスクラス"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        location_service: Optional[LocationService] = None,
+        notification_service: Optional[AutoNotificationService] = None,
+    ):
         self.db = get_firestore_client()
-        self.location_service = LocationService()
-        self.notification_service = AutoNotificationService()
+        self.location_service = location_service or LocationService()
+        self.notification_service = notification_service or AutoNotificationService()
 
     async def cleanup_expired_data(self) -> dict:
         """
@@ -34,6 +43,7 @@ class CleanupService:
                 "expired_schedules": 削除件数
             }
         """
+        started_at = time.perf_counter()
         results = {}
 
         # 位置情報履歴のクリーンアップ
@@ -53,6 +63,7 @@ class CleanupService:
 
         total = sum(results.values())
         logger.info(f"クリーンアップ完了: 合計 {total}件のデータを削除しました")
+        record_batch_job("cleanup", started_at, total)
 
         return results
 
@@ -119,8 +130,67 @@ class CleanupService:
             doc.reference.delete()
             deleted_count += 1
 
+        # 時間バケット形式の場合は、スケジュールに関連する点だけを取り除く
+        bucket_query = self.db.collection("location_buckets").where(
+            "schedule_ids", "array_contains", schedule_id
+        )
+        for doc in bucket_query.stream():
+            deleted_count += self._remove_points_from_bucket(doc.reference, schedule_id)
+
         return deleted_count
 
+    def _remove_points_from_bucket(self, bucket_ref, schedule_id: str) -> int:
+        """
+        バケットからスケジュールに関連する点を取り除く（内部メソッド）
+
+        LocationService._append_to_bucket と同じくトランザクション内で読み直して書き込むため、
+        同時に追記された点は失われません。
+
+        Args:
+            bucket_ref: バケットの参照
+            schedule_id: スケジュールID
+
+        Returns:
+            取り除いた点の数
+        """
+
+        @firestore.transactional
+        def remove_points(transaction) -> int:
+            snapshot = bucket_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return 0
+
+            bucket_data = snapshot.to_dict()
+            schedule_ids = bucket_data.get("schedule_ids", [])
+            keep = [
+                index
+                for index, point_schedule_id in enumerate(schedule_ids)
+                if point_schedule_id != schedule_id
+            ]
+
+            if not keep:
+                transaction.delete(bucket_ref)
+            elif len(keep) < len(schedule_ids):
+                transaction.update(
+                    bucket_ref,
+                    {
+                        **{
+                            field: [bucket_data[field][index] for index in keep]
+                            for field in (
+                                "lats",
+                                "lngs",
+                                "accuracies",
+                                "recorded_ats",
+                                "schedule_ids",
+                            )
+                        },
+                        "point_count": len(keep),
+                    },
+                )
+            return len(schedule_ids) - len(keep)
+
+        return remove_points(self.db.transaction())
+
     async def _delete_related_notification_history(self, schedule_id: str) -> int:
         """
         スケジュールに関連する通知履歴を削除
@@ -134,7 +204,7 @@ class CleanupService:
         if not schedule_id:
             return 0
 
-        query = self.db.collection("notification_history").where("schedule_id", "==", schedule_id)
+        query = self.db.collection("notifications").where("schedule_id", "==", schedule_id)
 
         deleted_count = 0
         for doc in query.stream():
@@ -154,6 +224,7 @@ class CleanupService:
         """
         from datetime import timedelta
 
+        started_at = time.perf_counter()
         now = now_jst()
 
         # end_time + 24時間前の時刻を計算
@@ -199,6 +270,7 @@ class CleanupService:
         if updated_count > 0:
             logger.info(f"[期限切れ] スケジュールのステータス更新完了: {updated_count}件")
 
+        record_batch_job("update_expired_schedules", started_at, updated_count)
         return updated_count
 
     async def get_cleanup_stats(self) -> dict:
@@ -214,8 +286,12 @@ class CleanupService:
         location_query = self.db.collection("location_history").where("auto_delete_at", "<=", now)
         location_count = len(list(location_query.stream()))
 
+        # 削除対象の位置情報バケット数
+        bucket_query = self.db.collection("location_buckets").where("auto_delete_at", "<=", now)
+        bucket_count = len(list(bucket_query.stream()))
+
         # 削除対象の通知履歴数
-        notification_query = self.db.collection("notification_history").where(
+        notification_query = self.db.collection("notifications").where(
             "auto_delete_at", "<=", now
         )
         notification_count = len(list(notification_query.stream()))
@@ -234,7 +310,10 @@ class CleanupService:
 
         return {
             "location_history_count": location_count,
+            "location_bucket_count": bucket_count,
             "notification_history_count": notification_count,
             "expired_schedules_count": len(expired_schedules),
-            "total_cleanup_items": location_count + notification_count + len(expired_schedules),
+            "total_cleanup_items": (
+                location_count + bucket_count + notification_count + len(expired_schedules)
+            ),
         }
@@ -0,0 +1,156 @@
+"""
+分散カウンターサービス
+
+Firestoreは1ドキュメントあたりの持続的な書き込みが毎秒1回程度に制限されるため、
+人気のポップのリアクション数のように頻繁に更新されるカウンターは、親ドキュメントの
+サブコレクションに COUNTER_SHARDS 個のシャードを作り、書き込みごとにランダムなシャードへ加算します。
+
+Firestoreの構造（pops/{pop_id} の reaction_count の場合）:
+    pops/{pop_id}/counter_shards/reaction_count_0  {"count": 3}
+    pops/{pop_id}/counter_shards/reaction_count_1  {"count": 1}
+    ...
+
+- 値は「親ドキュメントのフィールドの値 + 全シャードの合計」。シャード導入前に親ドキュメントへ
+  加算されていた値はそのまま使うため、既存データの移行は不要
+- 読み取りは全シャードを一括取得（get_all）して合計し、COUNTER_CACHE_TTL_SECONDS の間
+  プロセス内にキャッシュする（このプロセスでの加算はキャッシュにも反映）
+- カウンター名は任意（例: "reaction_count"、"view_count"）
+- COUNTER_SHARDS は増やすことのみ可能（読み取り・削除は 0..COUNTER_SHARDS-1 のシャードのみを対象とする）
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+from app.config import settings
+from app.core.firebase import get_firestore_client
+
+# シャードを保存するサブコレクション名
+SHARDS_COLLECTION = "counter_shards"
+
+# キャッシュの件数がこれを超えたら期限切れのものを削除する
+_CACHE_PRUNE_THRESHOLD = 10_000
+
+
+class ShardedCounterService:
+    """分散カウンターサービスクラス"""
+
+    def __init__(self, num_shards: Optional[int] = None, cache_ttl_seconds: Optional[float] = None):
+        self.db = get_firestore_client()
+        self.num_shards = num_shards or settings.COUNTER_SHARDS
+        self.cache_ttl_seconds = (
+            settings.COUNTER_CACHE_TTL_SECONDS if cache_ttl_seconds is None else cache_ttl_seconds
+        )
+        # (親ドキュメントのパス, カウンター名) → (有効期限, シャードの合計)
+        self._cache: Dict[Tuple[str, str], Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def _shard_ref(self, parent_ref: Any, name: str, index: int) -> Any:
+        return parent_ref.collection(SHARDS_COLLECTION).document(f"{name}_{index}")
+
+    def shard_refs(self, parent_ref: Any, name: str) -> List[Any]:
+        """
+        カウンターの全シャードの参照を取得（親ドキュメントの削除時にシャードも削除するため）
+
+        Args:
+            parent_ref: 親ドキュメントの参照
+            name: カウンター名
+
+        Returns:
+            シャードの参照のリスト
+        """
+        return [self._shard_ref(parent_ref, name, index) for index in range(self.num_shards)]
+
+    def increment(
+        self, parent_ref: Any, name: str, amount: int = 1, transaction: Any = None
+    ) -> None:
+        """
+        カウンターに加算（ランダムに選んだシャードに書き込む）
+
+        Args:
+            parent_ref: 親ドキュメントの参照（例: pops/{pop_id}）
+            name: カウンター名
+            amount: 加算する値（減算は負の値）
+            transaction: 指定した場合はトランザクションの書き込みとして加算する
+                （リトライで重複して反映しないよう、キャッシュは加算せず破棄する）
+        """
+        shard_ref = self._shard_ref(parent_ref, name, random.randrange(self.num_shards))
+        shard_data = {"count": firestore.Increment(amount)}
+
+        key = (parent_ref.path, name)
+        if transaction is not None:
+            transaction.set(shard_ref, shard_data, merge=True)
+            with self._lock:
+                self._cache.pop(key, None)
+            return
+
+        shard_ref.set(shard_data, merge=True)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache[key] = (cached[0], cached[1] + amount)
+
+    def get_count(self, parent_ref: Any, name: str) -> int:
+        """
+        シャードの合計を取得
+
+        Args:
+            parent_ref: 親ドキュメントの参照
+            name: カウンター名
+
+        Returns:
+            シャードの合計（親ドキュメントのフィールドの値は含まない）
+        """
+        return self.get_counts([parent_ref], name)[parent_ref.path]
+
+    def get_counts(self, parent_refs: Iterable[Any], name: str) -> Dict[str, int]:
+        """
+        複数の親ドキュメントのシャードの合計を取得（キャッシュにない分を1回の一括取得で取得）
+
+        Args:
+            parent_refs: 親ドキュメントの参照のリスト
+            name: カウンター名
+
+        Returns:
+            親ドキュメントのパス → シャードの合計（親ドキュメントのフィールドの値は含まない）
+        """
+        now = time.monotonic()
+        counts: Dict[str, int] = {}
+        missing = {}
+        with self._lock:
+            for parent_ref in parent_refs:
+                cached = self._cache.get((parent_ref.path, name))
+                if cached is not None and cached[0] > now:
+                    counts[parent_ref.path] = cached[1]
+                else:
+                    missing[parent_ref.path] = parent_ref
+
+        if not missing:
+            return counts
+
+        # シャードのパス → 親ドキュメントのパス（get_all は指定した順に返すとは限らないため）
+        shard_parents = {}
+        shard_refs = []
+        for parent_path, parent_ref in missing.items():
+            for index in range(self.num_shards):
+                shard_ref = self._shard_ref(parent_ref, name, index)
+                shard_parents[shard_ref.path] = parent_path
+                shard_refs.append(shard_ref)
+
+        fetched = dict.fromkeys(missing, 0)
+        for shard_doc in self.db.get_all(shard_refs):
+            if shard_doc.exists:
+                fetched[shard_parents[shard_doc.reference.path]] += shard_doc.to_dict().get("count", 0)
+
+        expires_at = now + self.cache_ttl_seconds
+        with self._lock:
+            if len(self._cache) > _CACHE_PRUNE_THRESHOLD:
+                self._cache = {key: value for key, value in self._cache.items() if value[0] > now}
+            for parent_path, count in fetched.items():
+                self._cache[(parent_path, name)] = (expires_at, count)
+
+        counts.update(fetched)
+        return counts
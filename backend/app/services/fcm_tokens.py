@@ -0,0 +1,155 @@
+"""
+FCMトークン管理サービス
+
+ユーザードキュメントの fcm_tokens 配列（送信時に読む）と、トークンごとの最終確認日時を持つ
+fcm_tokens コレクション（登録簿）を、1回のバッチ書き込みでまとめて更新します。
+配列は ArrayUnion / ArrayRemove で更新するため、読み取りは不要で、同時に行われる
+送信時の無効トークン削除と競合しません。
+
+Firestoreのfcm_tokens コレクション構造（ドキュメントIDはトークンのSHA-256）:
+{
+    "token": "fcm_token",
+    "user_id": "uid",
+    "last_seen_at": "2025-01-20T09:00:00+09:00"  # アプリがトークンを登録するたびに更新
+}
+
+FCM_TOKEN_STALE_DAYS 日以上登録されていないトークンは、バッチ処理（prune_stale_tokens）で削除します。
+"""
+
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Iterable, List
+
+from firebase_admin import firestore
+from google.api_core.exceptions import NotFound
+from google.cloud.firestore_v1 import FieldFilter
+
+from app.config import settings
+from app.core.firebase import get_firestore_client
+from app.utils.timezone import now_jst
+
+logger = logging.getLogger(__name__)
+
+# 1回のバッチ書き込みの上限（Firestoreの上限は500）
+_BATCH_LIMIT = 500
+
+
+class FcmTokenService:
+    """FCMトークン管理サービスクラス"""
+
+    def __init__(self):
+        self.db = get_firestore_client()
+        self.collection_name = "fcm_tokens"
+
+    def _registry_ref(self, fcm_token: str):
+        token_id = hashlib.sha256(fcm_token.encode()).hexdigest()
+        return self.db.collection(self.collection_name).document(token_id)
+
+    async def register_token(self, user_id: str, fcm_token: str) -> None:
+        """
+        FCMトークンを登録（登録済みの場合は最終確認日時を更新）
+
+        Args:
+            user_id: ユーザID
+            fcm_token: FCMトークン
+
+        Raises:
+            ValueError: ユーザーが見つからない場合
+        """
+        now = now_jst()
+        batch = self.db.batch()
+        batch.update(
+            self.db.collection("users").document(user_id),
+            {"fcm_tokens": firestore.ArrayUnion([fcm_token]), "updated_at": now},
+        )
+        batch.set(
+            self._registry_ref(fcm_token),
+            {"token": fcm_token, "user_id": user_id, "last_seen_at": now},
+            merge=True,
+        )
+
+        try:
+            batch.commit()
+        except NotFound:
+            raise ValueError(f"ユーザーが見つかりません: {user_id}")
+
+    async def remove_tokens(self, user_id: str, fcm_tokens: Iterable[str]) -> None:
+        """
+        ユーザーのFCMトークンを削除
+
+        Args:
+            user_id: ユーザID
+            fcm_tokens: 削除するトークン
+
+        Raises:
+            ValueError: ユーザーが見つからない場合
+        """
+        fcm_tokens = list(fcm_tokens)
+        if not fcm_tokens:
+            return
+
+        try:
+            self._commit_removals(user_id, fcm_tokens)
+        except NotFound:
+            raise ValueError(f"ユーザーが見つかりません: {user_id}")
+
+    async def prune_stale_tokens(self) -> int:
+        """
+        FCM_TOKEN_STALE_DAYS 日以上登録されていないトークンを削除（バッチ処理から呼び出される）
+
+        Returns:
+            削除したトークン数
+        """
+        threshold = now_jst() - timedelta(days=settings.FCM_TOKEN_STALE_DAYS)
+        docs = (
+            self.db.collection(self.collection_name)
+            .where(filter=FieldFilter("last_seen_at", "<", threshold))
+            .stream()
+        )
+
+        tokens_by_user: Dict[str, List[str]] = defaultdict(list)
+        for doc in docs:
+            token_data = doc.to_dict()
+            tokens_by_user[token_data["user_id"]].append(token_data["token"])
+
+        pruned_count = 0
+        for user_id, fcm_tokens in tokens_by_user.items():
+            try:
+                self._commit_removals(user_id, fcm_tokens)
+            except NotFound:
+                # 削除済みのユーザーのトークンは登録簿からのみ削除
+                self._commit_removals(user_id, fcm_tokens, update_user=False)
+            pruned_count += len(fcm_tokens)
+
+        logger.info(f"古いFCMトークンを削除: {pruned_count}件")
+        return pruned_count
+
+    def _commit_removals(self, user_id: str, fcm_tokens: List[str], update_user: bool = True) -> None:
+        """
+        ユーザーの配列と登録簿からトークンをバッチ書き込みで削除（内部メソッド）
+
+        Args:
+            user_id: ユーザID
+            fcm_tokens: 削除するトークンのリスト
+            update_user: ユーザーの fcm_tokens 配列も更新するか
+        """
+        batch = self.db.batch()
+        writes = 0
+        if update_user:
+            batch.update(
+                self.db.collection("users").document(user_id),
+                {"fcm_tokens": firestore.ArrayRemove(fcm_tokens), "updated_at": now_jst()},
+            )
+            writes += 1
+
+        for fcm_token in fcm_tokens:
+            if writes >= _BATCH_LIMIT:
+                batch.commit()
+                batch = self.db.batch()
+                writes = 0
+            batch.delete(self._registry_ref(fcm_token))
+            writes += 1
+
+        batch.commit()
@@ -27,9 +27,9 @@ from app.services.users import UserService
 class FriendService:
     """フレンド管理サービスクラス"""
 
-    def __init__(self):
+    def __init__(self, user_service: Optional[UserService] = None):
         self.db = get_firestore_client()
-        self.user_service = UserService()
+        self.user_service = user_service or UserService()
 
     async def send_friend_request(
         self, from_user_id: str, request_data: FriendRequestCreate
@@ -116,7 +116,7 @@ class FriendService:
             if from_user:
                 req_data["from_user_display_name"] = from_user.display_name
                 req_data["from_user_username"] = from_user.username
-                req_data["from_user_profile_image_url"] = from_user.profile_image_url
+                req_data["from_user_profile_image_url"] = from_user.thumbnail_url()
 
             result.append(FriendRequestResponse(**req_data))
 
@@ -151,7 +151,7 @@ class FriendService:
             if to_user:
                 req_data["to_user_display_name"] = to_user.display_name
                 req_data["to_user_username"] = to_user.username
-                req_data["to_user_profile_image_url"] = to_user.profile_image_url
+                req_data["to_user_profile_image_url"] = to_user.thumbnail_url()
 
             result.append(FriendRequestResponse(**req_data))
 
@@ -307,7 +307,7 @@ class FriendService:
                 friendship_data["friend_display_name"] = friend.display_name
                 friendship_data["friend_username"] = friend.username
                 friendship_data["friend_email"] = friend.email
-                friendship_data["friend_profile_image_url"] = friend.profile_image_url
+                friendship_data["friend_profile_image_url"] = friend.thumbnail_url()
 
             result.append(FriendshipResponse(**friendship_data))
 
@@ -553,7 +553,7 @@ class FriendService:
             requester = await self.user_service.get_user_by_uid(req_data["requester_id"])
             if requester:
                 req_data["requester_display_name"] = requester.display_name
-                req_data["requester_profile_image_url"] = requester.profile_image_url
+                req_data["requester_profile_image_url"] = requester.thumbnail_url()
 
             result.append(LocationShareRequestResponse(**req_data))
 
@@ -5,21 +5,43 @@
 """
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
+from math import cos, radians, sqrt
 from typing import List, Optional, Tuple
 
 from app.config import settings
 from app.core.firebase import get_firestore_client
-from app.utils.timezone import now_jst
+from app.core.logging_config import log_diagnostic
+from app.core.metrics import GEOFENCE_EVENTS
+from app.utils.timezone import now_jst, to_jst
 from app.schemas.common import Coordinates
 from app.schemas.schedule import LocationScheduleInDB, ScheduleStatus
 from app.services.schedules import ScheduleService
 
 logger = logging.getLogger(__name__)
 
+# 推奨送信間隔の計算に使う最低想定速度（徒歩程度、m/s）
+# 停止中でも動き出した直後にジオフェンスを見逃さないよう、この速度以上で移動すると仮定する
+MIN_ASSUMED_SPEED_MPS = 1.4
+
+# 速度が不明な場合の想定速度（m/s、約50km/h）
+DEFAULT_ASSUMED_SPEED_MPS = 13.9
+
+# 境界到達までの推定時間に掛ける安全係数（境界の手前で次の送信が来るようにする）
+INTERVAL_SAFETY_FACTOR = 0.5
+
+# 前回位置との線分で通過判定を行う最大の時間差（秒）
+# これより間隔が空いた2点は直線移動とみなせないため、通過判定・時刻補間を行わない
+SEGMENT_MAX_GAP_SECONDS = 2 * 60 * 60
+
+# 地球の半径（メートル）
+EARTH_RADIUS = 6371000
+
 
 class GeofenceEvent:
-    """ジオフェンスイベント情報"""
+    """ジオフェンスイベント情報（位置情報更新ごとに生成されるため __slots__ で属性辞書を持たない）"""
+
+    __slots__ = ("schedule", "event_type", "current_coords", "distance_to_destination", "occurred_at")
 
     def __init__(
         self,
@@ -27,19 +49,35 @@ class GeofenceEvent:
         event_type: str,  # "entry" or "exit"
         current_coords: Coordinates,
         distance_to_destination: float,
+        occurred_at: Optional[datetime] = None,
     ):
         self.schedule = schedule
         self.event_type = event_type
         self.current_coords = current_coords
         self.distance_to_destination = distance_to_destination
+        self.occurred_at = occurred_at
+
+
+class GeofenceCrossing:
+    """前回位置→現在位置の線分とジオフェンス円の交差情報"""
+
+    def __init__(
+        self,
+        entered_at: Optional[datetime],
+        exited_at: Optional[datetime],
+        closest_distance: float,
+    ):
+        self.entered_at = entered_at  # 線分の途中で円に入った時刻（始点が円内ならNone）
+        self.exited_at = exited_at  # 線分の途中で円から出た時刻（終点が円内ならNone）
+        self.closest_distance = closest_distance  # 線分上で目的地に最も近づいた距離（メートル）
 
 
 class GeofencingService:
     """ジオフェンシングサービスクラス"""
 
-    def __init__(self):
+    def __init__(self, schedule_service: Optional[ScheduleService] = None):
         self.db = get_firestore_client()
-        self.schedule_service = ScheduleService()
+        self.schedule_service = schedule_service or ScheduleService()
 
     def _calculate_distance(self, coords1: Coordinates, coords2: Coordinates) -> float:
         """
@@ -105,14 +143,14 @@ class GeofencingService:
             # ジオフェンス内にいれば初回到着として扱う
             if schedule.arrived_at is None:
                 logger.info(
-                    f"スケジュール {schedule.id}: 初回ジオフェンス内を検出 (距離: {distance:.1f}m)"
+                    "スケジュール %s: 初回ジオフェンス内を検出 (距離: %.1fm)", schedule.id, distance
                 )
                 return True, distance
 
             if previous_coords is None:
                 # 前回の位置情報がない場合（初回記録）
                 logger.info(
-                    f"スケジュール {schedule.id}: ジオフェンス内を検出 (距離: {distance:.1f}m)"
+                    "スケジュール %s: ジオフェンス内を検出 (距離: %.1fm)", schedule.id, distance
                 )
                 return True, distance
             else:
@@ -121,8 +159,10 @@ class GeofencingService:
                 # 前回はジオフェンス外で、今回は内側の場合のみ侵入イベント
                 if prev_distance > geofence_radius:
                     logger.info(
-                        f"スケジュール {schedule.id}: ジオフェンスへ侵入 "
-                        f"(前回: {prev_distance:.1f}m → 現在: {distance:.1f}m)"
+                        "スケジュール %s: ジオフェンスへ侵入 (前回: %.1fm → 現在: %.1fm)",
+                        schedule.id,
+                        prev_distance,
+                        distance,
                     )
                     return True, distance
 
@@ -170,23 +210,150 @@ class GeofencingService:
                 # 前回はジオフェンス内で、今回は外側の場合のみ退出イベント
                 if prev_distance <= geofence_radius:
                     logger.info(
-                        f"スケジュール {schedule.id}: ジオフェンスから退出 "
-                        f"(前回: {prev_distance:.1f}m → 現在: {distance:.1f}m)"
+                        "スケジュール %s: ジオフェンスから退出 (前回: %.1fm → 現在: %.1fm)",
+                        schedule.id,
+                        prev_distance,
+                        distance,
                     )
                     return True, distance
 
         return False, distance
 
+    def find_segment_crossing(
+        self,
+        schedule: LocationScheduleInDB,
+        previous_coords: Coordinates,
+        current_coords: Coordinates,
+        previous_recorded_at: datetime,
+        current_recorded_at: datetime,
+        accuracy: Optional[float] = None,
+    ) -> Optional[GeofenceCrossing]:
+        """
+        前回位置から現在位置への線分がジオフェンス円を通過したかを判定
+
+        送信間隔が長いと、2回の送信の間にジオフェンスを通り抜けてしまうことがあるため、
+        2点間を等速直線移動とみなして線分と円の交差を求め、出入りの時刻を線形補間します。
+        目的地を中心とした局所平面（正距円筒近似）で計算するため、数km程度までの線分で有効です。
+
+        Args:
+            schedule: スケジュール情報
+            previous_coords: 前回の座標
+            current_coords: 現在の座標
+            previous_recorded_at: 前回の記録日時
+            current_recorded_at: 現在の記録日時
+            accuracy: 位置情報の精度（メートル）。円をかすめる程度の交差は精度の範囲内として無視する
+
+        Returns:
+            交差情報、線分が円を通らない・判定できない場合はNone
+        """
+        previous_recorded_at = to_jst(previous_recorded_at)
+        current_recorded_at = to_jst(current_recorded_at)
+        elapsed_seconds = (current_recorded_at - previous_recorded_at).total_seconds()
+        if elapsed_seconds <= 0 or elapsed_seconds > SEGMENT_MAX_GAP_SECONDS:
+            return None
+
+        geofence_radius = schedule.geofence_radius or settings.GEOFENCE_RADIUS_METERS
+        center = schedule.destination_coords
+
+        # 目的地を原点とした平面座標（メートル）に変換
+        meters_per_degree = radians(1) * EARTH_RADIUS
+        lng_scale = cos(radians(center.lat))
+        x0 = (previous_coords.lng - center.lng) * lng_scale * meters_per_degree
+        y0 = (previous_coords.lat - center.lat) * meters_per_degree
+        dx = (current_coords.lng - previous_coords.lng) * lng_scale * meters_per_degree
+        dy = (current_coords.lat - previous_coords.lat) * meters_per_degree
+
+        # 線分上で目的地に最も近い点
+        a = dx * dx + dy * dy
+        if a == 0:
+            return None
+        t_closest = min(1.0, max(0.0, -(x0 * dx + y0 * dy) / a))
+        closest_distance = sqrt((x0 + t_closest * dx) ** 2 + (y0 + t_closest * dy) ** 2)
+
+        # 円をかすめるだけの交差は、位置情報の誤差の範囲内として扱わない
+        required_depth = min(accuracy or 0.0, geofence_radius) / 2
+        if geofence_radius - closest_distance < required_depth or closest_distance > geofence_radius:
+            return None
+
+        # |P0 + t*D| = r を解き、円内にいる区間 [t_in, t_out] を求める
+        b = 2 * (x0 * dx + y0 * dy)
+        c = x0 * x0 + y0 * y0 - geofence_radius * geofence_radius
+        discriminant = max(0.0, b * b - 4 * a * c)
+        t_in = (-b - sqrt(discriminant)) / (2 * a)
+        t_out = (-b + sqrt(discriminant)) / (2 * a)
+
+        def interpolate(t: float) -> datetime:
+            return previous_recorded_at + timedelta(seconds=elapsed_seconds * t)
+
+        return GeofenceCrossing(
+            entered_at=interpolate(t_in) if 0.0 < t_in <= 1.0 else None,
+            exited_at=interpolate(t_out) if 0.0 <= t_out < 1.0 else None,
+            closest_distance=closest_distance,
+        )
+
+    async def get_tracked_schedules(
+        self, user_id: str, now: Optional[datetime] = None
+    ) -> List[LocationScheduleInDB]:
+        """
+        ジオフェンス判定の対象となるスケジュール（ACTIVE + ARRIVED）を取得
+
+        GEOFENCE_TIME_WINDOW_FILTER_ENABLED が有効な場合、ACTIVEスケジュールは
+        時間枠（前後に GEOFENCE_TIME_WINDOW_GRACE_MINUTES の猶予）が現在時刻を含むものに絞り込みます。
+        開始時刻の上限はクエリで絞り込み、終了時刻と繰り返し設定はPython側で判定します。
+        ARRIVEDスケジュールは退出を検出するため常に対象とします。
+
+        Args:
+            user_id: ユーザID
+            now: 現在時刻（省略時は現在のJST時刻）
+
+        Returns:
+            スケジュールのリスト
+        """
+        if settings.GEOFENCE_TIME_WINDOW_FILTER_ENABLED:
+            now = now or now_jst()
+            grace = timedelta(minutes=settings.GEOFENCE_TIME_WINDOW_GRACE_MINUTES)
+            candidate_schedules = await self.schedule_service.get_schedules_by_user(
+                user_id, ScheduleStatus.ACTIVE, start_time_before=now + grace
+            )
+            active_schedules = [
+                schedule
+                for schedule in candidate_schedules
+                if self.schedule_service.is_in_time_window(schedule, now, grace)
+            ]
+        else:
+            active_schedules = await self.schedule_service.get_schedules_by_user(
+                user_id, ScheduleStatus.ACTIVE
+            )
+
+        arrived_schedules = await self.schedule_service.get_schedules_by_user(
+            user_id, ScheduleStatus.ARRIVED
+        )
+        return active_schedules + arrived_schedules
+
     async def process_location_update(
-        self, user_id: str, current_coords: Coordinates, previous_coords: Optional[Coordinates] = None
+        self,
+        user_id: str,
+        current_coords: Coordinates,
+        previous_coords: Optional[Coordinates] = None,
+        schedules: Optional[List[LocationScheduleInDB]] = None,
+        previous_recorded_at: Optional[datetime] = None,
+        current_recorded_at: Optional[datetime] = None,
+        accuracy: Optional[float] = None,
     ) -> List[GeofenceEvent]:
         """
         位置情報更新時のジオフェンス判定処理
 
+        前回・今回の記録日時が渡された場合は、2点間の線分でジオフェンスの通過を判定し、
+        到着・退出時刻を線形補間で求めます（送信間隔が長くても通り抜けを検出できる）。
+
         Args:
             user_id: ユーザID
             current_coords: 現在の座標
             previous_coords: 前回の座標（オプション）
+            schedules: 判定対象のスケジュール（省略時はACTIVE/ARRIVEDを取得）
+            previous_recorded_at: 前回の記録日時（オプション）
+            current_recorded_at: 今回の記録日時（オプション）
+            accuracy: 位置情報の精度（メートル、オプション）
 
         Returns:
             発生したジオフェンスイベントのリスト
@@ -194,61 +361,121 @@ class GeofencingService:
         events: List[GeofenceEvent] = []
 
         # アクティブなスケジュールと到着済みスケジュールを取得
-        active_schedules = await self.schedule_service.get_schedules_by_user(
-            user_id, ScheduleStatus.ACTIVE
-        )
-        arrived_schedules = await self.schedule_service.get_schedules_by_user(
-            user_id, ScheduleStatus.ARRIVED
-        )
-
-        all_schedules = active_schedules + arrived_schedules
-
-        logger.info(
-            f"[ジオフェンス処理] ユーザー: {user_id}, "
-            f"対象スケジュール: {len(all_schedules)}件 "
-            f"(ACTIVE: {len(active_schedules)}, ARRIVED: {len(arrived_schedules)})"
+        if schedules is None:
+            schedules = await self.get_tracked_schedules(user_id)
+
+        arrived_count = sum(1 for s in schedules if s.status == ScheduleStatus.ARRIVED)
+
+        log_diagnostic(
+            logger,
+            "[ジオフェンス処理] ユーザー: %s, 対象スケジュール: %d件 (ACTIVE: %d, ARRIVED: %d)",
+            user_id,
+            len(schedules),
+            len(schedules) - arrived_count,
+            arrived_count,
         )
 
         # 現在時刻を取得
         now = now_jst()
 
         # 各スケジュールに対してジオフェンス判定
-        for schedule in all_schedules:
-            # 時間枠はあくまで目安なので、時間外でも通知を送る
-            # （start_time/end_timeのチェックは行わない）
-
-            logger.info(
-                f"[ジオフェンス判定] スケジュール: {schedule.id}, "
-                f"目的地: {schedule.destination_name}, "
-                f"ステータス: {schedule.status}, "
-                f"通知先: {len(schedule.notify_to_user_ids)}人"
+        for schedule in schedules:
+            # 時間枠はあくまで目安なので、前後の猶予を含めて判定対象とする
+            # （時間枠による絞り込みは get_tracked_schedules で行う）
+
+            log_diagnostic(
+                logger,
+                "[ジオフェンス判定] スケジュール: %s, 目的地: %s, ステータス: %s, 通知先: %d人",
+                schedule.id,
+                schedule.destination_name,
+                schedule.status,
+                len(schedule.notify_to_user_ids),
             )
 
+            # 前回位置→現在位置の線分とジオフェンスの交差（出入り時刻の補間用）
+            crossing = None
+            if previous_coords is not None and previous_recorded_at and current_recorded_at:
+                crossing = self.find_segment_crossing(
+                    schedule,
+                    previous_coords,
+                    current_coords,
+                    previous_recorded_at,
+                    current_recorded_at,
+                    accuracy,
+                )
+
             # 到着判定
             is_entry, distance = await self.check_geofence_entry(
                 schedule, current_coords, previous_coords
             )
 
-            logger.info(
-                f"[到着判定] スケジュール: {schedule.id}, "
-                f"到着判定: {is_entry}, 距離: {distance:.1f}m"
+            log_diagnostic(
+                logger,
+                "[到着判定] スケジュール: %s, 到着判定: %s, 距離: %.1fm",
+                schedule.id,
+                is_entry,
+                distance,
             )
 
             if is_entry:
+                arrived_at = (crossing.entered_at if crossing else None) or now
+
                 # 到着イベントを記録
                 event = GeofenceEvent(
                     schedule=schedule,
                     event_type="entry",
                     current_coords=current_coords,
                     distance_to_destination=distance,
+                    occurred_at=arrived_at,
                 )
                 events.append(event)
 
                 # スケジュールステータスを更新
                 await self.schedule_service.update_schedule_status(
-                    schedule.id, ScheduleStatus.ARRIVED, arrived_at=now
+                    schedule.id, ScheduleStatus.ARRIVED, arrived_at=arrived_at
+                )
+                logger.info("スケジュール %s: ステータスをARRIVEDに更新", schedule.id)
+
+            elif (
+                schedule.status == ScheduleStatus.ACTIVE
+                and crossing is not None
+                and crossing.entered_at is not None
+                and crossing.exited_at is not None
+            ):
+                # 2回の送信の間にジオフェンスを通り抜けた場合は、到着と退出を両方記録する
+                logger.info(
+                    "スケジュール %s: ジオフェンスを通過 (最接近: %.1fm, 到着: %s, 退出: %s)",
+                    schedule.id,
+                    crossing.closest_distance,
+                    crossing.entered_at,
+                    crossing.exited_at,
+                )
+                events.append(
+                    GeofenceEvent(
+                        schedule=schedule,
+                        event_type="entry",
+                        current_coords=current_coords,
+                        distance_to_destination=crossing.closest_distance,
+                        occurred_at=crossing.entered_at,
+                    )
+                )
+                events.append(
+                    GeofenceEvent(
+                        schedule=schedule,
+                        event_type="exit",
+                        current_coords=current_coords,
+                        distance_to_destination=distance,
+                        occurred_at=crossing.exited_at,
+                    )
                 )
-                logger.info(f"スケジュール {schedule.id}: ステータスをARRIVEDに更新")
+
+                await self.schedule_service.update_schedule_status(
+                    schedule.id,
+                    ScheduleStatus.COMPLETED,
+                    arrived_at=crossing.entered_at,
+                    departed_at=crossing.exited_at,
+                )
+                logger.info("スケジュール %s: ステータスをCOMPLETEDに更新（通過）", schedule.id)
 
             # 退出判定（到着済みスケジュールのみ）
             if schedule.status == ScheduleStatus.ARRIVED:
@@ -256,30 +483,132 @@ class GeofencingService:
                     schedule, current_coords, previous_coords
                 )
 
-                logger.info(
-                    f"[退出判定] スケジュール: {schedule.id}, "
-                    f"退出判定: {is_exit}, 距離: {distance:.1f}m"
+                log_diagnostic(
+                    logger,
+                    "[退出判定] スケジュール: %s, 退出判定: %s, 距離: %.1fm",
+                    schedule.id,
+                    is_exit,
+                    distance,
                 )
 
                 if is_exit:
+                    departed_at = (crossing.exited_at if crossing else None) or now
+
                     # 退出イベントを記録
                     event = GeofenceEvent(
                         schedule=schedule,
                         event_type="exit",
                         current_coords=current_coords,
                         distance_to_destination=distance,
+                        occurred_at=departed_at,
                     )
                     events.append(event)
 
                     # スケジュールステータスを更新
                     await self.schedule_service.update_schedule_status(
-                        schedule.id, ScheduleStatus.COMPLETED, departed_at=now
+                        schedule.id, ScheduleStatus.COMPLETED, departed_at=departed_at
                     )
-                    logger.info(f"スケジュール {schedule.id}: ステータスをCOMPLETEDに更新")
+                    logger.info("スケジュール %s: ステータスをCOMPLETEDに更新", schedule.id)
 
-        logger.info(f"[ジオフェンス処理完了] 検出イベント: {len(events)}件")
+        for event in events:
+            GEOFENCE_EVENTS.inc(event_type=event.event_type)
+
+        log_diagnostic(logger, "[ジオフェンス処理完了] 検出イベント: %d件", len(events))
         return events
 
+    def estimate_speed(
+        self,
+        previous_coords: Optional[Coordinates],
+        previous_recorded_at: Optional[datetime],
+        current_coords: Coordinates,
+        current_recorded_at: datetime,
+    ) -> Optional[float]:
+        """
+        直近2点から移動速度を推定
+
+        Args:
+            previous_coords: 前回の座標
+            previous_recorded_at: 前回の記録日時
+            current_coords: 現在の座標
+            current_recorded_at: 現在の記録日時
+
+        Returns:
+            移動速度（m/s）、推定できない場合はNone
+        """
+        if previous_coords is None or previous_recorded_at is None:
+            return None
+
+        elapsed_seconds = (
+            to_jst(current_recorded_at) - to_jst(previous_recorded_at)
+        ).total_seconds()
+        if elapsed_seconds <= 0:
+            return None
+
+        return self._calculate_distance(previous_coords, current_coords) / elapsed_seconds
+
+    def calculate_next_update_interval(
+        self,
+        schedules: List[LocationScheduleInDB],
+        current_coords: Coordinates,
+        speed_mps: Optional[float] = None,
+        now: Optional[datetime] = None,
+    ) -> int:
+        """
+        次回の位置情報送信までの推奨間隔を計算
+
+        ACTIVE/ARRIVEDスケジュールのジオフェンス境界までの最短距離と移動速度から、
+        境界に到達する前に次の送信が来るような間隔を求めます。
+        時間枠の開始前のスケジュールは距離ではなく開始時刻までの時間で間隔を制限します。
+        到着済みで円内に滞在中のスケジュールは基本間隔（LOCATION_UPDATE_INTERVAL_MINUTES）を使います。
+
+        Args:
+            schedules: 対象スケジュール（ACTIVE/ARRIVED）
+            current_coords: 現在の座標
+            speed_mps: 直近の移動速度（m/s、不明な場合はNone）
+            now: 現在時刻（省略時は現在のJST時刻）
+
+        Returns:
+            推奨間隔（秒）
+        """
+        min_interval = settings.LOCATION_UPDATE_MIN_INTERVAL_SECONDS
+        max_interval = settings.LOCATION_UPDATE_MAX_INTERVAL_SECONDS
+        now = now or now_jst()
+
+        if speed_mps is None:
+            speed_mps = DEFAULT_ASSUMED_SPEED_MPS
+        speed_mps = max(speed_mps, MIN_ASSUMED_SPEED_MPS)
+
+        interval = float(max_interval)
+        for schedule in schedules:
+            if schedule.status not in (ScheduleStatus.ACTIVE, ScheduleStatus.ARRIVED):
+                continue
+
+            # 時間枠の開始前（基本間隔以上先）のスケジュールは、開始時刻に合わせて起こすだけにする
+            occurrence = self.schedule_service.get_occurrence(schedule, now)
+            occurrence_start = occurrence[0] if occurrence else to_jst(schedule.start_time)
+            seconds_until_start = (occurrence_start - now).total_seconds()
+            if (
+                schedule.status == ScheduleStatus.ACTIVE
+                and seconds_until_start > settings.LOCATION_UPDATE_INTERVAL_MINUTES * 60
+            ):
+                interval = min(interval, seconds_until_start)
+                continue
+
+            geofence_radius = schedule.geofence_radius or settings.GEOFENCE_RADIUS_METERS
+            distance = self._calculate_distance(current_coords, schedule.destination_coords)
+
+            # 到着済みで円内に滞在中は基本間隔で十分（退出時刻は線分の交差判定で補間される）
+            # 円内では境界までの距離が半径以下のため、距離から求めると常に最短間隔になってしまう
+            if schedule.status == ScheduleStatus.ARRIVED and distance <= geofence_radius:
+                interval = min(interval, settings.LOCATION_UPDATE_INTERVAL_MINUTES * 60)
+                continue
+
+            boundary_distance = abs(distance - geofence_radius)
+
+            interval = min(interval, boundary_distance / speed_mps * INTERVAL_SAFETY_FACTOR)
+
+        return int(max(min_interval, min(interval, max_interval)))
+
     async def get_nearby_schedules(
         self, user_id: str, current_coords: Coordinates, radius_meters: Optional[int] = None
     ) -> List[Tuple[LocationScheduleInDB, float]]:
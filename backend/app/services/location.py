@@ -2,14 +2,21 @@
 位置情報トラッキングサービス
 """
 
+import json
+import logging
 import uuid
 from datetime import datetime, timedelta
 from typing import List, Optional
 
+from firebase_admin import firestore
+
+from app.config import settings
 from app.core.firebase import get_firestore_client
-from app.utils.timezone import now_jst
+from app.utils.encryption import decrypt_many, decrypt_string, encrypt_location_data
+from app.utils.timezone import now_jst, to_jst
 from app.schemas.common import Coordinates
 from app.schemas.location import (
+    LocationBucketInDB,
     LocationHistoryInDB,
     LocationUpdateRequest,
     ScheduleStatusInfo,
@@ -17,14 +24,43 @@ from app.schemas.location import (
 from app.schemas.schedule import ScheduleStatus
 from app.services.schedules import ScheduleService
 
+logger = logging.getLogger(__name__)
+
 
 class LocationService:
     """位置情報トラッキングサービスクラス"""
 
-    def __init__(self):
+    def __init__(self, schedule_service: Optional[ScheduleService] = None):
         self.db = get_firestore_client()
         self.collection_name = "location_history"
-        self.schedule_service = ScheduleService()
+        self.bucket_collection_name = "location_buckets"
+        self.schedule_service = schedule_service or ScheduleService()
+
+    @property
+    def uses_buckets(self) -> bool:
+        """時間バケット形式で保存するかどうか"""
+        return settings.LOCATION_HISTORY_STORAGE == "bucket"
+
+    @property
+    def encrypts_coords(self) -> bool:
+        """座標を暗号化して保存するかどうか（1点1ドキュメント形式のみ、設定の検証で保証）"""
+        return settings.LOCATION_HISTORY_ENCRYPTION_ENABLED
+
+    def _get_bucket_start(self, recorded_at: datetime) -> datetime:
+        """
+        記録日時が属する時間枠の開始日時を取得
+
+        Args:
+            recorded_at: 記録日時
+
+        Returns:
+            時間枠の開始日時（JST）
+        """
+        recorded_at = to_jst(recorded_at)
+        day_start = recorded_at.replace(hour=0, minute=0, second=0, microsecond=0)
+        bucket_minutes = settings.LOCATION_BUCKET_MINUTES
+        elapsed_minutes = int((recorded_at - day_start).total_seconds() // 60)
+        return day_start + timedelta(minutes=elapsed_minutes // bucket_minutes * bucket_minutes)
 
     async def record_location(
         self,
@@ -43,10 +79,14 @@ class LocationService:
         Returns:
             記録された位置情報
         """
-        # 新しい位置情報履歴IDを生成
-        history_id = str(uuid.uuid4())
         now = now_jst()
         recorded_at = location_data.recorded_at or now
+
+        if self.uses_buckets:
+            return await self._append_to_bucket(user_id, location_data, recorded_at, schedule_id)
+
+        # 新しい位置情報履歴IDを生成
+        history_id = str(uuid.uuid4())
         auto_delete_at = recorded_at + timedelta(hours=24)
 
         # 位置情報データを作成
@@ -59,12 +99,88 @@ class LocationService:
             "recorded_at": recorded_at,
             "auto_delete_at": auto_delete_at,
         }
+        history = LocationHistoryInDB(**history_dict)
+
+        # 座標を暗号化して保存する場合は平文の座標を残さない
+        if self.encrypts_coords:
+            del history_dict["coords"]
+            history_dict["encrypted_coords"] = encrypt_location_data(
+                location_data.coords.lat, location_data.coords.lng
+            )
 
         # Firestoreに保存
         history_ref = self.db.collection(self.collection_name).document(history_id)
         history_ref.set(history_dict)
 
-        return LocationHistoryInDB(**history_dict)
+        return history
+
+    async def _append_to_bucket(
+        self,
+        user_id: str,
+        location_data: LocationUpdateRequest,
+        recorded_at: datetime,
+        schedule_id: Optional[str] = None,
+    ) -> LocationHistoryInDB:
+        """
+        位置情報を時間バケットの並列配列に追記
+
+        同じバケットへの同時書き込みで点が失われないよう、トランザクション内で追記します。
+
+        Args:
+            user_id: ユーザID
+            location_data: 位置情報データ
+            recorded_at: 記録日時
+            schedule_id: 関連するスケジュールID（オプション）
+
+        Returns:
+            記録された位置情報
+        """
+        bucket_start = self._get_bucket_start(recorded_at)
+        bucket_end = bucket_start + timedelta(minutes=settings.LOCATION_BUCKET_MINUTES)
+        bucket_id = f"{user_id}_{bucket_start.strftime('%Y%m%d%H%M')}"
+        bucket_ref = self.db.collection(self.bucket_collection_name).document(bucket_id)
+
+        @firestore.transactional
+        def append_point(transaction) -> dict:
+            snapshot = bucket_ref.get(transaction=transaction)
+            if snapshot.exists:
+                bucket_dict = snapshot.to_dict()
+            else:
+                bucket_dict = {
+                    "id": bucket_id,
+                    "user_id": user_id,
+                    "bucket_start": bucket_start,
+                    "bucket_end": bucket_end,
+                    "lats": [],
+                    "lngs": [],
+                    "accuracies": [],
+                    "recorded_ats": [],
+                    "schedule_ids": [],
+                    "auto_delete_at": bucket_end + timedelta(hours=24),
+                }
+
+            bucket_dict["lats"].append(location_data.coords.lat)
+            bucket_dict["lngs"].append(location_data.coords.lng)
+            bucket_dict["accuracies"].append(location_data.accuracy)
+            bucket_dict["recorded_ats"].append(recorded_at)
+            bucket_dict["schedule_ids"].append(schedule_id)
+            bucket_dict["point_count"] = len(bucket_dict["lats"])
+
+            transaction.set(bucket_ref, bucket_dict)
+            return bucket_dict
+
+        bucket_dict = append_point(self.db.transaction())
+        point_index = bucket_dict["point_count"] - 1
+
+        return LocationHistoryInDB(
+            id=f"{bucket_id}_{point_index}",
+            user_id=user_id,
+            schedule_id=schedule_id,
+            coords=location_data.coords,
+            accuracy=location_data.accuracy,
+            recorded_at=recorded_at,
+            auto_delete_at=bucket_dict["auto_delete_at"],
+        )
 
     async def get_latest_location(self, user_id: str) -> Optional[LocationHistoryInDB]:
         """
@@ -76,20 +192,12 @@ class LocationService:
         Returns:
             最新の位置情報、存在しない場合はNone
         """
-        query = (
-            self.db.collection(self.collection_name)
-            .where("user_id", "==", user_id)
-            .order_by("recorded_at", direction="DESCENDING")
-            .limit(1)
-        )
+        histories = await self.get_location_history(user_id, limit=1)
 
-        docs = list(query.stream())
-
-        if not docs:
+        if not histories:
             return None
 
-        location_data = docs[0].to_dict()
-        return LocationHistoryInDB(**location_data)
+        return histories[0]
 
     async def get_location_history(
         self, user_id: str, limit: int = 100
@@ -102,7 +210,77 @@ class LocationService:
             limit: 取得件数の上限
 
         Returns:
-            位置情報履歴のリスト
+            位置情報履歴のリスト（新しい順）
+        """
+        if not self.uses_buckets:
+            return await self._get_document_history(user_id, limit)
+
+        histories = await self._get_bucket_history(user_id, limit)
+
+        # バケット形式への切り替え前に記録された1点1ドキュメントのデータを補完
+        # （旧形式のデータは24時間TTLで消えるため、切り替えから保持期間内のみ読み取る）
+        if len(histories) < limit and self._in_bucket_cutover_period():
+            histories.extend(await self._get_document_history(user_id, limit - len(histories)))
+
+        return histories
+
+    def _in_bucket_cutover_period(self) -> bool:
+        """
+        バケット形式への切り替え後、旧形式のデータが残っている期間かどうか（内部メソッド）
+
+        Returns:
+            LOCATION_BUCKET_CUTOVER_AT から DATA_RETENTION_HOURS 以内の場合True
+        """
+        cutover_at = settings.LOCATION_BUCKET_CUTOVER_AT
+        if cutover_at is None:
+            return False
+        return now_jst() < to_jst(cutover_at) + timedelta(hours=settings.DATA_RETENTION_HOURS)
+
+    async def _get_bucket_history(
+        self, user_id: str, limit: int
+    ) -> List[LocationHistoryInDB]:
+        """
+        時間バケット形式の位置情報履歴を取得
+
+        新しいバケットから順に展開し、必要な件数が揃った時点で読み取りを打ち切ります。
+        直近N件の取得は通常1〜2ドキュメントの読み取りで完了します。
+
+        Args:
+            user_id: ユーザID
+            limit: 取得件数の上限
+
+        Returns:
+            位置情報履歴のリスト（新しい順）
+        """
+        # 1バケットには必ず1点以上含まれるため、limit件のバケットで十分
+        query = (
+            self.db.collection(self.bucket_collection_name)
+            .where("user_id", "==", user_id)
+            .order_by("bucket_start", direction="DESCENDING")
+            .limit(limit)
+        )
+
+        histories: List[LocationHistoryInDB] = []
+        for doc in query.stream():
+            bucket = LocationBucketInDB(**doc.to_dict())
+            histories.extend(bucket.to_histories())
+            if len(histories) >= limit:
+                break
+
+        return histories[:limit]
+
+    async def _get_document_history(
+        self, user_id: str, limit: int
+    ) -> List[LocationHistoryInDB]:
+        """
+        1点1ドキュメント形式の位置情報履歴を取得
+
+        Args:
+            user_id: ユーザID
+            limit: 取得件数の上限
+
+        Returns:
+            位置情報履歴のリスト（新しい順）
         """
         query = (
             self.db.collection(self.collection_name)
@@ -111,12 +289,49 @@ class LocationService:
             .limit(limit)
         )
 
-        histories = []
-        for doc in query.stream():
-            history_data = doc.to_dict()
-            histories.append(LocationHistoryInDB(**history_data))
+        history_data_list = self._decrypt_coords([doc.to_dict() for doc in query.stream()])
 
-        return histories
+        return [LocationHistoryInDB(**history_data) for history_data in history_data_list]
+
+    def _decrypt_coords(self, history_data_list: List[dict]) -> List[dict]:
+        """
+        暗号化された座標をまとめて復号化し、coords に展開（内部メソッド）
+
+        暗号化の設定に関わらず、encrypted_coords を持つドキュメントは復号化します
+        （設定の切り替え前後のデータが混在していても読み取れるようにするため）。
+        復号化できないドキュメント（ENCRYPTION_OLD_KEYS から外したキーで暗号化されたものなど）は
+        ログに記録して除外します。
+
+        Args:
+            history_data_list: 位置情報履歴ドキュメントのリスト
+
+        Returns:
+            復号化できたドキュメントのリスト（元の順序）
+        """
+        encrypted = [data for data in history_data_list if data.get("encrypted_coords")]
+        if not encrypted:
+            return history_data_list
+
+        tokens = [data.pop("encrypted_coords") for data in encrypted]
+        try:
+            decrypted = decrypt_many(tokens)
+        except ValueError:
+            # 1件ずつ復号化し直して、失敗したものだけを除外する
+            decrypted = []
+            for data, token in zip(encrypted, tokens):
+                try:
+                    decrypted.append(decrypt_string(token))
+                except ValueError as e:
+                    logger.warning(f"[位置情報] 座標を復号化できない履歴を除外: {data.get('id')}: {e}")
+                    decrypted.append(None)
+
+        for data, plaintext in zip(encrypted, decrypted):
+            if plaintext is not None:
+                coords = json.loads(plaintext)
+                data["coords"] = {"lat": coords["lat"], "lng": coords["lng"]}
+
+        # 暗号化して保存されたドキュメントは平文の coords を持たないため、復号化できたものだけが残る
+        return [data for data in history_data_list if data.get("coords")]
 
     async def get_active_schedule_status(self, user_id: str) -> List[ScheduleStatusInfo]:
         """
@@ -194,8 +409,10 @@ class LocationService:
         """
         24時間以上経過した位置情報履歴を削除
 
+        時間バケット形式のデータはバケット単位でまとめて削除します。
+
         Returns:
-            削除した件数
+            削除した件数（ドキュメント数）
         """
         now = now_jst()
 
@@ -206,4 +423,12 @@ class LocationService:
             doc.reference.delete()
             deleted_count += 1
 
+        # 保存形式を切り替えた後も残ったバケットが消えるよう、設定に関わらず削除する
+        bucket_query = self.db.collection(self.bucket_collection_name).where(
+            "auto_delete_at", "<=", now
+        )
+        for doc in bucket_query.stream():
+            doc.reference.delete()
+            deleted_count += 1
+
         return deleted_count
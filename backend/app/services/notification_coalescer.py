@@ -0,0 +1,125 @@
+"""
+通知のまとめ送信（コアレッシング）
+
+同じ受信者への自動通知を短い時間枠（NOTIFICATION_COALESCE_WINDOW_SECONDS）の間プロセス内に保持し、
+1回のプッシュ通知にまとめて送信します。グループでの外出のように、1人の到着が多数のフレンドに
+届き、そのフレンドも同時に送信者になる場面でのFCM呼び出しと端末の起動回数を減らします。
+
+通知の保存（notifications コレクション）はイベントごとに即時に行うため、通知一覧や
+滞在通知の重複防止には影響しません。まとめるのはプッシュ通知の送信のみです。
+
+時間枠の経過後にバックグラウンドで送信するため、Cloud Runでは、リクエスト処理中以外も
+CPUが割り当てられる設定（CPU always allocated）の場合にのみ有効にしてください。
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.core.metrics import NOTIFICATIONS_COALESCED
+from app.schemas.notification import NotificationType
+from app.services.notifications import NotificationService
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PendingPush:
+    """送信待ちのプッシュ通知"""
+
+    notification_id: str
+    title: str
+    body: str
+    notification_type: NotificationType
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+class NotificationCoalescer:
+    """受信者ごとに通知をまとめて送信するクラス"""
+
+    def __init__(
+        self,
+        notification_service: NotificationService,
+        window_seconds: Optional[float] = None,
+    ):
+        self.notification_service = notification_service
+        self.window_seconds = (
+            settings.NOTIFICATION_COALESCE_WINDOW_SECONDS
+            if window_seconds is None
+            else window_seconds
+        )
+        self._pending: Dict[str, List[PendingPush]] = {}
+        self._flush_tasks: Dict[str, asyncio.Task] = {}
+
+    @property
+    def enabled(self) -> bool:
+        """まとめ送信が有効かどうか"""
+        return self.window_seconds > 0
+
+    def add(self, user_id: str, push: PendingPush) -> None:
+        """
+        プッシュ通知を送信待ちに追加
+
+        受信者の時間枠が始まっていない場合は、時間枠の経過後に送信するタスクを開始します。
+
+        Args:
+            user_id: 送信先ユーザID
+            push: 送信するプッシュ通知
+        """
+        self._pending.setdefault(user_id, []).append(push)
+        if user_id not in self._flush_tasks:
+            self._flush_tasks[user_id] = asyncio.create_task(self._flush_later(user_id))
+
+    async def _flush_later(self, user_id: str) -> None:
+        """時間枠の経過後に受信者の通知を送信"""
+        await asyncio.sleep(self.window_seconds)
+        self._flush_tasks.pop(user_id, None)
+        await self.flush(user_id)
+
+    async def flush(self, user_id: str) -> None:
+        """
+        受信者の送信待ちの通知を1回のプッシュ通知にまとめて送信
+
+        Args:
+            user_id: 送信先ユーザID
+        """
+        pushes = self._pending.pop(user_id, [])
+        if not pushes:
+            return
+
+        if len(pushes) == 1:
+            push = pushes[0]
+            title, body, data = push.title, push.body, push.data
+        else:
+            # 各通知の1行目（「今ね、〜」のメッセージ）を並べる
+            title = f"📍 {len(pushes)}件の新しい通知"
+            body = "\n".join(push.body.split("\n", 1)[0] for push in pushes)
+            data = {
+                **pushes[-1].data,
+                "notification_ids": ",".join(push.notification_id for push in pushes),
+                "coalesced_count": len(pushes),
+            }
+            NOTIFICATIONS_COALESCED.inc(len(pushes) - 1)
+
+        try:
+            await self.notification_service.send_push_notification(
+                user_id=user_id,
+                title=title,
+                body=body,
+                notification_type=pushes[-1].notification_type,
+                data=data,
+                save_to_db=False,
+            )
+            logger.info(f"[まとめ送信] {user_id} に {len(pushes)}件の通知を送信しました")
+        except Exception as e:
+            logger.error(f"[まとめ送信] {user_id} への送信に失敗: {e}", exc_info=True)
+
+    async def flush_all(self) -> None:
+        """送信待ちの通知をすべて送信（アプリケーション終了時に呼び出す）"""
+        for task in self._flush_tasks.values():
+            task.cancel()
+        self._flush_tasks.clear()
+        for user_id in list(self._pending):
+            await self.flush(user_id)
@@ -3,21 +3,25 @@
 
 Firebase Cloud Messaging (FCM) を使用したプッシュ通知の送信と、
 Firestoreでの通知履歴管理を行います。
+通知は受信者ごとに notifications コレクションへ1件だけ保存し、通知一覧と24時間以内の履歴の
+両方をそこから返します。
 """
 
 import logging
+from datetime import datetime, timedelta
 from typing import Any, List, Optional
 
-from firebase_admin import messaging
 from google.cloud.firestore_v1 import FieldFilter
 
 from app.core.firebase import get_firestore_client
+from app.core.metrics import FCM_TOKENS_PRUNED, NOTIFICATIONS_FAILED, NOTIFICATIONS_SENT
 from app.schemas.notification import (
     NotificationResponse,
     NotificationSettings,
     NotificationSettingsUpdate,
     NotificationType,
 )
+from app.services.fcm_tokens import FcmTokenService
 from app.services.users import UserService
 from app.utils.timezone import now_jst
 
@@ -27,9 +31,14 @@ logger = logging.getLogger(__name__)
 class NotificationService:
     """通知サービスクラス"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        user_service: Optional[UserService] = None,
+        fcm_token_service: Optional[FcmTokenService] = None,
+    ):
         self.db = get_firestore_client()
-        self.user_service = UserService()
+        self.user_service = user_service or UserService()
+        self.fcm_token_service = fcm_token_service or FcmTokenService()
 
     async def send_push_notification(
         self,
@@ -39,6 +48,9 @@ class NotificationService:
         notification_type: NotificationType,
         data: Optional[dict[str, Any]] = None,
         save_to_db: bool = True,
+        from_user_id: Optional[str] = None,
+        schedule_id: Optional[str] = None,
+        ttl: Optional[timedelta] = None,
     ) -> Optional[NotificationResponse]:
         """
         プッシュ通知を送信
@@ -50,6 +62,9 @@ class NotificationService:
             notification_type: 通知タイプ
             data: 追加データ（オプション）
             save_to_db: Firestoreに通知履歴を保存するかどうか
+            from_user_id: 送信元ユーザID（オプション）
+            schedule_id: 関連するスケジュールID（オプション）
+            ttl: 保存した通知を自動削除するまでの時間（Noneの場合は削除しない）
 
         Returns:
             保存された通知データ（save_to_db=Trueの場合）
@@ -79,12 +94,15 @@ class NotificationService:
             )
             # トークンがなくてもDB保存は行う（後で通知一覧で確認できるように）
             if save_to_db:
-                result = await self._save_notification_to_db(
+                result = await self.save_notification(
                     user_id=user_id,
                     title=title,
                     body=body,
                     notification_type=notification_type,
                     data=data,
+                    from_user_id=from_user_id,
+                    schedule_id=schedule_id,
+                    ttl=ttl,
                 )
                 logger.info(f"[通知送信] DB保存完了: notification_id={result.notification_id}")
                 return result
@@ -96,6 +114,10 @@ class NotificationService:
         tokens = user.fcm_tokens
 
         # FCMで送信（個別送信）
+        # messaging の読み込みは重いため、起動時ではなく初回の送信時に行う
+        from firebase_admin import messaging
+
+        response = None
         try:
             # send_multicast の代わりに send_each を使用
             messages = []
@@ -129,6 +151,10 @@ class NotificationService:
                 )
 
             response = messaging.send_each(messages)
+            NOTIFICATIONS_SENT.inc(response.success_count, notification_type=notification_type.value)
+            NOTIFICATIONS_FAILED.inc(
+                response.failure_count, notification_type=notification_type.value
+            )
             logger.info(
                 f"[通知送信] FCM送信完了: {response.success_count}/{len(tokens)} 成功, "
                 f"{response.failure_count} 失敗"
@@ -159,35 +185,44 @@ class NotificationService:
                 # 無効なトークンのみ削除
                 if failed_tokens:
                     await self._remove_invalid_fcm_tokens(user_id, failed_tokens)
+                    FCM_TOKENS_PRUNED.inc(len(failed_tokens))
 
         except Exception as e:
             logger.error(f"[通知送信] FCM送信エラー: {type(e).__name__}: {str(e)}", exc_info=True)
+            if response is None:
+                NOTIFICATIONS_FAILED.inc(len(tokens), notification_type=notification_type.value)
             # エラーが発生してもDB保存は続行
 
         # Firestoreに通知を保存
         if save_to_db:
-            result = await self._save_notification_to_db(
+            result = await self.save_notification(
                 user_id=user_id,
                 title=title,
                 body=body,
                 notification_type=notification_type,
                 data=data,
+                from_user_id=from_user_id,
+                schedule_id=schedule_id,
+                ttl=ttl,
             )
             logger.info(f"[通知送信] DB保存完了: notification_id={result.notification_id}")
             return result
 
         return None
 
-    async def _save_notification_to_db(
+    async def save_notification(
         self,
         user_id: str,
         title: str,
         body: str,
         notification_type: NotificationType,
         data: dict[str, Any],
+        from_user_id: Optional[str] = None,
+        schedule_id: Optional[str] = None,
+        ttl: Optional[timedelta] = None,
     ) -> NotificationResponse:
         """
-        通知をFirestoreに保存（内部メソッド）
+        通知をFirestoreに保存（プッシュ通知は送信しない）
 
         Args:
             user_id: ユーザID
@@ -195,10 +230,14 @@ class NotificationService:
             body: 本文
             notification_type: 通知タイプ
             data: 追加データ
+            from_user_id: 送信元ユーザID
+            schedule_id: 関連するスケジュールID
+            ttl: 自動削除するまでの時間
 
         Returns:
             保存された通知データ
         """
+        now = now_jst()
         notification_ref = self.db.collection("notifications").document()
         notification_dict = {
             "notification_id": notification_ref.id,
@@ -208,8 +247,11 @@ class NotificationService:
             "body": body,
             "data": data,
             "is_read": False,
-            "created_at": now_jst(),
+            "created_at": now,
             "read_at": None,
+            "from_user_id": from_user_id,
+            "schedule_id": schedule_id,
+            "auto_delete_at": now + ttl if ttl else None,
         }
 
         logger.info(
@@ -231,24 +273,17 @@ class NotificationService:
             user_id: ユーザID
             invalid_tokens: 削除するトークンのリスト
         """
-        user_ref = self.db.collection("users").document(user_id)
-        user_doc = user_ref.get()
-
-        if not user_doc.exists:
+        try:
+            await self.fcm_token_service.remove_tokens(user_id, invalid_tokens)
+        except ValueError:
+            # ユーザーが削除済みの場合は何もしない
             return
 
-        user_data = user_doc.to_dict()
-        current_tokens = user_data.get("fcm_tokens", [])
-
-        # 無効なトークンを除外
-        updated_tokens = [token for token in current_tokens if token not in invalid_tokens]
-
-        user_ref.update({"fcm_tokens": updated_tokens, "updated_at": now_jst()})
         logger.info(f"ユーザー {user_id} の無効なFCMトークンを削除しました: {invalid_tokens}")
 
     async def register_fcm_token(self, user_id: str, fcm_token: str) -> None:
         """
-        FCMトークンを登録
+        FCMトークンを登録（登録済みの場合は最終確認日時を更新）
 
         Args:
             user_id: ユーザID
@@ -257,23 +292,7 @@ class NotificationService:
         Raises:
             ValueError: ユーザーが見つからない場合
         """
-        user_ref = self.db.collection("users").document(user_id)
-        user_doc = user_ref.get()
-
-        if not user_doc.exists:
-            raise ValueError(f"ユーザーが見つかりません: {user_id}")
-
-        user_data = user_doc.to_dict()
-        current_tokens = user_data.get("fcm_tokens", [])
-
-        # トークンが既に登録されている場合はスキップ
-        if fcm_token in current_tokens:
-            logger.info(f"FCMトークンは既に登録されています: {user_id}")
-            return
-
-        # トークンを追加
-        current_tokens.append(fcm_token)
-        user_ref.update({"fcm_tokens": current_tokens, "updated_at": now_jst()})
+        await self.fcm_token_service.register_token(user_id, fcm_token)
         logger.info(f"FCMトークンを登録しました: {user_id}")
 
     async def remove_fcm_token(self, user_id: str, fcm_token: str) -> None:
@@ -287,25 +306,15 @@ class NotificationService:
         Raises:
             ValueError: ユーザーが見つからない場合
         """
-        user_ref = self.db.collection("users").document(user_id)
-        user_doc = user_ref.get()
-
-        if not user_doc.exists:
-            raise ValueError(f"ユーザーが見つかりません: {user_id}")
-
-        user_data = user_doc.to_dict()
-        current_tokens = user_data.get("fcm_tokens", [])
-
-        # トークンを削除
-        if fcm_token in current_tokens:
-            current_tokens.remove(fcm_token)
-            user_ref.update({"fcm_tokens": current_tokens, "updated_at": now_jst()})
-            logger.info(f"FCMトークンを削除しました: {user_id}")
-        else:
-            logger.warning(f"削除対象のFCMトークンが見つかりません: {user_id}")
+        await self.fcm_token_service.remove_tokens(user_id, [fcm_token])
+        logger.info(f"FCMトークンを削除しました: {user_id}")
 
     async def get_user_notifications(
-        self, user_id: str, limit: int = 50, unread_only: bool = False
+        self,
+        user_id: str,
+        limit: int = 50,
+        unread_only: bool = False,
+        since: Optional[datetime] = None,
     ) -> List[NotificationResponse]:
         """
         ユーザーの通知一覧を取得
@@ -314,17 +323,18 @@ class NotificationService:
             user_id: ユーザID
             limit: 取得件数（デフォルト50件）
             unread_only: 未読のみ取得するかどうか
+            since: 指定した日時以降の通知のみ取得（履歴表示用）
 
         Returns:
             通知一覧
         """
         try:
-            query = (
-                self.db.collection("notifications")
-                .where(filter=FieldFilter("user_id", "==", user_id))
-                .order_by("created_at", direction="DESCENDING")
-                .limit(limit)
+            query = self.db.collection("notifications").where(
+                filter=FieldFilter("user_id", "==", user_id)
             )
+            if since is not None:
+                query = query.where(filter=FieldFilter("created_at", ">=", since))
+            query = query.order_by("created_at", direction="DESCENDING").limit(limit)
 
             # 未読のみフィルタ
             if unread_only:
@@ -0,0 +1,152 @@
+"""
+ポップ検索のタイルキャッシュ
+
+周辺のポップ検索では、検索範囲を覆うGeohashタイルごとにFirestoreをクエリし、結果を
+(タイル, カテゴリの組み合わせ, 有効なポップのみか) 単位でプロセス内にキャッシュします。
+同じエリアからの検索はタイルのキャッシュを組み合わせて半径で絞り込むだけで済みます。
+
+- タイルの精度は検索半径に応じて選ぶ（タイル数が _MAX_TILES 以下になる最も細かい精度）
+- キャッシュは POP_TILE_CACHE_TTL_SECONDS で期限切れになる
+- ポップの作成・更新・削除・期限切れ処理では、そのポップを含むタイルのキャッシュを破棄する
+  （他のインスタンスでの変更はTTLが切れるまで反映されない）
+"""
+
+import threading
+import time
+from math import cos, radians
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import pygeohash as gh
+
+from app.config import settings
+from app.schemas.pop import PopInDB
+
+# タイルに使うGeohashの精度（細かい順。保存されるGeohashの精度7より粗いこと）
+TILE_PRECISIONS = (6, 5, 4, 3)
+
+# 1回の検索で使うタイル数の上限（超える場合は1段粗い精度を使う）
+_MAX_TILES = 16
+
+# 緯度1度あたりの距離（km）
+_KM_PER_DEGREE = 111.32
+
+# キャッシュのタイル数がこれを超えたら期限切れのものを削除する
+_CACHE_PRUNE_THRESHOLD = 10_000
+
+# (カテゴリの組み合わせ（指定なしはNone）, 有効なポップのみか)
+TileKey = Tuple[Optional[FrozenSet[str]], bool]
+
+
+def _tile_size(precision: int) -> Tuple[float, float]:
+    """Geohashタイルの大きさ（緯度方向の度数, 経度方向の度数）"""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** ((bits + 1) // 2)
+
+
+def _steps(start: float, end: float, step: float) -> List[float]:
+    """start から end までを step 間隔で区切った点（両端を含む）"""
+    count = int((end - start) / step) + 1
+    return [start + index * step for index in range(count)] + [end]
+
+
+def covering_tiles(latitude: float, longitude: float, radius_km: float) -> List[str]:
+    """
+    検索範囲（中心と半径）を覆うGeohashタイルを取得
+
+    Args:
+        latitude: 検索中心の緯度
+        longitude: 検索中心の経度
+        radius_km: 検索半径（km）
+
+    Returns:
+        Geohashタイルのリスト
+    """
+    delta_lat = radius_km / _KM_PER_DEGREE
+    delta_lng = radius_km / (_KM_PER_DEGREE * max(cos(radians(latitude)), 0.01))
+    min_lat = max(latitude - delta_lat, -89.999999)
+    max_lat = min(latitude + delta_lat, 89.999999)
+    min_lng = longitude - delta_lng
+    max_lng = longitude + delta_lng
+
+    for precision in TILE_PRECISIONS:
+        lat_step, lng_step = _tile_size(precision)
+        lats = _steps(min_lat, max_lat, lat_step)
+        lngs = _steps(min_lng, max_lng, lng_step)
+        if len(lats) * len(lngs) > _MAX_TILES * 4 and precision != TILE_PRECISIONS[-1]:
+            continue
+
+        tiles = {
+            # 経度は -180〜180 に正規化（日付変更線をまたぐ検索用）
+            gh.encode(lat, (lng + 180.0) % 360.0 - 180.0, precision=precision)
+            for lat in lats
+            for lng in lngs
+        }
+        if len(tiles) <= _MAX_TILES or precision == TILE_PRECISIONS[-1]:
+            return sorted(tiles)
+
+    return []
+
+
+class PopTileCache:
+    """ポップ検索のタイルキャッシュ（プロセス内）"""
+
+    def __init__(self, ttl_seconds: Optional[float] = None):
+        self.ttl_seconds = (
+            settings.POP_TILE_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        )
+        # タイル → キー → (有効期限, ポップのリスト)
+        self._entries: Dict[str, Dict[TileKey, Tuple[float, List[PopInDB]]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tile: str, key: TileKey) -> Optional[List[PopInDB]]:
+        """
+        タイルのキャッシュを取得
+
+        Args:
+            tile: Geohashタイル
+            key: (カテゴリの組み合わせ, 有効なポップのみか)
+
+        Returns:
+            ポップのリスト（キャッシュがない・期限切れの場合はNone）
+        """
+        with self._lock:
+            entry = self._entries.get(tile, {}).get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return None
+        return entry[1]
+
+    def put(self, tile: str, key: TileKey, pops: List[PopInDB]) -> None:
+        """
+        タイルのクエリ結果をキャッシュ
+
+        Args:
+            tile: Geohashタイル
+            key: (カテゴリの組み合わせ, 有効なポップのみか)
+            pops: タイル内のポップのリスト
+        """
+        if self.ttl_seconds <= 0:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            if len(self._entries) > _CACHE_PRUNE_THRESHOLD:
+                self._entries = {
+                    cached_tile: live
+                    for cached_tile, entries in self._entries.items()
+                    if (live := {k: v for k, v in entries.items() if v[0] > now})
+                }
+            self._entries.setdefault(tile, {})[key] = (now + self.ttl_seconds, pops)
+
+    def invalidate(self, geohash: Optional[str]) -> None:
+        """
+        ポップの位置を含むタイルのキャッシュを破棄
+
+        Args:
+            geohash: ポップの位置のGeohash（精度7）
+        """
+        if not geohash:
+            return
+
+        with self._lock:
+            for precision in TILE_PRECISIONS:
+                self._entries.pop(geohash[:precision], None)
@@ -4,12 +4,14 @@
 
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import FrozenSet, List, Optional
 
 import pygeohash as gh
 from firebase_admin import firestore
 
 from app.core.firebase import get_firestore_client
+from app.services.counters import ShardedCounterService
+from app.services.pop_tiles import PopTileCache, covering_tiles
 from app.utils.timezone import now_jst
 from app.schemas.pop import (
     PopCreate,
@@ -20,13 +22,22 @@ from app.schemas.pop import (
     PopUpdate,
 )
 
+# 1タイルあたりのクエリの取得件数の上限
+TILE_QUERY_LIMIT = 500
+
 
 class PopService:
     """ポップサービスクラス"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        counter_service: Optional[ShardedCounterService] = None,
+        tile_cache: Optional[PopTileCache] = None,
+    ):
         self.db = get_firestore_client()
         self.collection = "pops"
+        self.counter_service = counter_service or ShardedCounterService()
+        self.tile_cache = tile_cache or PopTileCache()
 
     async def create_pop(self, user_id: str, pop_data: PopCreate) -> PopResponse:
         """
@@ -80,6 +91,7 @@ class PopService:
 
         # Firestoreに保存
         self.db.collection(self.collection).document(pop_id).set(pop_dict)
+        self.tile_cache.invalidate(geohash)
 
         # レスポンスを作成
         pop_in_db = PopInDB(**pop_dict)
@@ -102,7 +114,7 @@ class PopService:
 
         pop_data = doc.to_dict()
         pop_in_db = PopInDB(**pop_data)
-        return self._to_response(pop_in_db)
+        return self._to_responses([pop_in_db])[0]
 
     async def search_nearby_pops(self, search_request: PopSearchRequest) -> List[PopResponse]:
         """
@@ -114,36 +126,32 @@ class PopService:
         Returns:
             ポップのリスト
         """
-        # Geohashの範囲を計算（簡易実装）
-        center_geohash = gh.encode(
-            search_request.latitude, search_request.longitude, precision=5
+        categories = (
+            frozenset(cat.value for cat in search_request.categories)
+            if search_request.categories
+            else None
         )
+        key = (categories, search_request.only_active)
 
-        # クエリを構築
-        query = self.db.collection(self.collection)
-
-        # 有効なポップのみ取得する場合
-        if search_request.only_active:
-            query = query.where("status", "==", PopStatus.ACTIVE.value)
-            query = query.where("expires_at", ">", now_jst())
-
-        # カテゴリフィルター
-        if search_request.categories:
-            category_values = [cat.value for cat in search_request.categories]
-            query = query.where("category", "in", category_values)
-
-        # 件数制限
-        query = query.limit(search_request.limit)
-
-        # クエリ実行
-        docs = query.stream()
-
-        pops = []
-        for doc in docs:
-            pop_data = doc.to_dict()
-            pop_in_db = PopInDB(**pop_data)
+        # 検索範囲を覆うタイルごとにキャッシュを使い、ないタイルだけクエリする
+        candidates: List[PopInDB] = []
+        tiles = covering_tiles(
+            search_request.latitude, search_request.longitude, search_request.radius_km
+        )
+        for tile in tiles:
+            tile_pops = self.tile_cache.get(tile, key)
+            if tile_pops is None:
+                tile_pops = self._query_tile(tile, categories, search_request.only_active)
+                self.tile_cache.put(tile, key, tile_pops)
+            candidates.extend(tile_pops)
+
+        # 期限切れ・範囲外のポップを除外し、近い順に件数を制限
+        now = now_jst()
+        nearby = []
+        for pop_in_db in candidates:
+            if search_request.only_active and pop_in_db.expires_at <= now:
+                continue
 
-            # 距離フィルタリング（簡易実装 - より正確にはHaversine式を使用）
             distance = self._calculate_distance(
                 search_request.latitude,
                 search_request.longitude,
@@ -152,9 +160,42 @@ class PopService:
             )
 
             if distance <= search_request.radius_km:
-                pops.append(self._to_response(pop_in_db))
+                nearby.append((distance, pop_in_db))
+
+        nearby.sort(key=lambda item: item[0])
+        pops = [pop_in_db for _, pop_in_db in nearby[: search_request.limit]]
+
+        return self._to_responses(pops)
+
+    def _query_tile(
+        self, tile: str, categories: Optional[FrozenSet[str]], only_active: bool
+    ) -> List[PopInDB]:
+        """
+        Geohashタイル内のポップをクエリ
+
+        Args:
+            tile: Geohashタイル（前方一致で検索）
+            categories: フィルターするカテゴリ（指定なしはNone）
+            only_active: 有効なポップのみ取得するか（有効期限は呼び出し側で判定）
 
-        return pops
+        Returns:
+            タイル内のポップのリスト
+        """
+        query = (
+            self.db.collection(self.collection)
+            .where("location.geohash", ">=", tile)
+            .where("location.geohash", "<", tile + "~")
+        )
+
+        if only_active:
+            query = query.where("status", "==", PopStatus.ACTIVE.value)
+
+        if categories:
+            query = query.where("category", "in", sorted(categories))
+
+        query = query.limit(TILE_QUERY_LIMIT)
+
+        return [PopInDB(**doc.to_dict()) for doc in query.stream()]
 
     async def get_user_pops(self, user_id: str, include_expired: bool = False) -> List[PopResponse]:
         """
@@ -177,13 +218,8 @@ class PopService:
 
         docs = query.stream()
 
-        pops = []
-        for doc in docs:
-            pop_data = doc.to_dict()
-            pop_in_db = PopInDB(**pop_data)
-            pops.append(self._to_response(pop_in_db))
-
-        return pops
+        pops = [PopInDB(**doc.to_dict()) for doc in docs]
+        return self._to_responses(pops)
 
     async def update_pop(self, pop_id: str, user_id: str, update_data: PopUpdate) -> bool:
         """
@@ -219,6 +255,7 @@ class PopService:
 
         if update_fields:
             pop_ref.update(update_fields)
+            self.tile_cache.invalidate(pop_data.get("location", {}).get("geohash"))
 
         return True
 
@@ -248,12 +285,13 @@ class PopService:
 
         # 論理削除
         pop_ref.update({"status": PopStatus.DELETED.value})
+        self.tile_cache.invalidate(pop_data.get("location", {}).get("geohash"))
 
         return True
 
     async def increment_reaction_count(self, pop_id: str) -> bool:
         """
-        リアクション数をインクリメント
+        リアクション数をインクリメント（分散カウンター）
 
         Args:
             pop_id: ポップID
@@ -262,12 +300,12 @@ class PopService:
             成功時True
         """
         pop_ref = self.db.collection(self.collection).document(pop_id)
-        pop_ref.update({"reaction_count": firestore.Increment(1)})
+        self.counter_service.increment(pop_ref, "reaction_count", 1)
         return True
 
     async def decrement_reaction_count(self, pop_id: str) -> bool:
         """
-        リアクション数をデクリメント
+        リアクション数をデクリメント（分散カウンター）
 
         Args:
             pop_id: ポップID
@@ -276,7 +314,7 @@ class PopService:
             成功時True
         """
         pop_ref = self.db.collection(self.collection).document(pop_id)
-        pop_ref.update({"reaction_count": firestore.Increment(-1)})
+        self.counter_service.increment(pop_ref, "reaction_count", -1)
         return True
 
     async def expire_old_pops(self) -> int:
@@ -297,16 +335,33 @@ class PopService:
 
         for doc in docs:
             doc.reference.update({"status": PopStatus.EXPIRED.value})
+            self.tile_cache.invalidate(doc.to_dict().get("location", {}).get("geohash"))
             count += 1
 
         return count
 
-    def _to_response(self, pop_in_db: PopInDB) -> PopResponse:
+    def _to_responses(self, pops: List[PopInDB]) -> List[PopResponse]:
+        """
+        PopInDBのリストをPopResponseに変換（リアクション数は分散カウンターの値を加算）
+
+        Args:
+            pops: データベース内のポップのリスト
+
+        Returns:
+            レスポンス用ポップのリスト
+        """
+        collection = self.db.collection(self.collection)
+        refs = [collection.document(pop.pop_id) for pop in pops]
+        counts = self.counter_service.get_counts(refs, "reaction_count")
+        return [self._to_response(pop, counts[ref.path]) for pop, ref in zip(pops, refs)]
+
+    def _to_response(self, pop_in_db: PopInDB, sharded_reaction_count: int = 0) -> PopResponse:
         """
         PopInDBをPopResponseに変換
 
         Args:
             pop_in_db: データベース内のポップ
+            sharded_reaction_count: 分散カウンターのリアクション数（ポップのフィールドの値に加算）
 
         Returns:
             レスポンス用ポップ
@@ -320,7 +375,7 @@ class PopService:
             created_at=pop_in_db.created_at,
             expires_at=pop_in_db.expires_at,
             duration_minutes=pop_in_db.duration_minutes,
-            reaction_count=pop_in_db.reaction_count,
+            reaction_count=pop_in_db.reaction_count + sharded_reaction_count,
             is_premium=pop_in_db.is_premium,
             status=pop_in_db.status,
             visibility=pop_in_db.visibility,
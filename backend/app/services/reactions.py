@@ -2,13 +2,13 @@
 リアクションサービス - Firestore連携
 """
 
-import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from firebase_admin import firestore
 
 from app.core.firebase import get_firestore_client
+from app.services.counters import ShardedCounterService
 from app.utils.timezone import now_jst
 from app.schemas.reaction import (
     ReactionCreate,
@@ -21,8 +21,9 @@ from app.schemas.reaction import (
 class ReactionService:
     """リアクションサービスクラス"""
 
-    def __init__(self):
+    def __init__(self, counter_service: Optional[ShardedCounterService] = None):
         self.db = get_firestore_client()
+        self.counter_service = counter_service or ShardedCounterService()
         self.collection = "reactions"
         self.pops_collection = "pops"
         self.users_collection = "users"
@@ -43,55 +44,61 @@ class ReactionService:
         Raises:
             ValueError: ポップが見つからない、自分のポップへのリアクション、重複リアクション
         """
-        # ポップの存在確認と投稿者取得
+        # 送信者とポップの組で一意なIDにし、重複チェックと作成を1つのトランザクションで行う
+        reaction_id = self._reaction_id(reaction_data.pop_id, from_user_id)
+        reaction_ref = self.db.collection(self.collection).document(reaction_id)
         pop_ref = self.db.collection(self.pops_collection).document(reaction_data.pop_id)
-        pop_doc = pop_ref.get()
-
-        if not pop_doc.exists:
-            raise ValueError("ポップが見つかりません")
-
-        pop_data = pop_doc.to_dict()
-        to_user_id = pop_data.get("user_id")
-
-        # 自分のポップへのリアクションは禁止
-        if from_user_id == to_user_id:
-            raise ValueError("自分のポップにリアクションできません")
-
-        # 既にリアクション済みかチェック
-        existing_reactions = (
-            self.db.collection(self.collection)
-            .where("pop_id", "==", reaction_data.pop_id)
-            .where("from_user_id", "==", from_user_id)
-            .where("status", "in", [ReactionStatus.PENDING.value, ReactionStatus.ACCEPTED.value])
-            .limit(1)
-            .stream()
-        )
-
-        if any(existing_reactions):
-            raise ValueError("既にこのポップにリアクションしています")
-
-        # リアクションIDを生成
-        reaction_id = str(uuid.uuid4())
-
-        # データベースに保存
-        reaction_dict = {
-            "reaction_id": reaction_id,
-            "pop_id": reaction_data.pop_id,
-            "from_user_id": from_user_id,
-            "to_user_id": to_user_id,
-            "message": reaction_data.message,
-            "created_at": now_jst(),
-            "status": ReactionStatus.PENDING.value,
-        }
-
-        self.db.collection(self.collection).document(reaction_id).set(reaction_dict)
-
-        # ポップのリアクション数をインクリメント
-        pop_ref.update({"reaction_count": firestore.Increment(1)})
-
-        # レスポンスを作成
+        from_user_ref = self.db.collection(self.users_collection).document(from_user_id)
+
+        @firestore.transactional
+        def create(transaction) -> dict:
+            # ポップ・送信者・既存のリアクションを1回の一括取得で読む
+            docs = self._get_documents([pop_ref, from_user_ref, reaction_ref], transaction=transaction)
+            pop_data = docs[pop_ref.path]
+
+            if pop_data is None:
+                raise ValueError("ポップが見つかりません")
+
+            from_user_data = docs[from_user_ref.path] or {}
+            to_user_id = pop_data.get("user_id")
+
+            # 自分のポップへのリアクションは禁止
+            if from_user_id == to_user_id:
+                raise ValueError("自分のポップにリアクションできません")
+
+            # 既にリアクション済みかチェック（拒否・キャンセル済みなら送り直せる）
+            existing = docs[reaction_ref.path]
+            if existing is not None and existing.get("status") in (
+                ReactionStatus.PENDING.value,
+                ReactionStatus.ACCEPTED.value,
+            ):
+                raise ValueError("既にこのポップにリアクションしています")
+
+            reaction_dict = {
+                "reaction_id": reaction_id,
+                "pop_id": reaction_data.pop_id,
+                "from_user_id": from_user_id,
+                "to_user_id": to_user_id,
+                "message": reaction_data.message,
+                "created_at": now_jst(),
+                "status": ReactionStatus.PENDING.value,
+                # ポップごとの一覧で送信者を都度取得しないよう、送信時点の情報を保存
+                "from_user_display_name": from_user_data.get("display_name"),
+                "from_user_profile_image_url": from_user_data.get("profile_image_url"),
+            }
+            transaction.set(reaction_ref, reaction_dict)
+
+            # ポップのリアクション数をインクリメント（分散カウンター）
+            self.counter_service.increment(pop_ref, "reaction_count", 1, transaction=transaction)
+
+            return reaction_dict
+
+        reaction_dict = create(self.db.transaction())
+
+        # レスポンスを作成（送信者は保存した情報を使い、受信者とポップを一括取得）
         reaction_in_db = ReactionInDB(**reaction_dict)
-        return await self._to_response(reaction_in_db)
+        [response] = await self._to_responses([reaction_in_db], use_stored_sender=True)
+        return response
 
     async def get_reaction_by_id(self, reaction_id: str) -> Optional[ReactionResponse]:
         """
@@ -134,13 +141,8 @@ class ReactionService:
 
         docs = query.stream()
 
-        reactions = []
-        for doc in docs:
-            reaction_data = doc.to_dict()
-            reaction_in_db = ReactionInDB(**reaction_data)
-            reactions.append(await self._to_response(reaction_in_db))
-
-        return reactions
+        reactions = [ReactionInDB(**doc.to_dict()) for doc in docs]
+        return await self._to_responses(reactions)
 
     async def get_sent_reactions(
         self, user_id: str, status_filter: Optional[ReactionStatus] = None
@@ -164,13 +166,8 @@ class ReactionService:
 
         docs = query.stream()
 
-        reactions = []
-        for doc in docs:
-            reaction_data = doc.to_dict()
-            reaction_in_db = ReactionInDB(**reaction_data)
-            reactions.append(await self._to_response(reaction_in_db))
-
-        return reactions
+        reactions = [ReactionInDB(**doc.to_dict()) for doc in docs]
+        return await self._to_responses(reactions)
 
     async def get_pop_reactions(self, pop_id: str) -> List[ReactionResponse]:
         """
@@ -190,13 +187,8 @@ class ReactionService:
 
         docs = query.stream()
 
-        reactions = []
-        for doc in docs:
-            reaction_data = doc.to_dict()
-            reaction_in_db = ReactionInDB(**reaction_data)
-            reactions.append(await self._to_response(reaction_in_db))
-
-        return reactions
+        reactions = [ReactionInDB(**doc.to_dict()) for doc in docs]
+        return await self._to_responses(reactions, use_stored_sender=True)
 
     async def accept_reaction(self, reaction_id: str, user_id: str) -> bool:
         """
@@ -266,9 +258,9 @@ class ReactionService:
         # ステータスを拒否に更新
         reaction_ref.update({"status": ReactionStatus.REJECTED.value})
 
-        # ポップのリアクション数をデクリメント
+        # ポップのリアクション数をデクリメント（分散カウンター）
         pop_ref = self.db.collection(self.pops_collection).document(reaction_data["pop_id"])
-        pop_ref.update({"reaction_count": firestore.Increment(-1)})
+        self.counter_service.increment(pop_ref, "reaction_count", -1)
 
         return True
 
@@ -305,9 +297,9 @@ class ReactionService:
         # ステータスをキャンセルに更新
         reaction_ref.update({"status": ReactionStatus.CANCELLED.value})
 
-        # ポップのリアクション数をデクリメント
+        # ポップのリアクション数をデクリメント（分散カウンター）
         pop_ref = self.db.collection(self.pops_collection).document(reaction_data["pop_id"])
-        pop_ref.update({"reaction_count": firestore.Increment(-1)})
+        self.counter_service.increment(pop_ref, "reaction_count", -1)
 
         return True
 
@@ -340,34 +332,100 @@ class ReactionService:
         Returns:
             レスポンス用リアクション
         """
-        # 送信者情報を取得
-        from_user_doc = (
-            self.db.collection(self.users_collection).document(reaction_in_db.from_user_id).get()
-        )
-        from_user_data = from_user_doc.to_dict() if from_user_doc.exists else {}
+        [response] = await self._to_responses([reaction_in_db])
+        return response
 
-        # 受信者情報を取得
-        to_user_doc = (
-            self.db.collection(self.users_collection).document(reaction_in_db.to_user_id).get()
-        )
-        to_user_data = to_user_doc.to_dict() if to_user_doc.exists else {}
-
-        # ポップ情報を取得
-        pop_doc = self.db.collection(self.pops_collection).document(reaction_in_db.pop_id).get()
-        pop_data = pop_doc.to_dict() if pop_doc.exists else {}
-
-        return ReactionResponse(
-            reaction_id=reaction_in_db.reaction_id,
-            pop_id=reaction_in_db.pop_id,
-            from_user_id=reaction_in_db.from_user_id,
-            to_user_id=reaction_in_db.to_user_id,
-            message=reaction_in_db.message,
-            created_at=reaction_in_db.created_at,
-            status=reaction_in_db.status,
-            from_user_display_name=from_user_data.get("display_name"),
-            from_user_profile_image_url=from_user_data.get("profile_image_url"),
-            to_user_display_name=to_user_data.get("display_name"),
-            to_user_profile_image_url=to_user_data.get("profile_image_url"),
-            pop_content=pop_data.get("content"),
-            pop_category=pop_data.get("category"),
-        )
+    async def _to_responses(
+        self, reactions: List[ReactionInDB], use_stored_sender: bool = False
+    ) -> List[ReactionResponse]:
+        """
+        ReactionInDBのリストをReactionResponseに変換（ユーザー情報とポップ情報を付加）
+
+        参照している全ユーザー・全ポップを1回の一括取得（get_all）でまとめて取得する。
+
+        Args:
+            reactions: データベース内のリアクションのリスト
+            use_stored_sender: 送信時に保存した送信者情報を使う（保存されていない場合のみ取得）
+
+        Returns:
+            レスポンス用リアクションのリスト
+        """
+        users = self.db.collection(self.users_collection)
+        pops = self.db.collection(self.pops_collection)
+
+        refs = {}
+        for reaction in reactions:
+            if not (use_stored_sender and reaction.from_user_display_name is not None):
+                refs.setdefault(("user", reaction.from_user_id), users.document(reaction.from_user_id))
+            refs.setdefault(("user", reaction.to_user_id), users.document(reaction.to_user_id))
+            refs.setdefault(("pop", reaction.pop_id), pops.document(reaction.pop_id))
+
+        docs = self._get_documents(list(refs.values()))
+
+        def data(kind: str, document_id: str) -> dict:
+            ref = refs.get((kind, document_id))
+            return (docs.get(ref.path) if ref is not None else None) or {}
+
+        responses = []
+        for reaction in reactions:
+            if ("user", reaction.from_user_id) in refs:
+                from_user_data = data("user", reaction.from_user_id)
+            else:
+                from_user_data = {
+                    "display_name": reaction.from_user_display_name,
+                    "profile_image_url": reaction.from_user_profile_image_url,
+                }
+            to_user_data = data("user", reaction.to_user_id)
+            pop_data = data("pop", reaction.pop_id)
+
+            responses.append(
+                ReactionResponse(
+                    reaction_id=reaction.reaction_id,
+                    pop_id=reaction.pop_id,
+                    from_user_id=reaction.from_user_id,
+                    to_user_id=reaction.to_user_id,
+                    message=reaction.message,
+                    created_at=reaction.created_at,
+                    status=reaction.status,
+                    from_user_display_name=from_user_data.get("display_name"),
+                    from_user_profile_image_url=from_user_data.get("profile_image_url"),
+                    to_user_display_name=to_user_data.get("display_name"),
+                    to_user_profile_image_url=to_user_data.get("profile_image_url"),
+                    pop_content=pop_data.get("content"),
+                    pop_category=pop_data.get("category"),
+                )
+            )
+
+        return responses
+
+    def _reaction_id(self, pop_id: str, from_user_id: str) -> str:
+        """
+        リアクションIDを生成（送信者とポップの組で一意）
+
+        Args:
+            pop_id: ポップID
+            from_user_id: 送信者のUID
+
+        Returns:
+            リアクションID
+        """
+        return f"{pop_id}_{from_user_id}"
+
+    def _get_documents(self, refs: list, transaction=None) -> Dict[str, Optional[dict]]:
+        """
+        複数のドキュメントを1回の一括取得（get_all）で取得
+
+        Args:
+            refs: ドキュメント参照のリスト
+            transaction: トランザクション（指定した場合はトランザクション内で読む）
+
+        Returns:
+            ドキュメントのパス → データ（存在しない場合はNone）
+        """
+        if not refs:
+            return {}
+        # get_all は指定した順に返すとは限らないため、パスで対応付ける
+        return {
+            doc.reference.path: doc.to_dict() if doc.exists else None
+            for doc in self.db.get_all(refs, transaction=transaction)
+        }
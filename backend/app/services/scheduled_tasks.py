@@ -0,0 +1,211 @@
+"""
+遅延タスク管理サービス
+
+指定時刻に実行すべきタスク（滞在通知など）をFirestoreの scheduled_tasks コレクションに
+期限順で永続化します。バッチ処理は期限を迎えたタスクだけを取り出すため、
+処理コストは実行すべきタスク数に比例します。
+
+Firestoreのscheduled_tasks コレクション構造:
+{
+    "id": "stay_notification_{schedule_id}",
+    "task_type": "stay_notification",
+    "schedule_id": "schedule_id",
+    "due_at": "2025-01-15T15:05:00+09:00",  # 到着時刻 + notify_after_minutes
+    "status": "pending",  # "pending", "processing"
+    "created_at": "2025-01-15T14:05:00+09:00",
+    "claimed_at": null
+}
+
+"processing" のまま CLAIM_LEASE_MINUTES を過ぎたタスクは、実行中のインスタンスが
+停止したものとみなして再び実行対象にします。
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from firebase_admin import firestore
+
+from app.core.firebase import get_firestore_client
+from app.utils.timezone import now_jst
+
+logger = logging.getLogger(__name__)
+
+TASK_TYPE_STAY_NOTIFICATION = "stay_notification"
+
+# 実行権の有効期限（分）。これを過ぎた "processing" のタスクは再実行される
+CLAIM_LEASE_MINUTES = 10
+
+
+class ScheduledTaskService:
+    """遅延タスク管理サービスクラス"""
+
+    def __init__(self):
+        self.db = get_firestore_client()
+        self.collection_name = "scheduled_tasks"
+
+    def get_stay_notification_task_id(self, schedule_id: str) -> str:
+        """
+        スケジュールの滞在通知タスクIDを取得（スケジュールごとに1件）
+
+        Args:
+            schedule_id: スケジュールID
+
+        Returns:
+            タスクID
+        """
+        return f"{TASK_TYPE_STAY_NOTIFICATION}_{schedule_id}"
+
+    async def schedule_stay_notification(self, schedule_id: str, due_at: datetime) -> dict:
+        """
+        滞在通知タスクを登録（既存のタスクは置き換え）
+
+        Args:
+            schedule_id: スケジュールID
+            due_at: 実行予定時刻
+
+        Returns:
+            登録したタスク
+        """
+        task_id = self.get_stay_notification_task_id(schedule_id)
+        task_dict = {
+            "id": task_id,
+            "task_type": TASK_TYPE_STAY_NOTIFICATION,
+            "schedule_id": schedule_id,
+            "due_at": due_at,
+            "status": "pending",
+            "created_at": now_jst(),
+            "claimed_at": None,
+        }
+
+        self.db.collection(self.collection_name).document(task_id).set(task_dict)
+        logger.info(f"[遅延タスク] 滞在通知タスクを登録: {task_id}, 実行予定: {due_at}")
+
+        return task_dict
+
+    async def has_task(self, task_id: str) -> bool:
+        """
+        タスクが登録されているかどうか
+
+        Args:
+            task_id: タスクID
+
+        Returns:
+            登録されている場合True
+        """
+        return self.db.collection(self.collection_name).document(task_id).get().exists
+
+    async def cancel_task(self, task_id: str) -> None:
+        """
+        タスクを取り消し
+
+        Args:
+            task_id: タスクID
+        """
+        self.db.collection(self.collection_name).document(task_id).delete()
+
+    async def get_due_tasks(self, until: Optional[datetime] = None, limit: int = 500) -> List[dict]:
+        """
+        指定時刻までに期限を迎える未処理タスクを期限順に取得
+
+        実行権の有効期限が切れた "processing" のタスク（実行中にインスタンスが停止したもの）も含みます。
+
+        Args:
+            until: 期限の上限（省略時は現在時刻）
+            limit: 取得件数の上限
+
+        Returns:
+            タスクのリスト
+        """
+        now = now_jst()
+        until = until or now
+
+        pending_query = (
+            self.db.collection(self.collection_name)
+            .where("status", "==", "pending")
+            .where("due_at", "<=", until)
+            .order_by("due_at")
+            .limit(limit)
+        )
+        tasks = [doc.to_dict() for doc in pending_query.stream()]
+
+        stale_query = (
+            self.db.collection(self.collection_name)
+            .where("status", "==", "processing")
+            .where("claimed_at", "<=", now - timedelta(minutes=CLAIM_LEASE_MINUTES))
+            .limit(limit)
+        )
+        stale_tasks = [doc.to_dict() for doc in stale_query.stream()]
+        if stale_tasks:
+            logger.warning(f"[遅延タスク] 実行権の期限切れタスクを再実行: {len(stale_tasks)}件")
+
+        tasks.extend(stale_tasks)
+        tasks.sort(key=lambda task: task["due_at"])
+        return tasks[:limit]
+
+    async def claim_task(self, task_id: str) -> Optional[dict]:
+        """
+        タスクの実行権を取得（複数インスタンスでの重複実行を防ぐ）
+
+        Args:
+            task_id: タスクID
+
+        Returns:
+            実行権を取得できた場合はタスク、既に他で処理中・処理済みの場合はNone
+        """
+        task_ref = self.db.collection(self.collection_name).document(task_id)
+
+        @firestore.transactional
+        def claim(transaction) -> Optional[dict]:
+            snapshot = task_ref.get(transaction=transaction)
+            if not snapshot.exists:
+                return None
+
+            task_dict = snapshot.to_dict()
+            if not self._is_claimable(task_dict):
+                return None
+
+            transaction.update(task_ref, {"status": "processing", "claimed_at": now_jst()})
+            return task_dict
+
+        return claim(self.db.transaction())
+
+    def _is_claimable(self, task_dict: dict) -> bool:
+        """
+        タスクの実行権を取得できるかどうか（内部メソッド）
+
+        Args:
+            task_dict: タスク
+
+        Returns:
+            未処理、または実行権の有効期限が切れている場合True
+        """
+        if task_dict.get("status") == "pending":
+            return True
+
+        claimed_at = task_dict.get("claimed_at")
+        return (
+            task_dict.get("status") == "processing"
+            and claimed_at is not None
+            and claimed_at <= now_jst() - timedelta(minutes=CLAIM_LEASE_MINUTES)
+        )
+
+    async def complete_task(self, task_id: str) -> None:
+        """
+        処理済みのタスクを削除
+
+        Args:
+            task_id: タスクID
+        """
+        await self.cancel_task(task_id)
+
+    async def release_task(self, task_id: str) -> None:
+        """
+        処理に失敗したタスクを未処理に戻す（次回のバッチで再実行される）
+
+        Args:
+            task_id: タスクID
+        """
+        self.db.collection(self.collection_name).document(task_id).update(
+            {"status": "pending", "claimed_at": None}
+        )
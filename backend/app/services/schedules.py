@@ -2,9 +2,10 @@
 位置情報スケジュール管理サービス
 """
 
+import logging
 import uuid
-from datetime import datetime
-from typing import List, Optional
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
 
 from app.core.firebase import get_firestore_client
 from app.utils.timezone import now_jst, to_jst
@@ -12,16 +13,22 @@ from app.schemas.schedule import (
     LocationScheduleCreate,
     LocationScheduleInDB,
     LocationScheduleUpdate,
+    RecurrenceType,
     ScheduleStatus,
 )
+from app.services.scheduled_tasks import ScheduledTaskService
+from app.services.stay_notification_timer import stay_notification_timer
+
+logger = logging.getLogger(__name__)
 
 
 class ScheduleService:
     """位置情報スケジュール管理サービスクラス"""
 
-    def __init__(self):
+    def __init__(self, task_service: Optional[ScheduledTaskService] = None):
         self.db = get_firestore_client()
         self.collection_name = "schedules"
+        self.task_service = task_service or ScheduledTaskService()
 
     async def create_schedule(
         self, user_id: str, schedule_data: LocationScheduleCreate
@@ -48,11 +55,10 @@ class ScheduleService:
         now = now_jst()
 
         # デバッグ：受信した start_time を確認
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"[DEBUG] 受信した start_time (JST): {to_jst(schedule_data.start_time)}")
-        logger.info(f"[DEBUG] start_time のタイムゾーン: {schedule_data.start_time.tzinfo}")
-        logger.info(f"[DEBUG] 現在のJST時刻: {now}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("受信した start_time (JST): %s", to_jst(schedule_data.start_time))
+            logger.debug("start_time のタイムゾーン: %s", schedule_data.start_time.tzinfo)
+            logger.debug("現在のJST時刻: %s", now)
 
         # スケジュールデータを作成
         schedule_dict = schedule_data.model_dump()
@@ -74,8 +80,7 @@ class ScheduleService:
 
         # Firestoreに保存
         schedule_ref = self.db.collection(self.collection_name).document(schedule_id)
-        saved_time = schedule_dict.get('start_time')
-        logger.info(f"[DEBUG] Firestoreに保存する start_time (JST): {to_jst(saved_time) if saved_time else None}")
+        logger.debug("Firestoreに保存する start_time: %s", schedule_dict.get("start_time"))
         schedule_ref.set(schedule_dict)
 
         return LocationScheduleInDB(**schedule_dict)
@@ -105,23 +110,20 @@ class ScheduleService:
         schedule_data = schedule_doc.to_dict()
 
         # デバッグ：Firestoreから取得した start_time を確認
-        import logging
-        logger = logging.getLogger(__name__)
-        raw_start_time = schedule_data.get('start_time')
-        logger.info(f"[DEBUG] Firestoreから取得した start_time (JST): {to_jst(raw_start_time) if raw_start_time else None}")
-        logger.info(f"[DEBUG] start_time の型: {type(raw_start_time)}")
+        raw_start_time = schedule_data.get("start_time")
+        logger.debug("Firestoreから取得した start_time: %s (%s)", raw_start_time, type(raw_start_time))
 
         # 権限チェック: 作成者本人のみアクセス可能
         if schedule_data.get("user_id") != user_id:
             raise ValueError("このスケジュールにアクセスする権限がありません")
 
-        result = LocationScheduleInDB(**schedule_data)
-        logger.info(f"[DEBUG] LocationScheduleInDB の start_time (JST): {to_jst(result.start_time)}")
-        logger.info(f"[DEBUG] start_time のタイムゾーン: {result.start_time.tzinfo}")
-        return result
+        return LocationScheduleInDB(**schedule_data)
 
     async def get_schedules_by_user(
-        self, user_id: str, status: Optional[ScheduleStatus] = None
+        self,
+        user_id: str,
+        status: Optional[ScheduleStatus] = None,
+        start_time_before: Optional[datetime] = None,
     ) -> List[LocationScheduleInDB]:
         """
         ユーザーのスケジュール一覧を取得
@@ -129,6 +131,8 @@ class ScheduleService:
         Args:
             user_id: ユーザID
             status: フィルタリングするステータス（Noneの場合は全て取得）
+            start_time_before: 指定時刻以前に開始するスケジュールのみ取得
+                （user_id, status, start_time の複合インデックスを使用）
 
         Returns:
             スケジュール一覧
@@ -139,6 +143,10 @@ class ScheduleService:
         if status:
             query = query.where("status", "==", status.value)
 
+        # 開始時刻でフィルタリング
+        if start_time_before:
+            query = query.where("start_time", "<=", start_time_before)
+
         schedules_docs = query.stream()
 
         schedules = []
@@ -151,6 +159,70 @@ class ScheduleService:
 
         return schedules
 
+    def get_occurrence(
+        self, schedule: LocationScheduleInDB, at: datetime
+    ) -> Optional[Tuple[datetime, datetime]]:
+        """
+        指定時刻以降に終了するスケジュールの発生（開始・終了時刻）を取得
+
+        繰り返し設定（daily/weekdays/weekends）がある場合は、start_time/end_time の
+        時刻と長さを保ったまま各日に展開し、終了時刻が指定時刻以降となる最初の発生を返します。
+        曜日の判定はJSTで行います。
+
+        Args:
+            schedule: スケジュール情報
+            at: 基準時刻
+
+        Returns:
+            (開始時刻, 終了時刻)、該当する発生がない場合はNone
+        """
+        start_time = to_jst(schedule.start_time)
+        end_time = to_jst(schedule.end_time)
+        at = to_jst(at)
+
+        if schedule.recurrence is None:
+            return (start_time, end_time) if end_time >= at else None
+
+        duration = end_time - start_time
+
+        # 基準時刻より前に始まって基準時刻をまたぐ発生も含めるため、期間分さかのぼって探す
+        first_day = max(start_time.date(), (at - duration).date())
+        for offset in range(8):
+            day = first_day + timedelta(days=offset)
+            is_weekday = day.weekday() < 5
+            if schedule.recurrence == RecurrenceType.WEEKDAYS and not is_weekday:
+                continue
+            if schedule.recurrence == RecurrenceType.WEEKENDS and is_weekday:
+                continue
+
+            occurrence_start = datetime.combine(day, start_time.timetz())
+            occurrence_end = occurrence_start + duration
+            if occurrence_end >= at:
+                return occurrence_start, occurrence_end
+
+        return None
+
+    def is_in_time_window(
+        self, schedule: LocationScheduleInDB, now: datetime, grace: timedelta
+    ) -> bool:
+        """
+        現在時刻がスケジュールの時間枠（前後の猶予を含む）に入っているかを判定
+
+        Args:
+            schedule: スケジュール情報
+            now: 現在時刻
+            grace: 開始前・終了後の猶予
+
+        Returns:
+            時間枠内ならTrue
+        """
+        occurrence = self.get_occurrence(schedule, now - grace)
+        if occurrence is None:
+            return False
+
+        occurrence_start, _ = occurrence
+        return occurrence_start - grace <= to_jst(now)
+
     async def get_active_schedules(self, user_id: str) -> List[LocationScheduleInDB]:
         """
         ユーザーのアクティブなスケジュール一覧を取得
@@ -290,7 +362,33 @@ class ScheduleService:
         # 更新後のスケジュール情報を取得
         schedule_doc = schedule_ref.get()
         schedule_data = schedule_doc.to_dict()
-        return LocationScheduleInDB(**schedule_data)
+        schedule = LocationScheduleInDB(**schedule_data)
+
+        # 滞在通知の遅延タスクを登録・取り消し
+        await self._sync_stay_notification_task(schedule)
+
+        return schedule
+
+    async def _sync_stay_notification_task(self, schedule: LocationScheduleInDB) -> None:
+        """
+        スケジュールのステータスに合わせて滞在通知タスクを登録・取り消し（内部メソッド）
+
+        到着時に「到着時刻 + notify_after_minutes」を期限とするタスクを登録し、
+        退出・期限切れ時に取り消します。
+
+        Args:
+            schedule: 更新後のスケジュール情報
+        """
+        task_id = self.task_service.get_stay_notification_task_id(schedule.id)
+
+        if schedule.status == ScheduleStatus.ARRIVED and schedule.arrived_at:
+            due_at = to_jst(schedule.arrived_at) + timedelta(minutes=schedule.notify_after_minutes)
+            await self.task_service.schedule_stay_notification(schedule.id, due_at)
+            stay_notification_timer.register(task_id, due_at)
+
+        elif schedule.status in (ScheduleStatus.COMPLETED, ScheduleStatus.EXPIRED):
+            await self.task_service.cancel_task(task_id)
+            stay_notification_timer.cancel(task_id)
 
     async def delete_schedule(self, schedule_id: str, user_id: str) -> None:
         """
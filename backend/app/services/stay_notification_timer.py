@@ -0,0 +1,130 @@
+"""
+滞在通知タイマー
+
+scheduled_tasks に永続化された滞在通知タスクのうち、近い将来に期限を迎えるものを
+プロセス内の階層型タイマーホイールに載せ、期限ちょうどに実行します。
+他インスタンスで登録されたタスクは定期的な同期で取り込み、実行時は
+ScheduledTaskService.claim_task で実行権を取得するため重複送信は起きません。
+
+Cloud Runでは、リクエスト処理中以外もCPUが割り当てられる設定（CPU always allocated）の
+場合にのみ有効にしてください。無効時・停止時も /batch/stay-notifications が
+期限を迎えたタスクを処理します。
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Optional
+
+from app.utils.timer_wheel import HierarchicalTimerWheel
+from app.utils.timezone import jst_now_plus
+
+if TYPE_CHECKING:
+    from app.services.auto_notification import AutoNotificationService
+
+logger = logging.getLogger(__name__)
+
+
+class StayNotificationTimer:
+    """滞在通知タイマークラス"""
+
+    def __init__(self, tick_seconds: float = 1.0, sync_interval_seconds: int = 60):
+        self.tick_seconds = tick_seconds
+        self.sync_interval_seconds = sync_interval_seconds
+        self.wheel = HierarchicalTimerWheel(
+            tick_seconds=tick_seconds, start_timestamp=time.time()
+        )
+        self._runner: Optional[asyncio.Task] = None
+        self._auto_notification_service: Optional["AutoNotificationService"] = None
+
+    @property
+    def is_running(self) -> bool:
+        """タイマーが稼働中かどうか"""
+        return self._runner is not None and not self._runner.done()
+
+    def register(self, task_id: str, due_at: datetime) -> None:
+        """
+        タスクをタイマーに登録（稼働中のみ）
+
+        Args:
+            task_id: タスクID
+            due_at: 実行予定時刻
+        """
+        if self.is_running:
+            self.wheel.add(task_id, due_at.timestamp())
+
+    def cancel(self, task_id: str) -> None:
+        """
+        タスクをタイマーから取り消し
+
+        Args:
+            task_id: タスクID
+        """
+        self.wheel.cancel(task_id)
+
+    def start(self, auto_notification_service: "AutoNotificationService") -> None:
+        """
+        タイマーを開始（実行中のイベントループ上でバックグラウンド実行）
+
+        Args:
+            auto_notification_service: タスクの実行に使用する自動通知サービス
+        """
+        if self.is_running:
+            return
+        self._auto_notification_service = auto_notification_service
+        self.wheel = HierarchicalTimerWheel(
+            tick_seconds=self.tick_seconds, start_timestamp=time.time()
+        )
+        self._runner = asyncio.create_task(self._run())
+        logger.info("[滞在通知タイマー] 開始しました")
+
+    async def stop(self) -> None:
+        """タイマーを停止"""
+        if self._runner is None:
+            return
+        self._runner.cancel()
+        try:
+            await self._runner
+        except asyncio.CancelledError:
+            pass
+        self._runner = None
+        logger.info("[滞在通知タイマー] 停止しました")
+
+    async def _run(self) -> None:
+        """タイマーのメインループ"""
+        last_synced = 0.0
+        while True:
+            now = time.time()
+            if now - last_synced >= self.sync_interval_seconds:
+                await self._sync()
+                last_synced = now
+
+            for task_id in self.wheel.advance(now):
+                await self._fire(task_id)
+
+            await asyncio.sleep(self.tick_seconds)
+
+    async def _sync(self) -> None:
+        """次回同期までに期限を迎えるタスクをFirestoreから取り込む"""
+        try:
+            task_service = self._auto_notification_service.task_service
+            tasks = await task_service.get_due_tasks(
+                until=jst_now_plus(minutes=2 * self.sync_interval_seconds // 60 + 1)
+            )
+            for task in tasks:
+                if task["id"] not in self.wheel:
+                    self.wheel.add(task["id"], task["due_at"].timestamp())
+        except Exception as e:
+            logger.error(f"[滞在通知タイマー] タスクの同期に失敗: {e}", exc_info=True)
+
+    async def _fire(self, task_id: str) -> None:
+        """期限を迎えたタスクを実行"""
+        try:
+            await self._auto_notification_service.run_stay_notification_task(task_id)
+        except Exception as e:
+            logger.error(f"[滞在通知タイマー] タスク {task_id} の実行に失敗: {e}", exc_info=True)
+
+
+# アプリケーション全体で共有するタイマー（STAY_NOTIFICATION_TIMER_ENABLED 時に起動）
+stay_notification_timer = StayNotificationTimer()
@@ -2,15 +2,21 @@
 ユーザー管理サービス
 """
 
+import asyncio
+import logging
 import uuid
-from typing import List, Optional
-
-from google.cloud.firestore_v1 import FieldFilter
+from typing import Dict, Iterable, List, Optional
 
 from app.core.firebase import get_firestore_client, get_storage_bucket
-from app.schemas.user import UserInDB, UserUpdate
+from app.schemas.user import UserInDB, UserUpdate, user_from_firestore
+from app.utils.images import resize_profile_image
 from app.utils.timezone import now_jst
 
+logger = logging.getLogger(__name__)
+
+# プロフィール画像のキャッシュ設定（ファイル名が画像ごとに変わるため、内容は変更されない）
+PROFILE_IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
 
 class UserService:
     """ユーザー管理サービスクラス"""
@@ -87,21 +93,10 @@ class UserService:
                 try:
                     user_data = user_doc.to_dict()
 
-                    # デバッグログ
-                    print(f"[UserService] Processing user: {user_doc.id}")
-                    print(f"[UserService] User data keys: {user_data.keys() if user_data else 'None'}")
-
-                    # FirestoreのTimestampをdatetimeに変換
-                    if "created_at" in user_data and hasattr(user_data["created_at"], "timestamp"):
-                        from datetime import datetime
-                        user_data["created_at"] = datetime.fromtimestamp(user_data["created_at"].timestamp())
+                    logger.debug("Processing user: %s", user_doc.id)
 
-                    if "updated_at" in user_data and hasattr(user_data["updated_at"], "timestamp"):
-                        from datetime import datetime
-                        user_data["updated_at"] = datetime.fromtimestamp(user_data["updated_at"].timestamp())
-
-                    # UserInDBに変換
-                    user = UserInDB(**user_data)
+                    # UserInDBに変換（登録時に検証済みのため再検証しない）
+                    user = user_from_firestore(user_data)
 
                     # 自分自身は除外
                     if user.uid == current_user_id:
@@ -118,14 +113,13 @@ class UserService:
 
                 except Exception as e:
                     # 個別のユーザーデータのエラーはスキップ
-                    print(f"[UserService] Error parsing user {user_doc.id}: {e}")
-                    print(f"[UserService] User data: {user_data}")
+                    logger.warning("Error parsing user %s: %s", user_doc.id, e)
                     continue
 
             return results
 
         except Exception as e:
-            print(f"[UserService] Error in search_users: {e}")
+            logger.error("Error in search_users: %s", e)
             raise
 
     async def get_user_by_uid(self, uid: str) -> Optional[UserInDB]:
@@ -146,15 +140,6 @@ class UserService:
 
         user_data = user_doc.to_dict()
 
-        # FirestoreのTimestampをdatetimeに変換
-        if "created_at" in user_data and hasattr(user_data["created_at"], "timestamp"):
-            from datetime import datetime
-            user_data["created_at"] = datetime.fromtimestamp(user_data["created_at"].timestamp())
-
-        if "updated_at" in user_data and hasattr(user_data["updated_at"], "timestamp"):
-            from datetime import datetime
-            user_data["updated_at"] = datetime.fromtimestamp(user_data["updated_at"].timestamp())
-
         # usernameが存在しない場合はエラー
         if "username" not in user_data or not user_data["username"]:
             print(f"[UserService] Error: User {uid} has no username")
@@ -164,7 +149,36 @@ class UserService:
                 "Please delete this user from Firebase Console and re-register."
             )
 
-        return UserInDB(**user_data)
+        return user_from_firestore(user_data)
+
+    async def get_users_by_uids(self, uids: Iterable[str]) -> Dict[str, UserInDB]:
+        """
+        複数のUIDのユーザー情報を1回の一括取得（get_all）で取得
+
+        Args:
+            uids: ユーザIDのリスト（重複可）
+
+        Returns:
+            ユーザID → ユーザー情報（存在しない・usernameがないユーザーは含まない）
+        """
+        unique_uids = list(dict.fromkeys(uids))
+        if not unique_uids:
+            return {}
+
+        users_collection = self.db.collection("users")
+        refs = [users_collection.document(uid) for uid in unique_uids]
+
+        users = {}
+        for user_doc in self.db.get_all(refs):
+            if not user_doc.exists:
+                continue
+            user_data = user_doc.to_dict()
+            if not user_data.get("username"):
+                logger.warning("User %s has no username", user_doc.id)
+                continue
+            users[user_doc.id] = user_from_firestore(user_data)
+
+        return users
 
     async def update_profile(self, uid: str, update_data: UserUpdate) -> UserInDB:
         """
@@ -212,69 +226,90 @@ class UserService:
         self, uid: str, image_data: bytes, content_type: str
     ) -> str:
         """
-        プロフィール画像をFirebase Storageにアップロード
+        プロフィール画像をリサイズしてFirebase Storageにアップロード
+
+        画像を検証・デコードし、PROFILE_IMAGE_SIZES の各サイズのWebPを生成して並行してアップロードする。
+        処理はすべてイベントループ外で行う。アップロード後、以前の画像は削除する。
 
         Args:
             uid: ユーザID
             image_data: 画像データ（バイト列）
-            content_type: ファイルのMIMEタイプ
+            content_type: ファイルのMIMEタイプ（形式は画像データから判定する）
 
         Returns:
-            アップロードされた画像の公開URL
+            プロフィール表示用（最大サイズ）の画像の公開URL
 
         Raises:
-            ValueError: ユーザーが見つからない場合
+            ValueError: ユーザーが見つからない、画像として読み込めない場合
         """
         # ユーザーの存在確認
         user = await self.get_user_by_uid(uid)
         if not user:
             raise ValueError("ユーザーが見つかりません")
 
-        # ファイル拡張子の決定
-        extension_map = {
-            "image/jpeg": "jpg",
-            "image/jpg": "jpg",
-            "image/png": "png",
-            "image/gif": "gif",
-            "image/webp": "webp",
-        }
-        extension = extension_map.get(content_type, "jpg")
+        loop = asyncio.get_running_loop()
 
-        # ファイル名を生成（ユーザIDとUUIDを使用）
-        filename = f"profile_images/{uid}/{uuid.uuid4()}.{extension}"
+        # 検証とリサイズ（CPUを使うためイベントループ外で実行）
+        variants = await loop.run_in_executor(None, resize_profile_image, image_data)
+
+        # ファイル名を生成（ユーザID・UUID・サイズを使用。内容が変わることはないため長期キャッシュできる）
+        image_id = uuid.uuid4()
+        uploaded_at = now_jst().isoformat()
 
         try:
-            # Firebase Storageにアップロード
             bucket = get_storage_bucket()
-            blob = bucket.blob(filename)
 
-            # メタデータを設定
-            blob.metadata = {
-                "user_id": uid,
-                "uploaded_at": now_jst().isoformat(),
-            }
+            def upload(size: int, data: bytes) -> str:
+                blob = bucket.blob(f"profile_images/{uid}/{image_id}_{size}.webp")
+                blob.metadata = {"user_id": uid, "uploaded_at": uploaded_at}
+                blob.cache_control = PROFILE_IMAGE_CACHE_CONTROL
+                blob.upload_from_string(data, content_type="image/webp")
+                # 公開URLを取得するために公開設定
+                blob.make_public()
+                return blob.public_url
+
+            urls = await asyncio.gather(
+                *(loop.run_in_executor(None, upload, size, data) for size, data in variants.items())
+            )
+            image_urls = {str(size): url for size, url in zip(variants, urls)}
 
-            # アップロード
-            blob.upload_from_string(image_data, content_type=content_type)
+        except Exception as e:
+            print(f"[UserService] Error uploading profile image: {e}")
+            raise ValueError(f"画像のアップロードに失敗しました: {str(e)}")
 
-            # 公開URLを取得するために公開設定
-            blob.make_public()
+        # ユーザーの画像URLを更新（profile_image_url は最大サイズ、一覧では小さいサイズを使う）
+        public_url = image_urls[str(max(variants))]
+        user_ref = self.db.collection("users").document(uid)
+        user_ref.update({
+            "profile_image_url": public_url,
+            "profile_image_urls": image_urls,
+            "updated_at": now_jst()
+        })
 
-            # 公開URLを取得
-            public_url = blob.public_url
+        # 以前の画像を削除（失敗しても新しい画像は使えるため無視する）
+        try:
+            await loop.run_in_executor(
+                None, self._delete_profile_image_blobs, uid, f"profile_images/{uid}/{image_id}_"
+            )
+        except Exception as e:
+            logger.warning("以前のプロフィール画像の削除に失敗: %s: %s", uid, e)
 
-            # ユーザーのprofile_image_urlを更新
-            user_ref = self.db.collection("users").document(uid)
-            user_ref.update({
-                "profile_image_url": public_url,
-                "updated_at": now_jst()
-            })
+        return public_url
 
-            return public_url
+    def _delete_profile_image_blobs(self, uid: str, keep_prefix: Optional[str] = None) -> None:
+        """
+        ユーザーのプロフィール画像をStorageから削除（内部メソッド、ブロッキングのためスレッドで実行）
 
-        except Exception as e:
-            print(f"[UserService] Error uploading profile image: {e}")
-            raise ValueError(f"画像のアップロードに失敗しました: {str(e)}")
+        Args:
+            uid: ユーザID
+            keep_prefix: このプレフィックスで始まる画像は削除しない
+        """
+        bucket = get_storage_bucket()
+        for blob in bucket.list_blobs(prefix=f"profile_images/{uid}/"):
+            if keep_prefix and blob.name.startswith(keep_prefix):
+                continue
+            blob.delete()
+            logger.info("プロフィール画像を削除: %s", blob.name)
 
     async def delete_profile_image(self, uid: str) -> None:
         """
@@ -292,128 +327,21 @@ class UserService:
             raise ValueError("ユーザーが見つかりません")
 
         try:
-            # Firebase Storageから画像を削除
-            bucket = get_storage_bucket()
-            blobs = bucket.list_blobs(prefix=f"profile_images/{uid}/")
-            for blob in blobs:
-                blob.delete()
-                print(f"[UserService] Deleted profile image: {blob.name}")
+            # Firebase Storageから画像を削除（ブロッキングのためイベントループ外で実行）
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._delete_profile_image_blobs, uid
+            )
 
             # ユーザーのprofile_image_urlをNullに設定
             user_ref = self.db.collection("users").document(uid)
             user_ref.update({
                 "profile_image_url": None,
+                "profile_image_urls": {},
                 "updated_at": now_jst()
             })
 
-            print(f"[UserService] Profile image deleted for user: {uid}")
+            logger.info("プロフィール画像を削除しました: %s", uid)
 
         except Exception as e:
-            print(f"[UserService] Error deleting profile image: {e}")
+            logger.warning("プロフィール画像の削除に失敗: %s: %s", uid, e)
             raise ValueError(f"プロフィール画像の削除に失敗しました: {str(e)}")
-
-    async def delete_user(self, uid: str) -> None:
-        """
-        ユーザーアカウントとすべての関連データを削除
-
-        Args:
-            uid: ユーザID
-
-        Raises:
-            ValueError: ユーザーが見つからない場合
-        """
-        # ユーザーの存在確認
-        user_ref = self.db.collection("users").document(uid)
-        user_doc = user_ref.get()
-
-        if not user_doc.exists:
-            raise ValueError("ユーザーが見つかりません")
-
-        try:
-            print(f"[UserService] Deleting user account: {uid}")
-
-            # 1. フレンド関係の削除
-            # 自分から送ったフレンドリクエスト
-            from_friends = self.db.collection("friends").where(
-                filter=FieldFilter("from_user_id", "==", uid)
-            ).stream()
-            for friend_doc in from_friends:
-                friend_doc.reference.delete()
-                print(f"[UserService] Deleted friend relationship (from): {friend_doc.id}")
-
-            # 自分宛に送られたフレンドリクエスト
-            to_friends = self.db.collection("friends").where(
-                filter=FieldFilter("to_user_id", "==", uid)
-            ).stream()
-            for friend_doc in to_friends:
-                friend_doc.reference.delete()
-                print(f"[UserService] Deleted friend relationship (to): {friend_doc.id}")
-
-            # 2. スケジュールの削除
-            schedules = self.db.collection("schedules").where(
-                filter=FieldFilter("user_id", "==", uid)
-            ).stream()
-            for schedule_doc in schedules:
-                schedule_doc.reference.delete()
-                print(f"[UserService] Deleted schedule: {schedule_doc.id}")
-
-            # 3. お気に入り位置の削除
-            favorites = self.db.collection("favorites").where(
-                filter=FieldFilter("user_id", "==", uid)
-            ).stream()
-            for favorite_doc in favorites:
-                favorite_doc.reference.delete()
-                print(f"[UserService] Deleted favorite: {favorite_doc.id}")
-
-            # 4. 位置情報履歴の削除
-            location_history = self.db.collection("location_history").where(
-                filter=FieldFilter("user_id", "==", uid)
-            ).stream()
-            for location_doc in location_history:
-                location_doc.reference.delete()
-                print(f"[UserService] Deleted location history: {location_doc.id}")
-
-            # 5. 通知履歴の削除（送信元）
-            from_notifications = self.db.collection("notification_history").where(
-                filter=FieldFilter("from_user_id", "==", uid)
-            ).stream()
-            for notification_doc in from_notifications:
-                notification_doc.reference.delete()
-                print(f"[UserService] Deleted notification (from): {notification_doc.id}")
-
-            # 6. 通知履歴の削除（送信先）
-            to_notifications = self.db.collection("notification_history").where(
-                filter=FieldFilter("to_user_id", "==", uid)
-            ).stream()
-            for notification_doc in to_notifications:
-                notification_doc.reference.delete()
-                print(f"[UserService] Deleted notification (to): {notification_doc.id}")
-
-            # 7. FCMトークンの削除
-            fcm_tokens = self.db.collection("fcm_tokens").where(
-                filter=FieldFilter("user_id", "==", uid)
-            ).stream()
-            for token_doc in fcm_tokens:
-                token_doc.reference.delete()
-                print(f"[UserService] Deleted FCM token: {token_doc.id}")
-
-            # 8. ユーザードキュメントの削除
-            user_ref.delete()
-            print(f"[UserService] Deleted user document: {uid}")
-
-            # 9. プロフィール画像の削除（Storage）
-            try:
-                bucket = get_storage_bucket()
-                blobs = bucket.list_blobs(prefix=f"profile_images/{uid}/")
-                for blob in blobs:
-                    blob.delete()
-                    print(f"[UserService] Deleted profile image: {blob.name}")
-            except Exception as e:
-                # ストレージの削除エラーは無視（ファイルが存在しない場合など）
-                print(f"[UserService] Error deleting profile images: {e}")
-
-            print(f"[UserService] User account deletion completed: {uid}")
-
-        except Exception as e:
-            print(f"[UserService] Error deleting user account: {e}")
-            raise ValueError(f"アカウントの削除に失敗しました: {str(e)}")
@@ -1,31 +1,71 @@
 """
 位置情報暗号化ユーティリティ
+
+暗号化オブジェクトはキー設定ごとに1度だけ生成してキャッシュします。
+ENCRYPTION_OLD_KEYS に旧キーを指定すると、新しいキー（ENCRYPTION_KEY）で暗号化しつつ
+旧キーで暗号化されたデータも復号化できます（キーローテーション）。
 """
 
 import base64
 import json
-from typing import Any
-
-from cryptography.fernet import Fernet
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Iterable, List
 
 from app.config import settings
 
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet, MultiFernet
 
-def _get_cipher() -> Fernet:
+
+def _build_fernet(key: str) -> "Fernet":
     """
-    暗号化キーからFernetオブジェクトを取得
+    暗号化キーからFernetオブジェクトを生成
+
+    Args:
+        key: 暗号化キー
 
     Returns:
         Fernet: 暗号化/復号化オブジェクト
     """
-    # ENCRYPTION_KEYが既にFernet形式の場合はそのまま使用
+    from cryptography.fernet import Fernet
+
+    # キーが既にFernet形式の場合はそのまま使用
     # そうでない場合はbase64エンコード（初回セットアップ時）
     try:
-        return Fernet(settings.ENCRYPTION_KEY.encode())
+        return Fernet(key.encode())
     except Exception:
         # キーが正しくない場合は、キーから新しいFernetキーを生成
-        key = base64.urlsafe_b64encode(settings.ENCRYPTION_KEY.encode().ljust(32)[:32])
-        return Fernet(key)
+        derived_key = base64.urlsafe_b64encode(key.encode().ljust(32)[:32])
+        return Fernet(derived_key)
+
+
+@lru_cache(maxsize=4)
+def _build_cipher(primary_key: str, old_keys: str) -> "MultiFernet":
+    """
+    キー設定からMultiFernetオブジェクトを生成（キー設定ごとにキャッシュ）
+
+    Args:
+        primary_key: 暗号化に使用するキー
+        old_keys: 復号化のみに使用する旧キー（カンマ区切り）
+
+    Returns:
+        MultiFernet: 暗号化/復号化オブジェクト
+    """
+    # cryptography の読み込みは初回の暗号化・復号化時まで遅らせる（起動時間の短縮）
+    from cryptography.fernet import MultiFernet
+
+    keys = [primary_key] + [key.strip() for key in old_keys.split(",") if key.strip()]
+    return MultiFernet([_build_fernet(key) for key in keys])
+
+
+def _get_cipher() -> "MultiFernet":
+    """
+    現在の設定の暗号化オブジェクトを取得
+
+    Returns:
+        MultiFernet: 暗号化/復号化オブジェクト
+    """
+    return _build_cipher(settings.ENCRYPTION_KEY, settings.ENCRYPTION_OLD_KEYS)
 
 
 def encrypt_location_data(latitude: float, longitude: float, **extra_data: Any) -> str:
@@ -40,8 +80,6 @@ def encrypt_location_data(latitude: float, longitude: float, **extra_data: Any)
     Returns:
         str: 暗号化されたデータ（base64文字列）
     """
-    cipher = _get_cipher()
-
     # JSONとして結合
     data = {
         "lat": latitude,
@@ -50,10 +88,7 @@ def encrypt_location_data(latitude: float, longitude: float, **extra_data: Any)
     }
 
     # JSON文字列化して暗号化
-    json_data = json.dumps(data)
-    encrypted = cipher.encrypt(json_data.encode())
-
-    return encrypted.decode()
+    return encrypt_string(json.dumps(data))
 
 
 def decrypt_location_data(encrypted_data: str) -> dict[str, Any]:
@@ -112,3 +147,60 @@ def decrypt_string(encrypted_text: str) -> str:
         return decrypted.decode()
     except Exception as e:
         raise ValueError(f"Failed to decrypt string: {str(e)}")
+
+
+def encrypt_many(texts: Iterable[str]) -> List[str]:
+    """
+    複数の文字列をまとめて暗号化
+
+    Args:
+        texts: 暗号化する文字列のリスト
+
+    Returns:
+        List[str]: 暗号化された文字列のリスト（入力と同じ順序）
+    """
+    cipher = _get_cipher()
+    return [cipher.encrypt(text.encode()).decode() for text in texts]
+
+
+def decrypt_many(encrypted_texts: Iterable[str]) -> List[str]:
+    """
+    複数の暗号化された文字列をまとめて復号化
+
+    Args:
+        encrypted_texts: 暗号化された文字列のリスト
+
+    Returns:
+        List[str]: 復号化された文字列のリスト（入力と同じ順序）
+
+    Raises:
+        ValueError: いずれかの復号化に失敗した場合
+    """
+    cipher = _get_cipher()
+    decrypted = []
+    for index, encrypted_text in enumerate(encrypted_texts):
+        try:
+            decrypted.append(cipher.decrypt(encrypted_text.encode()).decode())
+        except Exception as e:
+            raise ValueError(f"Failed to decrypt string at index {index}: {str(e)}")
+    return decrypted
+
+
+def rotate_string(encrypted_text: str) -> str:
+    """
+    旧キーで暗号化された文字列を現在のキーで暗号化し直す
+
+    Args:
+        encrypted_text: 暗号化された文字列（base64）
+
+    Returns:
+        str: 現在のキーで暗号化された文字列
+
+    Raises:
+        ValueError: 復号化に失敗した場合
+    """
+    try:
+        cipher = _get_cipher()
+        return cipher.rotate(encrypted_text.encode()).decode()
+    except Exception as e:
+        raise ValueError(f"Failed to rotate string: {str(e)}")
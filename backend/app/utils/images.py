@@ -0,0 +1,65 @@
+"""
+プロフィール画像の処理（検証・リサイズ）
+
+アップロードされた画像をデコードして検証し、一覧表示・プロフィール表示用の正方形のWebPに変換します。
+元の画像はそのまま保存しません。
+"""
+
+import io
+from typing import Dict, Sequence
+
+# 生成するサイズ（px、正方形）。小さい方は一覧のアバター用
+PROFILE_IMAGE_SIZES = (128, 512)
+
+# 受け付ける画像形式（Pillowの形式名）
+ALLOWED_FORMATS = {"JPEG", "PNG", "GIF", "WEBP"}
+
+# デコードする画像の最大ピクセル数（巨大な画像の展開によるメモリ消費を防ぐ）
+MAX_PIXELS = 40_000_000
+
+WEBP_QUALITY = 80
+
+
+def resize_profile_image(
+    image_data: bytes, sizes: Sequence[int] = PROFILE_IMAGE_SIZES
+) -> Dict[int, bytes]:
+    """
+    画像を検証し、中央を正方形に切り抜いた各サイズのWebPを生成
+
+    CPUを使う処理のため、イベントループ外（run_in_executor）で呼び出してください。
+
+    Args:
+        image_data: アップロードされた画像データ
+        sizes: 生成するサイズ（px）
+
+    Returns:
+        サイズ → WebPの画像データ
+
+    Raises:
+        ValueError: 画像として読み込めない、対応していない形式、大きすぎる場合
+    """
+    # アップロード時にのみ使うため、ここで読み込む
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(io.BytesIO(image_data)) as image:
+            if image.format not in ALLOWED_FORMATS:
+                raise ValueError("JPEG, PNG, GIF, WebP の画像のみアップロード可能です")
+            if image.width * image.height > MAX_PIXELS:
+                raise ValueError("画像の解像度が大きすぎます")
+
+            # EXIFの向きを反映し、透過の有無に合わせて色空間をそろえる
+            image = ImageOps.exif_transpose(image)
+            has_alpha = image.mode in ("RGBA", "LA") or "transparency" in image.info
+            image = image.convert("RGBA" if has_alpha else "RGB")
+
+            variants = {}
+            for size in sizes:
+                thumbnail = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+                output = io.BytesIO()
+                thumbnail.save(output, format="WEBP", quality=WEBP_QUALITY)
+                variants[size] = output.getvalue()
+            return variants
+
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError("画像を読み込めませんでした") from e
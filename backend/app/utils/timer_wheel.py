@@ -0,0 +1,171 @@
+"""
+階層型タイマーホイール
+
+近い将来に期限を迎えるタスクをメモリ上で管理し、期限の到来したキーを
+O(1)（償却）で取り出すためのデータ構造です。
+"""
+
+import math
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+
+class HierarchicalTimerWheel:
+    """
+    階層型タイマーホイール
+
+    デフォルトでは「1秒 × 60スロット」「1分 × 60スロット」「1時間 × 24スロット」の3階層で、
+    最大24時間先までのタイマーを保持します。上位階層のスロットは、その時間枠に入った時点で
+    下位階層へ振り直されます（カスケード）。
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = 1.0,
+        wheel_sizes: Sequence[int] = (60, 60, 24),
+        start_timestamp: float = 0.0,
+    ):
+        """
+        Args:
+            tick_seconds: 最下位階層の1スロットの長さ（秒）
+            wheel_sizes: 各階層のスロット数（下位から順に）
+            start_timestamp: 開始時刻（UNIXタイムスタンプ）
+        """
+        self.tick_seconds = tick_seconds
+        self.wheel_sizes = list(wheel_sizes)
+        # 各階層の1スロットが表すtick数
+        self._spans = [math.prod(self.wheel_sizes[:level]) for level in range(len(self.wheel_sizes))]
+        self._horizon_ticks = math.prod(self.wheel_sizes)
+        self._wheels: List[List[Dict[Hashable, int]]] = [
+            [{} for _ in range(size)] for size in self.wheel_sizes
+        ]
+        self._locations: Dict[Hashable, Tuple[int, int]] = {}
+        self._ready: Dict[Hashable, int] = {}
+        self.current_tick = self._to_tick(start_timestamp)
+
+    def _to_tick(self, timestamp: float) -> int:
+        """タイムスタンプをtickに変換（切り上げ）"""
+        return math.ceil(timestamp / self.tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._locations) + len(self._ready)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._locations or key in self._ready
+
+    @property
+    def horizon_seconds(self) -> float:
+        """保持できる最大の先行時間（秒）"""
+        return self._horizon_ticks * self.tick_seconds
+
+    def add(self, key: Hashable, due_timestamp: float) -> bool:
+        """
+        タイマーを追加（同じキーが既にある場合は置き換え）
+
+        Args:
+            key: タイマーのキー
+            due_timestamp: 期限（UNIXタイムスタンプ）
+
+        Returns:
+            追加できた場合True、保持できる範囲より先の期限の場合False
+        """
+        self.cancel(key)
+        return self._place(key, self._to_tick(due_timestamp))
+
+    def _place(self, key: Hashable, due_tick: int) -> bool:
+        """期限までのtick数に応じた階層・スロットに配置"""
+        delta = due_tick - self.current_tick
+        if delta <= 0:
+            self._ready[key] = due_tick
+            return True
+        if delta >= self._horizon_ticks:
+            return False
+
+        for level, span in enumerate(self._spans):
+            if delta < span * self.wheel_sizes[level]:
+                slot = (due_tick // span) % self.wheel_sizes[level]
+                self._wheels[level][slot][key] = due_tick
+                self._locations[key] = (level, slot)
+                return True
+        return False
+
+    def cancel(self, key: Hashable) -> bool:
+        """
+        タイマーを取り消し
+
+        Args:
+            key: タイマーのキー
+
+        Returns:
+            取り消した場合True
+        """
+        if key in self._ready:
+            del self._ready[key]
+            return True
+
+        location = self._locations.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        self._wheels[level][slot].pop(key, None)
+        return True
+
+    def advance(self, timestamp: float) -> List[Hashable]:
+        """
+        指定時刻まで時間を進め、期限を迎えたキーを取り出す
+
+        Args:
+            timestamp: 現在時刻（UNIXタイムスタンプ）
+
+        Returns:
+            期限を迎えたキーのリスト（期限順）
+        """
+        target_tick = math.floor(timestamp / self.tick_seconds)
+        expired: List[Tuple[int, Hashable]] = [(due, key) for key, due in self._ready.items()]
+        self._ready.clear()
+
+        while self.current_tick < target_tick:
+            self.current_tick += 1
+            self._cascade()
+
+            slot = self._wheels[0][self.current_tick % self.wheel_sizes[0]]
+            for key, due_tick in list(slot.items()):
+                if due_tick <= self.current_tick:
+                    del slot[key]
+                    del self._locations[key]
+                    expired.append((due_tick, key))
+
+            # カスケードで期限ちょうどに振り直されたもの
+            if self._ready:
+                expired.extend((due, key) for key, due in self._ready.items())
+                self._ready.clear()
+
+        expired.sort(key=lambda item: item[0])
+        return [key for _, key in expired]
+
+    def _cascade(self) -> None:
+        """上位階層のスロットの時間枠に入ったタイマーを下位階層に振り直す"""
+        for level in range(len(self.wheel_sizes) - 1, 0, -1):
+            span = self._spans[level]
+            if self.current_tick % span != 0:
+                continue
+            slot = self._wheels[level][(self.current_tick // span) % self.wheel_sizes[level]]
+            entries = list(slot.items())
+            slot.clear()
+            for key, due_tick in entries:
+                del self._locations[key]
+                self._place(key, due_tick)
+
+    def next_due_timestamp(self) -> Optional[float]:
+        """
+        最も早い期限を取得（デバッグ・監視用）
+
+        Returns:
+            最も早い期限（UNIXタイムスタンプ）、タイマーがない場合はNone
+        """
+        due_ticks = list(self._ready.values())
+        for wheel in self._wheels:
+            for slot in wheel:
+                due_ticks.extend(slot.values())
+        if not due_ticks:
+            return None
+        return min(due_ticks) * self.tick_seconds
@@ -13,6 +13,7 @@ interface CleanupResult {
   success: boolean;
   deleted: {
     locationHistory: number;
+    locationBuckets: number;
     notificationHistory: number;
     schedules: number;
   };
@@ -90,13 +91,15 @@ export const manualCleanup = functions
  *
  * 削除対象:
  * 1. location_history: auto_delete_at が現在時刻より前
- * 2. notification_history: auto_delete_at が現在時刻より前
+ *    （location_buckets はバケット単位でまとめて削除）
+ * 2. notifications: auto_delete_at が現在時刻より前（位置情報の通知のみ設定される）
  * 3. schedules: status=expired かつ end_time から24時間経過
  */
 async function performCleanup(): Promise<CleanupResult> {
   const now = admin.firestore.Timestamp.now();
   const deletedCounts = {
     locationHistory: 0,
+    locationBuckets: 0,
     notificationHistory: 0,
     schedules: 0,
   };
@@ -118,18 +121,33 @@ async function performCleanup(): Promise<CleanupResult> {
     errors.push(errorMsg);
   }
 
-  // 2. notification_history の削除
   try {
-    console.log("Cleaning up notification_history...");
+    console.log("Cleaning up location_buckets...");
+    const locationBucketsCount = await cleanupCollection(
+      "location_buckets",
+      "auto_delete_at",
+      now
+    );
+    deletedCounts.locationBuckets = locationBucketsCount;
+    console.log(`Deleted ${locationBucketsCount} location_buckets records`);
+  } catch (error) {
+    const errorMsg = `Failed to cleanup location_buckets: ${error}`;
+    console.error(errorMsg);
+    errors.push(errorMsg);
+  }
+
+  // 2. 期限切れの通知の削除
+  try {
+    console.log("Cleaning up notifications...");
     const notificationHistoryCount = await cleanupCollection(
-      "notification_history",
+      "notifications",
       "auto_delete_at",
       now
     );
     deletedCounts.notificationHistory = notificationHistoryCount;
-    console.log(`Deleted ${notificationHistoryCount} notification_history records`);
+    console.log(`Deleted ${notificationHistoryCount} notifications records`);
   } catch (error) {
-    const errorMsg = `Failed to cleanup notification_history: ${error}`;
+    const errorMsg = `Failed to cleanup notifications: ${error}`;
     console.error(errorMsg);
     errors.push(errorMsg);
   }
@@ -0,0 +1,339 @@
+"""
+位置情報更新の負荷テスト
+
+N台の端末が目的地に向かって移動し、到着後にその場で滞在する軌跡を再現して、
+POST /api/v1/location/update をASGIアプリに直接送信します（uvicorn・ネットワークは経由しません）。
+レイテンシ（p50/p95/p99）、スループット、1リクエストあたりのFirestore操作数を出力します。
+「1インスタンスで何ユーザーまで捌けるか」の見積もりに使ってください。
+
+Firestore:
+    --firestore fake       インメモリのフェイク（tests/fake_firestore.py、デフォルト）
+    --firestore emulator   Firestoreエミュレータ（FIRESTORE_EMULATOR_HOST を設定しておくこと）
+
+FCMの送信は常にスタブに置き換えるため、実際の通知は送信されません。
+フェイクのクエリは全件走査のため、端末数が多い場合の絶対値はエミュレータ・本番と異なります。
+
+使い方:
+    uv run python scripts/load_test.py --devices 200 --updates 20 --concurrency 50
+    FIRESTORE_EMULATOR_HOST=localhost:8080 uv run python scripts/load_test.py --firestore emulator
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Tuple
+from unittest.mock import patch
+
+# backend/ を import パスに追加（scripts/ から直接実行するため）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import Request  # noqa: E402
+
+from app.api.dependencies import get_current_user  # noqa: E402
+from app.core.container import ServiceContainer  # noqa: E402
+from app.core.firebase import get_firestore_client  # noqa: E402
+from app.core.firestore_metrics import FirestoreOpStats, track_firestore_ops  # noqa: E402
+from app.main import app  # noqa: E402
+from app.schemas.user import UserInDB  # noqa: E402
+from app.utils.timezone import now_jst  # noqa: E402
+
+# 1度あたりの距離（メートル、緯度方向）
+METERS_PER_DEGREE = 111_320
+
+# 端末の初期位置の中心（東京駅）
+CENTER_LAT = 35.6812
+CENTER_LNG = 139.7671
+
+
+@dataclass
+class Device:
+    """シミュレーションする端末（1端末 = 1ユーザー、目的地付きのスケジュール1件）"""
+
+    user_id: str
+    friend_id: str
+    start: Tuple[float, float]
+    destination: Tuple[float, float]
+    approach_steps: int
+    rng: random.Random = field(repr=False)
+
+    def position(self, step: int) -> Tuple[float, float]:
+        """
+        step 回目の送信時の座標
+
+        approach_steps 回で目的地まで直線的に移動し、以降は目的地の周辺に滞在します。
+        いずれもGPSの誤差として数メートル〜十数メートルのばらつきを加えます。
+        """
+        progress = min(step / self.approach_steps, 1.0)
+        lat = self.start[0] + (self.destination[0] - self.start[0]) * progress
+        lng = self.start[1] + (self.destination[1] - self.start[1]) * progress
+        noise_m = self.rng.gauss(0, 8)
+        angle = self.rng.uniform(0, 2 * math.pi)
+        lat += noise_m * math.sin(angle) / METERS_PER_DEGREE
+        lng += noise_m * math.cos(angle) / (METERS_PER_DEGREE * math.cos(math.radians(lat)))
+        return lat, lng
+
+
+@dataclass
+class LoadTestResult:
+    """負荷テストの結果"""
+
+    latencies_ms: List[float]
+    status_counts: Dict[int, int]
+    event_counts: Dict[str, int]
+    elapsed_seconds: float
+    ops: FirestoreOpStats
+
+
+def build_devices(count: int, updates: int, seed: int) -> List[Device]:
+    """端末を作成（初期位置は目的地から0.5〜3km離れたランダムな方向）"""
+    rng = random.Random(seed)
+    devices = []
+    for index in range(count):
+        destination = (
+            CENTER_LAT + rng.uniform(-0.05, 0.05),
+            CENTER_LNG + rng.uniform(-0.05, 0.05),
+        )
+        distance_m = rng.uniform(500, 3000)
+        bearing = rng.uniform(0, 2 * math.pi)
+        start = (
+            destination[0] + distance_m * math.sin(bearing) / METERS_PER_DEGREE,
+            destination[1]
+            + distance_m * math.cos(bearing) / (METERS_PER_DEGREE * math.cos(math.radians(destination[0]))),
+        )
+        devices.append(
+            Device(
+                user_id=f"loadtest_user_{index}",
+                friend_id=f"loadtest_friend_{index}",
+                start=start,
+                destination=destination,
+                # 送信回数の前半で到着し、後半は滞在
+                approach_steps=max(updates // 2, 1),
+                rng=random.Random(seed + index + 1),
+            )
+        )
+    return devices
+
+
+def seed_firestore(devices: List[Device], started_at: datetime) -> Dict[str, UserInDB]:
+    """
+    ユーザー・フレンド・スケジュールを投入
+
+    Returns:
+        ユーザーID → ユーザー（認証の差し替えに使用）
+    """
+    db = get_firestore_client()
+    users = {}
+    for device in devices:
+        for uid in (device.user_id, device.friend_id):
+            user = UserInDB(
+                uid=uid,
+                username=uid,
+                email=f"{uid}@example.com",
+                display_name=uid,
+                fcm_tokens=[f"{uid}_token"],
+                created_at=started_at,
+                updated_at=started_at,
+            )
+            db.collection("users").document(uid).set(user.model_dump())
+            users[uid] = user
+
+        schedule_id = f"loadtest_schedule_{device.user_id}"
+        db.collection("schedules").document(schedule_id).set(
+            {
+                "id": schedule_id,
+                "user_id": device.user_id,
+                "destination_name": f"目的地 {device.user_id}",
+                "destination_address": "東京都",
+                "destination_coords": {"lat": device.destination[0], "lng": device.destination[1]},
+                "geofence_radius": 50,
+                "notify_to_user_ids": [device.friend_id],
+                "start_time": started_at - timedelta(minutes=10),
+                "end_time": started_at + timedelta(hours=3),
+                "status": "active",
+                "notify_after_minutes": 60,
+                "created_at": started_at,
+                "updated_at": started_at,
+            }
+        )
+    return users
+
+
+def _stub_send_each(messages, *args, **kwargs):
+    """FCMの一括送信のスタブ（全件成功）"""
+    return SimpleNamespace(
+        success_count=len(messages),
+        failure_count=0,
+        responses=[SimpleNamespace(success=True, exception=None) for _ in messages],
+    )
+
+
+async def drive_devices(
+    devices: List[Device],
+    users: Dict[str, UserInDB],
+    updates: int,
+    interval_seconds: int,
+    concurrency: int,
+    started_at: datetime,
+) -> LoadTestResult:
+    """全端末から位置情報を送信し、レイテンシを計測"""
+    latencies_ms: List[float] = []
+    status_counts: Dict[int, int] = {}
+    event_counts: Dict[str, int] = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def current_device_user(request: Request) -> UserInDB:
+        return users[request.headers["Authorization"].removeprefix("Bearer ")]
+
+    app.dependency_overrides[get_current_user] = current_device_user
+
+    async def run_device(client: httpx.AsyncClient, device: Device) -> None:
+        headers = {"Authorization": f"Bearer {device.user_id}"}
+        for step in range(updates):
+            lat, lng = device.position(step)
+            # 記録日時は送信間隔ごとに進める（移動速度の推定が実際の端末と同じになるように）
+            recorded_at = started_at + timedelta(seconds=interval_seconds * step)
+            payload = {
+                "coords": {"lat": lat, "lng": lng},
+                "accuracy": round(abs(device.rng.gauss(10, 5)), 1),
+                "recorded_at": recorded_at.isoformat(),
+            }
+            async with semaphore:
+                request_started = time.perf_counter()
+                response = await client.post("/api/v1/location/update", json=payload, headers=headers)
+                latencies_ms.append((time.perf_counter() - request_started) * 1000)
+
+            status_counts[response.status_code] = status_counts.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                for update in response.json().get("schedule_updates", []):
+                    event_counts[update["event_type"]] = event_counts.get(update["event_type"], 0) + 1
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+            with track_firestore_ops() as ops:
+                run_started = time.perf_counter()
+                await asyncio.gather(*(run_device(client, device) for device in devices))
+                elapsed_seconds = time.perf_counter() - run_started
+    finally:
+        app.dependency_overrides.pop(get_current_user, None)
+
+    return LoadTestResult(
+        latencies_ms=latencies_ms,
+        status_counts=status_counts,
+        event_counts=event_counts,
+        elapsed_seconds=elapsed_seconds,
+        ops=ops,
+    )
+
+
+def percentile(sorted_values: List[float], percent: float) -> float:
+    """パーセンタイル（最近傍順位法）"""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(percent / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def print_report(result: LoadTestResult, devices: int, concurrency: int) -> None:
+    """結果を出力"""
+    latencies = sorted(result.latencies_ms)
+    requests = len(latencies)
+    per_request = max(requests, 1)
+
+    print(f"端末数: {devices}  同時実行数: {concurrency}  リクエスト数: {requests}")
+    print(f"所要時間: {result.elapsed_seconds:.2f}秒  スループット: {requests / result.elapsed_seconds:.1f} req/s")
+    print(
+        "レイテンシ(ms): "
+        f"p50={percentile(latencies, 50):.1f}  p95={percentile(latencies, 95):.1f}  "
+        f"p99={percentile(latencies, 99):.1f}  max={latencies[-1] if latencies else 0:.1f}"
+    )
+    print(
+        "Firestore操作数/リクエスト: "
+        f"reads={result.ops.reads / per_request:.2f}  writes={result.ops.writes / per_request:.2f}  "
+        f"queries={result.ops.queries / per_request:.2f}  "
+        f"time={result.ops.elapsed_ms / per_request:.1f}ms"
+    )
+    print(f"ステータス: {dict(sorted(result.status_counts.items()))}")
+    print(f"ジオフェンスイベント: {result.event_counts}")
+
+
+class _EmulatorCredential:
+    """エミュレータ用の認証情報（エミュレータは認証しないため匿名で接続）"""
+
+    def get_credential(self):
+        from google.auth.credentials import AnonymousCredentials
+
+        return AnonymousCredentials()
+
+
+def _initialize_emulator() -> None:
+    """エミュレータ接続用にFirebaseを初期化"""
+    import firebase_admin
+
+    from app.config import settings
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(_EmulatorCredential(), {"projectId": settings.FIREBASE_PROJECT_ID})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="位置情報更新の負荷テスト")
+    parser.add_argument("--devices", type=int, default=100, help="端末数")
+    parser.add_argument("--updates", type=int, default=20, help="1端末あたりの送信回数")
+    parser.add_argument("--concurrency", type=int, default=20, help="同時に処理中のリクエスト数の上限")
+    parser.add_argument("--interval", type=int, default=30, help="端末の送信間隔（秒、記録日時の計算に使用）")
+    parser.add_argument("--firestore", choices=("fake", "emulator"), default="fake")
+    parser.add_argument("--seed", type=int, default=0, help="軌跡の乱数シード")
+    parser.add_argument("--verbose", action="store_true", help="INFOログを出力")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+
+    if args.firestore == "emulator":
+        if not os.environ.get("FIRESTORE_EMULATOR_HOST"):
+            parser.error("--firestore emulator には FIRESTORE_EMULATOR_HOST の設定が必要です")
+        firestore_patches = [patch("app.core.firebase.initialize_firebase", _initialize_emulator)]
+    else:
+        from tests.fake_firestore import FakeFirestore
+
+        firestore_patches = [
+            patch("app.core.firebase.initialize_firebase"),
+            patch("app.core.firebase.firestore.client", return_value=FakeFirestore()),
+        ]
+
+    devices = build_devices(args.devices, args.updates, args.seed)
+    # 最後の送信の記録日時が現在時刻になるように開始時刻を決める
+    started_at = now_jst() - timedelta(seconds=args.interval * args.updates)
+
+    for firestore_patch in firestore_patches:
+        firestore_patch.start()
+    try:
+        with patch("firebase_admin.messaging.send_each", side_effect=_stub_send_each), patch.object(
+            app.state, "services", ServiceContainer()
+        ):
+            users = seed_firestore(devices, started_at)
+            result = asyncio.run(
+                drive_devices(
+                    devices, users, args.updates, args.interval, args.concurrency, started_at
+                )
+            )
+    finally:
+        for firestore_patch in firestore_patches:
+            firestore_patch.stop()
+
+    print_report(result, args.devices, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -146,27 +146,10 @@ async def test_notification_delivery():
     if notifications:
         for notif in notifications:
             print(f"    • {notif.title}: {notif.body[:50]}...")
-            print(f"      作成日時: {notif.created_at}")
+            print(f"      作成日時: {notif.created_at}, 自動削除日時: {notif.auto_delete_at}")
     else:
         print("    (通知なし)")
 
-    # notification_historyコレクション
-    print("\n  - notification_historyコレクション:")
-    history_ref = (
-        db.collection("notification_history")
-        .where("to_user_id", "==", test_user_id)
-        .order_by("sent_at", direction="DESCENDING")
-        .limit(5)
-    )
-    histories = list(history_ref.stream())
-    if histories:
-        for hist in histories:
-            hist_data = hist.to_dict()
-            print(f"    • {hist_data['type']}: {hist_data['message'][:50]}...")
-            print(f"      送信日時: {hist_data['sent_at']}")
-    else:
-        print("    (通知履歴なし)")
-
     print("\n" + "=" * 60)
     print("テスト完了")
     print("=" * 60)
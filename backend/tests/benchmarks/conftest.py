@@ -0,0 +1,72 @@
+"""
+ベンチマーク用のフィクスチャとテストデータ
+
+pytest-benchmark がインストールされている場合のみ実行されます。
+    uv run pytest tests/benchmarks --benchmark-only -m "not slow"   # 1,000件のみ
+    uv run pytest tests/benchmarks --benchmark-only                # 100,000件を含む
+"""
+
+import asyncio
+from datetime import timedelta
+from typing import Dict
+
+import pytest
+
+from app.utils.timezone import now_jst
+
+# スケジュールの件数（100,000件は時間がかかるため slow マーカー付き）
+SCALES = [1_000, pytest.param(100_000, marks=pytest.mark.slow)]
+
+# スケジュール作成者1人あたりのスケジュール数
+SCHEDULES_PER_USER = 10
+
+# 東京駅周辺
+BASE_LAT = 35.6812
+BASE_LNG = 139.7671
+
+
+@pytest.fixture
+def run():
+    """コルーチンを同期的に実行する関数（benchmark は同期関数のみ計測できるため）"""
+    loop = asyncio.new_event_loop()
+    yield loop.run_until_complete
+    loop.close()
+
+
+def make_schedules(count: int, status: str = "active", **overrides) -> Dict[str, dict]:
+    """
+    スケジュールのテストデータを作成
+
+    Args:
+        count: 件数
+        status: ステータス
+        **overrides: 上書きするフィールド
+
+    Returns:
+        ドキュメントID → データ
+    """
+    now = now_jst()
+    schedules = {}
+    for index in range(count):
+        schedule_id = f"schedule_{index}"
+        schedules[schedule_id] = {
+            "id": schedule_id,
+            "user_id": f"user_{index // SCHEDULES_PER_USER}",
+            "destination_name": f"目的地{index}",
+            "destination_address": "東京都千代田区",
+            # 1インデックスごとに約100mずらして配置
+            "destination_coords": {
+                "lat": BASE_LAT + (index % 100) * 0.001,
+                "lng": BASE_LNG + (index // 100 % 100) * 0.001,
+            },
+            "geofence_radius": 50,
+            "notify_to_user_ids": [f"user_{(index + 1) // SCHEDULES_PER_USER}"],
+            "start_time": now - timedelta(hours=1),
+            "end_time": now + timedelta(hours=2),
+            "status": status,
+            "notify_after_minutes": 60,
+            "created_at": now,
+            "updated_at": now,
+            **overrides,
+        }
+    return schedules
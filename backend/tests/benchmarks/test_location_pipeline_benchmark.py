@@ -0,0 +1,162 @@
+"""
+位置情報パイプラインのベンチマーク
+
+インメモリのFirestoreフェイク上で、位置情報更新からバッチ処理までのスループットを計測します。
+フェイクのクエリは全件走査のため、データ件数に比例する時間の一部はフェイク自体のコストです。
+同じ条件の計測結果どうしを比較して、回帰の検出に使ってください。
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pygeohash
+import pytest
+
+from app.config import settings
+from app.schemas.common import Coordinates
+from app.schemas.pop import PopSearchRequest
+from app.schemas.schedule import LocationScheduleInDB
+from app.utils.timezone import now_jst
+from tests.benchmarks.conftest import BASE_LAT, BASE_LNG, SCALES, make_schedules
+
+pytest.importorskip("pytest_benchmark")
+
+
+@pytest.mark.parametrize("count", SCALES)
+def test_process_location_update(benchmark, run, fake_services, count):
+    """ジオフェンス判定（目的地から離れた位置、対象スケジュール count 件）"""
+    schedules = [LocationScheduleInDB(**data) for data in make_schedules(count).values()]
+    current = Coordinates(lat=BASE_LAT - 0.05, lng=BASE_LNG - 0.05)
+    previous = Coordinates(lat=BASE_LAT - 0.051, lng=BASE_LNG - 0.05)
+    geofencing_service = fake_services.geofencing_service
+
+    events = benchmark(
+        lambda: run(
+            geofencing_service.process_location_update(
+                user_id="user_0",
+                current_coords=current,
+                previous_coords=previous,
+                schedules=schedules,
+            )
+        )
+    )
+
+    assert events == []
+
+
+@pytest.mark.parametrize("count", SCALES)
+def test_update_location_endpoint(benchmark, client, fake_services, fake_firestore, count):
+    """POST /location/update（全体で count 件のスケジュール、1ユーザーあたり10件）"""
+    fake_firestore.seed("schedules", make_schedules(count))
+
+    def update():
+        return client.post(
+            "/api/v1/location/update",
+            json={"coords": {"lat": BASE_LAT - 0.05, "lng": BASE_LNG - 0.05}, "accuracy": 10.0},
+        )
+
+    with patch.object(settings, "LOCATION_HISTORY_STORAGE", "document"):
+        response = benchmark.pedantic(update, rounds=10, iterations=1)
+
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("count", SCALES)
+def test_check_and_send_stay_notifications(benchmark, run, fake_services, fake_firestore, count):
+    """滞在通知の全件走査（到着済み count 件、いずれも滞在時間に未到達）"""
+    fake_firestore.seed("schedules", make_schedules(count, status="arrived", arrived_at=now_jst()))
+    auto_notification_service = fake_services.auto_notification_service
+
+    sent_count = benchmark.pedantic(
+        lambda: run(auto_notification_service.check_and_send_stay_notifications()),
+        rounds=3,
+        iterations=1,
+    )
+
+    assert sent_count == 0
+
+
+@pytest.mark.parametrize("count", SCALES)
+def test_search_nearby_pops(benchmark, run, fake_services, fake_firestore, count):
+    """周辺のポップ検索（有効なポップ count 件）"""
+    from app.services.pop_tiles import PopTileCache
+    from app.services.pops import PopService
+
+    now = now_jst()
+
+    def location(index: int) -> dict:
+        latitude = BASE_LAT + (index % 100) * 0.001
+        longitude = BASE_LNG + (index // 100 % 100) * 0.001
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "geohash": pygeohash.encode(latitude, longitude, precision=7),
+        }
+
+    fake_firestore.seed(
+        "pops",
+        {
+            f"pop_{index}": {
+                "pop_id": f"pop_{index}",
+                "user_id": f"user_{index}",
+                "content": "テスト",
+                "category": "food",
+                "location": location(index),
+                "created_at": now,
+                "expires_at": now + timedelta(minutes=30),
+                "duration_minutes": 30,
+                "status": "active",
+            }
+            for index in range(count)
+        },
+    )
+    # タイルキャッシュを無効にしてクエリを含めた時間を計測
+    pop_service = PopService(tile_cache=PopTileCache(ttl_seconds=0))
+    search_request = PopSearchRequest(latitude=BASE_LAT, longitude=BASE_LNG, radius_km=10.0)
+
+    pops = benchmark(lambda: run(pop_service.search_nearby_pops(search_request)))
+
+    assert len(pops) == search_request.limit
+
+
+@pytest.mark.parametrize("count", SCALES)
+def test_cleanup_expired_data(benchmark, run, fake_services, fake_firestore, count):
+    """期限切れデータの削除（位置情報履歴・通知履歴 各 count 件）"""
+    expired_at = now_jst() - timedelta(hours=1)
+    cleanup_service = fake_services.cleanup_service
+
+    def seed():
+        fake_firestore.seed(
+            "location_history",
+            {f"loc_{i}": {"user_id": "user_0", "auto_delete_at": expired_at} for i in range(count)},
+        )
+        fake_firestore.seed(
+            "notifications",
+            {f"n_{i}": {"schedule_id": "s", "auto_delete_at": expired_at} for i in range(count)},
+        )
+
+    results = benchmark.pedantic(
+        lambda: run(cleanup_service.cleanup_expired_data()), setup=seed, rounds=3, iterations=1
+    )
+
+    assert results["location_history"] == count
+    assert results["notification_history"] == count
+
+
+@pytest.mark.parametrize("count", SCALES)
+def test_update_expired_schedules_status(benchmark, run, fake_services, fake_firestore, count):
+    """期限切れスケジュールのステータス更新（終了から24時間超の ACTIVE count 件）"""
+    end_time = now_jst() - timedelta(hours=25)
+    cleanup_service = fake_services.cleanup_service
+
+    def seed():
+        fake_firestore.seed("schedules", make_schedules(count, end_time=end_time))
+
+    updated_count = benchmark.pedantic(
+        lambda: run(cleanup_service.update_expired_schedules_status()),
+        setup=seed,
+        rounds=3,
+        iterations=1,
+    )
+
+    assert updated_count == count
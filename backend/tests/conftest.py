@@ -2,15 +2,19 @@
 pytest設定とフィクスチャ定義
 """
 
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List
-from unittest.mock import MagicMock
+from typing import Dict, List, Optional
+from unittest.mock import MagicMock, patch
 
 import pytest
 from fastapi.testclient import TestClient
 
+from app.core.container import ServiceContainer
+from app.core.firestore_metrics import track_firestore_ops
 from app.main import app
 from app.schemas.user import Address, UserInDB
+from tests.fake_firestore import FakeFirestore
 
 
 @pytest.fixture
@@ -39,6 +43,61 @@ def mock_firestore_client():
     return mock_client
 
 
+@pytest.fixture
+def fake_firestore():
+    """
+    インメモリのFirestoreフェイク
+
+    get_firestore_client の戻り値を差し替えるため、フィクスチャの有効中に生成したサービスは
+    全てこのフェイクを使います。データは fake_firestore.seed() で投入してください。
+    """
+    db = FakeFirestore()
+    with patch("app.core.firebase.initialize_firebase"), patch(
+        "app.core.firebase.firestore.client", return_value=db
+    ):
+        yield db
+
+
+@pytest.fixture
+def fake_services(fake_firestore):
+    """フェイクのFirestoreを使うサービスのコンテナ（APIのテスト用に app.state.services を差し替え）"""
+    services = ServiceContainer()
+    with patch.object(app.state, "services", services):
+        yield services
+
+
+@pytest.fixture
+def firestore_budget():
+    """
+    Firestore操作数の上限を検証するフィクスチャ
+
+    使い方:
+        with firestore_budget(reads=3, writes=1) as ops:
+            client.post("/api/v1/location/update", json=...)
+
+    計測対象は get_firestore_client が返す（計測用ラッパーで包まれた）クライアント経由の操作です。
+    """
+
+    @contextmanager
+    def budget(
+        reads: Optional[int] = None,
+        writes: Optional[int] = None,
+        queries: Optional[int] = None,
+    ):
+        with track_firestore_ops() as ops:
+            yield ops
+
+        limits = {"reads": reads, "writes": writes, "queries": queries}
+        exceeded = {
+            name: f"{getattr(ops, name)} > {limit}"
+            for name, limit in limits.items()
+            if limit is not None and getattr(ops, name) > limit
+        }
+        assert not exceeded, f"Firestore操作数が上限を超えました: {exceeded}"
+
+    return budget
+
+
 @pytest.fixture
 def sample_user1() -> UserInDB:
     """テスト用ユーザー1"""
@@ -0,0 +1,382 @@
+"""
+インメモリのFirestoreフェイク
+
+テストとベンチマーク用に、アプリケーションが使うFirestoreの機能をプロセス内で再現します。
+conftest.py の fake_firestore フィクスチャで get_firestore_client の戻り値として差し込まれます。
+
+対応している機能:
+- コレクション・ドキュメント（サブコレクションを含む）の get / set(merge) / update / create / delete
+- where（==, !=, <, <=, >, >=, in, not-in, array_contains, array_contains_any、FieldFilterも可）
+- order_by（複数指定可、DESCENDING）/ limit / stream / get
+- バッチ書き込み、get_all、firestore.transactional で使うトランザクション
+- Increment / ArrayUnion / ArrayRemove / DELETE_FIELD / SERVER_TIMESTAMP
+
+Firestoreと同様に、where・order_by の対象フィールドを持たないドキュメントはクエリ結果に含まれません。
+複合インデックスの有無はチェックしません。
+"""
+
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from google.api_core.exceptions import AlreadyExists, NotFound
+from google.cloud.firestore_v1 import transforms
+
+_MISSING = object()
+
+
+def _copy(value: Any) -> Any:
+    """保存・取得時の値のコピー（日時などの不変な値はそのまま）"""
+    if isinstance(value, dict):
+        return {key: _copy(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy(item) for item in value]
+    return value
+
+
+def _get_field(data: Dict[str, Any], field_path: str) -> Any:
+    """ドット区切りのフィールドパスの値を取得（存在しない場合は _MISSING）"""
+    value: Any = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _apply_leaf(target: Dict[str, Any], key: str, value: Any) -> None:
+    """フィールドに値を設定（変換用の特殊値も処理）"""
+    current = target.get(key)
+    if value is transforms.DELETE_FIELD:
+        target.pop(key, None)
+    elif value is transforms.SERVER_TIMESTAMP:
+        target[key] = datetime.now(timezone.utc)
+    elif isinstance(value, transforms.Increment):
+        target[key] = (current if isinstance(current, (int, float)) else 0) + value.value
+    elif isinstance(value, transforms.ArrayUnion):
+        items = list(current) if isinstance(current, list) else []
+        items.extend(item for item in value.values if item not in items)
+        target[key] = items
+    elif isinstance(value, transforms.ArrayRemove):
+        items = list(current) if isinstance(current, list) else []
+        target[key] = [item for item in items if item not in value.values]
+    else:
+        target[key] = _copy(value)
+
+
+def _set_fields(data: Dict[str, Any], values: Dict[str, Any]) -> None:
+    """set の値を反映（入れ子の辞書は既存の値にマージ）"""
+    for key, value in values.items():
+        if isinstance(value, dict):
+            target = data.get(key)
+            if not isinstance(target, dict):
+                target = data[key] = {}
+            _set_fields(target, value)
+        else:
+            _apply_leaf(data, key, value)
+
+
+def _update_fields(data: Dict[str, Any], values: Dict[str, Any]) -> None:
+    """update の値を反映（キーはドット区切りのフィールドパス）"""
+    for field_path, value in values.items():
+        *parents, leaf = field_path.split(".")
+        target = data
+        for part in parents:
+            if not isinstance(target.get(part), dict):
+                target[part] = {}
+            target = target[part]
+        _apply_leaf(target, leaf, value)
+
+
+def _matches(value: Any, op: str, expected: Any) -> bool:
+    """where 条件の判定"""
+    if value is _MISSING:
+        return False
+    try:
+        if op == "==":
+            return value == expected
+        if op == "!=":
+            return value != expected and value is not None
+        if op == "<":
+            return value < expected
+        if op == "<=":
+            return value <= expected
+        if op == ">":
+            return value > expected
+        if op == ">=":
+            return value >= expected
+        if op == "in":
+            return value in expected
+        if op == "not-in":
+            return value not in expected and value is not None
+        if op == "array_contains":
+            return isinstance(value, list) and expected in value
+        if op == "array_contains_any":
+            return isinstance(value, list) and any(item in value for item in expected)
+    except TypeError:
+        # 型が異なる値同士の比較（Firestoreでは型ごとに別の順序になり一致しない）
+        return False
+    raise ValueError(f"未対応の演算子です: {op}")
+
+
+class FakeDocumentSnapshot:
+    """ドキュメントのスナップショット"""
+
+    def __init__(self, reference: "FakeDocumentReference", data: Optional[Dict[str, Any]]):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return _copy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str) -> Any:
+        if self._data is None:
+            return None
+        value = _get_field(self._data, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return _copy(value)
+
+
+class FakeDocumentReference:
+    """ドキュメント参照"""
+
+    def __init__(self, client: "FakeFirestore", path: str):
+        self._client = client
+        self.path = path
+        self._collection_path, self.id = path.rsplit("/", 1)
+
+    @property
+    def parent(self) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, self._collection_path)
+
+    @property
+    def _store(self) -> Dict[str, Dict[str, Any]]:
+        return self._client._collection_store(self._collection_path)
+
+    def collection(self, collection_id: str) -> "FakeCollectionReference":
+        return FakeCollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def get(self, field_paths=None, transaction=None, **kwargs) -> FakeDocumentSnapshot:
+        return FakeDocumentSnapshot(self, self._store.get(self.id))
+
+    def set(self, document_data: Dict[str, Any], merge: bool = False, **kwargs) -> None:
+        existing = self._store.get(self.id)
+        data = _copy(existing) if merge and existing is not None else {}
+        _set_fields(data, document_data)
+        self._store[self.id] = data
+
+    def create(self, document_data: Dict[str, Any], **kwargs) -> None:
+        if self.id in self._store:
+            raise AlreadyExists(f"ドキュメントが既に存在します: {self.path}")
+        self.set(document_data)
+
+    def update(self, field_updates: Dict[str, Any], **kwargs) -> None:
+        existing = self._store.get(self.id)
+        if existing is None:
+            raise NotFound(f"ドキュメントが存在しません: {self.path}")
+        data = _copy(existing)
+        _update_fields(data, field_updates)
+        self._store[self.id] = data
+
+    def delete(self, **kwargs) -> None:
+        self._store.pop(self.id, None)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FakeDocumentReference) and other.path == self.path
+
+    def __hash__(self) -> int:
+        return hash(self.path)
+
+
+class FakeQuery:
+    """クエリ"""
+
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(
+        self,
+        client: "FakeFirestore",
+        collection_path: str,
+        filters: Tuple[Tuple[str, str, Any], ...] = (),
+        orders: Tuple[Tuple[str, str], ...] = (),
+        limit_count: Optional[int] = None,
+    ):
+        self._client = client
+        self._collection_path = collection_path
+        self._filters = filters
+        self._orders = orders
+        self._limit = limit_count
+
+    def _copy_with(self, **changes: Any) -> "FakeQuery":
+        params = {
+            "filters": self._filters,
+            "orders": self._orders,
+            "limit_count": self._limit,
+            **changes,
+        }
+        return FakeQuery(self._client, self._collection_path, **params)
+
+    def where(self, field_path=None, op_string=None, value=None, *, filter=None) -> "FakeQuery":
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy_with(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path: str, direction: str = ASCENDING) -> "FakeQuery":
+        return self._copy_with(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._copy_with(limit_count=count)
+
+    def _documents(self) -> List[Tuple[str, Dict[str, Any]]]:
+        results = []
+        for document_id, data in self._client._collection_store(self._collection_path).items():
+            if all(_matches(_get_field(data, f), op, v) for f, op, v in self._filters):
+                if all(_get_field(data, field) is not _MISSING for field, _ in self._orders):
+                    results.append((document_id, data))
+
+        # 後に指定した並び順から安定ソートを重ねる
+        for field, direction in reversed(self._orders):
+            results.sort(
+                key=lambda item: _get_field(item[1], field),
+                reverse=direction == self.DESCENDING,
+            )
+        if self._limit is not None:
+            results = results[: self._limit]
+        return results
+
+    def stream(self, transaction=None, **kwargs) -> Iterator[FakeDocumentSnapshot]:
+        for document_id, data in self._documents():
+            reference = FakeDocumentReference(self._client, f"{self._collection_path}/{document_id}")
+            yield FakeDocumentSnapshot(reference, data)
+
+    def get(self, transaction=None, **kwargs) -> List[FakeDocumentSnapshot]:
+        return list(self.stream())
+
+
+class FakeCollectionReference(FakeQuery):
+    """コレクション参照"""
+
+    def __init__(self, client: "FakeFirestore", path: str):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id: Optional[str] = None) -> FakeDocumentReference:
+        return FakeDocumentReference(
+            self._client, f"{self._collection_path}/{document_id or uuid.uuid4().hex}"
+        )
+
+    def add(self, document_data: Dict[str, Any], document_id: Optional[str] = None):
+        reference = self.document(document_id)
+        reference.create(document_data)
+        return datetime.now(timezone.utc), reference
+
+
+class FakeWriteBatch:
+    """バッチ書き込み（コミット時にまとめて反映）"""
+
+    def __init__(self):
+        self._writes: List[Tuple[str, FakeDocumentReference, tuple, dict]] = []
+
+    def set(self, reference, *args, **kwargs) -> None:
+        self._writes.append(("set", reference, args, kwargs))
+
+    def create(self, reference, *args, **kwargs) -> None:
+        self._writes.append(("create", reference, args, kwargs))
+
+    def update(self, reference, *args, **kwargs) -> None:
+        self._writes.append(("update", reference, args, kwargs))
+
+    def delete(self, reference, *args, **kwargs) -> None:
+        self._writes.append(("delete", reference, args, kwargs))
+
+    def commit(self, **kwargs) -> list:
+        writes, self._writes = self._writes, []
+        for method, reference, args, method_kwargs in writes:
+            getattr(reference, method)(*args, **method_kwargs)
+        return [None] * len(writes)
+
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    トランザクション
+
+    firestore.transactional が使う内部メソッドを実装する。
+    プロセス内で直列に実行されるため競合は発生せず、書き込みはコミット時に反映する。
+    """
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self):
+        super().__init__()
+        self._id: Optional[bytes] = None
+
+    def get(self, reference, **kwargs):
+        if isinstance(reference, FakeDocumentReference):
+            return iter([reference.get()])
+        return reference.stream()
+
+    def _clean_up(self) -> None:
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None) -> None:
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self) -> list:
+        result = self.commit()
+        self._clean_up()
+        return result
+
+    def _rollback(self) -> None:
+        self._clean_up()
+
+
+class FakeFirestore:
+    """インメモリのFirestoreクライアント"""
+
+    def __init__(self):
+        # コレクションのパス（"users" や "users/uid/settings"）→ ドキュメントID → データ
+        self._collections: Dict[str, Dict[str, Dict[str, Any]]] = {}
+
+    def _collection_store(self, collection_path: str) -> Dict[str, Dict[str, Any]]:
+        return self._collections.setdefault(collection_path, {})
+
+    def collection(self, collection_id: str) -> FakeCollectionReference:
+        return FakeCollectionReference(self, collection_id)
+
+    def document(self, document_path: str) -> FakeDocumentReference:
+        return FakeDocumentReference(self, document_path)
+
+    def batch(self) -> FakeWriteBatch:
+        return FakeWriteBatch()
+
+    def transaction(self, **kwargs) -> FakeTransaction:
+        return FakeTransaction()
+
+    def get_all(self, references, field_paths=None, transaction=None, **kwargs):
+        for reference in references:
+            yield reference.get()
+
+    def seed(self, collection_id: str, documents: Dict[str, Dict[str, Any]]) -> None:
+        """
+        テストデータを投入（ドキュメントID → データ）
+
+        Args:
+            collection_id: コレクション名
+            documents: ドキュメントIDとデータの辞書
+        """
+        store = self._collection_store(collection_id)
+        for document_id, data in documents.items():
+            store[document_id] = _copy(data)
+
+    def count(self, collection_id: str) -> int:
+        """コレクションのドキュメント数（テスト・確認用）"""
+        return len(self._collection_store(collection_id))
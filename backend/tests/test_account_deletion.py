@@ -0,0 +1,119 @@
+"""
+アカウント削除ジョブのテスト
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.services import account_deletion
+from app.services.account_deletion import AccountDeletionService
+from app.services.counters import ShardedCounterService
+from app.utils.timezone import now_jst
+
+
+def _seed(fake_firestore, uid: str) -> None:
+    fake_firestore.seed("users", {uid: {"uid": uid}, "other": {"uid": "other"}})
+    fake_firestore.seed(
+        "friend_requests",
+        {
+            "f1": {"from_user_id": uid, "to_user_id": "other"},
+            "f2": {"from_user_id": "other", "to_user_id": uid},
+            "f3": {"from_user_id": "other", "to_user_id": "third"},
+        },
+    )
+    fake_firestore.seed(
+        "location_share_requests",
+        {
+            "ls1": {"requester_id": uid, "target_id": "other"},
+            "ls2": {"requester_id": "other", "target_id": uid},
+        },
+    )
+    fake_firestore.seed(
+        "notification_settings", {uid: {"user_id": uid}, "other": {"user_id": "other"}}
+    )
+    fake_firestore.seed(
+        "friendships",
+        {
+            "fs1": {"user_id": uid, "friend_id": "other"},
+            "fs2": {"user_id": "other", "friend_id": uid},
+        },
+    )
+    fake_firestore.seed("schedules", {f"s{index}": {"user_id": uid} for index in range(5)})
+    fake_firestore.seed("notifications", {"n1": {"user_id": uid}, "n2": {"user_id": "other"}})
+    fake_firestore.seed("reactions", {"r1": {"from_user_id": "other", "to_user_id": uid}})
+    fake_firestore.seed("pops", {"p1": {"user_id": uid}, "p2": {"user_id": "other"}})
+
+
+def test_delete_account_returns_job_and_cascades(client, fake_services, fake_firestore, sample_user1):
+    """削除APIがジョブIDを返し、関連データがすべて削除されることのテスト"""
+    uid = sample_user1.uid
+    _seed(fake_firestore, uid)
+    counter = fake_services.counter_service
+    counter.increment(fake_firestore.collection("pops").document("p1"), "reaction_count")
+
+    response = client.delete("/api/v1/users/me")
+
+    assert response.status_code == 202
+    assert response.json()["job_id"] == uid
+    for collection in (
+        "location_share_requests",
+        "friendships",
+        "schedules",
+        "reactions",
+        "pops/p1/counter_shards",
+    ):
+        assert fake_firestore.count(collection) == 0
+    assert fake_firestore.count("friend_requests") == 1
+    assert fake_firestore.count("notification_settings") == 1
+    assert fake_firestore.count("notifications") == 1
+    assert fake_firestore.count("pops") == 1
+    assert fake_firestore.count("users") == 1
+
+    job = fake_firestore.collection("account_deletion_jobs").document(uid).get().to_dict()
+    assert job["status"] == "completed"
+    assert job["completed_steps"]["schedules"] == 5
+
+
+@pytest.mark.asyncio
+async def test_failed_job_resumes_from_checkpoint(fake_firestore):
+    """失敗したジョブが完了済みのステップを飛ばして再開されることのテスト"""
+    uid = "user_1"
+    _seed(fake_firestore, uid)
+    service = AccountDeletionService(ShardedCounterService())
+    await service.start_deletion(uid)
+    fake_firestore.collection("account_deletion_jobs").document(uid).update(
+        {
+            "status": "failed",
+            "completed_steps": {"friend_requests_from": 1},
+            "updated_at": now_jst(),
+        }
+    )
+
+    with patch.object(account_deletion, "BATCH_SIZE", 2):
+        assert await service.resume_incomplete_jobs() == 1
+
+    # チェックポイント済みのステップは実行しない
+    assert fake_firestore.count("friend_requests") == 2
+    assert fake_firestore.count("schedules") == 0
+    assert fake_firestore.collection("users").document(uid).get().exists is False
+    # 完了済みのジョブは再実行しない
+    assert await service.run_job(uid) is None
+
+
+@pytest.mark.asyncio
+async def test_step_extends_lease(fake_firestore):
+    """ステップの完了ごとに実行権が延長され、実行中のジョブが再取得されないことのテスト"""
+    uid = "user_1"
+    _seed(fake_firestore, uid)
+    service = AccountDeletionService(ShardedCounterService())
+    await service.start_deletion(uid)
+    job_ref = fake_firestore.collection("account_deletion_jobs").document(uid)
+    expired = now_jst() - timedelta(minutes=account_deletion.LEASE_MINUTES + 1)
+    job_ref.update({"status": "running", "started_at": expired})
+
+    service._run_step(job_ref, uid, account_deletion.DELETION_STEPS[0])
+
+    assert job_ref.get().to_dict()["started_at"] > expired
+    assert service._claim(uid) is None
@@ -6,6 +6,7 @@ import pytest
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from app.config import settings
 from app.schemas.common import Coordinates
 from app.utils.timezone import now_jst
 from app.schemas.schedule import LocationScheduleInDB, ScheduleStatus
@@ -291,32 +292,82 @@ async def test_send_stay_notification_no_arrival_time(
 
 
 @pytest.mark.asyncio
-async def test_save_notification_history(auto_notification_service):
-    """通知履歴保存のテスト"""
-    mock_doc_ref = MagicMock()
-    mock_collection = MagicMock()
-    mock_collection.document.return_value = mock_doc_ref
+async def test_stay_notification_saved_once_per_recipient(
+    fake_firestore, sample_schedule, sample_user
+):
+    """滞在通知が受信者ごとに1件だけTTL付きで保存され、再送されないことのテスト"""
+    now = now_jst()
+    fake_firestore.seed(
+        "users",
+        {
+            "user_123": sample_user.model_dump(),
+            **{
+                uid: {
+                    "uid": uid,
+                    "username": uid,
+                    "email": f"{uid}@example.com",
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for uid in sample_schedule.notify_to_user_ids
+            },
+        },
+    )
+    sample_schedule.arrived_at = now - timedelta(minutes=90)
+    service = AutoNotificationService()
+    coords = Coordinates(lat=35.6580, lng=139.7016)
 
-    with patch.object(
-        auto_notification_service.db, "collection", return_value=mock_collection
-    ):
+    notification_ids = await service.send_stay_notification(sample_schedule, coords)
 
-        history = await auto_notification_service._save_notification_history(
-            from_user_id="user_123",
-            to_user_id="friend_1",
-            schedule_id="schedule_123",
-            notification_type="arrival",
-            message="今ね、テストユーザーさんが渋谷駅へ到着したよ",
-            map_link="https://www.google.com/maps?q=35.658,139.7016",
-        )
+    assert len(notification_ids) == 2
+    assert await service.send_stay_notification(sample_schedule, coords) == []
+    assert fake_firestore.count("notifications") == 2
+    record = fake_firestore.collection("notifications").document(notification_ids[0]).get()
+    assert record.to_dict()["from_user_id"] == "user_123"
+    assert record.to_dict()["schedule_id"] == "schedule_123"
+    assert record.to_dict()["auto_delete_at"] > now
 
-        # Firestoreへの保存が呼ばれたことを確認
-        mock_doc_ref.set.assert_called_once()
 
-        # 保存されたデータを確認
-        saved_data = mock_doc_ref.set.call_args[0][0]
-        assert saved_data["from_user_id"] == "user_123"
-        assert saved_data["to_user_id"] == "friend_1"
-        assert saved_data["schedule_id"] == "schedule_123"
-        assert saved_data["type"] == "arrival"
-        assert "auto_delete_at" in saved_data  # 24時間TTLが設定されている
+@pytest.mark.asyncio
+async def test_migrate_notification_history(fake_firestore):
+    """既存の位置情報の通知にTTLなどを設定し、旧通知履歴を削除する移行のテスト"""
+    created_at = now_jst() - timedelta(hours=2)
+    fake_firestore.seed(
+        "notifications",
+        {
+            "n1": {
+                "user_id": "friend_1",
+                "type": "stay",
+                "data": {"schedule_id": "schedule_123", "from_user_id": "user_123"},
+                "created_at": created_at,
+            },
+            "n2": {
+                "user_id": "friend_1",
+                "type": "friend_request",
+                "data": {},
+                "created_at": created_at,
+            },
+        },
+    )
+    fake_firestore.seed(
+        "notification_history", {"h1": {"schedule_id": "schedule_123", "type": "stay"}}
+    )
+    service = AutoNotificationService()
+
+    results = await service.migrate_notification_history()
+
+    assert results == {"updated_notifications": 1, "deleted_history": 1}
+    assert fake_firestore.count("notification_history") == 0
+    migrated = fake_firestore.collection("notifications").document("n1").get().to_dict()
+    assert migrated["schedule_id"] == "schedule_123"
+    assert migrated["auto_delete_at"] == created_at + timedelta(
+        hours=settings.DATA_RETENTION_HOURS
+    )
+    other = fake_firestore.collection("notifications").document("n2").get().to_dict()
+    assert "auto_delete_at" not in other
+    # 移行済みの通知で滞在通知の重複送信を防止できる
+    assert service._has_sent_stay_notification("schedule_123")
+    assert await service.migrate_notification_history() == {
+        "updated_notifications": 0,
+        "deleted_history": 0,
+    }
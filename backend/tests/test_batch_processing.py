@@ -85,13 +85,14 @@ async def test_check_and_send_stay_notifications(
         def mock_collection_side_effect(collection_name):
             if collection_name == "schedules":
                 return mock_collection.return_value
-            elif collection_name == "notification_history":
-                mock_history_collection = MagicMock()
-                mock_history_query = (
-                    mock_history_collection.where.return_value.where.return_value
+            elif collection_name == "notifications":
+                mock_notifications_collection = MagicMock()
+                mock_sent_query = (
+                    mock_notifications_collection.where.return_value.where.return_value
+                    .limit.return_value
                 )
-                mock_history_query.stream.return_value = []  # 通知履歴なし
-                return mock_history_collection
+                mock_sent_query.stream.return_value = []  # 滞在通知は未送信
+                return mock_notifications_collection
             return MagicMock()
 
         mock_collection.side_effect = mock_collection_side_effect
@@ -152,6 +153,154 @@ async def test_check_and_send_stay_notifications_insufficient_duration(
         assert sent_count == 0
 
 
+@pytest.mark.asyncio
+async def test_run_stay_notification_task(auto_notification_service, sample_arrived_schedule):
+    """期限を迎えた滞在通知タスクの実行テスト"""
+    task_id = "stay_notification_schedule_arrived_123"
+    mock_schedule_doc = MagicMock(exists=True)
+    mock_schedule_doc.to_dict.return_value = sample_arrived_schedule.model_dump()
+
+    with patch.object(
+        auto_notification_service.task_service, "claim_task", new_callable=AsyncMock
+    ) as mock_claim, patch.object(
+        auto_notification_service.task_service, "complete_task", new_callable=AsyncMock
+    ) as mock_complete, patch.object(
+        auto_notification_service.db, "collection"
+    ) as mock_collection, patch.object(
+        auto_notification_service, "send_stay_notification", new_callable=AsyncMock
+    ) as mock_send, patch(
+        "app.services.location.LocationService.get_latest_location", new_callable=AsyncMock
+    ) as mock_latest:
+        mock_claim.return_value = {"id": task_id, "schedule_id": sample_arrived_schedule.id}
+        mock_collection.return_value.document.return_value.get.return_value = mock_schedule_doc
+        mock_latest.return_value = None
+        mock_send.return_value = ["n1", "n2"]
+
+        sent_count = await auto_notification_service.run_stay_notification_task(task_id)
+
+        assert sent_count == 2
+        # 位置情報がない場合は目的地の座標で送信
+        assert mock_send.call_args.args[1] == sample_arrived_schedule.destination_coords
+        mock_complete.assert_called_once_with(task_id)
+
+
+@pytest.mark.asyncio
+async def test_run_stay_notification_task_already_claimed(auto_notification_service):
+    """他で処理中のタスクは実行しないことのテスト"""
+    with patch.object(
+        auto_notification_service.task_service, "claim_task", new_callable=AsyncMock
+    ) as mock_claim, patch.object(
+        auto_notification_service, "send_stay_notification", new_callable=AsyncMock
+    ) as mock_send:
+        mock_claim.return_value = None
+
+        sent_count = await auto_notification_service.run_stay_notification_task("task_1")
+
+        assert sent_count == 0
+        mock_send.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_run_stay_notification_task_departed(
+    auto_notification_service, sample_arrived_schedule
+):
+    """退出済みスケジュールのタスクは通知せずに完了することのテスト"""
+    sample_arrived_schedule.status = ScheduleStatus.COMPLETED
+    mock_schedule_doc = MagicMock(exists=True)
+    mock_schedule_doc.to_dict.return_value = sample_arrived_schedule.model_dump()
+
+    with patch.object(
+        auto_notification_service.task_service, "claim_task", new_callable=AsyncMock
+    ) as mock_claim, patch.object(
+        auto_notification_service.task_service, "complete_task", new_callable=AsyncMock
+    ) as mock_complete, patch.object(
+        auto_notification_service.db, "collection"
+    ) as mock_collection, patch.object(
+        auto_notification_service, "send_stay_notification", new_callable=AsyncMock
+    ) as mock_send:
+        mock_claim.return_value = {"id": "task_1", "schedule_id": sample_arrived_schedule.id}
+        mock_collection.return_value.document.return_value.get.return_value = mock_schedule_doc
+
+        sent_count = await auto_notification_service.run_stay_notification_task("task_1")
+
+        assert sent_count == 0
+        mock_send.assert_not_called()
+        mock_complete.assert_called_once_with("task_1")
+
+
+def test_stale_processing_task_is_claimable(auto_notification_service):
+    """実行権の有効期限が切れた処理中タスクを再実行できることのテスト"""
+    task_service = auto_notification_service.task_service
+    now = now_jst()
+
+    assert task_service._is_claimable({"status": "pending"})
+    assert not task_service._is_claimable(
+        {"status": "processing", "claimed_at": now - timedelta(minutes=1)}
+    )
+    assert task_service._is_claimable(
+        {"status": "processing", "claimed_at": now - timedelta(minutes=30)}
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_due_tasks_includes_stale_processing(auto_notification_service):
+    """期限切れの処理中タスクが未処理タスクと合わせて期限順に返されることのテスト"""
+    task_service = auto_notification_service.task_service
+    now = now_jst()
+    pending = MagicMock()
+    pending.to_dict.return_value = {"id": "pending", "due_at": now - timedelta(minutes=1)}
+    stale = MagicMock()
+    stale.to_dict.return_value = {"id": "stale", "due_at": now - timedelta(minutes=20)}
+
+    with patch.object(task_service.db, "collection") as mock_collection:
+        where_status = mock_collection.return_value.where
+        pending_query = where_status.return_value.where.return_value.order_by.return_value
+        pending_query.limit.return_value.stream.return_value = [pending]
+        stale_query = where_status.return_value.where.return_value
+        stale_query.limit.return_value.stream.return_value = [stale]
+
+        tasks = await task_service.get_due_tasks()
+
+        assert [task["id"] for task in tasks] == ["stale", "pending"]
+
+
+@pytest.mark.asyncio
+async def test_backfill_stay_notification_tasks(
+    auto_notification_service, sample_arrived_schedule
+):
+    """タスク未登録の到着済みスケジュールにタスクが登録されることのテスト"""
+    mock_schedule_doc = MagicMock()
+    mock_schedule_doc.to_dict.return_value = sample_arrived_schedule.model_dump()
+
+    with patch.object(auto_notification_service.db, "collection") as mock_collection, patch.object(
+        auto_notification_service.task_service, "has_task", new_callable=AsyncMock
+    ) as mock_has_task, patch.object(
+        auto_notification_service.task_service,
+        "schedule_stay_notification",
+        new_callable=AsyncMock,
+    ) as mock_schedule_task:
+
+        def mock_query_side_effect(collection_name):
+            mock_col = MagicMock()
+            if collection_name == "schedules":
+                mock_col.where.return_value.stream.return_value = [mock_schedule_doc]
+            else:
+                mock_history_query = mock_col.where.return_value.where.return_value
+                mock_history_query.limit.return_value.stream.return_value = []
+            return mock_col
+
+        mock_collection.side_effect = mock_query_side_effect
+        mock_has_task.return_value = False
+
+        created_count = await auto_notification_service.backfill_stay_notification_tasks()
+
+        assert created_count == 1
+        mock_schedule_task.assert_called_once_with(
+            sample_arrived_schedule.id,
+            sample_arrived_schedule.arrived_at + timedelta(minutes=60),
+        )
+
+
 @pytest.mark.asyncio
 async def test_cleanup_old_locations(cleanup_service):
     """古い位置情報履歴のクリーンアップテスト"""
@@ -166,16 +315,27 @@ async def test_cleanup_old_locations(cleanup_service):
         "auto_delete_at": now - timedelta(hours=25),
     }
 
+    old_bucket_doc = MagicMock()
+
     with patch.object(
         cleanup_service.location_service.db, "collection"
     ) as mock_collection:
-        mock_query = mock_collection.return_value.where.return_value
-        mock_query.stream.return_value = [old_location_doc]
 
-        deleted_count = await cleanup_service.location_service.cleanup_old_locations()
+        def mock_query_side_effect(collection_name):
+            mock_col = MagicMock()
+            docs = {"location_history": [old_location_doc], "location_buckets": [old_bucket_doc]}
+            mock_col.where.return_value.stream.return_value = docs[collection_name]
+            return mock_col
+
+        mock_collection.side_effect = mock_query_side_effect
+
+        # 保存形式が "document" でも、切り替え前に作られたバケットは削除される
+        with patch("app.services.location.settings.LOCATION_HISTORY_STORAGE", "document"):
+            deleted_count = await cleanup_service.location_service.cleanup_old_locations()
 
-        assert deleted_count == 1
+        assert deleted_count == 2
         old_location_doc.reference.delete.assert_called_once()
+        old_bucket_doc.reference.delete.assert_called_once()
 
 
 @pytest.mark.asyncio
@@ -294,7 +454,7 @@ async def test_get_cleanup_stats(cleanup_service):
 
             if collection_name == "location_history":
                 mock_query.stream.return_value = location_docs
-            elif collection_name == "notification_history":
+            elif collection_name == "notifications":
                 mock_query.stream.return_value = notification_docs
             elif collection_name == "schedules":
                 mock_query.stream.return_value = schedule_docs
@@ -0,0 +1,75 @@
+"""
+分散カウンターのテスト
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.services.counters import ShardedCounterService
+from app.services.pops import PopService
+from app.utils.timezone import now_jst
+
+
+def test_increments_spread_over_shards_and_sum(fake_firestore):
+    """加算が複数のシャードに分散され、合計が取得できることのテスト"""
+    counter = ShardedCounterService(num_shards=4, cache_ttl_seconds=0)
+    pop_ref = fake_firestore.collection("pops").document("pop_1")
+
+    for _ in range(20):
+        counter.increment(pop_ref, "reaction_count")
+    counter.increment(pop_ref, "reaction_count", -3)
+
+    assert counter.get_count(pop_ref, "reaction_count") == 17
+    assert 1 < fake_firestore.count("pops/pop_1/counter_shards") <= 4
+    # 他のカウンターとは独立
+    assert counter.get_count(pop_ref, "view_count") == 0
+
+
+def test_cached_total_reflects_local_increments(fake_firestore):
+    """キャッシュの有効期間中はシャードを読み直さず、このプロセスでの加算は反映されることのテスト"""
+    counter = ShardedCounterService(num_shards=2, cache_ttl_seconds=60)
+    pop_ref = fake_firestore.collection("pops").document("pop_1")
+    counter.increment(pop_ref, "reaction_count")
+    assert counter.get_count(pop_ref, "reaction_count") == 1
+
+    counter.increment(pop_ref, "reaction_count")
+    with patch.object(fake_firestore, "get_all", wraps=fake_firestore.get_all) as get_all:
+        assert counter.get_count(pop_ref, "reaction_count") == 2
+
+    get_all.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_pop_reaction_count_adds_shards_to_legacy_field(fake_firestore):
+    """ポップのリアクション数がフィールドの値（シャード導入前の値）とシャードの合計になることのテスト"""
+    now = now_jst()
+    fake_firestore.seed(
+        "pops",
+        {
+            pop_id: {
+                "pop_id": pop_id,
+                "user_id": "owner",
+                "content": "テスト",
+                "category": "food",
+                "location": {"latitude": 35.6812, "longitude": 139.7671},
+                "created_at": now,
+                "expires_at": now + timedelta(minutes=30),
+                "duration_minutes": 30,
+                "reaction_count": reaction_count,
+                "status": "active",
+            }
+            for pop_id, reaction_count in (("pop_1", 3), ("pop_2", 0))
+        },
+    )
+    service = PopService(ShardedCounterService(num_shards=3, cache_ttl_seconds=0))
+    await service.increment_reaction_count("pop_1")
+    await service.increment_reaction_count("pop_2")
+    await service.increment_reaction_count("pop_2")
+    await service.decrement_reaction_count("pop_2")
+
+    pops = await service.get_user_pops("owner")
+
+    assert {pop.pop_id: pop.reaction_count for pop in pops} == {"pop_1": 4, "pop_2": 1}
+    assert fake_firestore.collection("pops").document("pop_1").get().to_dict()["reaction_count"] == 3
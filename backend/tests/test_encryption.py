@@ -0,0 +1,136 @@
+"""
+暗号化ユーティリティと座標の暗号化保存のテスト
+"""
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from cryptography.fernet import Fernet
+from pydantic import ValidationError
+
+from app.config import Settings
+from app.schemas.common import Coordinates
+from app.schemas.location import LocationUpdateRequest
+from app.services.location import LocationService
+from app.utils import encryption
+from app.utils.timezone import now_jst
+
+
+def test_cipher_is_cached():
+    """同じキー設定では暗号化オブジェクトが再利用されることのテスト"""
+    assert encryption._get_cipher() is encryption._get_cipher()
+
+
+def test_encrypt_many_round_trip():
+    """まとめて暗号化・復号化できることのテスト"""
+    texts = ["a", "位置情報", ""]
+
+    tokens = encryption.encrypt_many(texts)
+
+    assert len(tokens) == 3
+    assert encryption.decrypt_many(tokens) == texts
+    assert encryption.decrypt_string(tokens[1]) == "位置情報"
+
+
+def test_decrypt_many_reports_failed_index():
+    """復号化に失敗した要素の位置がエラーに含まれることのテスト"""
+    tokens = encryption.encrypt_many(["ok"]) + ["invalid"]
+
+    with pytest.raises(ValueError, match="index 1"):
+        encryption.decrypt_many(tokens)
+
+
+def test_key_rotation():
+    """旧キーで暗号化されたデータを復号化・再暗号化できることのテスト"""
+    old_key = Fernet.generate_key().decode()
+    new_key = Fernet.generate_key().decode()
+
+    with patch.object(encryption.settings, "ENCRYPTION_KEY", old_key):
+        old_token = encryption.encrypt_location_data(35.6580, 139.7016)
+
+    with patch.object(encryption.settings, "ENCRYPTION_KEY", new_key), patch.object(
+        encryption.settings, "ENCRYPTION_OLD_KEYS", old_key
+    ):
+        assert encryption.decrypt_location_data(old_token) == {"lat": 35.6580, "lng": 139.7016}
+        rotated = encryption.rotate_string(old_token)
+
+    with patch.object(encryption.settings, "ENCRYPTION_KEY", new_key):
+        assert encryption.decrypt_location_data(rotated)["lat"] == 35.6580
+        with pytest.raises(ValueError):
+            encryption.decrypt_location_data(old_token)
+
+
+@pytest.mark.asyncio
+async def test_record_and_read_encrypted_coords():
+    """座標を暗号化して保存し、履歴の取得時に復号化されることのテスト"""
+    location_service = LocationService()
+    location_data = LocationUpdateRequest(
+        coords=Coordinates(lat=35.6580, lng=139.7016), accuracy=10.0, recorded_at=now_jst()
+    )
+
+    with patch(
+        "app.services.location.settings.LOCATION_HISTORY_ENCRYPTION_ENABLED", True
+    ), patch.object(location_service.db, "collection") as mock_collection:
+        history = await location_service.record_location("user_123", location_data)
+
+        saved = mock_collection.return_value.document.return_value.set.call_args.args[0]
+        assert "coords" not in saved
+        assert saved["encrypted_coords"]
+        assert history.coords == location_data.coords
+
+        # 暗号化前の平文ドキュメントと混在していても読み取れる
+        plain_doc = MagicMock()
+        plain_doc.to_dict.return_value = {
+            **saved,
+            "id": "plain",
+            "coords": {"lat": 35.0, "lng": 139.0},
+            "encrypted_coords": None,
+        }
+        encrypted_doc = MagicMock()
+        encrypted_doc.to_dict.return_value = dict(saved)
+        mock_query = mock_collection.return_value.where.return_value.order_by.return_value
+        mock_query.limit.return_value.stream.return_value = iter([encrypted_doc, plain_doc])
+
+        histories = await location_service.get_location_history("user_123", limit=2)
+
+        assert histories[0].coords == location_data.coords
+        assert histories[1].coords == Coordinates(lat=35.0, lng=139.0)
+
+
+@pytest.mark.asyncio
+async def test_undecryptable_history_is_skipped():
+    """復号化できない履歴は除外され、他の履歴は取得できることのテスト"""
+    location_service = LocationService()
+    now = now_jst()
+    good_doc = MagicMock()
+    good_doc.to_dict.return_value = {
+        "id": "good",
+        "user_id": "user_123",
+        "encrypted_coords": encryption.encrypt_location_data(35.6580, 139.7016),
+        "recorded_at": now,
+        "auto_delete_at": now + timedelta(hours=24),
+    }
+    dropped_key_doc = MagicMock()
+    dropped_key_doc.to_dict.return_value = {
+        "id": "dropped_key",
+        "user_id": "user_123",
+        "encrypted_coords": Fernet(Fernet.generate_key()).encrypt(b"{}").decode(),
+        "recorded_at": now - timedelta(minutes=5),
+        "auto_delete_at": now + timedelta(hours=24),
+    }
+
+    with patch.object(location_service.db, "collection") as mock_collection:
+        mock_query = mock_collection.return_value.where.return_value.order_by.return_value
+        mock_query.limit.return_value.stream.return_value = iter([dropped_key_doc, good_doc])
+
+        histories = await location_service.get_location_history("user_123", limit=2)
+
+        assert [h.id for h in histories] == ["good"]
+        assert histories[0].coords == Coordinates(lat=35.6580, lng=139.7016)
+
+
+def test_encryption_with_bucket_storage_is_rejected():
+    """座標の暗号化とバケット形式の組み合わせは起動時に拒否されることのテスト"""
+    with pytest.raises(ValidationError):
+        Settings(LOCATION_HISTORY_ENCRYPTION_ENABLED=True, LOCATION_HISTORY_STORAGE="bucket")
@@ -0,0 +1,150 @@
+"""
+インメモリのFirestoreフェイクのテスト
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from firebase_admin import firestore
+from google.cloud.firestore_v1 import FieldFilter
+
+from app.config import settings
+from app.core.firebase import get_firestore_client
+from app.utils.timezone import now_jst
+from tests.fake_firestore import FakeFirestore
+
+
+def _seed_users(db: FakeFirestore) -> None:
+    db.seed(
+        "users",
+        {
+            "u1": {"uid": "u1", "age": 30, "tags": ["a", "b"], "profile": {"city": "tokyo"}},
+            "u2": {"uid": "u2", "age": 25, "tags": ["b"], "profile": {"city": "osaka"}},
+            "u3": {"uid": "u3", "age": 40, "tags": []},
+            "u4": {"uid": "u4", "tags": ["a"]},
+        },
+    )
+
+
+def test_where_order_by_limit():
+    """where・order_by・limit の組み合わせのテスト"""
+    db = FakeFirestore()
+    _seed_users(db)
+
+    query = db.collection("users").where("age", ">=", 25).order_by(
+        "age", direction=firestore.Query.DESCENDING
+    )
+
+    assert [doc.id for doc in query.stream()] == ["u3", "u1", "u2"]
+    assert [doc.id for doc in query.limit(2).get()] == ["u3", "u1"]
+    # order_by の対象フィールドがないドキュメントは含まれない
+    assert "u4" not in [doc.id for doc in db.collection("users").order_by("age").stream()]
+
+
+def test_array_contains_in_and_field_filter():
+    """array_contains・in・FieldFilter・ネストしたフィールドのテスト"""
+    db = FakeFirestore()
+    _seed_users(db)
+    users = db.collection("users")
+
+    assert {doc.id for doc in users.where("tags", "array_contains", "a").stream()} == {"u1", "u4"}
+    assert {doc.id for doc in users.where("age", "in", [25, 40]).stream()} == {"u2", "u3"}
+    assert [doc.id for doc in users.where(filter=FieldFilter("uid", "==", "u2")).stream()] == ["u2"]
+    assert [doc.id for doc in users.where("profile.city", "==", "tokyo").stream()] == ["u1"]
+
+
+def test_update_transforms_and_batch():
+    """update の変換（Increment・ArrayUnion）とバッチ書き込みのテスト"""
+    db = FakeFirestore()
+    _seed_users(db)
+    ref = db.collection("users").document("u1")
+
+    ref.update({"age": firestore.Increment(1), "tags": firestore.ArrayUnion(["b", "c"])})
+    batch = db.batch()
+    batch.delete(db.collection("users").document("u2"))
+    batch.set(db.collection("users").document("u5"), {"uid": "u5"})
+    assert db.count("users") == 4
+    batch.commit()
+
+    assert ref.get().to_dict()["age"] == 31
+    assert ref.get().to_dict()["tags"] == ["a", "b", "c"]
+    snapshots = list(db.get_all([db.collection("users").document(uid) for uid in ("u2", "u5")]))
+    assert [snapshot.exists for snapshot in snapshots] == [False, True]
+
+
+def test_transactional_commits_writes():
+    """firestore.transactional で書き込みがコミットされることのテスト"""
+    db = FakeFirestore()
+    ref = db.collection("counters").document("c1")
+
+    @firestore.transactional
+    def increment(transaction):
+        snapshot = ref.get(transaction=transaction)
+        value = snapshot.to_dict()["value"] if snapshot.exists else 0
+        transaction.set(ref, {"value": value + 1})
+        return value + 1
+
+    increment(db.transaction())
+
+    assert increment(db.transaction()) == 2
+    assert ref.get().to_dict() == {"value": 2}
+
+
+def test_injected_via_get_firestore_client(fake_firestore):
+    """get_firestore_client がフェイクを返すことのテスト"""
+    get_firestore_client().collection("users").document("u1").set({"uid": "u1"})
+
+    assert fake_firestore.count("users") == 1
+
+
+def test_location_update_marks_schedule_arrived(client, fake_services, fake_firestore, sample_user1):
+    """目的地に到着するとスケジュールが到着済みになり通知履歴が保存されることのテスト"""
+    now = now_jst()
+    fake_firestore.seed(
+        "schedules",
+        {
+            "s1": {
+                "id": "s1",
+                "user_id": sample_user1.uid,
+                "destination_name": "東京駅",
+                "destination_address": "東京都千代田区",
+                "destination_coords": {"lat": 35.6812, "lng": 139.7671},
+                "geofence_radius": 100,
+                "notify_to_user_ids": ["friend_1"],
+                "start_time": now - timedelta(minutes=30),
+                "end_time": now + timedelta(hours=2),
+                "status": "active",
+                "created_at": now,
+                "updated_at": now,
+            }
+        },
+    )
+    fake_firestore.seed(
+        "users",
+        {
+            "friend_1": {
+                "uid": "friend_1",
+                "username": "friend1",
+                "email": "friend1@example.com",
+                "display_name": "フレンド",
+                "fcm_tokens": [],
+                "created_at": now,
+                "updated_at": now,
+            },
+            sample_user1.uid: sample_user1.model_dump(),
+        },
+    )
+
+    with patch.object(settings, "LOCATION_HISTORY_STORAGE", "document"):
+        response = client.post(
+            "/api/v1/location/update",
+            json={"coords": {"lat": 35.6812, "lng": 139.7671}, "accuracy": 10.0},
+        )
+
+    assert response.status_code == 200
+    assert response.json()["schedule_updates"][0]["event_type"] == "entry"
+    schedule = fake_firestore.collection("schedules").document("s1").get().to_dict()
+    assert schedule["status"] == "arrived"
+    assert fake_firestore.count("location_history") == 1
+    [notification] = fake_firestore.collection("notifications").get()
+    assert notification.to_dict()["schedule_id"] == "s1"
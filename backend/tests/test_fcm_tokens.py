@@ -0,0 +1,58 @@
+"""
+FCMトークン管理のテスト
+"""
+
+from datetime import timedelta
+
+import pytest
+
+from app.services.fcm_tokens import FcmTokenService
+from app.services.notifications import NotificationService
+from app.utils.timezone import now_jst
+
+
+def _user_tokens(fake_firestore, uid: str) -> list:
+    return fake_firestore.collection("users").document(uid).get().to_dict()["fcm_tokens"]
+
+
+@pytest.mark.asyncio
+async def test_register_and_remove_without_reading_user(fake_firestore, firestore_budget):
+    """トークンの登録・削除がユーザーを読まずに配列と登録簿を更新することのテスト"""
+    fake_firestore.seed("users", {"u1": {"uid": "u1", "fcm_tokens": ["existing"]}})
+    service = NotificationService(fcm_token_service=FcmTokenService())
+
+    with firestore_budget(reads=0, queries=0):
+        await service.register_fcm_token("u1", "token_a")
+        await service.register_fcm_token("u1", "token_a")
+        await service.remove_fcm_token("u1", "existing")
+
+    assert _user_tokens(fake_firestore, "u1") == ["token_a"]
+    [registry] = fake_firestore.collection("fcm_tokens").get()
+    assert registry.to_dict()["user_id"] == "u1"
+    assert "last_seen_at" in registry.to_dict()
+
+    with pytest.raises(ValueError):
+        await service.register_fcm_token("missing_user", "token_b")
+
+
+@pytest.mark.asyncio
+async def test_prune_stale_tokens(fake_firestore):
+    """古いトークンだけをユーザーの配列と登録簿から削除することのテスト"""
+    service = FcmTokenService()
+    fake_firestore.seed("users", {"u1": {"uid": "u1"}, "u2": {"uid": "u2"}})
+    await service.register_token("u1", "stale")
+    await service.register_token("u1", "fresh")
+    await service.register_token("u2", "orphan")
+    # u2 は削除済み
+    fake_firestore.collection("users").document("u2").delete()
+
+    old = now_jst() - timedelta(days=90)
+    for token in ("stale", "orphan"):
+        service._registry_ref(token).update({"last_seen_at": old})
+
+    assert await service.prune_stale_tokens() == 2
+
+    assert _user_tokens(fake_firestore, "u1") == ["fresh"]
+    assert [doc.to_dict()["token"] for doc in fake_firestore.collection("fcm_tokens").get()] == [
+        "fresh"
+    ]
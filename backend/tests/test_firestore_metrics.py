@@ -0,0 +1,95 @@
+"""
+Firestore操作の計測のテスト
+"""
+
+from unittest.mock import MagicMock, patch
+
+from app.config import settings
+from app.core.firestore_metrics import (
+    FirestoreOpMetrics,
+    FirestoreOpStats,
+    instrument_client,
+    track_firestore_ops,
+)
+from tests.fake_firestore import FakeFirestore
+
+
+def test_counts_document_and_query_operations():
+    """ドキュメントの読み書きとクエリの件数が記録されることのテスト"""
+    raw = MagicMock()
+    raw.collection.return_value.where.return_value.stream.return_value = iter(
+        [MagicMock(), MagicMock(), MagicMock()]
+    )
+    db = instrument_client(raw)
+
+    with track_firestore_ops() as ops:
+        db.collection("users").document("u1").get()
+        db.collection("users").document("u1").set({"a": 1})
+        for _ in db.collection("users").where("a", "==", 1).stream():
+            break
+
+    # 途中で打ち切ったクエリは、そこまでに受け取った件数で記録される
+    assert ops.reads == 2
+    assert ops.writes == 1
+    assert ops.queries == 1
+    assert ops.documents == 2
+
+
+def test_empty_query_counts_one_read():
+    """0件のクエリも1読み取りとして記録されることのテスト"""
+    db = instrument_client(FakeFirestore())
+
+    with track_firestore_ops() as ops:
+        assert list(db.collection("users").where("a", "==", 1).stream()) == []
+        assert db.collection("users").limit(10).get() == []
+
+    assert ops.reads == 2
+    assert ops.queries == 2
+    assert ops.documents == 0
+
+
+def test_batch_counts_writes_on_commit_and_unwraps_references():
+    """バッチはコミット時に件数分の書き込みとして記録され、SDKには元の参照が渡されることのテスト"""
+    raw = MagicMock()
+    db = instrument_client(raw)
+    ref = db.collection("users").document("u1")
+
+    with track_firestore_ops() as ops:
+        batch = db.batch()
+        batch.set(ref, {"a": 1})
+        batch.delete(ref)
+        assert ops.writes == 0
+        batch.commit()
+
+    assert ops.writes == 2
+    raw.batch.return_value.set.assert_called_once_with(
+        raw.collection.return_value.document.return_value, {"a": 1}
+    )
+
+
+def test_metrics_aggregate_per_route():
+    """ルートごとに集計されることのテスト"""
+    metrics = FirestoreOpMetrics()
+
+    metrics.observe("/api/v1/location/update", FirestoreOpStats(reads=4, writes=1, queries=3))
+    metrics.observe("/api/v1/location/update", FirestoreOpStats(reads=6, writes=1, queries=3))
+
+    entry = metrics.as_dict()["/api/v1/location/update"]
+    assert entry["requests"] == 2
+    assert entry["reads"] == 10
+    assert entry["max_reads"] == 6
+    assert entry["avg_reads"] == 5
+
+
+def test_location_update_firestore_budget(client, fake_services, firestore_budget):
+    """位置情報更新のFirestore操作数が上限以内であることのテスト（N+1クエリの検出用）"""
+    with patch.object(settings, "LOCATION_HISTORY_STORAGE", "document"):
+        with firestore_budget(reads=5, writes=1, queries=5) as ops:
+            response = client.post(
+                "/api/v1/location/update",
+                json={"coords": {"lat": 35.6812, "lng": 139.7671}, "accuracy": 10.0},
+            )
+
+    assert response.status_code == 200
+    assert ops.writes == 1
+    assert response.headers["X-Firestore-Reads"] == str(ops.reads)
@@ -2,14 +2,26 @@
 フレンド管理APIエンドポイントのテスト
 """
 
+from contextlib import contextmanager
 from datetime import datetime
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock
 
 from fastapi import status
 
+from app.api.dependencies import get_friend_service
+from app.main import app
+from app.schemas.friend import FriendRequestStatus, FriendshipStatus, TrustLevel
 from app.utils.timezone import now_jst
 
-from app.schemas.friend import FriendRequestStatus, FriendshipStatus, TrustLevel
+
+@contextmanager
+def override_friend_service(mock_friend_service):
+    """フレンドサービスをモックに差し替える"""
+    app.dependency_overrides[get_friend_service] = lambda: mock_friend_service
+    try:
+        yield
+    finally:
+        app.dependency_overrides.pop(get_friend_service, None)
 
 
 class TestFriendRequestEndpoints:
@@ -28,7 +40,7 @@ class TestFriendRequestEndpoints:
             responded_at=None,
         )
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(
                 "/api/v1/friends/requests",
                 json={"to_user_id": "target_user", "message": "よろしく"},
@@ -46,7 +58,7 @@ class TestFriendRequestEndpoints:
             "自分自身にフレンドリクエストを送信できません"
         )
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(
                 "/api/v1/friends/requests",
                 json={"to_user_id": "test_user_1", "message": "test"},
@@ -71,7 +83,7 @@ class TestFriendRequestEndpoints:
             )
         ]
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.get("/api/v1/friends/requests/received")
 
             assert response.status_code == status.HTTP_200_OK
@@ -85,7 +97,7 @@ class TestFriendRequestEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.get_sent_requests.return_value = []
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.get("/api/v1/friends/requests/sent")
 
             assert response.status_code == status.HTTP_200_OK
@@ -108,7 +120,7 @@ class TestFriendRequestEndpoints:
             trust_level=TrustLevel.FRIEND,  # 後方互換性のため
         )
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post("/api/v1/friends/requests/request_123/accept")
 
             assert response.status_code == status.HTTP_200_OK
@@ -121,7 +133,7 @@ class TestFriendRequestEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.reject_friend_request.return_value = None
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post("/api/v1/friends/requests/request_123/reject")
 
             assert response.status_code == status.HTTP_200_OK
@@ -150,7 +162,7 @@ class TestFriendshipEndpoints:
             )
         ]
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.get("/api/v1/friends")
 
             assert response.status_code == status.HTTP_200_OK
@@ -189,7 +201,7 @@ class TestFriendshipEndpoints:
             )
         ]
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.get(f"/api/v1/friends/{sample_user2.uid}")
 
             assert response.status_code == status.HTTP_200_OK
@@ -201,7 +213,7 @@ class TestFriendshipEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.get_friendship.return_value = None
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.get("/api/v1/friends/nonexistent_user")
 
             assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -229,7 +241,7 @@ class TestFriendshipEndpoints:
             )
         ]
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.patch(
                 f"/api/v1/friends/{sample_user2.uid}",
                 json={"nickname": "親友"},
@@ -244,7 +256,7 @@ class TestFriendshipEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.remove_friend.return_value = None
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.delete(f"/api/v1/friends/{sample_user2.uid}")
 
             assert response.status_code == status.HTTP_204_NO_CONTENT
@@ -254,7 +266,7 @@ class TestFriendshipEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.block_user.return_value = None
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(f"/api/v1/friends/{sample_user2.uid}/block")
 
             assert response.status_code == status.HTTP_200_OK
@@ -277,7 +289,7 @@ class TestLocationShareEndpoints:
             responded_at=None,
         )
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(
                 "/api/v1/friends/location-share/requests",
                 json={"target_user_id": sample_user2.uid},
@@ -295,7 +307,7 @@ class TestLocationShareEndpoints:
             "位置情報共有リクエストを送信するにはフレンドである必要があります"
         )
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(
                 "/api/v1/friends/location-share/requests",
                 json={"target_user_id": sample_user2.uid},
@@ -319,7 +331,7 @@ class TestLocationShareEndpoints:
             )
         ]
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.get("/api/v1/friends/location-share/requests/received")
 
             assert response.status_code == status.HTTP_200_OK
@@ -333,7 +345,7 @@ class TestLocationShareEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.get_sent_location_share_requests.return_value = []
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.get("/api/v1/friends/location-share/requests/sent")
 
             assert response.status_code == status.HTTP_200_OK
@@ -352,7 +364,7 @@ class TestLocationShareEndpoints:
             status=FriendshipStatus.ACTIVE,
         )
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(
                 "/api/v1/friends/location-share/requests/loc_request_123/accept"
             )
@@ -366,7 +378,7 @@ class TestLocationShareEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.reject_location_share_request.return_value = None
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(
                 "/api/v1/friends/location-share/requests/loc_request_123/reject"
             )
@@ -380,7 +392,7 @@ class TestLocationShareEndpoints:
         mock_friend_service = AsyncMock()
         mock_friend_service.revoke_location_share.return_value = None
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(f"/api/v1/friends/{sample_user2.uid}/location-share/revoke")
 
             assert response.status_code == status.HTTP_200_OK
@@ -395,7 +407,7 @@ class TestLocationShareEndpoints:
             "既に位置情報共有は停止されています"
         )
 
-        with patch("app.api.v1.friends.FriendService", return_value=mock_friend_service):
+        with override_friend_service(mock_friend_service):
             response = client.post(f"/api/v1/friends/{sample_user2.uid}/location-share/revoke")
 
             assert response.status_code == status.HTTP_400_BAD_REQUEST
@@ -6,9 +6,10 @@ import pytest
 from datetime import datetime, timedelta
 from unittest.mock import AsyncMock, MagicMock, patch
 
+from app.config import settings
 from app.schemas.common import Coordinates
-from app.utils.timezone import now_jst
-from app.schemas.schedule import LocationScheduleInDB, ScheduleStatus
+from app.utils.timezone import JST, now_jst
+from app.schemas.schedule import LocationScheduleInDB, RecurrenceType, ScheduleStatus
 from app.services.geofencing import GeofencingService
 
 
@@ -155,7 +156,7 @@ async def test_process_location_update_entry(geofencing_service, sample_schedule
     ) as mock_update_status:
 
         # ACTIVEスケジュールとして返す
-        mock_get_schedules.side_effect = lambda user_id, status: (
+        mock_get_schedules.side_effect = lambda user_id, status, **kwargs: (
             [sample_schedule] if status == ScheduleStatus.ACTIVE else []
         )
 
@@ -188,7 +189,7 @@ async def test_process_location_update_exit(geofencing_service, sample_schedule)
     ) as mock_update_status:
 
         # ARRIVEDスケジュールとして返す
-        mock_get_schedules.side_effect = lambda user_id, status: (
+        mock_get_schedules.side_effect = lambda user_id, status, **kwargs: (
             [sample_schedule] if status == ScheduleStatus.ARRIVED else []
         )
 
@@ -228,3 +229,216 @@ async def test_get_nearby_schedules(geofencing_service, sample_schedule):
         assert len(nearby) == 1
         assert nearby[0][0].id == "schedule_123"
         assert nearby[0][1] <= 200  # 200m以内
+
+
+def test_calculate_next_update_interval_no_schedules(geofencing_service):
+    """スケジュールがない場合は最大間隔を返すテスト"""
+    current_coords = Coordinates(lat=35.6580, lng=139.7016)
+
+    interval = geofencing_service.calculate_next_update_interval([], current_coords)
+
+    assert interval == settings.LOCATION_UPDATE_MAX_INTERVAL_SECONDS
+
+
+def test_calculate_next_update_interval_near_destination(geofencing_service, sample_schedule):
+    """目的地に近いほど間隔が短くなるテスト"""
+    near_coords = Coordinates(lat=35.6600, lng=139.7016)  # 約220m
+    far_coords = Coordinates(lat=35.6800, lng=139.7016)  # 約2.4km
+
+    near_interval = geofencing_service.calculate_next_update_interval(
+        [sample_schedule], near_coords, speed_mps=1.4
+    )
+    far_interval = geofencing_service.calculate_next_update_interval(
+        [sample_schedule], far_coords, speed_mps=1.4
+    )
+
+    assert near_interval < far_interval
+    assert near_interval >= settings.LOCATION_UPDATE_MIN_INTERVAL_SECONDS
+    assert far_interval <= settings.LOCATION_UPDATE_MAX_INTERVAL_SECONDS
+
+
+def test_calculate_next_update_interval_before_time_window(geofencing_service, sample_schedule):
+    """時間枠の開始前のスケジュールは開始時刻まで間隔を延ばすテスト"""
+    now = now_jst()
+    sample_schedule.start_time = now + timedelta(minutes=20)
+    sample_schedule.end_time = now + timedelta(hours=2)
+    # 目的地のすぐ近く（距離だけなら最小間隔になる位置）
+    current_coords = Coordinates(lat=35.6585, lng=139.7016)
+
+    interval = geofencing_service.calculate_next_update_interval(
+        [sample_schedule], current_coords, speed_mps=10.0, now=now
+    )
+
+    assert interval == 20 * 60
+
+
+def test_calculate_next_update_interval_dwelling(geofencing_service, sample_schedule):
+    """到着済みで円内に滞在中は最短間隔ではなく基本間隔になるテスト"""
+    now = now_jst()
+    sample_schedule.status = ScheduleStatus.ARRIVED
+    sample_schedule.arrived_at = now - timedelta(minutes=30)
+    current_coords = Coordinates(lat=35.6581, lng=139.7016)  # 目的地から約11m（円内）
+
+    interval = geofencing_service.calculate_next_update_interval(
+        [sample_schedule], current_coords, speed_mps=0.0, now=now
+    )
+
+    assert interval == settings.LOCATION_UPDATE_INTERVAL_MINUTES * 60
+    assert interval > settings.LOCATION_UPDATE_MIN_INTERVAL_SECONDS
+
+
+def test_estimate_speed(geofencing_service):
+    """直近2点からの速度推定テスト"""
+    now = now_jst()
+    previous_coords = Coordinates(lat=35.6580, lng=139.7016)
+    current_coords = Coordinates(lat=35.6590, lng=139.7016)  # 約111m
+
+    speed = geofencing_service.estimate_speed(
+        previous_coords, now - timedelta(seconds=100), current_coords, now
+    )
+
+    assert 1.0 <= speed <= 1.2
+    assert geofencing_service.estimate_speed(None, None, current_coords, now) is None
+
+
+def test_find_segment_crossing_pass_through(geofencing_service, sample_schedule):
+    """2点間でジオフェンスを通り抜けた場合の交差判定テスト"""
+    now = now_jst()
+    # 目的地の南北約220mずつの2点（線分が目的地の真上を通る）
+    previous_coords = Coordinates(lat=35.6560, lng=139.7016)
+    current_coords = Coordinates(lat=35.6600, lng=139.7016)
+
+    crossing = geofencing_service.find_segment_crossing(
+        sample_schedule,
+        previous_coords,
+        current_coords,
+        now - timedelta(minutes=10),
+        now,
+    )
+
+    assert crossing is not None
+    assert crossing.closest_distance < 1
+    # 約445mのうち約172m地点で入り、約272m地点で出ている
+    assert now - timedelta(minutes=7) < crossing.entered_at < now - timedelta(minutes=6)
+    assert now - timedelta(minutes=4) < crossing.exited_at < now - timedelta(minutes=3)
+
+
+def test_find_segment_crossing_miss(geofencing_service, sample_schedule):
+    """線分がジオフェンスを通らない場合のテスト"""
+    now = now_jst()
+    # 目的地の約200m東を南北に移動
+    previous_coords = Coordinates(lat=35.6560, lng=139.7038)
+    current_coords = Coordinates(lat=35.6600, lng=139.7038)
+
+    crossing = geofencing_service.find_segment_crossing(
+        sample_schedule,
+        previous_coords,
+        current_coords,
+        now - timedelta(minutes=10),
+        now,
+    )
+
+    assert crossing is None
+
+
+@pytest.mark.asyncio
+async def test_process_location_update_pass_through(geofencing_service, sample_schedule):
+    """送信間隔の間に通り抜けた場合に到着・退出の両方を検出するテスト"""
+    now = now_jst()
+
+    with patch.object(
+        geofencing_service.schedule_service, "update_schedule_status", new_callable=AsyncMock
+    ) as mock_update_status:
+        events = await geofencing_service.process_location_update(
+            user_id="user_123",
+            current_coords=Coordinates(lat=35.6600, lng=139.7016),
+            previous_coords=Coordinates(lat=35.6560, lng=139.7016),
+            schedules=[sample_schedule],
+            previous_recorded_at=now - timedelta(minutes=10),
+            current_recorded_at=now,
+        )
+
+        assert [event.event_type for event in events] == ["entry", "exit"]
+        assert events[0].occurred_at < events[1].occurred_at < now
+
+        _, kwargs = mock_update_status.call_args
+        assert mock_update_status.call_args[0][1] == ScheduleStatus.COMPLETED
+        assert kwargs["arrived_at"] == events[0].occurred_at
+        assert kwargs["departed_at"] == events[1].occurred_at
+
+
+@pytest.mark.asyncio
+async def test_process_location_update_interpolates_arrival(geofencing_service, sample_schedule):
+    """到着時刻が境界通過時刻で補間されるテスト"""
+    now = now_jst()
+    sample_schedule.arrived_at = now - timedelta(days=1)  # 過去に一度到着済み
+
+    with patch.object(
+        geofencing_service.schedule_service, "update_schedule_status", new_callable=AsyncMock
+    ) as mock_update_status:
+        events = await geofencing_service.process_location_update(
+            user_id="user_123",
+            current_coords=Coordinates(lat=35.6580, lng=139.7016),
+            previous_coords=Coordinates(lat=35.6560, lng=139.7016),
+            schedules=[sample_schedule],
+            previous_recorded_at=now - timedelta(minutes=10),
+            current_recorded_at=now,
+        )
+
+        assert len(events) == 1
+        assert events[0].event_type == "entry"
+        # 約220mのうち約170m進んだ地点で境界を越えている
+        assert now - timedelta(minutes=3) < events[0].occurred_at < now - timedelta(minutes=2)
+        assert mock_update_status.call_args.kwargs["arrived_at"] == events[0].occurred_at
+
+
+@pytest.mark.asyncio
+async def test_get_tracked_schedules_filters_by_time_window(geofencing_service, sample_schedule):
+    """時間枠外のACTIVEスケジュールが判定対象から除外されるテスト"""
+    now = now_jst()
+    ended_schedule = sample_schedule.model_copy(
+        update={
+            "id": "schedule_ended",
+            "start_time": now - timedelta(hours=6),
+            "end_time": now - timedelta(hours=3),
+        }
+    )
+
+    with patch.object(
+        geofencing_service.schedule_service, "get_schedules_by_user", new_callable=AsyncMock
+    ) as mock_get_schedules:
+        mock_get_schedules.side_effect = lambda user_id, status, **kwargs: (
+            [sample_schedule, ended_schedule] if status == ScheduleStatus.ACTIVE else []
+        )
+
+        schedules = await geofencing_service.get_tracked_schedules("user_123", now=now)
+
+        assert [s.id for s in schedules] == ["schedule_123"]
+        # 開始時刻の上限がクエリに渡されている
+        active_call = mock_get_schedules.call_args_list[0]
+        assert active_call.kwargs["start_time_before"] == now + timedelta(
+            minutes=settings.GEOFENCE_TIME_WINDOW_GRACE_MINUTES
+        )
+
+
+def test_get_occurrence_weekdays(geofencing_service, sample_schedule):
+    """平日のみの繰り返しスケジュールの展開テスト"""
+    schedule_service = geofencing_service.schedule_service
+    # 2025-01-06（月）9:00-10:00 から平日繰り返し
+    first_start = datetime(2025, 1, 6, 9, 0, tzinfo=JST)
+    sample_schedule.start_time = first_start
+    sample_schedule.end_time = first_start + timedelta(hours=1)
+    sample_schedule.recurrence = RecurrenceType.WEEKDAYS
+
+    # 金曜 12:00 時点 → 翌週月曜 9:00 の発生
+    occurrence = schedule_service.get_occurrence(sample_schedule, datetime(2025, 1, 10, 12, 0, tzinfo=JST))
+    assert occurrence == (datetime(2025, 1, 13, 9, 0, tzinfo=JST), datetime(2025, 1, 13, 10, 0, tzinfo=JST))
+
+    # 水曜 9:30 時点 → 当日の発生中
+    assert schedule_service.is_in_time_window(
+        sample_schedule, datetime(2025, 1, 8, 9, 30, tzinfo=JST), timedelta(minutes=30)
+    )
+    # 土曜 9:30 時点 → 時間枠外
+    assert not schedule_service.is_in_time_window(
+        sample_schedule, datetime(2025, 1, 11, 9, 30, tzinfo=JST), timedelta(minutes=30)
+    )
@@ -0,0 +1,203 @@
+"""
+位置情報履歴のバケット保存形式のテスト
+"""
+
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.schemas.common import Coordinates
+from app.schemas.location import LocationBucketInDB, LocationUpdateRequest
+from app.services.cleanup import CleanupService
+from app.services.location import LocationService
+from app.utils.timezone import JST, now_jst
+
+
+@pytest.fixture
+def location_service():
+    """位置情報サービスのフィクスチャ"""
+    return LocationService()
+
+
+def _make_bucket(bucket_start, offsets_minutes):
+    """テスト用バケットの辞書を作成"""
+    recorded_ats = [bucket_start + timedelta(minutes=m) for m in offsets_minutes]
+    return {
+        "id": f"user_123_{bucket_start.strftime('%Y%m%d%H%M')}",
+        "user_id": "user_123",
+        "bucket_start": bucket_start,
+        "bucket_end": bucket_start + timedelta(hours=1),
+        "lats": [35.6580 + i * 0.0001 for i in range(len(offsets_minutes))],
+        "lngs": [139.7016] * len(offsets_minutes),
+        "accuracies": [10.0] * len(offsets_minutes),
+        "recorded_ats": recorded_ats,
+        "schedule_ids": [None] * len(offsets_minutes),
+        "point_count": len(offsets_minutes),
+        "auto_delete_at": bucket_start + timedelta(hours=25),
+    }
+
+
+def test_get_bucket_start(location_service):
+    """記録日時が属する時間枠の開始日時のテスト"""
+    recorded_at = now_jst().replace(hour=14, minute=37, second=12, microsecond=5)
+
+    with patch("app.services.location.settings.LOCATION_BUCKET_MINUTES", 60):
+        assert location_service._get_bucket_start(recorded_at) == recorded_at.replace(
+            minute=0, second=0, microsecond=0
+        )
+
+    with patch("app.services.location.settings.LOCATION_BUCKET_MINUTES", 15):
+        assert location_service._get_bucket_start(recorded_at) == recorded_at.replace(
+            minute=30, second=0, microsecond=0
+        )
+
+
+def test_bucket_to_histories_newest_first():
+    """並列配列の展開が新しい順になることのテスト"""
+    bucket_start = now_jst().replace(minute=0, second=0, microsecond=0)
+    bucket = LocationBucketInDB(**_make_bucket(bucket_start, [5, 30, 10]))
+
+    histories = bucket.to_histories()
+
+    assert [h.recorded_at.minute for h in histories] == [30, 10, 5]
+    assert histories[0].id == f"{bucket.id}_1"
+    assert histories[0].recorded_at.tzinfo is not None
+    assert all(h.auto_delete_at == bucket.auto_delete_at for h in histories)
+
+
+@pytest.mark.asyncio
+async def test_get_location_history_from_buckets(location_service):
+    """直近N件がバケット数件の読み取りで揃うことのテスト"""
+    bucket_start = now_jst().replace(minute=0, second=0, microsecond=0).astimezone(JST)
+    newer = MagicMock()
+    newer.to_dict.return_value = _make_bucket(bucket_start, [5])
+    older = MagicMock()
+    older.to_dict.return_value = _make_bucket(bucket_start - timedelta(hours=1), [20, 50])
+
+    with patch("app.services.location.settings.LOCATION_HISTORY_STORAGE", "bucket"), patch.object(
+        location_service.db, "collection"
+    ) as mock_collection, patch.object(
+        location_service, "_get_document_history", new_callable=AsyncMock
+    ) as mock_document_history:
+        mock_query = mock_collection.return_value.where.return_value.order_by.return_value
+        mock_query.limit.return_value.stream.return_value = iter([newer, older])
+
+        histories = await location_service.get_location_history("user_123", limit=2)
+
+        assert len(histories) == 2
+        assert histories[0].recorded_at == bucket_start + timedelta(minutes=5)
+        assert histories[1].recorded_at == bucket_start - timedelta(minutes=10)
+        mock_collection.assert_called_with("location_buckets")
+        mock_document_history.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_get_location_history_falls_back_to_documents(location_service):
+    """バケットの件数が足りない場合に旧形式のドキュメントで補完するテスト"""
+    bucket_start = now_jst().replace(minute=0, second=0, microsecond=0)
+    bucket_doc = MagicMock()
+    bucket_doc.to_dict.return_value = _make_bucket(bucket_start, [5])
+
+    with patch("app.services.location.settings.LOCATION_HISTORY_STORAGE", "bucket"), patch(
+        "app.services.location.settings.LOCATION_BUCKET_CUTOVER_AT", now_jst() - timedelta(hours=1)
+    ), patch.object(location_service.db, "collection") as mock_collection, patch.object(
+        location_service, "_get_document_history", new_callable=AsyncMock
+    ) as mock_document_history:
+        mock_query = mock_collection.return_value.where.return_value.order_by.return_value
+        mock_query.limit.return_value.stream.return_value = iter([bucket_doc])
+        mock_document_history.return_value = []
+
+        histories = await location_service.get_location_history("user_123", limit=2)
+
+        assert len(histories) == 1
+        mock_document_history.assert_called_once_with("user_123", 1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cutover_hours_ago", [None, 25])
+async def test_get_location_history_skips_documents_outside_cutover(
+    location_service, cutover_hours_ago
+):
+    """切り替え日時が未設定・保持期間を過ぎた場合は旧形式を読み取らないことのテスト"""
+    cutover_at = (
+        None if cutover_hours_ago is None else now_jst() - timedelta(hours=cutover_hours_ago)
+    )
+    bucket_start = now_jst().replace(minute=0, second=0, microsecond=0)
+    bucket_doc = MagicMock()
+    bucket_doc.to_dict.return_value = _make_bucket(bucket_start, [5])
+
+    with patch("app.services.location.settings.LOCATION_HISTORY_STORAGE", "bucket"), patch(
+        "app.services.location.settings.LOCATION_BUCKET_CUTOVER_AT", cutover_at
+    ), patch.object(location_service.db, "collection") as mock_collection, patch.object(
+        location_service, "_get_document_history", new_callable=AsyncMock
+    ) as mock_document_history:
+        mock_query = mock_collection.return_value.where.return_value.order_by.return_value
+        mock_query.limit.return_value.stream.return_value = iter([bucket_doc])
+
+        histories = await location_service.get_location_history("user_123", limit=100)
+
+        assert len(histories) == 1
+        mock_document_history.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_append_to_bucket(location_service):
+    """既存バケットの並列配列に1点追記されることのテスト"""
+    bucket_start = now_jst().replace(minute=0, second=0, microsecond=0)
+    recorded_at = bucket_start + timedelta(minutes=40)
+    existing = MagicMock(exists=True)
+    existing.to_dict.return_value = _make_bucket(bucket_start, [5, 20])
+    location_data = LocationUpdateRequest(
+        coords=Coordinates(lat=35.7, lng=139.8), accuracy=5.0, recorded_at=recorded_at
+    )
+
+    with patch("app.services.location.settings.LOCATION_HISTORY_STORAGE", "bucket"), patch(
+        "app.services.location.settings.LOCATION_BUCKET_MINUTES", 60
+    ), patch(
+        "app.services.location.firestore.transactional", lambda func: func
+    ), patch.object(location_service.db, "collection") as mock_collection, patch.object(
+        location_service.db, "transaction"
+    ) as mock_transaction:
+        bucket_ref = mock_collection.return_value.document.return_value
+        bucket_ref.get.return_value = existing
+
+        history = await location_service.record_location("user_123", location_data)
+
+        bucket_id = f"user_123_{bucket_start.strftime('%Y%m%d%H%M')}"
+        mock_collection.assert_called_with("location_buckets")
+        mock_collection.return_value.document.assert_called_with(bucket_id)
+
+        transaction = mock_transaction.return_value
+        saved_ref, saved = transaction.set.call_args.args
+        assert saved_ref is bucket_ref
+        assert saved["point_count"] == 3
+        assert saved["lats"][-1] == 35.7
+        assert saved["recorded_ats"][-1] == recorded_at
+        assert history.id == f"{bucket_id}_2"
+        assert history.coords == location_data.coords
+
+
+@pytest.mark.asyncio
+async def test_delete_related_bucket_points(fake_firestore):
+    """スケジュールに関連する点だけがトランザクション内でバケットから取り除かれることのテスト"""
+    bucket_start = now_jst().replace(minute=0, second=0, microsecond=0)
+    mixed = {**_make_bucket(bucket_start, [5, 20]), "schedule_ids": ["schedule_1", None]}
+    only_schedule = {
+        **_make_bucket(bucket_start - timedelta(hours=1), [5]),
+        "schedule_ids": ["schedule_1"],
+    }
+    fake_firestore.seed(
+        "location_buckets", {mixed["id"]: mixed, only_schedule["id"]: only_schedule}
+    )
+    cleanup_service = CleanupService()
+
+    deleted_count = await cleanup_service._delete_related_location_history("schedule_1")
+
+    assert deleted_count == 2
+    buckets = fake_firestore.collection("location_buckets")
+    assert buckets.document(only_schedule["id"]).get().exists is False
+    updated = buckets.document(mixed["id"]).get().to_dict()
+    assert updated["point_count"] == 1
+    assert updated["schedule_ids"] == [None]
+    assert updated["recorded_ats"] == [bucket_start + timedelta(minutes=20)]
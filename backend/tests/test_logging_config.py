@@ -0,0 +1,89 @@
+"""
+ロギング設定のテスト
+"""
+
+import json
+import logging
+import queue
+import sys
+from unittest.mock import patch
+
+from app.config import settings
+from app.core.logging_config import (
+    JsonFormatter,
+    _DeferredFormatQueueHandler,
+    is_sampled,
+    log_diagnostic,
+    request_id_var,
+)
+
+
+def _make_record(msg, *args, **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+def test_is_sampled_is_deterministic():
+    """同じリクエストIDのサンプリング結果が常に同じになることのテスト"""
+    with patch.object(settings, "LOG_DIAGNOSTIC_SAMPLE_RATE", 0.5):
+        results = [is_sampled(f"request-{i}") for i in range(200)]
+
+        assert results == [is_sampled(f"request-{i}") for i in range(200)]
+        assert 0 < sum(results) < 200
+
+
+def test_is_sampled_rate_bounds():
+    """サンプリング率が0なら記録せず、1なら全て記録することのテスト"""
+    with patch.object(settings, "LOG_DIAGNOSTIC_SAMPLE_RATE", 0):
+        assert is_sampled("request-1") is False
+
+    with patch.object(settings, "LOG_DIAGNOSTIC_SAMPLE_RATE", 1):
+        assert is_sampled("request-1") is True
+
+
+def test_log_diagnostic_skips_unsampled_request(caplog):
+    """サンプリング対象外のリクエストでは診断ログを出力しないことのテスト"""
+    logger = logging.getLogger("app.test.diagnostic")
+    token = request_id_var.set("request-1")
+    try:
+        with caplog.at_level(logging.INFO, logger=logger.name):
+            with patch.object(settings, "LOG_DIAGNOSTIC_SAMPLE_RATE", 0):
+                log_diagnostic(logger, "skipped %s", 1)
+            with patch.object(settings, "LOG_DIAGNOSTIC_SAMPLE_RATE", 1):
+                log_diagnostic(logger, "sampled %s", 2)
+    finally:
+        request_id_var.reset(token)
+
+    assert [r.getMessage() for r in caplog.records] == ["sampled 2"]
+
+
+def test_json_formatter_includes_context_and_extra():
+    """JSON形式にseverity・リクエストID・extraが含まれることのテスト"""
+    record = _make_record("距離: %.1fm", 12.345, request_id="abc", schedule_id="s1")
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["severity"] == "INFO"
+    assert entry["message"] == "距離: 12.3m"
+    assert entry["request_id"] == "abc"
+    assert entry["schedule_id"] == "s1"
+
+
+def test_queue_handler_renders_message_and_exception():
+    """キューに渡す前にメッセージと例外が文字列化されることのテスト"""
+    handler = _DeferredFormatQueueHandler(queue.SimpleQueue())
+    try:
+        raise RuntimeError("boom")
+    except RuntimeError:
+        record = logging.LogRecord(
+            "app.test", logging.ERROR, __file__, 1, "failed: %s", ("x",), sys.exc_info()
+        )
+
+    prepared = handler.prepare(record)
+
+    assert prepared.msg == "failed: x"
+    assert prepared.args is None
+    assert prepared.exc_info is None
+    assert "RuntimeError: boom" in prepared.exc_text
@@ -0,0 +1,91 @@
+"""
+Prometheus形式のメトリクスのテスト
+"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.core.metrics import (
+    FCM_TOKENS_PRUNED,
+    NOTIFICATIONS_FAILED,
+    NOTIFICATIONS_SENT,
+    Counter,
+    Histogram,
+    MetricsRegistry,
+)
+from app.schemas.notification import NotificationType
+from app.services.notifications import NotificationService
+
+
+def test_histogram_renders_cumulative_buckets():
+    """ヒストグラムが累積バケット・合計・件数で出力されることのテスト"""
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("job_seconds", "所要時間", ("job",), (1.0, 5.0)))
+
+    histogram.observe(0.5, job="cleanup")
+    histogram.observe(3.0, job="cleanup")
+    histogram.observe(7.0, job="cleanup")
+
+    lines = registry.render().splitlines()
+    assert "# TYPE job_seconds histogram" in lines
+    assert 'job_seconds_bucket{job="cleanup",le="1"} 1' in lines
+    assert 'job_seconds_bucket{job="cleanup",le="5"} 2' in lines
+    assert 'job_seconds_bucket{job="cleanup",le="+Inf"} 3' in lines
+    assert 'job_seconds_sum{job="cleanup"} 10.5' in lines
+    assert 'job_seconds_count{job="cleanup"} 3' in lines
+
+
+def test_counter_rejects_unknown_labels():
+    """定義と異なるラベルを指定した場合にエラーになることのテスト"""
+    counter = Counter("events_total", "イベント数", ("event_type",))
+
+    with pytest.raises(ValueError):
+        counter.inc(kind="entry")
+
+
+def test_metrics_endpoint_reports_route_latency(client):
+    """/metrics にルートごとの処理時間が含まれることのテスト"""
+    client.get("/health")
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/health",status="200"}'
+        in response.text
+    )
+    assert "http_requests_in_flight" in response.text
+
+
+@pytest.mark.asyncio
+async def test_send_push_notification_counts_results(sample_user1):
+    """FCMの送信結果が成功・失敗・削除トークン数として記録されることのテスト"""
+    sample_user1.fcm_tokens = ["valid_token", "stale_token"]
+    service = NotificationService(user_service=MagicMock())
+    service.user_service.get_user_by_uid = AsyncMock(return_value=sample_user1)
+
+    failed = MagicMock(success=False, exception=Exception("Requested entity was not found (Unregistered)"))
+    response = MagicMock(
+        success_count=1, failure_count=1, responses=[MagicMock(success=True), failed]
+    )
+    label = NotificationType.ARRIVAL.value
+    sent_before = NOTIFICATIONS_SENT.value(notification_type=label)
+    failed_before = NOTIFICATIONS_FAILED.value(notification_type=label)
+    pruned_before = FCM_TOKENS_PRUNED.value()
+
+    with patch("firebase_admin.messaging.send_each", return_value=response), patch.object(
+        service, "_remove_invalid_fcm_tokens", new_callable=AsyncMock
+    ):
+        await service.send_push_notification(
+            user_id=sample_user1.uid,
+            title="到着",
+            body="到着しました",
+            notification_type=NotificationType.ARRIVAL,
+            save_to_db=False,
+        )
+
+    assert NOTIFICATIONS_SENT.value(notification_type=label) == sent_before + 1
+    assert NOTIFICATIONS_FAILED.value(notification_type=label) == failed_before + 1
+    assert FCM_TOKENS_PRUNED.value() == pruned_before + 1
@@ -0,0 +1,111 @@
+"""
+通知のまとめ送信のテスト
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.schemas.common import Coordinates
+from app.schemas.notification import NotificationType
+from app.schemas.schedule import LocationScheduleInDB, ScheduleStatus
+from app.services.auto_notification import AutoNotificationService
+from app.services.notification_coalescer import NotificationCoalescer, PendingPush
+from app.services.notifications import NotificationService
+from app.utils.timezone import now_jst
+
+
+def _push(notification_id: str, body: str, notification_type=NotificationType.ARRIVAL):
+    return PendingPush(
+        notification_id=notification_id,
+        title="📍 渋谷駅に到着",
+        body=f"{body}\nここにいるよ → https://www.google.com/maps?q=35.658,139.7016",
+        notification_type=notification_type,
+        data={"map_link": "https://www.google.com/maps?q=35.658,139.7016"},
+    )
+
+
+@pytest.mark.asyncio
+async def test_pushes_within_window_are_merged_per_recipient():
+    """時間枠内の同じ受信者への通知が1回のプッシュ通知にまとめられることのテスト"""
+    notification_service = MagicMock()
+    notification_service.send_push_notification = AsyncMock()
+    coalescer = NotificationCoalescer(notification_service, window_seconds=0.01)
+
+    coalescer.add("u1", _push("n1", "今ね、Aさんが到着したよ"))
+    coalescer.add("u1", _push("n2", "今ね、Bさんが出発したよ", NotificationType.DEPARTURE))
+    coalescer.add("u2", _push("n3", "今ね、Aさんが到着したよ"))
+    await asyncio.sleep(0.05)
+
+    assert notification_service.send_push_notification.call_count == 2
+    calls = {
+        call.kwargs["user_id"]: call.kwargs
+        for call in notification_service.send_push_notification.call_args_list
+    }
+    merged = calls["u1"]
+    assert merged["title"] == "📍 2件の新しい通知"
+    assert merged["body"] == "今ね、Aさんが到着したよ\n今ね、Bさんが出発したよ"
+    assert merged["data"]["notification_ids"] == "n1,n2"
+    assert merged["notification_type"] == NotificationType.DEPARTURE
+    assert merged["save_to_db"] is False
+    assert calls["u2"]["title"] == "📍 渋谷駅に到着"
+
+    # 送信後は新しい時間枠が始まる
+    coalescer.add("u1", _push("n4", "今ね、Cさんが到着したよ"))
+    await coalescer.flush_all()
+    assert notification_service.send_push_notification.call_count == 3
+
+
+@pytest.mark.asyncio
+async def test_auto_notification_records_each_event_before_push(fake_firestore):
+    """まとめ送信が有効でも、通知はイベントごとに即時に保存されることのテスト"""
+    now = now_jst()
+    fake_firestore.seed(
+        "users",
+        {
+            uid: {
+                "uid": uid,
+                "username": uid,
+                "display_name": uid,
+                "email": f"{uid}@example.com",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for uid in ("sender", "friend_1", "friend_2")
+        },
+    )
+    schedule = LocationScheduleInDB(
+        id="schedule_1",
+        user_id="sender",
+        destination_name="渋谷駅",
+        destination_address="東京都渋谷区",
+        destination_coords=Coordinates(lat=35.6580, lng=139.7016),
+        notify_to_user_ids=["friend_1", "friend_2"],
+        start_time=now,
+        end_time=now,
+        status=ScheduleStatus.ACTIVE,
+        created_at=now,
+        updated_at=now,
+    )
+    notification_service = NotificationService()
+    service = AutoNotificationService(
+        notification_service,
+        coalescer=NotificationCoalescer(notification_service, window_seconds=60),
+    )
+
+    with patch.object(
+        notification_service, "send_push_notification", new_callable=AsyncMock
+    ) as send_push:
+        coords = schedule.destination_coords
+        notification_ids = await service.send_arrival_notification(schedule, coords)
+        await service.send_departure_notification(schedule, coords)
+
+        assert len(notification_ids) == 2
+        assert fake_firestore.count("notifications") == 4
+        send_push.assert_not_called()
+
+        await service.coalescer.flush_all()
+
+    assert send_push.call_count == 2
+    assert all(call.kwargs["data"]["coalesced_count"] == 2 for call in send_push.call_args_list)
@@ -0,0 +1,87 @@
+"""
+ポップ検索のタイルキャッシュのテスト
+"""
+
+from datetime import timedelta
+from math import cos, radians, sin
+
+import pygeohash as gh
+import pytest
+
+from app.schemas.pop import Location, PopCategory, PopCreate, PopSearchRequest
+from app.services.counters import ShardedCounterService
+from app.services.pop_tiles import PopTileCache, covering_tiles
+from app.services.pops import PopService
+from app.utils.timezone import now_jst
+
+BASE_LAT = 35.6812
+BASE_LNG = 139.7671
+
+
+def _pop(pop_id: str, latitude: float, longitude: float, minutes: int = 30) -> dict:
+    now = now_jst()
+    return {
+        "pop_id": pop_id,
+        "user_id": "owner",
+        "content": f"内容 {pop_id}",
+        "category": "food",
+        "location": {
+            "latitude": latitude,
+            "longitude": longitude,
+            "geohash": gh.encode(latitude, longitude, precision=7),
+        },
+        "created_at": now - timedelta(minutes=60 - minutes),
+        "expires_at": now + timedelta(minutes=minutes),
+        "duration_minutes": 30,
+        "status": "active",
+    }
+
+
+@pytest.mark.parametrize("radius_km", [0.1, 1.0, 5.0, 50.0])
+def test_covering_tiles_cover_search_circle(radius_km):
+    """検索範囲の円周上の点がすべていずれかのタイルに含まれることのテスト"""
+    tiles = covering_tiles(BASE_LAT, BASE_LNG, radius_km)
+
+    assert 1 <= len(tiles) <= 16
+    for degree in range(0, 360, 10):
+        latitude = BASE_LAT + radius_km / 111.32 * sin(radians(degree))
+        longitude = BASE_LNG + radius_km / (111.32 * cos(radians(BASE_LAT))) * cos(radians(degree))
+        point = gh.encode(latitude, longitude, precision=7)
+        assert any(point.startswith(tile) for tile in tiles)
+
+
+@pytest.mark.asyncio
+async def test_repeated_search_is_served_from_tiles(fake_firestore, firestore_budget):
+    """同じエリアの検索はキャッシュしたタイルから返し、作成したポップの位置のタイルは破棄されることのテスト"""
+    fake_firestore.seed(
+        "pops",
+        {
+            "near": _pop("near", BASE_LAT + 0.001, BASE_LNG),
+            "nearest": _pop("nearest", BASE_LAT, BASE_LNG),
+            "expiring": _pop("expiring", BASE_LAT, BASE_LNG, minutes=0),
+            "far": _pop("far", BASE_LAT + 1.0, BASE_LNG),
+        },
+    )
+    service = PopService(ShardedCounterService(cache_ttl_seconds=60), PopTileCache(ttl_seconds=60))
+    search_request = PopSearchRequest(latitude=BASE_LAT, longitude=BASE_LNG, radius_km=1.0)
+
+    first = await service.search_nearby_pops(search_request)
+    with firestore_budget(queries=0, reads=0):
+        nearby = await service.search_nearby_pops(
+            PopSearchRequest(latitude=BASE_LAT + 0.0001, longitude=BASE_LNG, radius_km=1.0)
+        )
+
+    assert [pop.pop_id for pop in first] == ["nearest", "near"]
+    assert [pop.pop_id for pop in nearby] == ["nearest", "near"]
+
+    created = await service.create_pop(
+        "owner",
+        PopCreate(
+            content="新しいポップ",
+            category=PopCategory.FOOD,
+            location=Location(latitude=BASE_LAT + 0.002, longitude=BASE_LNG),
+        ),
+    )
+    pops = await service.search_nearby_pops(search_request)
+
+    assert created.pop_id in [pop.pop_id for pop in pops]
@@ -0,0 +1,120 @@
+"""
+プロフィール画像のリサイズとアップロードのテスト
+"""
+
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.services import users
+from app.services.users import UserService
+from app.utils.images import resize_profile_image
+from app.utils.timezone import now_jst
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _image_bytes(size=(800, 600), image_format="PNG") -> bytes:
+    output = io.BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(output, format=image_format)
+    return output.getvalue()
+
+
+def test_resize_profile_image_creates_square_webp_variants():
+    """画像が各サイズの正方形のWebPに変換されることのテスト"""
+    variants = resize_profile_image(_image_bytes(), sizes=(64, 256))
+
+    for size, data in variants.items():
+        with Image.open(io.BytesIO(data)) as image:
+            assert image.format == "WEBP"
+            assert image.size == (size, size)
+
+
+def test_resize_profile_image_rejects_invalid_data():
+    """画像として読み込めないデータ・対応していない形式を拒否することのテスト"""
+    with pytest.raises(ValueError):
+        resize_profile_image(b"not an image")
+    with pytest.raises(ValueError):
+        resize_profile_image(_image_bytes(image_format="BMP"))
+
+
+@pytest.mark.asyncio
+async def test_upload_profile_image_stores_variants_and_removes_old(fake_firestore):
+    """各サイズをキャッシュ設定付きでアップロードし、以前の画像を削除することのテスト"""
+    now = now_jst()
+    fake_firestore.seed(
+        "users",
+        {
+            "u1": {
+                "uid": "u1",
+                "username": "user_1",
+                "email": "u1@example.com",
+                "display_name": "ユーザー1",
+                "created_at": now,
+                "updated_at": now,
+            }
+        },
+    )
+    blobs = {}
+
+    def make_blob(name):
+        blob = MagicMock()
+        blob.name = name
+        blob.public_url = f"https://storage.example.com/{name}"
+        blobs[name] = blob
+        return blob
+
+    old_blob = make_blob("profile_images/u1/old.jpg")
+    bucket = MagicMock()
+    bucket.blob.side_effect = make_blob
+    bucket.list_blobs.side_effect = lambda prefix: list(blobs.values())
+
+    with patch.object(users, "get_storage_bucket", return_value=bucket):
+        url = await UserService().upload_profile_image("u1", _image_bytes(), "image/png")
+
+    user = await UserService().get_user_by_uid("u1")
+    assert url == user.profile_image_url
+    assert set(user.profile_image_urls) == {"128", "512"}
+    assert user.thumbnail_url() == user.profile_image_urls["128"]
+    new_blobs = [blob for name, blob in blobs.items() if name.endswith(".webp")]
+    assert len(new_blobs) == 2
+    for blob in new_blobs:
+        assert blob.cache_control == users.PROFILE_IMAGE_CACHE_CONTROL
+        blob.upload_from_string.assert_called_once()
+        blob.delete.assert_not_called()
+    old_blob.delete.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_delete_profile_image_removes_blobs_and_urls(fake_firestore):
+    """プロフィール画像の削除で全サイズの画像とURLが削除されることのテスト"""
+    now = now_jst()
+    fake_firestore.seed(
+        "users",
+        {
+            "u1": {
+                "uid": "u1",
+                "username": "user_1",
+                "email": "u1@example.com",
+                "display_name": "ユーザー1",
+                "profile_image_url": "https://storage.example.com/profile_images/u1/a_512.webp",
+                "profile_image_urls": {"128": "https://storage.example.com/a_128.webp"},
+                "created_at": now,
+                "updated_at": now,
+            }
+        },
+    )
+    blobs = [MagicMock(), MagicMock()]
+    bucket = MagicMock()
+    bucket.list_blobs.return_value = blobs
+
+    with patch.object(users, "get_storage_bucket", return_value=bucket):
+        await UserService().delete_profile_image("u1")
+
+    bucket.list_blobs.assert_called_once_with(prefix="profile_images/u1/")
+    for blob in blobs:
+        blob.delete.assert_called_once()
+    user = await UserService().get_user_by_uid("u1")
+    assert user.profile_image_url is None
+    assert user.profile_image_urls == {}
@@ -0,0 +1,59 @@
+"""
+サンプリングプロファイラーのテスト
+"""
+
+import time
+from unittest.mock import patch
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.core.profiling import ProfilingMiddleware
+
+
+def _blocking_work():
+    time.sleep(0.1)
+
+
+def _profiled_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: str):
+        _blocking_work()
+        return {"item_id": item_id}
+
+    return app
+
+
+def test_sampled_request_writes_collapsed_stacks_per_route(tmp_path):
+    """サンプリング対象のリクエストのスタックがルートごとのディレクトリに書き出されることのテスト"""
+    with patch.object(settings, "PROFILING_ENABLED", True), patch.object(
+        settings, "PROFILING_SAMPLE_RATE", 1.0
+    ), patch.object(settings, "PROFILING_INTERVAL_MS", 1), patch.object(
+        settings, "PROFILING_OUTPUT_DIR", str(tmp_path)
+    ):
+        response = TestClient(_profiled_app()).get("/items/1")
+
+    assert response.status_code == 200
+    profiles = list((tmp_path / "GET_items_item_id").glob("*.collapsed"))
+    assert len(profiles) == 1
+    lines = profiles[0].read_text(encoding="utf-8").splitlines()
+    assert any("read_item" in line and "_blocking_work" in line for line in lines)
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+
+
+def test_fast_request_below_threshold_is_not_written(tmp_path):
+    """サンプリング対象外で閾値未満のリクエストは書き出されないことのテスト"""
+    with patch.object(settings, "PROFILING_ENABLED", True), patch.object(
+        settings, "PROFILING_SAMPLE_RATE", 0.0
+    ), patch.object(settings, "PROFILING_SLOW_THRESHOLD_MS", 60_000), patch.object(
+        settings, "PROFILING_INTERVAL_MS", 1
+    ), patch.object(settings, "PROFILING_OUTPUT_DIR", str(tmp_path)):
+        response = TestClient(_profiled_app()).get("/items/1")
+
+    assert response.status_code == 200
+    assert list(tmp_path.iterdir()) == []
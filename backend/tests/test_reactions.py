@@ -0,0 +1,110 @@
+"""
+リアクションサービスのテスト
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+
+from app.schemas.reaction import ReactionCreate
+from app.services.counters import ShardedCounterService
+from app.services.reactions import ReactionService
+from app.utils.timezone import now_jst
+
+
+def _seed(fake_firestore) -> None:
+    now = now_jst()
+    fake_firestore.seed(
+        "users",
+        {
+            uid: {"uid": uid, "display_name": f"表示名 {uid}", "profile_image_url": None}
+            for uid in ("owner", "sender_1", "sender_2", "sender_3")
+        },
+    )
+    fake_firestore.seed(
+        "pops",
+        {
+            pop_id: {"pop_id": pop_id, "user_id": "owner", "content": f"内容 {pop_id}", "category": "food"}
+            for pop_id in ("pop_1", "pop_2")
+        },
+    )
+    fake_firestore.seed(
+        "reactions",
+        {
+            f"r{index}": {
+                "reaction_id": f"r{index}",
+                "pop_id": "pop_1" if index % 2 else "pop_2",
+                "from_user_id": f"sender_{index}",
+                "to_user_id": "owner",
+                "created_at": now - timedelta(minutes=index),
+                "status": "pending",
+            }
+            for index in (1, 2, 3)
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_received_reactions_fetch_users_and_pops_in_one_batch(fake_firestore, firestore_budget):
+    """受信一覧でユーザーとポップを1回の一括取得でまとめて取得することのテスト"""
+    _seed(fake_firestore)
+    service = ReactionService()
+
+    with patch.object(fake_firestore, "get_all", wraps=fake_firestore.get_all) as get_all:
+        with firestore_budget(queries=1):
+            reactions = await service.get_received_reactions("owner")
+
+    assert get_all.call_count == 1
+    # 送信者3人 + 受信者1人 + ポップ2件
+    assert len(get_all.call_args.args[0]) == 6
+    assert [reaction.reaction_id for reaction in reactions] == ["r1", "r2", "r3"]
+    assert reactions[1].from_user_display_name == "表示名 sender_2"
+    assert reactions[1].to_user_display_name == "表示名 owner"
+    assert reactions[1].pop_content == "内容 pop_2"
+
+
+@pytest.mark.asyncio
+async def test_pop_reactions_use_sender_stored_at_write_time(fake_firestore):
+    """ポップごとの一覧では送信時に保存した送信者情報を使うことのテスト"""
+    _seed(fake_firestore)
+    service = ReactionService()
+    created = await service.create_reaction("sender_1", ReactionCreate(pop_id="pop_2"))
+    fake_firestore.collection("users").document("sender_1").update({"display_name": "変更後"})
+
+    with patch.object(fake_firestore, "get_all", wraps=fake_firestore.get_all) as get_all:
+        reactions = await service.get_pop_reactions("pop_2")
+
+    assert created.from_user_display_name == "表示名 sender_1"
+    by_id = {reaction.reaction_id: reaction for reaction in reactions}
+    assert by_id[created.reaction_id].from_user_display_name == "表示名 sender_1"
+    # 送信者情報が保存されていないリアクション（r2）の送信者のみ取得する
+    fetched = {ref.path for ref in get_all.call_args.args[0]}
+    assert fetched == {"users/sender_2", "users/owner", "pops/pop_2"}
+
+
+@pytest.mark.asyncio
+async def test_create_reaction_dedups_by_deterministic_id(fake_firestore, firestore_budget):
+    """送信者とポップの組で一意なIDにより、クエリなしで重複を検出することのテスト"""
+    _seed(fake_firestore)
+    service = ReactionService(ShardedCounterService(cache_ttl_seconds=0))
+    pop_ref = fake_firestore.collection("pops").document("pop_1")
+
+    with patch.object(fake_firestore, "get_all", wraps=fake_firestore.get_all) as get_all:
+        with firestore_budget(queries=0):
+            created = await service.create_reaction("sender_2", ReactionCreate(pop_id="pop_1"))
+
+    # トランザクション内の読み取り1回 + 受信者とポップの一括取得1回
+    assert get_all.call_count == 2
+    assert created.reaction_id == "pop_1_sender_2"
+    assert created.to_user_display_name == "表示名 owner"
+    assert created.pop_content == "内容 pop_1"
+
+    with pytest.raises(ValueError, match="既に"):
+        await service.create_reaction("sender_2", ReactionCreate(pop_id="pop_1"))
+    assert service.counter_service.get_count(pop_ref, "reaction_count") == 1
+
+    # キャンセル後は送り直せる
+    await service.cancel_reaction(created.reaction_id, "sender_2")
+    await service.create_reaction("sender_2", ReactionCreate(pop_id="pop_1"))
+    assert service.counter_service.get_count(pop_ref, "reaction_count") == 1
@@ -0,0 +1,71 @@
+"""
+スケジュールAPIのテスト
+"""
+
+from datetime import timedelta
+
+from app.utils.timezone import now_jst
+
+
+def _seed_schedules_and_users(fake_firestore, owner_uid: str, count: int) -> None:
+    now = now_jst()
+    fake_firestore.seed(
+        "schedules",
+        {
+            f"s{index}": {
+                "id": f"s{index}",
+                "user_id": owner_uid,
+                "destination_name": f"目的地{index}",
+                "destination_address": "東京都千代田区",
+                "destination_coords": {"lat": 35.6812, "lng": 139.7671},
+                "notify_to_user_ids": ["friend_1", "friend_2", "deleted_user"],
+                "start_time": now + timedelta(hours=index),
+                "end_time": now + timedelta(hours=index + 2),
+                "status": "active",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for index in range(count)
+        },
+    )
+    fake_firestore.seed(
+        "users",
+        {
+            uid: {
+                "uid": uid,
+                "username": uid,
+                "email": f"{uid}@example.com",
+                "display_name": f"表示名 {uid}",
+                "created_at": now,
+                "updated_at": now,
+            }
+            for uid in ("friend_1", "friend_2")
+        },
+    )
+
+
+def test_get_schedules_fetches_recipients_once(
+    client, fake_services, fake_firestore, firestore_budget, sample_user1
+):
+    """一覧取得で通知先ユーザーをスケジュール件数によらず1回の一括取得で取得することのテスト"""
+    _seed_schedules_and_users(fake_firestore, sample_user1.uid, count=5)
+
+    # スケジュールのクエリ1回 + 通知先3人分の一括取得
+    with firestore_budget(reads=8, queries=1):
+        response = client.get("/api/v1/schedules")
+
+    assert response.status_code == 200
+    schedules = response.json()["schedules"]
+    assert len(schedules) == 5
+    for schedule in schedules:
+        assert [user["user_id"] for user in schedule["notify_to_users"]] == ["friend_1", "friend_2"]
+
+
+def test_get_schedule_uses_same_enrichment(client, fake_services, fake_firestore, sample_user1):
+    """スケジュール詳細でも通知先ユーザー情報が追加されることのテスト"""
+    _seed_schedules_and_users(fake_firestore, sample_user1.uid, count=1)
+
+    response = client.get("/api/v1/schedules/s0")
+
+    assert response.status_code == 200
+    assert response.json()["notify_to_users"][1]["display_name"] == "表示名 friend_2"
@@ -0,0 +1,29 @@
+"""
+起動時間の計測のテスト
+"""
+
+from app.core.startup import StartupMetrics
+
+
+def test_first_request_is_recorded_once():
+    """最初のリクエストまでの時間が1度だけ記録されることのテスト"""
+    metrics = StartupMetrics()
+
+    metrics.mark_imports_done()
+    metrics.mark_first_request()
+    first = metrics.first_request_seconds
+    metrics.mark_first_request()
+
+    assert metrics.import_seconds is not None
+    assert metrics.first_request_seconds == first
+    assert metrics.as_dict()["firestore_prewarm_seconds"] is None
+
+
+def test_startup_health_endpoint(client):
+    """起動時間の計測結果を取得できることのテスト"""
+    response = client.get("/health/startup")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["import_seconds"] is not None
+    assert data["first_request_seconds"] is not None
@@ -0,0 +1,56 @@
+"""
+階層型タイマーホイールのテスト
+"""
+
+from app.utils.timer_wheel import HierarchicalTimerWheel
+
+
+def test_advance_returns_due_keys_in_order():
+    """期限を迎えたキーが期限順に取り出されることのテスト"""
+    wheel = HierarchicalTimerWheel(start_timestamp=1000)
+    wheel.add("b", 1005)
+    wheel.add("a", 1003)
+    wheel.add("c", 1010)
+
+    assert wheel.advance(1002) == []
+    assert wheel.advance(1005) == ["a", "b"]
+    assert "c" in wheel
+    assert len(wheel) == 1
+    assert wheel.advance(1010) == ["c"]
+    assert len(wheel) == 0
+
+
+def test_cascade_from_upper_levels():
+    """分・時間の階層に置かれたタイマーが正確な秒で取り出されることのテスト"""
+    wheel = HierarchicalTimerWheel(start_timestamp=0)
+    wheel.add("minutes", 125)
+    wheel.add("hours", 3 * 3600 + 7)
+
+    assert wheel.advance(124) == []
+    assert wheel.advance(125) == ["minutes"]
+    assert wheel.advance(3 * 3600 + 6) == []
+    assert wheel.advance(3 * 3600 + 7) == ["hours"]
+
+
+def test_cancel_and_replace():
+    """取り消し・再登録のテスト"""
+    wheel = HierarchicalTimerWheel(start_timestamp=0)
+    wheel.add("a", 30)
+    wheel.add("a", 90)  # 置き換え
+    wheel.add("b", 40)
+
+    assert wheel.cancel("b") is True
+    assert wheel.cancel("b") is False
+    assert wheel.next_due_timestamp() == 90
+    assert wheel.advance(60) == []
+    assert wheel.advance(90) == ["a"]
+
+
+def test_past_and_out_of_range():
+    """過去の期限は即時、保持範囲外の期限は追加されないことのテスト"""
+    wheel = HierarchicalTimerWheel(start_timestamp=100)
+
+    assert wheel.add("past", 50) is True
+    assert wheel.add("far", 100 + wheel.horizon_seconds) is False
+    assert wheel.advance(100) == ["past"]
+    assert "far" not in wheel
@@ -0,0 +1,60 @@
+"""
+検証なしのモデル生成（Firestoreからの読み込み用）のテスト
+"""
+
+from datetime import datetime, timezone
+
+from app.schemas.common import Coordinates
+from app.schemas.schedule import LocationScheduleInDB, ScheduleStatus
+from app.schemas.trusted import construct_trusted
+from app.schemas.user import Address, UserInDB, user_from_firestore
+
+
+def test_construct_trusted_matches_validated_model():
+    """ネストしたモデル・Enum・デフォルト値が検証時と同じになることのテスト"""
+    now = datetime(2025, 1, 15, 5, 0, tzinfo=timezone.utc)
+    data = {
+        "id": "s1",
+        "user_id": "u1",
+        "destination_name": "渋谷駅",
+        "destination_address": "東京都渋谷区",
+        "destination_coords": {"lat": 35.658, "lng": 139.7016},
+        "notify_to_user_ids": ["u2"],
+        "start_time": now,
+        "end_time": now,
+        "status": "arrived",
+        "arrived_at": now,
+        "created_at": now,
+        "updated_at": now,
+        "unknown_field": "ignored",
+    }
+
+    schedule = construct_trusted(LocationScheduleInDB, data, id="doc_id")
+
+    assert schedule.status is ScheduleStatus.ARRIVED
+    assert isinstance(schedule.destination_coords, Coordinates)
+    assert schedule.model_dump() == LocationScheduleInDB(**{**data, "id": "doc_id"}).model_dump()
+    assert data["id"] == "s1"
+
+
+def test_user_from_firestore_skips_validation_and_converts_timestamps():
+    """ユーザーのネストしたモデルが変換され、日時がnaiveなdatetimeになることのテスト"""
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    data = {
+        "uid": "u1",
+        "username": "user_1",
+        "email": "user1@example.com",
+        "display_name": "ユーザー1",
+        "home_address": {"latitude": 35.6812, "longitude": 139.7671},
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+    user = user_from_firestore(data)
+
+    assert isinstance(user, UserInDB)
+    assert isinstance(user.home_address, Address)
+    assert user.created_at == datetime.fromtimestamp(created_at.timestamp())
+    assert user.created_at.tzinfo is None
+    assert user.fcm_tokens == []
+    assert data["created_at"] is created_at